@@ -26,7 +26,10 @@ from .config import get_database_connection  # Establishes a connection to the M
 from .services import (
     create_incident,        # Creates a new incident record in the database.
     update_incident_status, # Updates the status of an existing incident.
-    analyze_incident        # Analyzes an incident using AI-driven workflows to provide recommendations.
+    analyze_incident,       # Analyzes an incident using AI-driven workflows to provide recommendations.
+    next_triage_incident,   # Hands out the highest-priority unassigned incident to an analyst.
+    get_indicator_incidents,  # Pivots from an indicator of compromise to the incidents that mention it.
+    lookup_indicators       # Looks up many indicators of compromise in the reverse index.
 )
 # Requirement Addressed: Incident Response Automation
 # Location: Technical Specification/4.1 Incident Response Automation
@@ -64,5 +67,8 @@ __all__ = [
     'create_incident',
     'update_incident_status',
     'analyze_incident',
+    'next_triage_incident',
+    'get_indicator_incidents',
+    'lookup_indicators',
     'register_routes'
 ]
\ No newline at end of file
@@ -0,0 +1,260 @@
+"""
+Content-addressed storage for incident evidence (pcaps, memory dumps, log bundles).
+
+Uploads are streamed to a temporary file in fixed-size chunks while being hashed, so an artifact
+is never buffered in memory. The finished file is moved to a path derived from its SHA-256 digest,
+which stores identical evidence attached to several incidents exactly once. Downloads are served
+from memory-mapped files so HTTP range requests on multi-gigabyte dumps only touch the pages read.
+
+Requirements Addressed:
+- Incident Data Management (Technical Specification/4.5 Comprehensive Case Management)
+  - TR-CM-005-1: Automatically log incident details, including AI-generated insights and manual actions.
+  - TR-CM-005-3: Provide search and retrieval capabilities for historical incident data.
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+from typing import BinaryIO, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+# Artifacts are addressed by lowercase hex SHA-256 digests only; anything else is rejected
+# before it can reach the filesystem.
+_DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+_RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Characters that cannot appear in the quoted-string fallback of a Content-Disposition filename.
+_UNSAFE_FILENAME_CHARACTERS = re.compile(r'[^\x20-\x7e]|["\\]')
+
+
+class ArtifactStore:
+    """
+    Stores artifacts on disk under `<root>/objects/<aa>/<bb>/<sha256>`.
+
+    Requirements Addressed:
+    - Incident Data Management (Technical Specification/4.5 Comprehensive Case Management)
+      - TR-CM-005-1: Automatically log incident details, including AI-generated insights and manual actions.
+    """
+
+    def __init__(self, root: str, chunk_size: int = 1024 * 1024):
+        """
+        Initializes the store, creating its object and temporary directories if needed.
+
+        Parameters:
+            root (str): Base directory of the artifact store.
+            chunk_size (int): Number of bytes read from upload streams and yielded per download chunk.
+        """
+        self.root = root
+        self.chunk_size = chunk_size
+        self._objects_dir = os.path.join(root, 'objects')
+        # Temporary files live on the same filesystem as the objects so the final move is atomic.
+        self._tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self._objects_dir, exist_ok=True)
+        os.makedirs(self._tmp_dir, exist_ok=True)
+
+    def path_for(self, digest: str) -> str:
+        """
+        Returns the storage path for a digest, rejecting anything that is not a SHA-256 hex digest.
+        """
+        if not _DIGEST_PATTERN.match(digest or ''):
+            raise ValueError(f"Invalid artifact digest '{digest}'.")
+        return os.path.join(self._objects_dir, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest: str) -> bool:
+        """
+        Returns True if an artifact with the given digest is stored.
+        """
+        return os.path.isfile(self.path_for(digest))
+
+    def size(self, digest: str) -> int:
+        """
+        Returns the size in bytes of a stored artifact.
+        """
+        return os.path.getsize(self.path_for(digest))
+
+    def open_upload(self, max_bytes: Optional[int] = None) -> 'ArtifactUpload':
+        """
+        Starts an upload written chunk by chunk, for callers that receive the body incrementally
+        (e.g. an ASGI request stream).
+
+        Parameters:
+            max_bytes (int, optional): Upload size limit; exceeding it aborts the upload.
+        """
+        return ArtifactUpload(self, max_bytes)
+
+    def store_stream(self, stream: BinaryIO, max_bytes: Optional[int] = None) -> Tuple[str, int, bool]:
+        """
+        Streams an upload to disk while hashing it and stores it under its content address.
+
+        Parameters:
+            stream (BinaryIO): Readable binary stream of the upload body.
+            max_bytes (int, optional): Upload size limit; exceeding it aborts the upload.
+
+        Returns:
+            Tuple[str, int, bool]: The SHA-256 digest, the size in bytes and whether an identical
+            artifact was already stored (in which case the upload is discarded).
+        """
+        upload = self.open_upload(max_bytes)
+        try:
+            while True:
+                chunk = stream.read(self.chunk_size)
+                if not chunk:
+                    break
+                upload.write(chunk)
+            return upload.commit()
+        except BaseException:
+            upload.abort()
+            raise
+
+    def iter_range(self, digest: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Yields the bytes of an artifact between start and end (inclusive) from a memory map.
+
+        Parameters:
+            digest (str): SHA-256 digest of the artifact.
+            start (int): Offset of the first byte to return.
+            end (int, optional): Offset of the last byte to return; defaults to the end of the file.
+        """
+        path = self.path_for(digest)
+        with open(path, 'rb') as artifact_file:
+            size = os.fstat(artifact_file.fileno()).st_size
+            if size == 0:
+                return
+            end = size - 1 if end is None else min(end, size - 1)
+            with mmap.mmap(artifact_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                offset = start
+                while offset <= end:
+                    stop = min(offset + self.chunk_size, end + 1)
+                    yield mapped[offset:stop]
+                    offset = stop
+
+
+class ArtifactUpload:
+    """
+    An upload in progress: chunks are hashed and appended to a temporary file in the store.
+    """
+
+    def __init__(self, store: ArtifactStore, max_bytes: Optional[int] = None):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hasher = hashlib.sha256()
+        fd, self._tmp_path = tempfile.mkstemp(dir=store._tmp_dir, prefix='upload-')
+        self._file = os.fdopen(fd, 'wb')
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Appends a chunk of the upload.
+
+        Raises:
+            ValueError: If the upload exceeds its size limit.
+        """
+        self.size += len(chunk)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise ValueError(f"Artifact exceeds the maximum upload size of {self.max_bytes} bytes.")
+        self._hasher.update(chunk)
+        self._file.write(chunk)
+
+    def commit(self) -> Tuple[str, int, bool]:
+        """
+        Flushes the upload to disk and stores it under its content address.
+
+        Steps:
+        - Flush the temporary file to disk.
+        - Discard it if the digest is already stored, otherwise move it into place atomically.
+
+        Returns:
+            Tuple[str, int, bool]: The SHA-256 digest, the size in bytes and whether an identical
+            artifact was already stored.
+        """
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+            digest = self._hasher.hexdigest()
+            final_path = self.store.path_for(digest)
+            if os.path.exists(final_path):
+                os.unlink(self._tmp_path)
+                return digest, self.size, True
+
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(self._tmp_path, final_path)
+            return digest, self.size, False
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self) -> None:
+        """
+        Discards the upload.
+        """
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.unlink(self._tmp_path)
+
+
+# Process-wide artifact store, created on first use so importing the service does not touch the filesystem.
+_artifact_store = None
+
+
+def get_artifact_store(root: str, chunk_size: int) -> ArtifactStore:
+    """
+    Returns the process-wide artifact store, creating it under `root` on first use. Shared by the
+    Flask and ASGI services.
+    """
+    global _artifact_store
+    if _artifact_store is None:
+        _artifact_store = ArtifactStore(root, chunk_size)
+    return _artifact_store
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single-range HTTP `Range` header into inclusive byte offsets.
+
+    Parameters:
+        range_header (str, optional): The raw header value, e.g. 'bytes=0-1023' or 'bytes=-500'.
+        size (int): Size of the artifact in bytes.
+
+    Returns:
+        Tuple[int, int]: The first and last byte offsets, or None if the whole artifact is requested
+        (no header, or a multi-range/unsupported unit which is answered with the full body).
+
+    Raises:
+        ValueError: If the range cannot be satisfied for an artifact of this size.
+    """
+    if not range_header:
+        return None
+    match = _RANGE_PATTERN.match(range_header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("Requested range not satisfiable.")
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("Requested range not satisfiable.")
+    return start, min(end, size - 1)
+
+
+def content_disposition(filename: str) -> str:
+    """
+    Builds an attachment Content-Disposition header for a user-supplied file name (RFC 6266).
+
+    The quoted `filename` parameter carries an ASCII fallback with quotes, backslashes and control
+    or non-ASCII characters replaced, so the name cannot break out of the header; the exact name
+    is sent percent-encoded in `filename*`.
+    """
+    fallback = _UNSAFE_FILENAME_CHARACTERS.sub('_', filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
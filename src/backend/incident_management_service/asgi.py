@@ -0,0 +1,437 @@
+"""
+ASGI entry point for the Incident Management Service.
+
+Alternative to the Flask application in app.py that exposes the same incident routes on an
+asyncio event loop with the non-blocking Motor driver, so one process can hold thousands of
+concurrent in-flight requests (SSE streams, long polls, slow analysis) without a thread per request.
+
+Run with:
+    uvicorn src.backend.incident_management_service.asgi:app --host 0.0.0.0 --port 5000
+
+Requirements Addressed:
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import json
+from contextlib import asynccontextmanager
+
+# External dependencies
+from starlette.applications import Starlette  # Starlette version 0.14.2 provides the ASGI web framework
+from starlette.requests import Request  # Starlette version 0.14.2
+from starlette.responses import JSONResponse, Response, StreamingResponse  # Starlette version 0.14.2
+from starlette.routing import Route  # Starlette version 0.14.2
+
+# Internal dependencies
+from .config import (
+    get_async_database_connection,  # Establishes a non-blocking connection to the MongoDB database
+    ARTIFACT_STORAGE_PATH,
+    ARTIFACT_CHUNK_SIZE,
+    INCIDENT_LIST_DEFAULT_LIMIT
+)
+from .artifacts import content_disposition, get_artifact_store, parse_range_header  # Content-addressed evidence storage and download headers
+from . import async_services  # Asyncio-native incident services
+from .http_cache import (  # Version-based ETags, the per-incident ETag cache and response compression.
+    COMPRESSION_MIN_BYTES,
+    StreamCompressor,
+    choose_encoding,
+    compress,
+    etag_matches,
+    incident_cache,
+    make_etag,
+    make_list_etag
+)
+
+
+def _serialize(payload) -> bytes:
+    """
+    Serializes a response payload; ObjectIds and datetimes are rendered as strings.
+    """
+    return json.dumps(payload, default=str).encode('utf-8')
+
+
+def _not_modified(etag: str) -> Response:
+    """
+    Builds a 304 Not Modified response for the given ETag.
+    """
+    return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+
+def _json_response(request: Request, body: bytes, etag: str) -> Response:
+    """
+    Builds a JSON response from a serialized body, compressing it if large and accepted by the client.
+    """
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    encoding = choose_encoding(request.headers.get('accept-encoding')) if len(body) >= COMPRESSION_MIN_BYTES else None
+    if encoding:
+        body = compress(body, encoding)
+        headers['Content-Encoding'] = encoding
+    return Response(body, media_type='application/json', headers=headers)
+
+
+async def _cached_response(request: Request, incident_id: str, kind: str, load_version, build_payload):
+    """
+    Answers a conditional GET for an incident representation from the ETag cache when possible.
+
+    `load_version` and `build_payload` are coroutine functions; `build_payload` is only awaited when
+    the cache is stale. Returns None if the incident does not exist.
+    """
+    if_none_match = request.headers.get('if-none-match')
+
+    # A matching cached ETag is answered without touching the database or serializing anything.
+    cached = incident_cache.get(incident_id, kind)
+    if cached and etag_matches(if_none_match, cached[0]):
+        return _not_modified(cached[0])
+
+    version = await load_version()
+    if version is None:
+        return None
+    etag = make_etag(kind, version)
+    if cached and cached[0] == etag:
+        body = cached[1]
+    else:
+        body = _serialize(await build_payload())
+        incident_cache.put(incident_id, kind, etag, body)
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    return _json_response(request, body, etag)
+
+
+async def create_incident(request: Request) -> JSONResponse:
+    """
+    Endpoint to create a new security incident.
+
+    Requirements Addressed:
+    - Supports automated logging of incident details into the case management system.
+      (Requirement ID: TR-IR-001-2, Technical Specification/4.1.4 Technical Requirements)
+    """
+    try:
+        incident_data = await request.json()
+    except ValueError:
+        incident_data = None
+    if not incident_data:
+        return JSONResponse({'status': 'error', 'message': 'No incident data provided.'}, status_code=400)
+
+    try:
+        incident = await async_services.create_incident(request.app.state.db, incident_data)
+        return JSONResponse({'status': 'success', 'incident': incident}, status_code=201)
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=400)
+
+
+async def update_incident_status(request: Request) -> JSONResponse:
+    """
+    Endpoint to update the status of an existing incident.
+
+    Requirements Addressed:
+    - Enables real-time analysis and updates of incidents.
+      (Requirement ID: TR-IR-001-3, Technical Specification/4.1.4 Technical Requirements)
+    """
+    try:
+        status_data = await request.json()
+    except ValueError:
+        status_data = None
+    if not status_data or 'status' not in status_data:
+        return JSONResponse({'status': 'error', 'message': 'Status data must be provided.'}, status_code=400)
+
+    try:
+        updated = await async_services.update_incident_status(
+            request.app.state.db, request.path_params['incident_id'], status_data['status']
+        )
+        if not updated:
+            return JSONResponse({'status': 'error', 'message': 'Incident not found.'}, status_code=404)
+        return JSONResponse({'status': 'success', 'message': 'Incident status updated successfully.'}, status_code=200)
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=400)
+
+
+async def analyze_incident(request: Request) -> Response:
+    """
+    Endpoint to analyze an incident and provide AI-driven recommendations.
+
+    Recommendations are cached per incident version, so polling an unchanged incident neither
+    re-runs the model nor re-serializes them; a failed analysis is answered with an error and
+    never cached.
+
+    Requirements Addressed:
+    - Provides AI-powered assistance for incident analysis by generating actionable recommendations.
+      (Requirement ID: TR-AI-002-1, Technical Specification/4.2.4 Technical Requirements)
+    """
+    db = request.app.state.db
+    incident_id = request.path_params['incident_id']
+
+    async def build_payload():
+        return {'status': 'success',
+                'recommendations': await async_services.generate_incident_recommendations(db, incident_id)}
+
+    try:
+        response = await _cached_response(
+            request, incident_id, 'recommendations',
+            lambda: async_services.get_incident_version(db, incident_id), build_payload
+        )
+        if response is None:
+            return JSONResponse({'status': 'success', 'recommendations': []}, status_code=200)
+        return response
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=400)
+
+
+async def get_indicator_incidents(request: Request) -> Response:
+    """
+    Endpoint to pivot from an indicator of compromise to the incidents that mention it.
+
+    Requirements Addressed:
+    - Provides search and retrieval capabilities for historical incident data.
+      (Requirement ID: TR-CM-005-3, Technical Specification/4.5 Comprehensive Case Management)
+    """
+    value = request.path_params['value']
+    try:
+        matches = await async_services.get_indicator_incidents(request.app.state.db, value)
+        if not matches:
+            return JSONResponse({'status': 'error', 'message': 'Indicator not found.'}, status_code=404)
+        # Index entries carry first/last seen datetimes, which _serialize renders as strings.
+        return Response(_serialize({'status': 'success', 'indicator': value, 'matches': matches}),
+                        media_type='application/json')
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=400)
+
+
+async def lookup_indicators(request: Request) -> Response:
+    """
+    Endpoint to look up many indicators of compromise in one call.
+
+    Requirements Addressed:
+    - Provides search and retrieval capabilities for historical incident data.
+      (Requirement ID: TR-CM-005-3, Technical Specification/4.5 Comprehensive Case Management)
+    """
+    try:
+        lookup_data = await request.json()
+    except ValueError:
+        lookup_data = None
+    if not lookup_data or 'indicators' not in lookup_data:
+        return JSONResponse({'status': 'error', 'message': 'Indicators must be provided.'}, status_code=400)
+
+    try:
+        results = await async_services.lookup_indicators(request.app.state.db, lookup_data['indicators'])
+        return Response(_serialize({'status': 'success', 'results': results}), media_type='application/json')
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=400)
+
+
+async def next_triage_incident(request: Request) -> JSONResponse:
+    """
+    Endpoint to hand out the highest-priority unassigned incident to an analyst.
+
+    Requirements Addressed:
+    - Ensures scalability to handle peak incident loads without degradation.
+      (Requirement ID: TR-IR-001-5, Technical Specification/4.1.4 Technical Requirements)
+    """
+    analyst_id = request.query_params.get('analyst_id')
+    if not analyst_id:
+        return JSONResponse({'status': 'error', 'message': 'analyst_id query parameter must be provided.'}, status_code=400)
+
+    try:
+        incident = await async_services.next_triage_incident(request.app.state.db, analyst_id)
+        if incident is None:
+            return JSONResponse({'status': 'error', 'message': 'No unassigned incidents in the triage queue.'}, status_code=404)
+        return JSONResponse({'status': 'success', 'incident': incident}, status_code=200)
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=400)
+
+
+async def get_incident(request: Request) -> Response:
+    """
+    Endpoint to retrieve a single incident, answering unchanged incidents with 304 Not Modified.
+
+    Requirements Addressed:
+    - Provides search and retrieval capabilities for historical incident data.
+      (Requirement ID: TR-CM-005-3, Technical Specification/4.5 Comprehensive Case Management)
+    """
+    incident_id = request.path_params['incident_id']
+    loaded = {}
+
+    async def load_version():
+        loaded['incident'] = await async_services.get_incident(request.app.state.db, incident_id)
+        return loaded['incident'].get('version', 0) if loaded['incident'] else None
+
+    async def build_payload():
+        return {'status': 'success', 'incident': loaded['incident']}
+
+    try:
+        response = await _cached_response(request, incident_id, 'incident', load_version, build_payload)
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=400)
+    if response is None:
+        return JSONResponse({'status': 'error', 'message': 'Incident not found.'}, status_code=404)
+    return response
+
+
+async def list_incidents(request: Request) -> Response:
+    """
+    Endpoint to list incidents page by page, with ETags and compression for polling consoles.
+
+    Requirements Addressed:
+    - Provides search and retrieval capabilities for historical incident data.
+      (Requirement ID: TR-CM-005-3, Technical Specification/4.5 Comprehensive Case Management)
+    """
+    try:
+        incidents = await async_services.list_incidents(
+            request.app.state.db,
+            status=request.query_params.get('status'),
+            limit=int(request.query_params.get('limit', INCIDENT_LIST_DEFAULT_LIMIT)),
+            offset=int(request.query_params.get('offset', 0))
+        )
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=400)
+
+    # An unchanged page is answered with 304 before anything is serialized.
+    etag = make_list_etag('incidents', incidents)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return _not_modified(etag)
+
+    body = _serialize({'status': 'success', 'incidents': incidents})
+    return _json_response(request, body, etag)
+
+
+async def export_incidents(request: Request) -> StreamingResponse:
+    """
+    Endpoint to export incidents as a streamed, optionally compressed, NDJSON document.
+
+    Requirements Addressed:
+    - Provides search and retrieval capabilities for historical incident data.
+      (Requirement ID: TR-CM-005-3, Technical Specification/4.5 Comprehensive Case Management)
+    """
+    encoding = choose_encoding(request.headers.get('accept-encoding'))
+    incidents = async_services.export_incidents(request.app.state.db, request.query_params.get('status'))
+
+    async def body():
+        compressor = StreamCompressor(encoding) if encoding else None
+        async for incident in incidents:
+            chunk = _serialize(incident) + b'\n'
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        if compressor:
+            yield compressor.finish()
+
+    headers = {'Vary': 'Accept-Encoding', 'Content-Disposition': 'attachment; filename="incidents.ndjson"'}
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return StreamingResponse(body(), media_type='application/x-ndjson', headers=headers)
+
+
+async def upload_artifact(request: Request) -> JSONResponse:
+    """
+    Endpoint to stream an evidence artifact (pcap, memory dump, log bundle) onto an incident.
+
+    Requirements Addressed:
+    - Automatically logs incident details, including attached evidence.
+      (Requirement ID: TR-CM-005-1, Technical Specification/4.5 Comprehensive Case Management)
+    """
+    filename = request.query_params.get('filename') or request.headers.get('x-artifact-filename')
+    if not filename:
+        return JSONResponse({'status': 'error', 'message': 'Artifact filename must be provided.'}, status_code=400)
+    content_type = request.headers.get('content-type', '').split(';')[0].strip()
+
+    try:
+        artifact = await async_services.attach_artifact(
+            request.app.state.db, request.path_params['incident_id'], request.stream(), filename, content_type
+        )
+        if artifact is None:
+            return JSONResponse({'status': 'error', 'message': 'Incident not found.'}, status_code=404)
+        return JSONResponse({'status': 'success', 'artifact': artifact}, status_code=201)
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=400)
+
+
+async def download_artifact(request: Request):
+    """
+    Endpoint to download an incident artifact, supporting HTTP range requests.
+
+    Requirements Addressed:
+    - Provides retrieval capabilities for historical incident data.
+      (Requirement ID: TR-CM-005-3, Technical Specification/4.5 Comprehensive Case Management)
+    """
+    sha256 = request.path_params['sha256']
+    try:
+        artifact = await async_services.get_incident_artifact(
+            request.app.state.db, request.path_params['incident_id'], sha256
+        )
+        if artifact is None:
+            return JSONResponse({'status': 'error', 'message': 'Artifact not found.'}, status_code=404)
+
+        store = get_artifact_store(ARTIFACT_STORAGE_PATH, ARTIFACT_CHUNK_SIZE)
+        size = store.size(sha256)
+        try:
+            byte_range = parse_range_header(request.headers.get('range'), size)
+        except ValueError as e:
+            return JSONResponse({'status': 'error', 'message': str(e)}, status_code=416,
+                                headers={'Content-Range': f'bytes */{size}'})
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, status_code=400)
+
+    # The memory-mapped reads are blocking, so Starlette iterates them in its thread pool.
+    start, end = byte_range if byte_range else (0, size - 1)
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'Content-Length': str(max(end - start + 1, 0)),
+        'Content-Disposition': content_disposition(artifact.get('filename', sha256))
+    }
+    if byte_range:
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return StreamingResponse(
+        store.iter_range(sha256, start, end),
+        status_code=206 if byte_range else 200,
+        media_type=artifact.get('content_type', 'application/octet-stream'),
+        headers=headers
+    )
+
+
+def create_asgi_app() -> Starlette:
+    """
+    Initializes and configures the ASGI application for the incident management service.
+
+    Requirements Addressed:
+    - Incident Response Automation
+      Location: Technical Specification/4.1 Incident Response Automation
+      Description: TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+
+    Returns:
+        Starlette: The initialized ASGI application instance.
+    """
+    # Step 1: Register the same incident routes exposed by the Flask application.
+    # Static paths are listed before the parameterized routes so they are never shadowed.
+    routes = [
+        Route('/incidents', create_incident, methods=['POST']),
+        Route('/incidents', list_incidents, methods=['GET']),
+        Route('/incidents/export', export_incidents, methods=['GET']),
+        Route('/incidents/triage/next', next_triage_incident, methods=['GET']),
+        Route('/incidents/{incident_id}', get_incident, methods=['GET']),
+        Route('/incidents/{incident_id}/status', update_incident_status, methods=['PUT']),
+        Route('/incidents/{incident_id}/analyze', analyze_incident, methods=['GET']),
+        Route('/incidents/{incident_id}/artifacts', upload_artifact, methods=['POST']),
+        Route('/incidents/{incident_id}/artifacts/{sha256}', download_artifact, methods=['GET']),
+        Route('/indicators/lookup', lookup_indicators, methods=['POST']),
+        Route('/indicators/{value:path}/incidents', get_indicator_incidents, methods=['GET']),
+    ]
+
+    # Step 2: Create the Motor client inside the running event loop and close it on shutdown.
+    # Handlers use the database named in DATABASE_URI, the async counterpart of `db` in services.py.
+    @asynccontextmanager
+    async def lifespan(asgi_app):
+        client = get_async_database_connection()
+        asgi_app.state.db = client.get_default_database()
+        try:
+            yield
+        finally:
+            client.close()
+
+    asgi_app = Starlette(routes=routes, lifespan=lifespan)
+
+    # Step 3: Return the configured ASGI application instance.
+    return asgi_app
+
+# Global ASGI application instance
+app = create_asgi_app()
@@ -0,0 +1,439 @@
+"""
+Asyncio-native counterparts of the incident services, used by the ASGI serving mode (asgi.py).
+
+Each function mirrors the synchronous service in services.py but awaits a Motor client instead of
+blocking on pymongo, so one process can keep thousands of slow requests in flight. CPU-bound work
+(AI analysis) and the synchronous write-coalescer flush are pushed to the default executor.
+
+Requirements Addressed:
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import asyncio
+from datetime import datetime
+
+from pymongo import ReturnDocument  # pymongo version 3.6.3
+
+# Internal Dependencies
+from .models import IncidentModel  # Defines the data model for managing security incidents.
+from .config import ARTIFACT_STORAGE_PATH, ARTIFACT_CHUNK_SIZE, ARTIFACT_MAX_UPLOAD_BYTES  # Artifact store location and upload limit.
+from .config import INCIDENT_LIST_MAX_LIMIT  # Upper bound on the incident list page size.
+from .config import INDICATOR_LOOKUP_MAX_VALUES  # Upper bound on the indicators of a bulk lookup.
+from .config import TRIAGE_QUEUE_MAX_SIZE, TRIAGE_REFRESH_SECONDS  # Bound and refresh interval of the triage queue seed.
+from .artifacts import get_artifact_store  # Content-addressed storage for incident evidence.
+from .write_coalescer import flush_pending_writes  # Flushes coalesced incident saves before reads (flush-on-read consistency).
+from .triage import triage_queue, CLOSED_STATUS_VALUES, FEATURE_FIELDS  # Priority queue of open incidents for analyst triage.
+from .ioc_extraction import default_extractor  # Extracts normalized indicators of compromise from incident text.
+from .indicator_index import (  # Indicator reverse index maintenance and lookups.
+    INDICATOR_INDEX_COLLECTION,
+    add_lookup_entry,
+    build_index_operations,
+    incident_key,
+    plan_lookup
+)
+from .http_cache import incident_cache  # Cached ETags and bodies of incident representations, invalidated on writes.
+from ..ai_recommendation_engine.services import generate_recommendations  # Generates AI-driven recommendations for incidents.
+
+
+async def _flush_pending_writes() -> None:
+    """
+    Runs the synchronous flush-on-read of coalesced saves without blocking the event loop.
+    """
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, flush_pending_writes)
+
+
+async def create_incident(db, incident_data: dict) -> dict:
+    """
+    Creates a new incident record in the database.
+
+    Addresses:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+        - Requirement ID: TR-IR-001-2
+            - Description: Support automated logging of incident details into the case management system.
+
+    Parameters:
+    - db: The AsyncIOMotorDatabase opened at application startup.
+    - incident_data (dict): The incident fields from the request body.
+
+    Returns:
+    - dict: The stored incident including its generated `id`.
+    """
+    # Step 1: Extract indicators of compromise and insert the incident into the database.
+    incident = dict(incident_data)
+    incident.setdefault('status', 'Open')
+    incident.setdefault('assigned_to', None)
+    incident['indicators'] = default_extractor.extract_batch([incident])[0]
+    incident['version'] = 1
+    result = await db.incidents.insert_one(incident)
+
+    # Add the incident to the reverse index of every indicator it mentions.
+    operations = build_index_operations([(incident_key(incident), [], incident['indicators'])])
+    if operations:
+        await db[INDICATOR_INDEX_COLLECTION].bulk_write(operations, ordered=False)
+
+    # Step 2: Queue the new incident for triage if the queue has already been loaded.
+    if triage_queue.loaded:
+        triage_queue.push_many([incident])
+
+    # Step 3: Return the stored incident in its JSON-serializable form.
+    response = {key: value for key, value in incident.items() if key != '_id'}
+    response['id'] = str(result.inserted_id)
+    return response
+
+
+async def update_incident_status(db, incident_id: str, new_status: str) -> bool:
+    """
+    Updates the status of an existing incident.
+
+    Addresses:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+        - Requirement ID: TR-IR-001-3
+            - Description: Enable real-time analysis of incidents using AI algorithms.
+
+    Parameters:
+    - db: The AsyncIOMotorDatabase opened at application startup.
+    - incident_id (str): The unique identifier of the incident to update.
+    - new_status (str): The new status to set for the incident.
+
+    Returns:
+    - bool: True if the status update was successful, otherwise False.
+    """
+    # Step 1: Flush coalesced saves so the update applies on top of them.
+    await _flush_pending_writes()
+
+    # Step 2: Update the status and fetch the resulting document in one round trip.
+    incident = await db.incidents.find_one_and_update(
+        {"_id": incident_id},
+        {"$set": {"status": new_status}, "$inc": {"version": 1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not incident:
+        return False
+    incident_cache.invalidate(incident_id)
+
+    # Step 3: Re-prioritize or drop the incident in the triage queue.
+    triage_queue.on_status_change(incident)
+    return True
+
+
+async def analyze_incident(db, incident_id: str) -> list:
+    """
+    Analyzes an incident using AI-driven workflows to provide recommendations.
+
+    Addresses:
+    - AI-Powered Assistance (Technical Specification/4.2 AI-Powered Assistance)
+        - Requirement ID: TR-AI-002-1
+            - Description: Implement machine learning models for generating actionable recommendations.
+
+    Parameters:
+    - db: The AsyncIOMotorDatabase opened at application startup.
+    - incident_id (str): The unique identifier of the incident to analyze.
+
+    Returns:
+    - list: A list of AI-generated recommendations for the incident, empty if the analysis failed.
+    """
+    try:
+        return await generate_incident_recommendations(db, incident_id)
+    except Exception as e:
+        # Log the exception as per TR-LM-020-1.
+        print(f"Error analyzing incident: {e}")
+        return []
+
+
+async def generate_incident_recommendations(db, incident_id: str) -> list:
+    """
+    Generates the AI recommendations of an incident, raising instead of returning an empty list when
+    the analysis fails, so callers that cache the result never cache a failure.
+
+    Parameters:
+    - db: The AsyncIOMotorDatabase opened at application startup.
+    - incident_id (str): The unique identifier of the incident to analyze.
+
+    Returns:
+    - list: A list of AI-generated recommendations for the incident.
+
+    Raises:
+    - ValueError: If the incident does not exist.
+    """
+    # Step 1: Retrieve the incident data by incident_id, flushing any coalesced saves first.
+    await _flush_pending_writes()
+    incident = await db.incidents.find_one({"_id": incident_id})
+    if not incident:
+        raise ValueError(f"Incident with ID {incident_id} not found.")
+
+    # Convert the incident data to an IncidentModel instance.
+    incident_data = IncidentModel.from_dict(incident)
+
+    # Step 2: Run the CPU-bound model inference off the event loop and return the recommendations.
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, generate_recommendations, incident_data)
+
+
+async def get_incident(db, incident_id: str) -> dict:
+    """
+    Retrieves a single incident.
+
+    Addresses:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+        - Requirement ID: TR-CM-005-3
+            - Description: Provide search and retrieval capabilities for historical incident data.
+
+    Parameters:
+    - db: The AsyncIOMotorDatabase opened at application startup.
+    - incident_id (str): The unique identifier of the incident.
+
+    Returns:
+    - dict: The incident document including its `version`, or None if it does not exist.
+    """
+    await _flush_pending_writes()
+    return await db.incidents.find_one({"_id": incident_id})
+
+
+async def get_incident_version(db, incident_id: str) -> int:
+    """
+    Returns the version of an incident with a projection-only read, or None if it does not exist.
+    """
+    await _flush_pending_writes()
+    incident = await db.incidents.find_one({"_id": incident_id}, {"version": 1})
+    if not incident:
+        return None
+    return incident.get("version", 0)
+
+
+async def list_incidents(db, status: str = None, limit: int = 100, offset: int = 0) -> list:
+    """
+    Lists incidents, most recently created first.
+
+    Addresses:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+        - Requirement ID: TR-CM-005-3
+            - Description: Provide search and retrieval capabilities for historical incident data.
+
+    Parameters:
+    - db: The AsyncIOMotorDatabase opened at application startup.
+    - status (str, optional): Only list incidents with this status.
+    - limit (int): Maximum number of incidents returned, capped at INCIDENT_LIST_MAX_LIMIT.
+    - offset (int): Number of incidents skipped.
+
+    Returns:
+    - list: The incident documents of the requested page.
+    """
+    if limit < 1 or offset < 0:
+        raise ValueError("limit must be positive and offset must not be negative.")
+    limit = min(limit, INCIDENT_LIST_MAX_LIMIT)
+
+    await _flush_pending_writes()
+    query = {"status": status} if status else {}
+    return await db.incidents.find(query).sort("_id", -1).skip(offset).limit(limit).to_list(length=limit)
+
+
+async def export_incidents(db, status: str = None, batch_size: int = 500):
+    """
+    Streams every incident for export without loading the collection into memory.
+
+    Addresses:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+        - Requirement ID: TR-CM-005-3
+            - Description: Provide search and retrieval capabilities for historical incident data.
+
+    Parameters:
+    - db: The AsyncIOMotorDatabase opened at application startup.
+    - status (str, optional): Only export incidents with this status.
+    - batch_size (int): Number of incidents fetched per database round trip.
+
+    Returns:
+    - AsyncIterator[dict]: The incident documents, most recently created first.
+    """
+    await _flush_pending_writes()
+    query = {"status": status} if status else {}
+    async for incident in db.incidents.find(query).sort("_id", -1).batch_size(batch_size):
+        yield incident
+
+
+async def next_triage_incident(db, analyst_id: str) -> dict:
+    """
+    Hands out the highest-priority open incident that is not yet assigned to an analyst.
+
+    As in services.next_triage_incident, the per-process queue is re-seeded every TRIAGE_REFRESH_SECONDS
+    from a bounded read of the newest open, unassigned incidents.
+
+    Addresses:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+        - Requirement ID: TR-IR-001-5
+            - Description: Ensure scalability to handle peak incident loads without degradation.
+
+    Parameters:
+    - db: The AsyncIOMotorDatabase opened at application startup.
+    - analyst_id (str): The analyst claiming the incident.
+
+    Returns:
+    - dict: The claimed incident, or None if no unassigned incident is queued.
+    """
+    # Step 1: Flush coalesced saves and populate the triage queue on first use and once it is stale.
+    await _flush_pending_writes()
+    if triage_queue.is_stale(TRIAGE_REFRESH_SECONDS):
+        cursor = db.incidents.find(
+            {"status": {"$nin": CLOSED_STATUS_VALUES}, "assigned_to": None},
+            dict.fromkeys(FEATURE_FIELDS, 1)
+        ).sort("detected_at", -1).limit(TRIAGE_QUEUE_MAX_SIZE)
+        triage_queue.reload(await cursor.to_list(length=TRIAGE_QUEUE_MAX_SIZE))
+
+    # Step 2: Pop incidents by priority until one can be claimed atomically.
+    while True:
+        top = triage_queue.pop()
+        if top is None:
+            return None
+        incident_id, score = top
+        try:
+            incident = await db.incidents.find_one_and_update(
+                {"_id": incident_id, "assigned_to": None, "status": {"$nin": CLOSED_STATUS_VALUES}},
+                {"$set": {"assigned_to": analyst_id, "assigned_at": datetime.utcnow()}, "$inc": {"version": 1}},
+                return_document=ReturnDocument.AFTER
+            )
+        except BaseException:
+            # The claim did not happen (or was cancelled), so the incident goes back into the queue.
+            triage_queue.push(incident_id, score)
+            raise
+        if incident:
+            incident_cache.invalidate(str(incident_id))
+            # Step 3: Return the claimed incident with its triage score.
+            incident["_id"] = str(incident["_id"])
+            incident["assigned_at"] = incident["assigned_at"].isoformat()
+            incident["triage_score"] = round(float(score), 4)
+            return incident
+
+
+async def attach_artifact(db, incident_id: str, chunks, filename: str, content_type: str) -> dict:
+    """
+    Streams an evidence artifact into content-addressed storage and links it to an incident.
+
+    Addresses:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+        - Requirement ID: TR-CM-005-1
+            - Description: Automatically log incident details, including AI-generated insights and manual actions.
+
+    Parameters:
+    - db: The AsyncIOMotorDatabase opened at application startup.
+    - incident_id (str): The unique identifier of the incident the evidence belongs to.
+    - chunks: Async iterator over the bytes of the upload body.
+    - filename (str): Original file name supplied by the uploader.
+    - content_type (str): MIME type supplied by the uploader.
+
+    Returns:
+    - dict: The artifact metadata linked to the incident, or None if the incident does not exist.
+    """
+    # Step 1: Ensure the incident exists before accepting the upload.
+    await _flush_pending_writes()
+    if not await db.incidents.find_one({"_id": incident_id}, {"_id": 1}):
+        return None
+
+    # Step 2: Write each received chunk to disk off the event loop while hashing it.
+    loop = asyncio.get_event_loop()
+    upload = get_artifact_store(ARTIFACT_STORAGE_PATH, ARTIFACT_CHUNK_SIZE).open_upload(ARTIFACT_MAX_UPLOAD_BYTES)
+    try:
+        async for chunk in chunks:
+            if chunk:
+                await loop.run_in_executor(None, upload.write, chunk)
+        digest, size, deduplicated = await loop.run_in_executor(None, upload.commit)
+    except BaseException:
+        upload.abort()
+        raise
+    artifact = {
+        "sha256": digest,
+        "size": size,
+        "filename": filename,
+        "content_type": content_type or "application/octet-stream",
+        "uploaded_at": datetime.utcnow().isoformat()
+    }
+
+    # Step 3: Link the artifact to the incident unless it is already attached.
+    await db.incidents.update_one(
+        {"_id": incident_id, "artifacts.sha256": {"$ne": digest}},
+        {"$push": {"artifacts": artifact}, "$inc": {"version": 1}}
+    )
+    incident_cache.invalidate(incident_id)
+
+    # Step 4: Return the linked artifact metadata.
+    artifact["deduplicated"] = deduplicated
+    return artifact
+
+
+async def get_incident_artifact(db, incident_id: str, digest: str) -> dict:
+    """
+    Returns the metadata of an artifact linked to an incident.
+
+    Addresses:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+        - Requirement ID: TR-CM-005-3
+            - Description: Provide search and retrieval capabilities for historical incident data.
+
+    Parameters:
+    - db: The AsyncIOMotorDatabase opened at application startup.
+    - incident_id (str): The unique identifier of the incident.
+    - digest (str): SHA-256 digest of the artifact.
+
+    Returns:
+    - dict: The artifact metadata, or None if the artifact is not linked to the incident or not stored.
+    """
+    await _flush_pending_writes()
+    incident = await db.incidents.find_one(
+        {"_id": incident_id, "artifacts.sha256": digest},
+        {"artifacts.$": 1}
+    )
+    if not incident or not get_artifact_store(ARTIFACT_STORAGE_PATH, ARTIFACT_CHUNK_SIZE).exists(digest):
+        return None
+    return incident["artifacts"][0]
+
+
+async def get_indicator_incidents(db, value: str) -> list:
+    """
+    Returns the incidents that mention an indicator, answered from the indicator reverse index.
+
+    Addresses:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+        - Requirement ID: TR-CM-005-3
+            - Description: Provide search and retrieval capabilities for historical incident data.
+
+    Parameters:
+    - db: The AsyncIOMotorDatabase opened at application startup.
+    - value (str): The indicator value, e.g. an IP address, domain, URL or file hash; defanged
+      values are accepted.
+
+    Returns:
+    - list: One index entry per indicator type the value was seen as, each holding the
+      incident ids, incident count and first/last seen timestamps. Empty if never seen.
+    """
+    return (await lookup_indicators(db, [value]))[value]
+
+
+async def lookup_indicators(db, values: list) -> dict:
+    """
+    Looks up many indicators in the reverse index in one call.
+
+    Addresses:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+        - Requirement ID: TR-CM-005-3
+            - Description: Provide search and retrieval capabilities for historical incident data.
+
+    Parameters:
+    - db: The AsyncIOMotorDatabase opened at application startup.
+    - values (list): Indicator values to look up, at most INDICATOR_LOOKUP_MAX_VALUES.
+
+    Returns:
+    - dict: The index entries of each requested value; unknown values map to an empty list.
+    """
+    # Step 1: Validate the request size.
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError("Indicators must be provided as a list of strings.")
+    if len(values) > INDICATOR_LOOKUP_MAX_VALUES:
+        raise ValueError(f"At most {INDICATOR_LOOKUP_MAX_VALUES} indicators can be looked up per request.")
+
+    # Step 2: Flush coalesced saves and answer every value from the reverse index.
+    await _flush_pending_writes()
+    results, requested, filters = plan_lookup(values)
+    for query in filters:
+        async for entry in db[INDICATOR_INDEX_COLLECTION].find(query, {'_id': 0}):
+            add_lookup_entry(results, requested, entry)
+    return results
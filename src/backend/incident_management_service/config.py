@@ -7,6 +7,35 @@ from mongodb import MongoClient  # mongodb version 3.6.3
 # Global variable for the MongoDB connection URI
 DATABASE_URI = 'mongodb://localhost:27017/incidents'
 
+# Write coalescing for IncidentModel.save (TR-IR-001-5: scalability under peak incident loads).
+# When enabled, repeated saves of the same incident within the window are merged into one upsert
+# and flushed together with other pending incidents as a single bulk_write.
+WRITE_COALESCING_ENABLED = False
+WRITE_COALESCING_WINDOW_SECONDS = 0.05
+WRITE_COALESCING_MAX_PENDING = 500
+# A failing flush is retried after the window, doubling the delay up to this ceiling.
+WRITE_COALESCING_MAX_BACKOFF_SECONDS = 30.0
+
+# Content-addressed evidence storage (TR-CM-005-1: log incident details including attached evidence).
+# Uploads are streamed to disk in ARTIFACT_CHUNK_SIZE chunks and rejected above ARTIFACT_MAX_UPLOAD_BYTES.
+ARTIFACT_STORAGE_PATH = '/var/lib/incident-management/artifacts'
+ARTIFACT_CHUNK_SIZE = 1024 * 1024
+ARTIFACT_MAX_UPLOAD_BYTES = 20 * 1024 * 1024 * 1024
+
+# Indicator reverse index (TR-CM-005-3: search and retrieval of historical incident data).
+# Bulk lookups accept at most INDICATOR_LOOKUP_MAX_VALUES indicator values per request.
+INDICATOR_LOOKUP_MAX_VALUES = 10000
+
+# Triage queue (TR-IR-001-5: scalability under peak incident loads). Each worker seeds its queue with
+# at most TRIAGE_QUEUE_MAX_SIZE of the newest open, unassigned incidents and re-seeds it, re-scoring
+# them, once it is older than TRIAGE_REFRESH_SECONDS.
+TRIAGE_QUEUE_MAX_SIZE = 5000
+TRIAGE_REFRESH_SECONDS = 60
+
+# Incident list endpoint paging (TR-IR-001-5: scalability under peak incident loads).
+INCIDENT_LIST_DEFAULT_LIMIT = 100
+INCIDENT_LIST_MAX_LIMIT = 500
+
 def get_database_connection():
     """
     Establishes and returns a connection to the MongoDB database using the configured URI.
@@ -27,4 +56,31 @@ def get_database_connection():
     # Create a new MongoClient instance using the DATABASE_URI
     client = MongoClient(DATABASE_URI)
     # Return the MongoClient instance
+    return client
+
+def get_async_database_connection():
+    """
+    Establishes and returns a non-blocking connection to the MongoDB database using the configured URI.
+
+    Used by the ASGI serving mode (asgi.py) so that database calls suspend the request coroutine
+    instead of holding a worker thread.
+
+    This function addresses the following requirement:
+    - **Name**: Incident Response Automation
+    - **Location**: Technical Specification/4.1 Incident Response Automation
+    - **Description**: TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+
+    **Returns:**
+        `AsyncIOMotorClient`: An asyncio MongoDB client instance connected to the specified database.
+        Use `get_default_database()` for the database named in `DATABASE_URI`, and close the
+        client on shutdown.
+    """
+    # Import the asyncio-native MongoDB client here, so the synchronous (Flask) serving mode does not
+    # require motor.
+    from motor.motor_asyncio import AsyncIOMotorClient  # motor version 1.3.1
+
+    # Create a new AsyncIOMotorClient instance using the DATABASE_URI. The client must be created
+    # inside the running event loop, so callers create it once at application startup.
+    client = AsyncIOMotorClient(DATABASE_URI)
+    # Return the AsyncIOMotorClient instance
     return client
\ No newline at end of file
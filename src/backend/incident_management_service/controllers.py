@@ -10,13 +10,97 @@ Requirements Addressed:
   AI-driven workflows to ensure consistent and efficient incident handling.
 """
 
-from flask import Flask, request, jsonify  # Flask version 1.1.2
-from models import IncidentModel  # Defines the data model for managing security incidents.
-from services import create_incident, update_incident_status, analyze_incident  # Service functions for incident management.
-from config import get_database_connection  # Establishes a connection to the MongoDB database using the configured URI.
+import json  # Serializes cached response bodies. (builtin)
+
+from flask import Flask, Response, request, jsonify  # Flask version 1.1.2
+from .models import IncidentModel  # Defines the data model for managing security incidents.
+from .services import (  # Service functions for incident management.
+    create_incident,
+    update_incident_status,
+    generate_incident_recommendations,
+    next_triage_incident,
+    attach_artifact,
+    get_incident_artifact,
+    get_artifact_store,
+    get_indicator_incidents,
+    lookup_indicators,
+    get_incident,
+    get_incident_version,
+    list_incidents,
+    export_incidents
+)
+from .artifacts import content_disposition, parse_range_header  # Builds download headers for artifacts.
+from .http_cache import (  # Version-based ETags, the per-incident ETag cache and response compression.
+    COMPRESSION_MIN_BYTES,
+    choose_encoding,
+    compress,
+    compress_stream,
+    etag_matches,
+    incident_cache,
+    make_etag,
+    make_list_etag
+)
+from .config import get_database_connection, INCIDENT_LIST_DEFAULT_LIMIT  # Establishes a connection to the MongoDB database using the configured URI.
 
 app = Flask(__name__)
 
+def _serialize(payload) -> bytes:
+    """Serializes a response payload; ObjectIds and datetimes are rendered as strings."""
+    return json.dumps(payload, default=str).encode('utf-8')
+
+def _not_modified(etag: str) -> Response:
+    """Builds a 304 Not Modified response for the given ETag."""
+    response = Response(status=304)
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _json_response(body: bytes, etag: str = None, status: int = 200) -> Response:
+    """Builds a JSON response from a serialized body, compressing it if large and accepted by the client."""
+    response = Response(body, status=status, mimetype='application/json')
+    response.headers['Vary'] = 'Accept-Encoding'
+    if etag:
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = 'no-cache'
+    encoding = choose_encoding(request.headers.get('Accept-Encoding')) if len(body) >= COMPRESSION_MIN_BYTES else None
+    if encoding:
+        response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def _cached_response(incident_id: str, kind: str, load_version, build_payload):
+    """Answers a conditional GET for an incident representation from the ETag cache when possible.
+
+    Parameters:
+    - incident_id (string): The incident the representation belongs to.
+    - kind (string): Name of the representation, e.g. 'incident' or 'recommendations'.
+    - load_version (callable): Returns the current incident version, or None if it does not exist.
+    - build_payload (callable): Builds the response payload; only called when the cache is stale.
+
+    Returns:
+    - Response object, or None if the incident does not exist.
+    """
+    if_none_match = request.headers.get('If-None-Match')
+
+    # A matching cached ETag is answered without touching the database or serializing anything.
+    cached = incident_cache.get(incident_id, kind)
+    if cached and etag_matches(if_none_match, cached[0]):
+        return _not_modified(cached[0])
+
+    version = load_version()
+    if version is None:
+        return None
+    etag = make_etag(kind, version)
+    if cached and cached[0] == etag:
+        body = cached[1]
+    else:
+        body = _serialize(build_payload())
+        incident_cache.put(incident_id, kind, etag, body)
+
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    return _json_response(body, etag)
+
 @app.route('/incidents', methods=['POST'])
 def create_incident_controller():
     """Handles the logic for creating a new incident.
@@ -98,12 +182,305 @@ def analyze_incident_controller(incident_id):
     - Response object with AI-generated recommendations.
     """
 
-    # Call analyze_incident service with the incident_id.
+    # Generate the recommendations for the incident_id; they are cached per incident version, so
+    # polling an unchanged incident neither re-runs the model nor re-serializes them. A failed
+    # analysis raises before anything is cached and is answered with an error.
     try:
-        recommendations = analyze_incident(incident_id)
+        response = _cached_response(
+            incident_id,
+            'recommendations',
+            lambda: get_incident_version(incident_id),
+            lambda: {'status': 'success', 'recommendations': generate_incident_recommendations(incident_id)}
+        )
+        if response is None:
+            return jsonify({'status': 'success', 'recommendations': []}), 200
 
         # Return a response with the AI-generated recommendations.
-        return jsonify({'status': 'success', 'recommendations': recommendations}), 200
+        return response
     except Exception as e:
         # Return an error response if analysis fails.
-        return jsonify({'status': 'error', 'message': str(e)}), 400
\ No newline at end of file
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@app.route('/incidents/triage/next', methods=['GET'])
+def next_triage_incident_controller():
+    """Handles the logic for handing out the highest-priority unassigned incident to an analyst.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation):
+      Automate the detection, logging, analysis, and resolution of security incidents using
+      AI-driven workflows to ensure consistent and efficient incident handling.
+
+    Parameters:
+    - request: The HTTP request object; the `analyst_id` query parameter identifies the claiming analyst.
+
+    Returns:
+    - Response object with the claimed incident or an error message.
+    """
+
+    # Parse the analyst claiming the incident.
+    analyst_id = request.args.get('analyst_id')
+    if not analyst_id:
+        return jsonify({'status': 'error', 'message': 'analyst_id query parameter must be provided.'}), 400
+
+    # Call next_triage_incident service to claim the highest-priority incident.
+    try:
+        incident = next_triage_incident(analyst_id)
+        if incident is None:
+            return jsonify({'status': 'error', 'message': 'No unassigned incidents in the triage queue.'}), 404
+
+        # Return a response with the claimed incident.
+        return jsonify({'status': 'success', 'incident': incident}), 200
+    except Exception as e:
+        # Return an error response if triage fails.
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@app.route('/incidents/<incident_id>/artifacts', methods=['POST'])
+def upload_artifact_controller(incident_id):
+    """Handles the logic for streaming an evidence artifact upload and linking it to an incident.
+
+    Requirements Addressed:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management):
+      Automatically log incident details, including AI-generated insights and manual actions (TR-CM-005-1).
+
+    Parameters:
+    - incident_id (string): The unique identifier of the incident.
+    - request: The HTTP request whose raw body is the artifact; the file name is taken from the
+      `filename` query parameter or the `X-Artifact-Filename` header.
+
+    Returns:
+    - Response object with the stored artifact metadata or error message.
+    """
+
+    # Parse the artifact file name; the body itself is streamed, never read into memory here.
+    filename = request.args.get('filename') or request.headers.get('X-Artifact-Filename')
+    if not filename:
+        return jsonify({'status': 'error', 'message': 'Artifact filename must be provided.'}), 400
+
+    # Call attach_artifact service with the request body stream.
+    try:
+        artifact = attach_artifact(incident_id, request.stream, filename, request.mimetype)
+        if artifact is None:
+            return jsonify({'status': 'error', 'message': 'Incident not found.'}), 404
+
+        # Return a response with the stored artifact metadata.
+        return jsonify({'status': 'success', 'artifact': artifact}), 201
+    except Exception as e:
+        # Return an error response if the upload fails.
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@app.route('/incidents/<incident_id>/artifacts/<sha256>', methods=['GET'])
+def download_artifact_controller(incident_id, sha256):
+    """Handles the logic for downloading an incident artifact, honoring single HTTP byte ranges.
+
+    Requirements Addressed:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management):
+      Provide search and retrieval capabilities for historical incident data (TR-CM-005-3).
+
+    Parameters:
+    - incident_id (string): The unique identifier of the incident.
+    - sha256 (string): The content address of the artifact.
+
+    Returns:
+    - Streamed response with the artifact bytes (206 for range requests) or error message.
+    """
+
+    # Call get_incident_artifact service to check the artifact is linked to the incident.
+    try:
+        artifact = get_incident_artifact(incident_id, sha256)
+        if artifact is None:
+            return jsonify({'status': 'error', 'message': 'Artifact not found.'}), 404
+
+        store = get_artifact_store()
+        size = store.size(sha256)
+        try:
+            byte_range = parse_range_header(request.headers.get('Range'), size)
+        except ValueError as e:
+            response = jsonify({'status': 'error', 'message': str(e)})
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return response, 416
+
+        # Stream the requested bytes from the memory-mapped artifact.
+        start, end = byte_range if byte_range else (0, size - 1)
+        response = Response(
+            store.iter_range(sha256, start, end),
+            status=206 if byte_range else 200,
+            mimetype=artifact.get('content_type', 'application/octet-stream'),
+            direct_passthrough=True
+        )
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.headers['Content-Length'] = str(max(end - start + 1, 0))
+        response.headers['Content-Disposition'] = content_disposition(artifact.get('filename', sha256))
+        if byte_range:
+            response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        return response
+    except Exception as e:
+        # Return an error response if the download fails.
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@app.route('/indicators/<path:value>/incidents', methods=['GET'])
+def get_indicator_incidents_controller(value):
+    """Handles the logic for pivoting from an indicator of compromise to the incidents that mention it.
+
+    Requirements Addressed:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management):
+      Provide search and retrieval capabilities for historical incident data (TR-CM-005-3).
+
+    Parameters:
+    - value (string): The indicator value (IP address, domain, URL, e-mail address or file hash).
+
+    Returns:
+    - Response object with the matching index entries or error message.
+    """
+
+    # Call get_indicator_incidents service to answer the pivot from the reverse index.
+    try:
+        matches = get_indicator_incidents(value)
+        if not matches:
+            return jsonify({'status': 'error', 'message': 'Indicator not found.'}), 404
+
+        # Return a response with the incidents of every indicator type the value was seen as.
+        return jsonify({'status': 'success', 'indicator': value, 'matches': matches}), 200
+    except Exception as e:
+        # Return an error response if the lookup fails.
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@app.route('/indicators/lookup', methods=['POST'])
+def lookup_indicators_controller():
+    """Handles the logic for looking up many indicators of compromise in one call.
+
+    Requirements Addressed:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management):
+      Provide search and retrieval capabilities for historical incident data (TR-CM-005-3).
+
+    Parameters:
+    - request: The HTTP request object whose JSON body holds an `indicators` list.
+
+    Returns:
+    - Response object mapping each requested indicator to its index entries, or error message.
+    """
+
+    # Parse the indicators to look up.
+    lookup_data = request.get_json()
+    if not lookup_data or 'indicators' not in lookup_data:
+        return jsonify({'status': 'error', 'message': 'Indicators must be provided.'}), 400
+
+    # Call lookup_indicators service to answer every indicator from the reverse index.
+    try:
+        results = lookup_indicators(lookup_data['indicators'])
+
+        # Return a response with the index entries of each indicator.
+        return jsonify({'status': 'success', 'results': results}), 200
+    except Exception as e:
+        # Return an error response if the lookup fails.
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+
+@app.route('/incidents/<incident_id>', methods=['GET'])
+def get_incident_controller(incident_id):
+    """Handles the logic for retrieving a single incident, honoring conditional requests.
+
+    Requirements Addressed:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management):
+      Provide search and retrieval capabilities for historical incident data (TR-CM-005-3).
+
+    Parameters:
+    - incident_id (string): The unique identifier of the incident.
+    - request: The HTTP request object; an `If-None-Match` header enables 304 responses.
+
+    Returns:
+    - Response object with the incident and its ETag, 304 Not Modified, or error message.
+    """
+
+    # Call get_incident service unless the cached ETag already answers the request.
+    try:
+        loaded = {}
+
+        def load_version():
+            loaded['incident'] = get_incident(incident_id)
+            return loaded['incident'].get('version', 0) if loaded['incident'] else None
+
+        response = _cached_response(
+            incident_id,
+            'incident',
+            load_version,
+            lambda: {'status': 'success', 'incident': loaded['incident']}
+        )
+        if response is None:
+            return jsonify({'status': 'error', 'message': 'Incident not found.'}), 404
+
+        # Return a response with the incident details.
+        return response
+    except Exception as e:
+        # Return an error response if retrieval fails.
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@app.route('/incidents', methods=['GET'])
+def list_incidents_controller():
+    """Handles the logic for listing incidents, honoring conditional requests and compressing large pages.
+
+    Requirements Addressed:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management):
+      Provide search and retrieval capabilities for historical incident data (TR-CM-005-3).
+
+    Parameters:
+    - request: The HTTP request object; `status`, `limit` and `offset` query parameters select the page.
+
+    Returns:
+    - Response object with the page of incidents and its ETag, 304 Not Modified, or error message.
+    """
+
+    # Call list_incidents service with the requested page.
+    try:
+        incidents = list_incidents(
+            status=request.args.get('status'),
+            limit=request.args.get('limit', default=INCIDENT_LIST_DEFAULT_LIMIT, type=int),
+            offset=request.args.get('offset', default=0, type=int)
+        )
+
+        # The ETag only depends on the ids and versions of the page, so an unchanged page is
+        # answered with 304 before anything is serialized.
+        etag = make_list_etag('incidents', incidents)
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return _not_modified(etag)
+
+        # Return a response with the page of incidents.
+        return _json_response(_serialize({'status': 'success', 'incidents': incidents}), etag)
+    except Exception as e:
+        # Return an error response if listing fails.
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@app.route('/incidents/export', methods=['GET'])
+def export_incidents_controller():
+    """Handles the logic for exporting incidents as a streamed, optionally compressed, NDJSON document.
+
+    Requirements Addressed:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management):
+      Provide search and retrieval capabilities for historical incident data (TR-CM-005-3).
+
+    Parameters:
+    - request: The HTTP request object; the `status` query parameter filters the export.
+
+    Returns:
+    - Streamed response with one JSON incident per line, or error message.
+    """
+
+    # Call export_incidents service and stream one incident per line.
+    try:
+        incidents = export_incidents(status=request.args.get('status'))
+        chunks = (_serialize(incident) + b'\n' for incident in incidents)
+
+        # Compress the stream chunk by chunk when the client accepts it.
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        response = Response(
+            compress_stream(chunks, encoding) if encoding else chunks,
+            mimetype='application/x-ndjson',
+            direct_passthrough=True
+        )
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Content-Disposition'] = 'attachment; filename="incidents.ndjson"'
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+    except Exception as e:
+        # Return an error response if the export fails.
+        return jsonify({'status': 'error', 'message': str(e)}), 400
@@ -0,0 +1,243 @@
+"""
+HTTP caching helpers for the incident read endpoints: version-based ETags and response compression.
+
+Every incident carries a `version` counter that is incremented on each write. ETags are derived from
+it, so they are computed without hashing the payload, and the last ETag and serialized body of each
+incident are kept in a small in-process LRU cache. A console polling an unchanged incident is answered
+with 304 Not Modified straight from the cache, without a database read or serialization. Writes made
+by this process invalidate the cache immediately; writes made by other processes are picked up once an
+entry's time-to-live expires.
+
+Large list and export responses are compressed with brotli (when installed) or gzip according to the
+client's Accept-Encoding header.
+
+Requirements Addressed:
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+# Optional brotli support; responses fall back to gzip when it is not installed.
+try:
+    import brotli  # Brotli version 1.0.9
+except ImportError:
+    brotli = None
+
+# Encodings offered to clients, in order of preference when their quality values are equal.
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# gzip level used for responses; level 6 is the usual speed/ratio trade-off for dynamic content.
+GZIP_COMPRESSION_LEVEL = 6
+
+# Brotli quality used for responses; high qualities are too slow for dynamic content.
+BROTLI_QUALITY = 5
+
+# Responses smaller than this are sent uncompressed; compressing them costs more than it saves.
+COMPRESSION_MIN_BYTES = 1024
+
+# Size and time-to-live of the process-wide ETag cache. The TTL bounds how long a write made by
+# another process can go unnoticed by conditional requests answered from this process's cache.
+ETAG_CACHE_MAX_ENTRIES = 10000
+ETAG_CACHE_TTL_SECONDS = 5.0
+
+
+def make_etag(kind: str, version) -> str:
+    """
+    Returns the weak ETag of a representation of the given kind at the given version.
+
+    ETags are weak because the same representation may be sent with different content encodings.
+    """
+    return f'W/"{kind}-{version}"'
+
+
+def make_list_etag(kind: str, documents: Iterable[dict]) -> str:
+    """
+    Returns the weak ETag of a list of versioned documents, derived from their ids and versions only.
+    """
+    digest = hashlib.sha1()
+    for document in documents:
+        digest.update(f"{document.get('_id')}:{document.get('version', 0)};".encode('utf-8'))
+    return make_etag(kind, digest.hexdigest())
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Returns True if an If-None-Match header matches the ETag using weak comparison (RFC 7232).
+    """
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Picks the response content encoding from an Accept-Encoding header.
+
+    Returns:
+        str: 'br' or 'gzip', or None if the client accepts neither (or only identity).
+    """
+    if not accept_encoding:
+        return None
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        parts = item.strip().split(';')
+        coding = parts[0].strip().lower()
+        quality = 1.0
+        for parameter in parts[1:]:
+            name, _, value = parameter.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding] = quality
+
+    best, best_quality = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        quality = qualities.get(coding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compresses a complete response body with the given encoding.
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_COMPRESSION_LEVEL)
+
+
+class StreamCompressor:
+    """
+    Incremental compressor for streamed response bodies, so exports are never buffered whole.
+    """
+
+    def __init__(self, encoding: str):
+        """
+        Initializes the compressor for 'br' or 'gzip'.
+        """
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits=31 selects the gzip container.
+            self._compressor = zlib.compressobj(GZIP_COMPRESSION_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        """
+        Compresses a chunk; may return an empty string while the compressor buffers input.
+        """
+        if self.encoding == 'br':
+            return self._compressor.process(chunk)
+        return self._compressor.compress(chunk)
+
+    def finish(self) -> bytes:
+        """
+        Returns the remaining compressed bytes and the stream trailer.
+        """
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """
+    Compresses a streamed response body chunk by chunk.
+    """
+    compressor = StreamCompressor(encoding)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.finish()
+
+
+class ETagCache:
+    """
+    Thread-safe LRU cache of the last ETag and serialized body of each incident representation.
+
+    Entries are grouped per incident so a write invalidates every representation of it (the incident
+    itself, its recommendations, ...) at once, and expire after a time-to-live to bound staleness
+    with respect to writes made by other processes.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+    """
+
+    def __init__(self, max_entries: int = ETAG_CACHE_MAX_ENTRIES, ttl_seconds: float = ETAG_CACHE_TTL_SECONDS):
+        """
+        Initializes the cache.
+
+        Parameters:
+            max_entries (int): Maximum number of incidents kept; the least recently used are evicted.
+            ttl_seconds (float): How long an entry is trusted without re-reading the database.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[str, Dict[str, Tuple[str, bytes, float]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, incident_id: str, kind: str) -> Optional[Tuple[str, bytes]]:
+        """
+        Returns the cached (etag, body) of a representation, or None if missing or expired.
+        """
+        with self._lock:
+            representations = self._entries.get(incident_id)
+            if not representations or kind not in representations:
+                return None
+            etag, body, expires_at = representations[kind]
+            if expires_at <= time.monotonic():
+                del representations[kind]
+                return None
+            self._entries.move_to_end(incident_id)
+            return etag, body
+
+    def put(self, incident_id: str, kind: str, etag: str, body: bytes) -> None:
+        """
+        Stores the ETag and serialized body of a representation.
+        """
+        with self._lock:
+            representations = self._entries.setdefault(incident_id, {})
+            representations[kind] = (etag, body, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(incident_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *incident_ids) -> None:
+        """
+        Drops every cached representation of the given incidents; called after each write.
+        """
+        with self._lock:
+            for incident_id in incident_ids:
+                self._entries.pop(str(incident_id), None)
+
+    def clear(self) -> None:
+        """
+        Drops all cached entries.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide cache of incident representations shared by the read endpoints and the write paths.
+incident_cache = ETagCache()
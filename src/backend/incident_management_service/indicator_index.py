@@ -0,0 +1,226 @@
+"""
+Reverse index from indicators of compromise to the incidents that mention them.
+
+Every indicator extracted from an incident (see ioc_extraction.py) has one document in the
+`indicator_index` collection holding the ids of the incidents it appears in and when it was first
+and last seen; the incident count returned by lookups is derived from the id array. The index is
+maintained incrementally from the difference between an incident's previous and current
+indicators, so pivoting from a newly reported IP to every related incident is a single indexed
+lookup instead of a regex scan over all descriptions.
+
+Requirements Addressed:
+- Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+  - TR-CM-005-3: Provide search and retrieval capabilities for historical incident data.
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo import ASCENDING, DESCENDING, DeleteOne, UpdateOne  # pymongo version 3.6.3
+
+# Internal dependencies
+from .ioc_extraction import normalize_indicator  # Normalizes indicators so lookups match stored values
+
+# Name of the reverse index collection.
+INDICATOR_INDEX_COLLECTION = 'indicator_index'
+
+# Indicator types a raw lookup value is normalized as before querying the index.
+INDICATOR_TYPES = ('url', 'email', 'ipv4', 'sha256', 'sha1', 'md5', 'domain', 'keyword')
+
+# Number of values sent per `$in` query by bulk lookups.
+LOOKUP_CHUNK_SIZE = 1000
+
+# One incident's indicator change: (incident id, previous indicators, current indicators).
+IndicatorChange = Tuple[str, Iterable[dict], Iterable[dict]]
+
+
+def incident_key(incident: dict) -> str:
+    """
+    Returns the id an incident is indexed under: its `id` field (set by IncidentModel), or its
+    `_id` for documents created without one. Every writer and the delete path use this key.
+    """
+    return str(incident.get('id') or incident['_id'])
+
+
+def _indicator_keys(indicators: Optional[Iterable[dict]]) -> Set[Tuple[str, str]]:
+    """
+    Returns the (type, value) pairs of a list of indicator documents.
+    """
+    return {(indicator['type'], indicator['value']) for indicator in indicators or ()}
+
+
+def lookup_values(raw_value: str) -> Set[str]:
+    """
+    Returns every normalized form a raw indicator can be stored under, e.g. a defanged IP or a
+    mixed-case domain, so lookups match regardless of how the analyst typed the value.
+    """
+    values = set()
+    for indicator_type in INDICATOR_TYPES:
+        try:
+            value = normalize_indicator(indicator_type, raw_value)
+        except ValueError:
+            value = None
+        if value:
+            values.add(value)
+    return values
+
+
+def plan_lookup(raw_values: Iterable[str]) -> Tuple[Dict[str, List[dict]], Dict[str, List[str]], List[dict]]:
+    """
+    Prepares a bulk lookup for the synchronous and the asyncio drivers alike.
+
+    Returns:
+        Tuple: The empty result list of each distinct requested value, the requested values each
+        normalized value answers, and the `$in` filters querying the normalized values,
+        LOOKUP_CHUNK_SIZE values each.
+    """
+    raw_values = list(dict.fromkeys(raw_values))
+    requested: Dict[str, List[str]] = {}
+    for raw_value in raw_values:
+        for value in lookup_values(raw_value):
+            requested.setdefault(value, []).append(raw_value)
+    values = sorted(requested)
+    filters = [{'value': {'$in': values[offset:offset + LOOKUP_CHUNK_SIZE]}}
+               for offset in range(0, len(values), LOOKUP_CHUNK_SIZE)]
+    return {raw_value: [] for raw_value in raw_values}, requested, filters
+
+
+def add_lookup_entry(results: Dict[str, List[dict]], requested: Dict[str, List[str]], entry: dict) -> None:
+    """
+    Adds an index entry returned by a lookup filter to the results of the values it answers.
+    """
+    entry['incident_count'] = len(entry.get('incident_ids', ()))
+    for raw_value in requested[entry['value']]:
+        results[raw_value].append(entry)
+
+
+def build_index_operations(changes: Iterable[IndicatorChange], seen_at: Optional[datetime] = None) -> list:
+    """
+    Builds the bulk write operations that apply indicator changes to the reverse index.
+
+    Parameters:
+        changes (Iterable[IndicatorChange]): Incident ids with their previous and current indicators.
+        seen_at (datetime, optional): Timestamp recorded as last seen; defaults to now (UTC).
+
+    Returns:
+        list: pymongo write operations. Each touches one entry with commutative updates, so they
+        can be executed with `ordered=False`.
+
+    Steps:
+    - For each added indicator, upsert its entry, adding the incident to the id set.
+    - For each removed indicator, pull the incident from the entry.
+    """
+    seen_at = seen_at or datetime.utcnow()
+    operations = []
+    for incident_id, previous, current in changes:
+        incident_id = str(incident_id)
+        previous_keys = _indicator_keys(previous)
+        current_keys = _indicator_keys(current)
+
+        for indicator_type, value in sorted(current_keys - previous_keys):
+            operations.append(UpdateOne(
+                {'type': indicator_type, 'value': value},
+                {'$addToSet': {'incident_ids': incident_id}, '$max': {'last_seen': seen_at},
+                 '$setOnInsert': {'first_seen': seen_at}},
+                upsert=True
+            ))
+
+        for indicator_type, value in sorted(previous_keys - current_keys):
+            operations.append(UpdateOne(
+                {'type': indicator_type, 'value': value, 'incident_ids': incident_id},
+                {'$pull': {'incident_ids': incident_id}}
+            ))
+    return operations
+
+
+def build_cleanup_operations(changes: Iterable[IndicatorChange]) -> list:
+    """
+    Builds the operations that delete the entries of removed indicators once no incident mentions
+    them any more. They must run after the operations of `build_index_operations`.
+    """
+    removed = set()
+    for _, previous, current in changes:
+        removed |= _indicator_keys(previous) - _indicator_keys(current)
+    return [
+        DeleteOne({'type': indicator_type, 'value': value, 'incident_ids': {'$size': 0}})
+        for indicator_type, value in sorted(removed)
+    ]
+
+
+class IndicatorIndex:
+    """
+    Maintains and queries the indicator-to-incident reverse index.
+
+    Requirements Addressed:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+      - TR-CM-005-3: Provide search and retrieval capabilities for historical incident data.
+    """
+
+    def __init__(self, collection):
+        """
+        Initializes the index on top of the `indicator_index` collection.
+        """
+        self.collection = collection
+
+    def ensure_indexes(self) -> None:
+        """
+        Creates the unique (value, type) index used by lookups and upserts, and the recency index.
+        """
+        self.collection.create_index([('value', ASCENDING), ('type', ASCENDING)], unique=True, name='idx_value_type')
+        self.collection.create_index([('last_seen', DESCENDING)], name='idx_last_seen')
+
+    def apply(self, changes: Iterable[IndicatorChange], seen_at: Optional[datetime] = None) -> int:
+        """
+        Applies indicator changes of one or more incidents with an unordered bulk write, followed by
+        a second one deleting entries left without incidents when indicators were removed.
+
+        Returns:
+            int: The number of write operations sent.
+        """
+        changes = list(changes)
+        operations = build_index_operations(changes, seen_at)
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+        cleanup = build_cleanup_operations(changes)
+        if cleanup:
+            self.collection.bulk_write(cleanup, ordered=False)
+        return len(operations) + len(cleanup)
+
+    def remove_incident(self, incident_id: str, indicators: Iterable[dict]) -> int:
+        """
+        Removes a deleted incident from the entries of all its indicators.
+        """
+        return self.apply([(incident_id, indicators, [])])
+
+    def lookup(self, raw_value: str) -> List[dict]:
+        """
+        Returns the index entries for an indicator value, one per indicator type it was seen as.
+        """
+        return self.lookup_many([raw_value]).get(raw_value, [])
+
+    def lookup_many(self, raw_values: Iterable[str]) -> Dict[str, List[dict]]:
+        """
+        Looks up many indicator values with a handful of indexed `$in` queries.
+
+        Parameters:
+            raw_values (Iterable[str]): Indicator values as supplied by the caller, possibly defanged.
+
+        Returns:
+            Dict[str, List[dict]]: The index entries of each requested value, each with an
+            `incident_count` derived from its incident ids; values that are not indexed map to an
+            empty list.
+        """
+        results, requested, filters = plan_lookup(raw_values)
+        for query in filters:
+            for entry in self.collection.find(query, {'_id': 0}):
+                add_lookup_entry(results, requested, entry)
+        return results
+
+
+def get_indicator_index(db) -> IndicatorIndex:
+    """
+    Returns the reverse index backed by the given database connection.
+    """
+    return IndicatorIndex(db[INDICATOR_INDEX_COLLECTION])
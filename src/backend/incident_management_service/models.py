@@ -11,12 +11,22 @@ Requirements Addressed:
 import json
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-from pymongo import MongoClient  # pymongo version 3.6.3
+from pymongo import MongoClient, ReturnDocument  # pymongo version 3.6.3
 
 # Internal dependencies
-from config import get_database_connection  # Establishes a connection to the MongoDB database using the configured URI
+from .config import (
+    get_database_connection,  # Establishes a connection to the MongoDB database using the configured URI
+    WRITE_COALESCING_ENABLED,
+    WRITE_COALESCING_WINDOW_SECONDS,
+    WRITE_COALESCING_MAX_PENDING,
+    WRITE_COALESCING_MAX_BACKOFF_SECONDS
+)
+from .write_coalescer import get_write_coalescer  # Merges repeated incident upserts into batched bulk writes
+from .ioc_extraction import extract_indicators  # Extracts normalized indicators of compromise from incident text
+from .indicator_index import get_indicator_index  # Maintains the indicator-to-incident reverse index
+from .http_cache import incident_cache  # Cached ETags and bodies of incident representations, invalidated on writes
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,6 +38,77 @@ with open('src/database/schemas/incident_schema.json', 'r') as schema_file:
     incident_schema = json.load(schema_file)
 
 
+def _get_incidents_collection():
+    """
+    Returns the incidents collection using a fresh database connection.
+    """
+    db = get_database_connection()
+    return db['incidents']
+
+
+def _update_indicator_index(incident_id: str, previous: Optional[List[dict]], current: Optional[List[dict]]) -> None:
+    """
+    Applies the difference between an incident's previous and current indicators to the reverse index.
+
+    Incidents are indexed under their `id` field, the key `indicator_index.incident_key` gives
+    documents written by the services, so saves and deletes update the same entries.
+
+    Failures are logged rather than raised: the incident itself has already been written.
+    """
+    try:
+        get_indicator_index(get_database_connection()).apply([(incident_id, previous, current)])
+    except Exception as e:
+        logger.error(f"An error occurred while indexing the indicators of incident {incident_id}: {e}")
+
+
+def _index_coalesced_indicators(collection, batch: dict):
+    """
+    Write coalescer flush hook that keeps the indicator reverse index in step with coalesced saves.
+
+    Reads the stored indicators of the batch before it is written and returns a callback that
+    applies the differences to the reverse index once the batch has been flushed.
+    """
+    changed = {incident_id: fields['indicators'] for incident_id, fields in batch.items() if 'indicators' in fields}
+    if not changed:
+        return None
+    previous = {
+        incident['id']: incident.get('indicators')
+        for incident in collection.find({'id': {'$in': list(changed)}}, {'id': 1, 'indicators': 1})
+    }
+
+    def apply_changes():
+        get_indicator_index(get_database_connection()).apply(
+            (incident_id, previous.get(incident_id), indicators) for incident_id, indicators in changed.items()
+        )
+    return apply_changes
+
+
+def _invalidate_coalesced_incidents(collection, batch: dict):
+    """
+    Write coalescer flush hook that drops the cached representations of the flushed incidents.
+
+    The ETag cache is keyed by `_id`, the id used by the HTTP routes, while the batch is keyed by
+    the model `id`, so the `_id`s are read back once the batch (including new upserts) is written.
+    """
+    def invalidate():
+        written = collection.find({'id': {'$in': list(batch)}}, {'_id': 1})
+        incident_cache.invalidate(*(incident['_id'] for incident in written))
+    return invalidate
+
+
+def _get_write_coalescer():
+    """
+    Returns the process-wide incident write coalescer configured from config.py.
+    """
+    return get_write_coalescer(
+        _get_incidents_collection,
+        WRITE_COALESCING_WINDOW_SECONDS,
+        WRITE_COALESCING_MAX_PENDING,
+        flush_hooks=[_index_coalesced_indicators, _invalidate_coalesced_incidents],
+        max_backoff_seconds=WRITE_COALESCING_MAX_BACKOFF_SECONDS
+    )
+
+
 class IncidentModel:
     """
     Represents the data model for an incident, encapsulating all necessary fields and methods for managing incident data.
@@ -45,7 +126,8 @@ class IncidentModel:
         status: str,
         detected_at: datetime,
         resolved_at: Optional[datetime],
-        user_id: str
+        user_id: str,
+        artifacts: Optional[List[dict]] = None
     ):
         """
         Initializes a new instance of the IncidentModel with the provided data.
@@ -58,6 +140,8 @@ class IncidentModel:
             detected_at (datetime): Timestamp when the incident was detected.
             resolved_at (datetime, optional): Timestamp when the incident was resolved.
             user_id (str): Identifier of the user associated with the incident.
+            artifacts (List[dict], optional): Metadata of evidence artifacts linked to the incident,
+                each identified by the SHA-256 digest of its content-addressed blob.
 
         Steps:
         - Assign the provided id to the instance.
@@ -67,6 +151,7 @@ class IncidentModel:
         - Assign the provided detected_at timestamp to the instance.
         - Assign the provided resolved_at timestamp to the instance.
         - Assign the provided user_id to the instance.
+        - Assign the linked artifacts to the instance.
         """
         self.id = id
         self.title = title
@@ -75,6 +160,43 @@ class IncidentModel:
         self.detected_at = detected_at
         self.resolved_at = resolved_at
         self.user_id = user_id
+        # Artifacts are linked with an atomic $push by the artifact upload service and are therefore
+        # not part of the $set document written by save(), which could otherwise drop concurrent uploads.
+        self.artifacts = artifacts or []
+        # Indicators of compromise found in the title and description, refreshed on every save.
+        self.indicators: List[dict] = []
+
+    @classmethod
+    def from_dict(cls, document: dict) -> 'IncidentModel':
+        """
+        Builds an incident instance from a document of the incidents collection.
+
+        Parameters:
+            document (dict): The stored incident, as written by save() or by the incident services.
+
+        Returns:
+            IncidentModel: The incident, with its stored indicators.
+
+        Steps:
+        - Use the model `id`, falling back to the document `_id` for incidents created by the services.
+        - Parse the ISO timestamps written by save(); datetime values are used as they are.
+        - Copy the stored artifacts and indicators.
+        """
+        def parse(value):
+            return datetime.fromisoformat(value.replace('Z', '+00:00')) if isinstance(value, str) else value
+
+        incident = cls(
+            id=document.get('id') or str(document.get('_id')),
+            title=document.get('title'),
+            description=document.get('description'),
+            status=document.get('status'),
+            detected_at=parse(document.get('detected_at')),
+            resolved_at=parse(document.get('resolved_at')),
+            user_id=document.get('user_id'),
+            artifacts=document.get('artifacts')
+        )
+        incident.indicators = list(document.get('indicators') or [])
+        return incident
 
     def _validate_incident_data(self) -> bool:
         """
@@ -109,13 +231,15 @@ class IncidentModel:
         Steps:
         - Establish a database connection using get_database_connection.
         - Validate the incident data against the incident_schema.
-        - Insert or update the incident data in the database.
+        - Extract indicators of compromise from the title and description.
+        - Insert or update the incident data in the database, or hand it to the write
+          coalescer when WRITE_COALESCING_ENABLED is set.
+        - Apply added and removed indicators to the indicator reverse index.
         - Return True if the operation was successful.
         """
         try:
-            # Establish a database connection
-            db = get_database_connection()
-            incidents_collection = db['incidents']
+            # Extract indicators inline so they are stored together with the text they come from
+            self.indicators = extract_indicators(f"{self.title or ''}\n{self.description or ''}")
 
             # Convert incident object to dictionary
             incident_data = {
@@ -125,7 +249,8 @@ class IncidentModel:
                 'status': self.status,
                 'detected_at': self.detected_at.isoformat(),
                 'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
-                'user_id': self.user_id
+                'user_id': self.user_id,
+                'indicators': self.indicators
             }
 
             # Validate the incident data against the incident_schema
@@ -133,13 +258,29 @@ class IncidentModel:
                 logger.error("Incident data validation failed.")
                 return False
 
-            # Insert or update the incident data in the database
-            incidents_collection.update_one(
+            # Coalesce the update with other pending saves of this incident when enabled
+            if WRITE_COALESCING_ENABLED:
+                _get_write_coalescer().enqueue(self.id, incident_data)
+                logger.info(f"Incident {self.id} queued for coalesced save.")
+                return True
+
+            # Insert or update the incident data in the database, reading back the previously
+            # stored indicators in the same round trip
+            incidents_collection = _get_incidents_collection()
+            previous = incidents_collection.find_one_and_update(
                 {'id': self.id},
-                {'$set': incident_data},
-                upsert=True
+                {'$set': incident_data, '$inc': {'version': 1}},
+                projection={'indicators': 1},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
             )
 
+            # Keep the indicator reverse index in step with the stored indicators
+            _update_indicator_index(self.id, (previous or {}).get('indicators'), self.indicators)
+            # The ETag cache is keyed by `_id`; a newly inserted incident has nothing cached
+            if previous is not None:
+                incident_cache.invalidate(previous['_id'])
+
             logger.info(f"Incident {self.id} saved successfully.")
             return True
         except Exception as e:
@@ -161,17 +302,24 @@ class IncidentModel:
         Steps:
         - Establish a database connection using get_database_connection.
         - Remove the incident data from the database using the instance's id.
+        - Remove the incident from the indicator reverse index.
         - Return True if the operation was successful.
         """
         try:
+            # Drop any coalesced save that would otherwise re-create the incident after deletion
+            if WRITE_COALESCING_ENABLED:
+                _get_write_coalescer().discard(self.id)
+
             # Establish a database connection
             db = get_database_connection()
             incidents_collection = db['incidents']
 
             # Remove the incident data from the database using the instance's id
-            result = incidents_collection.delete_one({'id': self.id})
+            deleted = incidents_collection.find_one_and_delete({'id': self.id}, projection={'indicators': 1})
 
-            if result.deleted_count > 0:
+            if deleted is not None:
+                _update_indicator_index(self.id, deleted.get('indicators'), [])
+                incident_cache.invalidate(deleted['_id'])
                 logger.info(f"Incident {self.id} deleted successfully.")
                 return True
             else:
@@ -5,7 +5,15 @@ from flask import Flask, request, jsonify  # Flask version 1.1.2
 from .controllers import (
     create_incident_controller,
     update_incident_status_controller,
-    analyze_incident_controller
+    analyze_incident_controller,
+    next_triage_incident_controller,
+    upload_artifact_controller,
+    download_artifact_controller,
+    get_indicator_incidents_controller,
+    lookup_indicators_controller,
+    get_incident_controller,
+    list_incidents_controller,
+    export_incidents_controller
 )
 
 # Initialize the Flask application
@@ -38,6 +46,42 @@ def register_routes(app):
         """
         return create_incident_controller()
 
+    # Register the '/incidents' GET route with the list_incidents_controller
+    @app.route('/incidents', methods=['GET'])
+    def list_incidents():
+        """
+        Endpoint to list incidents page by page, with ETags and compression for polling consoles.
+
+        Requirements Addressed:
+        - Provides search and retrieval capabilities for historical incident data.
+          (Requirement ID: TR-CM-005-3, Technical Specification/4.5 Comprehensive Case Management)
+        """
+        return list_incidents_controller()
+
+    # Register the '/incidents/export' route with the export_incidents_controller
+    @app.route('/incidents/export', methods=['GET'])
+    def export_incidents():
+        """
+        Endpoint to export incidents as a streamed, optionally compressed, NDJSON document.
+
+        Requirements Addressed:
+        - Provides search and retrieval capabilities for historical incident data.
+          (Requirement ID: TR-CM-005-3, Technical Specification/4.5 Comprehensive Case Management)
+        """
+        return export_incidents_controller()
+
+    # Register the '/incidents/<incident_id>' route with the get_incident_controller
+    @app.route('/incidents/<incident_id>', methods=['GET'])
+    def get_incident(incident_id):
+        """
+        Endpoint to retrieve a single incident, answering unchanged incidents with 304 Not Modified.
+
+        Requirements Addressed:
+        - Provides search and retrieval capabilities for historical incident data.
+          (Requirement ID: TR-CM-005-3, Technical Specification/4.5 Comprehensive Case Management)
+        """
+        return get_incident_controller(incident_id)
+
     # Register the '/incidents/<incident_id>/status' route with the update_incident_status_controller
     @app.route('/incidents/<incident_id>/status', methods=['PUT'])
     def update_incident_status(incident_id):
@@ -64,5 +108,70 @@ def register_routes(app):
         """
         return analyze_incident_controller(incident_id)
 
+    # Register the '/incidents/triage/next' route with the next_triage_incident_controller
+    @app.route('/incidents/triage/next', methods=['GET'])
+    def next_triage_incident():
+        """
+        Endpoint to hand out the highest-priority unassigned incident to an analyst.
+
+        Requirements Addressed:
+        - Enables real-time analysis and prioritization of incidents.
+          (Requirement ID: TR-IR-001-3, Technical Specification/4.1.4 Technical Requirements)
+        - Ensures scalability to handle peak incident loads without degradation.
+          (Requirement ID: TR-IR-001-5, Technical Specification/4.1.4 Technical Requirements)
+        """
+        return next_triage_incident_controller()
+
+    # Register the '/incidents/<incident_id>/artifacts' route with the upload_artifact_controller
+    @app.route('/incidents/<incident_id>/artifacts', methods=['POST'])
+    def upload_artifact(incident_id):
+        """
+        Endpoint to stream an evidence artifact (pcap, memory dump, log bundle) onto an incident.
+
+        Requirements Addressed:
+        - Automatically logs incident details, including attached evidence.
+          (Requirement ID: TR-CM-005-1, Technical Specification/4.5 Comprehensive Case Management)
+        """
+        return upload_artifact_controller(incident_id)
+
+    # Register the '/incidents/<incident_id>/artifacts/<sha256>' route with the download_artifact_controller
+    @app.route('/incidents/<incident_id>/artifacts/<sha256>', methods=['GET'])
+    def download_artifact(incident_id, sha256):
+        """
+        Endpoint to download an incident artifact, supporting HTTP range requests.
+
+        Requirements Addressed:
+        - Provides retrieval capabilities for historical incident data.
+          (Requirement ID: TR-CM-005-3, Technical Specification/4.5 Comprehensive Case Management)
+        """
+        return download_artifact_controller(incident_id, sha256)
+
+    # Register the '/indicators/<value>/incidents' route with the get_indicator_incidents_controller
+    # The path converter allows URL indicators, which contain slashes.
+    @app.route('/indicators/<path:value>/incidents', methods=['GET'])
+    def get_indicator_incidents(value):
+        """
+        Endpoint to pivot from an indicator of compromise to every incident that mentions it.
+
+        Requirements Addressed:
+        - Provides search and retrieval capabilities for historical incident data.
+          (Requirement ID: TR-CM-005-3, Technical Specification/4.5 Comprehensive Case Management)
+        """
+        return get_indicator_incidents_controller(value)
+
+    # Register the '/indicators/lookup' route with the lookup_indicators_controller
+    @app.route('/indicators/lookup', methods=['POST'])
+    def lookup_indicators():
+        """
+        Endpoint to look up thousands of indicators of compromise in a single call.
+
+        Requirements Addressed:
+        - Provides search and retrieval capabilities for historical incident data.
+          (Requirement ID: TR-CM-005-3, Technical Specification/4.5 Comprehensive Case Management)
+        - Ensures scalability to handle peak incident loads without degradation.
+          (Requirement ID: TR-IR-001-5, Technical Specification/4.1.4 Technical Requirements)
+        """
+        return lookup_indicators_controller()
+
 # Register the routes with the Flask application
 register_routes(app)
\ No newline at end of file
@@ -3,11 +3,29 @@ Provides core services for managing security incidents, including creation, stat
 """
 
 # External Dependencies
-from pymongo import MongoClient  # mongodb version 3.6.3
+from datetime import datetime
+
+from pymongo import MongoClient, ReturnDocument, UpdateOne  # mongodb version 3.6.3
 
 # Internal Dependencies
 from .models import IncidentModel  # Defines the data model for managing security incidents.
-from .config import get_database_connection  # Establishes a connection to the MongoDB database using the configured URI.
+from .config import (
+    get_database_connection,  # Establishes a connection to the MongoDB database using the configured URI.
+    ARTIFACT_STORAGE_PATH,
+    ARTIFACT_CHUNK_SIZE,
+    ARTIFACT_MAX_UPLOAD_BYTES,
+    INDICATOR_LOOKUP_MAX_VALUES,
+    INCIDENT_LIST_DEFAULT_LIMIT,
+    INCIDENT_LIST_MAX_LIMIT,
+    TRIAGE_QUEUE_MAX_SIZE,
+    TRIAGE_REFRESH_SECONDS
+)
+from .artifacts import ArtifactStore, get_artifact_store as _get_artifact_store  # Content-addressed storage for incident evidence.
+from .write_coalescer import flush_pending_writes  # Flushes coalesced incident saves before reads (flush-on-read consistency).
+from .triage import triage_queue, CLOSED_STATUS_VALUES, FEATURE_FIELDS  # Priority queue of open incidents for analyst triage.
+from .ioc_extraction import default_extractor  # Extracts normalized indicators of compromise from incident text.
+from .indicator_index import get_indicator_index, incident_key  # Reverse index from indicators to the incidents that mention them.
+from .http_cache import incident_cache  # Cached ETags and bodies of incident representations, invalidated on writes.
 from ..ai_recommendation_engine.services import generate_recommendations  # Generates AI-driven recommendations for incidents.
 from ..playbook_engine.services import create_playbook  # Creates a new playbook with specified steps.
 
@@ -36,9 +54,22 @@ def create_incident(incident_data: IncidentModel) -> bool:
 
         # Convert the IncidentModel instance to a dictionary for database insertion.
         incident_dict = incident_data.to_dict()
+
+        # Extract indicators of compromise inline so they are stored with the incident.
+        incident_dict["indicators"] = default_extractor.extract_batch([incident_dict])[0]
+
+        # Every write increments the version, from which the ETags of read endpoints are derived.
+        incident_dict["version"] = 1
         
         # Step 3: Insert the incident_data into the database.
         result = db.incidents.insert_one(incident_dict)
+
+        # Queue the new incident for triage if the queue has already been loaded.
+        if triage_queue.loaded:
+            triage_queue.push_many([incident_dict])
+
+        # Add the incident to the reverse index of every indicator it mentions.
+        get_indicator_index(db).apply([(incident_key(incident_dict), [], incident_dict["indicators"])])
         
         # Step 4: Return True if the operation was successful.
         return result.acknowledged
@@ -69,7 +100,8 @@ def update_incident_status(incident_id: str, new_status: str) -> bool:
         # Step 1: Establish a database connection using get_database_connection.
         db = get_database_connection()
         
-        # Step 2: Retrieve the incident by incident_id.
+        # Step 2: Retrieve the incident by incident_id, flushing any coalesced saves first.
+        flush_pending_writes()
         incident = db.incidents.find_one({"_id": incident_id})
         if not incident:
             print(f"Incident with ID {incident_id} not found.")
@@ -79,7 +111,12 @@ def update_incident_status(incident_id: str, new_status: str) -> bool:
         update_fields = {"status": new_status}
         
         # Step 4: Save the updated incident back to the database.
-        result = db.incidents.update_one({"_id": incident_id}, {"$set": update_fields})
+        result = db.incidents.update_one({"_id": incident_id}, {"$set": update_fields, "$inc": {"version": 1}})
+        incident_cache.invalidate(incident_id)
+
+        # Re-prioritize or drop the incident in the triage queue.
+        incident.update(update_fields)
+        triage_queue.on_status_change(incident)
         
         # Step 5: Return True if the operation was successful.
         return result.modified_count > 0
@@ -102,26 +139,382 @@ def analyze_incident(incident_id: str) -> list:
     Parameters:
     - incident_id (str): The unique identifier of the incident to analyze.
 
+    Returns:
+    - list: A list of AI-generated recommendations for the incident, empty if the analysis failed.
+    """
+    try:
+        return generate_incident_recommendations(incident_id)
+    except Exception as e:
+        # Log the exception as per TR-LM-020-1.
+        print(f"Error analyzing incident: {e}")
+        return []
+
+def generate_incident_recommendations(incident_id: str) -> list:
+    """
+    Generates the AI recommendations of an incident, raising instead of returning an empty list when
+    the analysis fails, so callers that cache the result never cache a failure.
+
+    Parameters:
+    - incident_id (str): The unique identifier of the incident to analyze.
+
     Returns:
     - list: A list of AI-generated recommendations for the incident.
+
+    Raises:
+    - ValueError: If the incident does not exist.
+    """
+    # Step 1: Retrieve the incident data by incident_id, flushing any coalesced saves first.
+    db = get_database_connection()
+    flush_pending_writes()
+    incident = db.incidents.find_one({"_id": incident_id})
+    if not incident:
+        raise ValueError(f"Incident with ID {incident_id} not found.")
+
+    # Convert the incident data to an IncidentModel instance.
+    incident_data = IncidentModel.from_dict(incident)
+
+    # Step 2: Call generate_recommendations with the incident data and return them.
+    return generate_recommendations(incident_data)
+
+def get_incident(incident_id: str) -> dict:
+    """
+    Retrieves a single incident.
+
+    Addresses:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+        - Requirement ID: TR-CM-005-3
+            - Description: Provide search and retrieval capabilities for historical incident data.
+
+    Parameters:
+    - incident_id (str): The unique identifier of the incident.
+
+    Returns:
+    - dict: The incident document including its `version`, or None if it does not exist.
+    """
+    db = get_database_connection()
+    flush_pending_writes()
+    return db.incidents.find_one({"_id": incident_id})
+
+
+def get_incident_version(incident_id: str) -> int:
+    """
+    Returns the version of an incident with a projection-only read, or None if it does not exist.
+    """
+    db = get_database_connection()
+    flush_pending_writes()
+    incident = db.incidents.find_one({"_id": incident_id}, {"version": 1})
+    if not incident:
+        return None
+    return incident.get("version", 0)
+
+
+def list_incidents(status: str = None, limit: int = INCIDENT_LIST_DEFAULT_LIMIT, offset: int = 0) -> list:
+    """
+    Lists incidents, most recently created first.
+
+    Addresses:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+        - Requirement ID: TR-CM-005-3
+            - Description: Provide search and retrieval capabilities for historical incident data.
+
+    Parameters:
+    - status (str, optional): Only list incidents with this status.
+    - limit (int): Maximum number of incidents returned, capped at INCIDENT_LIST_MAX_LIMIT.
+    - offset (int): Number of incidents skipped.
+
+    Returns:
+    - list: The incident documents of the requested page.
+    """
+    # Step 1: Validate the paging parameters.
+    if limit < 1 or offset < 0:
+        raise ValueError("limit must be positive and offset must not be negative.")
+    limit = min(limit, INCIDENT_LIST_MAX_LIMIT)
+
+    # Step 2: Read the requested page, flushing any coalesced saves first.
+    db = get_database_connection()
+    flush_pending_writes()
+    query = {"status": status} if status else {}
+    return list(db.incidents.find(query).sort("_id", -1).skip(offset).limit(limit))
+
+
+def export_incidents(status: str = None, batch_size: int = 500):
+    """
+    Streams every incident for export without loading the collection into memory.
+
+    Addresses:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+        - Requirement ID: TR-CM-005-3
+            - Description: Provide search and retrieval capabilities for historical incident data.
+
+    Parameters:
+    - status (str, optional): Only export incidents with this status.
+    - batch_size (int): Number of incidents fetched per database round trip.
+
+    Returns:
+    - Iterator[dict]: The incident documents, most recently created first.
+    """
+    db = get_database_connection()
+    flush_pending_writes()
+    query = {"status": status} if status else {}
+    return db.incidents.find(query).sort("_id", -1).batch_size(batch_size)
+
+
+def _load_triage_queue(db) -> None:
+    """
+    Re-seeds the triage queue with the newest open, unassigned incidents, scoring them in one batch.
+
+    The read is bounded by TRIAGE_QUEUE_MAX_SIZE and projected to the scoring features; older
+    incidents re-enter the queue when their status changes.
+    """
+    open_incidents = list(db.incidents.find(
+        {"status": {"$nin": CLOSED_STATUS_VALUES}, "assigned_to": None},
+        dict.fromkeys(FEATURE_FIELDS, 1)
+    ).sort("detected_at", -1).limit(TRIAGE_QUEUE_MAX_SIZE))
+    triage_queue.reload(open_incidents)
+
+
+def next_triage_incident(analyst_id: str) -> dict:
+    """
+    Hands out the highest-priority open incident that is not yet assigned to an analyst.
+
+    The triage queue is kept per worker process and re-seeded from the database every
+    TRIAGE_REFRESH_SECONDS, so scores follow incident age and incidents created by other
+    workers are picked up; the claim itself is atomic across workers.
+
+    Addresses:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+        - Requirement ID: TR-IR-001-3
+            - Description: Enable real-time analysis of incidents using AI algorithms.
+        - Requirement ID: TR-IR-001-5
+            - Description: Ensure scalability to handle peak incident loads without degradation.
+
+    Parameters:
+    - analyst_id (str): The analyst claiming the incident.
+
+    Returns:
+    - dict: The claimed incident, or None if no unassigned incident is queued.
     """
     try:
-        # Step 1: Retrieve the incident data by incident_id.
+        # Step 1: Establish a database connection and flush coalesced saves.
         db = get_database_connection()
-        incident = db.incidents.find_one({"_id": incident_id})
-        if not incident:
-            print(f"Incident with ID {incident_id} not found.")
-            return []
-        
-        # Convert the incident data to an IncidentModel instance.
-        incident_data = IncidentModel.from_dict(incident)
-        
-        # Step 2: Call generate_recommendations with the incident data.
-        recommendations = generate_recommendations(incident_data)
-        
-        # Step 3: Return the list of recommendations.
-        return recommendations
+        flush_pending_writes()
+
+        # Step 2: Populate the triage queue from the database on first use and once it is stale.
+        if triage_queue.is_stale(TRIAGE_REFRESH_SECONDS):
+            _load_triage_queue(db)
+
+        # Step 3: Pop incidents by priority until one can be claimed atomically; incidents
+        # claimed or closed by another process in the meantime are skipped.
+        while True:
+            top = triage_queue.pop()
+            if top is None:
+                return None
+            incident_id, score = top
+            try:
+                incident = db.incidents.find_one_and_update(
+                    {"_id": incident_id, "assigned_to": None, "status": {"$nin": CLOSED_STATUS_VALUES}},
+                    {"$set": {"assigned_to": analyst_id, "assigned_at": datetime.utcnow()}, "$inc": {"version": 1}},
+                    return_document=ReturnDocument.AFTER
+                )
+            except Exception:
+                # The claim did not happen, so the incident goes back into the queue.
+                triage_queue.push(incident_id, score)
+                raise
+            if incident:
+                incident_cache.invalidate(str(incident_id))
+
+                # Step 4: Return the claimed incident with its triage score.
+                incident["_id"] = str(incident["_id"])
+                incident["triage_score"] = round(float(score), 4)
+                return incident
     except Exception as e:
         # Log the exception as per TR-LM-020-1.
-        print(f"Error analyzing incident: {e}")
-        return []
\ No newline at end of file
+        print(f"Error retrieving next triage incident: {e}")
+        return None
+
+
+def get_artifact_store() -> ArtifactStore:
+    """
+    Returns the process-wide artifact store rooted at ARTIFACT_STORAGE_PATH.
+    """
+    return _get_artifact_store(ARTIFACT_STORAGE_PATH, ARTIFACT_CHUNK_SIZE)
+
+
+def attach_artifact(incident_id: str, stream, filename: str, content_type: str) -> dict:
+    """
+    Streams an evidence artifact into content-addressed storage and links it to an incident.
+
+    Addresses:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+        - Requirement ID: TR-CM-005-1
+            - Description: Automatically log incident details, including AI-generated insights and manual actions.
+
+    Parameters:
+    - incident_id (str): The unique identifier of the incident the evidence belongs to.
+    - stream: Readable binary stream of the upload body.
+    - filename (str): Original file name supplied by the uploader.
+    - content_type (str): MIME type supplied by the uploader.
+
+    Returns:
+    - dict: The artifact metadata linked to the incident, or None if the incident does not exist.
+    """
+    # Step 1: Ensure the incident exists before accepting the upload.
+    db = get_database_connection()
+    flush_pending_writes()
+    if not db.incidents.find_one({"_id": incident_id}, {"_id": 1}):
+        print(f"Incident with ID {incident_id} not found.")
+        return None
+
+    # Step 2: Stream the upload to disk while hashing it; identical evidence is stored once.
+    digest, size, deduplicated = get_artifact_store().store_stream(stream, ARTIFACT_MAX_UPLOAD_BYTES)
+    artifact = {
+        "sha256": digest,
+        "size": size,
+        "filename": filename,
+        "content_type": content_type or "application/octet-stream",
+        "uploaded_at": datetime.utcnow().isoformat()
+    }
+
+    # Step 3: Link the artifact to the incident unless it is already attached.
+    db.incidents.update_one(
+        {"_id": incident_id, "artifacts.sha256": {"$ne": digest}},
+        {"$push": {"artifacts": artifact}, "$inc": {"version": 1}}
+    )
+    incident_cache.invalidate(incident_id)
+
+    # Step 4: Return the linked artifact metadata.
+    artifact["deduplicated"] = deduplicated
+    return artifact
+
+
+def get_incident_artifact(incident_id: str, digest: str) -> dict:
+    """
+    Returns the metadata of an artifact linked to an incident.
+
+    Addresses:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+        - Requirement ID: TR-CM-005-3
+            - Description: Provide search and retrieval capabilities for historical incident data.
+
+    Parameters:
+    - incident_id (str): The unique identifier of the incident.
+    - digest (str): SHA-256 digest of the artifact.
+
+    Returns:
+    - dict: The artifact metadata, or None if the artifact is not linked to the incident or not stored.
+    """
+    db = get_database_connection()
+    flush_pending_writes()
+    incident = db.incidents.find_one(
+        {"_id": incident_id, "artifacts.sha256": digest},
+        {"artifacts.$": 1}
+    )
+    if not incident or not get_artifact_store().exists(digest):
+        return None
+    return incident["artifacts"][0]
+
+
+def extract_and_store_indicators(batch_size: int = 500) -> int:
+    """
+    Backfills the indicators of compromise of stored incidents in batches.
+
+    Addresses:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+        - Requirement ID: TR-IR-001-3
+            - Description: Enable real-time analysis of incidents using AI algorithms.
+
+    Parameters:
+    - batch_size (int): Number of incidents extracted and written per bulk write.
+
+    Returns:
+    - int: The number of incidents whose indicators were stored.
+    """
+    # Step 1: Stream the text fields of every incident, flushing any coalesced saves first.
+    db = get_database_connection()
+    flush_pending_writes()
+    cursor = db.incidents.find({}, {"id": 1, "title": 1, "description": 1, "indicators": 1}).batch_size(batch_size)
+
+    # Step 2: Extract indicators one batch at a time and write them back with a single bulk write.
+    updated = 0
+    batch = []
+    for incident in cursor:
+        batch.append(incident)
+        if len(batch) >= batch_size:
+            updated += _store_indicator_batch(db, batch)
+            batch = []
+    if batch:
+        updated += _store_indicator_batch(db, batch)
+
+    # Step 3: Return the number of incidents processed.
+    return updated
+
+
+def _store_indicator_batch(db, incidents: list) -> int:
+    """
+    Extracts the indicators of a batch of incidents, stores them with one unordered bulk write and
+    applies the changes to the indicator reverse index.
+    """
+    indicators = default_extractor.extract_batch(incidents)
+    requests = [
+        UpdateOne({"_id": incident["_id"]}, {"$set": {"indicators": found}, "$inc": {"version": 1}})
+        for incident, found in zip(incidents, indicators)
+    ]
+    db.incidents.bulk_write(requests, ordered=False)
+    incident_cache.invalidate(*(incident["_id"] for incident in incidents))
+    get_indicator_index(db).apply(
+        (incident_key(incident), incident.get("indicators"), found)
+        for incident, found in zip(incidents, indicators)
+    )
+    return len(requests)
+
+
+def get_indicator_incidents(value: str) -> list:
+    """
+    Returns the incidents that mention an indicator, answered from the indicator reverse index.
+
+    Addresses:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+        - Requirement ID: TR-CM-005-3
+            - Description: Provide search and retrieval capabilities for historical incident data.
+
+    Parameters:
+    - value (str): The indicator value, e.g. an IP address, domain, URL or file hash; defanged
+      values are accepted.
+
+    Returns:
+    - list: One index entry per indicator type the value was seen as, each holding the
+      incident ids, incident count and first/last seen timestamps. Empty if never seen.
+    """
+    # Step 1: Flush coalesced saves so their indicators are indexed.
+    db = get_database_connection()
+    flush_pending_writes()
+
+    # Step 2: Answer the pivot from the reverse index.
+    return get_indicator_index(db).lookup(value)
+
+
+def lookup_indicators(values: list) -> dict:
+    """
+    Looks up many indicators in the reverse index in one call.
+
+    Addresses:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+        - Requirement ID: TR-CM-005-3
+            - Description: Provide search and retrieval capabilities for historical incident data.
+
+    Parameters:
+    - values (list): Indicator values to look up, at most INDICATOR_LOOKUP_MAX_VALUES.
+
+    Returns:
+    - dict: The index entries of each requested value; unknown values map to an empty list.
+    """
+    # Step 1: Validate the request size.
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError("Indicators must be provided as a list of strings.")
+    if len(values) > INDICATOR_LOOKUP_MAX_VALUES:
+        raise ValueError(f"At most {INDICATOR_LOOKUP_MAX_VALUES} indicators can be looked up per request.")
+
+    # Step 2: Flush coalesced saves and answer every value from the reverse index.
+    db = get_database_connection()
+    flush_pending_writes()
+    return get_indicator_index(db).lookup_many(values)
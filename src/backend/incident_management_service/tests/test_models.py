@@ -1,8 +1,24 @@
+import datetime  # Builds incident detection timestamps. (builtin)
+import io  # Provides in-memory streams for artifact uploads. (builtin)
+import os  # Inspects the artifact store directories. (builtin)
+import shutil  # Removes temporary artifact stores. (builtin)
+import tempfile  # Creates temporary artifact store directories. (builtin)
+import threading  # Runs a flush concurrently with a discard. (builtin)
+import types  # Builds a stand-in database handle for the triage claim. (builtin)
 import unittest  # Provides a framework for constructing and running tests. (builtin)
+from unittest import mock  # Patches the database connection used by the services. (builtin)
+from bson import ObjectId  # Ships with pymongo 3.6.3; MongoDB's default document id type.
 from pymongo import MongoClient  # Version 3.6.3, Provides the MongoDB client for connecting to the database and executing operations.
 
 from src.backend.incident_management_service.models import IncidentModel  # Defines the data model for managing security incidents.
 from src.backend.incident_management_service.config import get_database_connection  # Establishes a connection to the MongoDB database using the configured URI.
+from src.backend.incident_management_service.write_coalescer import IncidentWriteCoalescer  # Merges repeated incident upserts into batched bulk writes.
+from src.backend.incident_management_service import models, services, write_coalescer  # Incident model, services and the process-wide coalescer, patched by the cache, triage and flush-on-read tests.
+from src.backend.incident_management_service.triage import TriageQueue, score_incidents  # Triage scoring and priority queue.
+from src.backend.incident_management_service.artifacts import ArtifactStore, content_disposition, parse_range_header  # Content-addressed evidence storage.
+from src.backend.incident_management_service.ioc_extraction import IOCExtractor, refang  # Indicator of compromise extraction.
+from src.backend.incident_management_service.indicator_index import build_cleanup_operations, build_index_operations, lookup_values  # Indicator reverse index.
+from src.backend.incident_management_service.http_cache import ETagCache, choose_encoding, etag_matches, make_etag  # HTTP caching helpers.
 
 class TestIncidentModel(unittest.TestCase):
     """
@@ -110,5 +126,538 @@ class TestIncidentModel(unittest.TestCase):
         deleted_incident = self.incident_collection.find_one({'title': 'Test Delete Incident'})
         self.assertIsNone(deleted_incident)
 
+class _RecordingCollection:
+    """
+    Minimal stand-in for a pymongo collection that records bulk_write calls.
+    """
+
+    def __init__(self):
+        self.bulk_writes = []
+
+    def bulk_write(self, operations, ordered=True):
+        self.bulk_writes.append(operations)
+
+
+class _UpsertingCollection(_RecordingCollection):
+    """
+    Stand-in collection that applies coalesced upserts, giving each new incident an `_id` distinct from its `id`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.documents = {}
+
+    def bulk_write(self, operations, ordered=True):
+        super().bulk_write(operations, ordered)
+        for operation in operations:
+            incident_id = operation._filter['id']
+            document = self.documents.setdefault(incident_id, {'_id': f'oid-{incident_id}', 'version': 0})
+            document.update(operation._doc['$set'])
+            document['version'] += operation._doc['$inc']['version']
+
+    def find(self, query, projection=None):
+        return [document for incident_id, document in self.documents.items() if incident_id in query['id']['$in']]
+
+    def find_one(self, query, projection=None):
+        return next((document for document in self.documents.values() if document['_id'] == query['_id']), None)
+
+
+class TestIncidentWriteCoalescer(unittest.TestCase):
+    """
+    Test suite for the IncidentWriteCoalescer, ensuring repeated saves are merged into one bulk write.
+
+    Requirements Addressed:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+      - TR-CM-005-1: Automatically log incident details, including AI-generated insights and manual actions.
+    """
+
+    def setUp(self):
+        self.collection = _RecordingCollection()
+        # A long window keeps the timer from flushing while the test runs.
+        self.coalescer = IncidentWriteCoalescer(lambda: self.collection, window_seconds=60)
+
+    def tearDown(self):
+        # Flushes leftovers and cancels the window timer so no thread outlives the test.
+        self.coalescer.close()
+
+    def test_repeated_saves_are_merged_per_incident(self):
+        """
+        Tests that several saves of the same incident produce a single upsert with the latest fields.
+        """
+        self.coalescer.enqueue('incident-1', {'status': 'Open', 'title': 'Phishing'})
+        self.coalescer.enqueue('incident-1', {'status': 'Investigating'})
+        self.coalescer.enqueue('incident-2', {'status': 'Open'})
+
+        self.assertEqual(self.coalescer.flush(), 2)
+        self.assertEqual(len(self.collection.bulk_writes), 1)
+        operations = {op._filter['id']: op._doc['$set'] for op in self.collection.bulk_writes[0]}
+        self.assertEqual(operations['incident-1'], {'status': 'Investigating', 'title': 'Phishing'})
+        self.assertFalse(self.coalescer.has_pending())
+
+    def test_flush_for_incident_without_pending_writes_is_a_no_op(self):
+        """
+        Tests that flush-on-read skips the database when the incident has nothing buffered.
+        """
+        self.coalescer.enqueue('incident-1', {'status': 'Open'})
+        self.assertEqual(self.coalescer.flush('incident-2'), 0)
+        self.assertEqual(self.collection.bulk_writes, [])
+        self.assertTrue(self.coalescer.has_pending('incident-1'))
+
+    def test_failed_flush_requeues_the_batch_and_rearms_the_timer(self):
+        """
+        Tests that a failed flush keeps the updates buffered and schedules another attempt.
+        """
+        def failing_write(operations, ordered=True):
+            raise RuntimeError('primary stepped down')
+
+        self.collection.bulk_write = failing_write
+        self.coalescer.enqueue('incident-1', {'status': 'Open'})
+        with self.assertRaises(RuntimeError):
+            self.coalescer.flush()
+
+        self.assertTrue(self.coalescer.has_pending('incident-1'))
+        self.assertIsNotNone(self.coalescer._timer)
+
+        # Let the tearDown flush succeed so it cancels the re-armed timer.
+        del self.collection.bulk_write
+
+    def test_failing_flushes_back_off_up_to_the_ceiling(self):
+        """
+        Tests that each failed flush doubles the retry delay up to the ceiling and a success resets it.
+        """
+        def failing_write(operations, ordered=True):
+            raise RuntimeError('primary stepped down')
+
+        self.coalescer.max_backoff_seconds = 200
+        self.collection.bulk_write = failing_write
+        self.coalescer.enqueue('incident-1', {'status': 'Open'})
+        delays = []
+        for _ in range(3):
+            with self.assertRaises(RuntimeError):
+                self.coalescer.flush()
+            delays.append(self.coalescer._timer.interval)
+        self.assertEqual(delays, [120, 200, 200])
+
+        del self.collection.bulk_write
+        self.assertEqual(self.coalescer.flush(), 1)
+        self.coalescer.enqueue('incident-1', {'status': 'Closed'})
+        self.assertEqual(self.coalescer._timer.interval, 60)
+
+    def test_read_flush_errors_are_logged_instead_of_raised(self):
+        """
+        Tests that flush-on-read serves the read when the flush fails, keeping the updates buffered.
+        """
+        def failing_write(operations, ordered=True):
+            raise RuntimeError('primary stepped down')
+
+        self.collection.bulk_write = failing_write
+        self.coalescer.enqueue('incident-1', {'status': 'Open'})
+        with mock.patch.object(write_coalescer, '_coalescer', self.coalescer), \
+                self.assertLogs(write_coalescer.logger, level='WARNING'):
+            self.assertEqual(write_coalescer.flush_pending_writes(), 0)
+        self.assertTrue(self.coalescer.has_pending('incident-1'))
+
+        del self.collection.bulk_write
+
+    def test_discard_waits_for_an_in_flight_flush(self):
+        """
+        Tests that discarding an incident returns only after a flush already writing it has finished.
+        """
+        writing, release = threading.Event(), threading.Event()
+        recorded = self.collection.bulk_write
+
+        def slow_write(operations, ordered=True):
+            writing.set()
+            release.wait(5)
+            recorded(operations, ordered)
+
+        self.collection.bulk_write = slow_write
+        self.coalescer.enqueue('incident-1', {'status': 'Open'})
+        flusher = threading.Thread(target=self.coalescer.flush)
+        flusher.start()
+        self.assertTrue(writing.wait(5))
+
+        discarder = threading.Thread(target=self.coalescer.discard, args=('incident-1',))
+        discarder.start()
+        discarder.join(0.2)
+        self.assertTrue(discarder.is_alive())
+
+        release.set()
+        flusher.join(5)
+        discarder.join(5)
+        self.assertFalse(discarder.is_alive())
+        self.assertEqual(len(self.collection.bulk_writes), 1)
+
+    def test_coalesced_save_is_visible_to_a_following_read(self):
+        """
+        Tests that a coalesced save is flushed by the services before they read the incident back.
+        """
+        collection = _UpsertingCollection()
+        db = types.SimpleNamespace(incidents=collection)
+        incident = models.IncidentModel(id='INC-7', title='Phishing', description='Credential harvesting page',
+                                        status='Open', detected_at=datetime.datetime(2023, 10, 5, 12, 34, 56),
+                                        resolved_at=None, user_id='analyst-1')
+        with mock.patch.object(write_coalescer, '_coalescer', None), \
+                mock.patch.object(models, 'WRITE_COALESCING_ENABLED', True), \
+                mock.patch.object(models, 'WRITE_COALESCING_WINDOW_SECONDS', 60), \
+                mock.patch.object(models, '_get_incidents_collection', return_value=collection), \
+                mock.patch.object(models, '_index_coalesced_indicators', lambda collection, batch: None), \
+                mock.patch.object(services, 'get_database_connection', return_value=db):
+            self.assertTrue(incident.save())
+            self.assertEqual(collection.bulk_writes, [])
+            stored = services.get_incident('oid-INC-7')
+
+        self.assertEqual(len(collection.bulk_writes), 1)
+        self.assertEqual((stored['status'], stored['version']), ('Open', 1))
+
+class TestTriageQueue(unittest.TestCase):
+    """
+    Test suite for triage scoring and the indexed priority queue of open incidents.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-3: Enable real-time analysis of incidents using AI algorithms.
+    """
+
+    def setUp(self):
+        self.incidents = [
+            {'_id': 'low', 'severity': 'Low', 'source': 'user_report', 'detected_at': '2023-10-05T12:00:00Z'},
+            {'_id': 'critical', 'severity': 'Critical', 'source': 'edr', 'asset_criticality': 'critical',
+             'detected_at': '2023-10-05T12:00:00Z', 'duplicate_count': 12},
+            {'_id': 'medium', 'severity': 'Medium', 'source': 'siem', 'detected_at': '2023-10-05T12:00:00Z'},
+        ]
+        self.queue = TriageQueue()
+        self.queue.push_many(self.incidents)
+
+    def test_scores_are_computed_per_incident(self):
+        """
+        Tests that a batch is scored in input order and ranks the critical incident highest.
+        """
+        scores = score_incidents(self.incidents)
+        self.assertEqual(len(scores), 3)
+        self.assertEqual(int(scores.argmax()), 1)
+
+    def test_pop_returns_incidents_by_priority(self):
+        """
+        Tests that incidents are handed out from highest to lowest score.
+        """
+        order = [self.queue.pop()[0] for _ in range(3)]
+        self.assertEqual(order, ['critical', 'medium', 'low'])
+        self.assertIsNone(self.queue.pop())
+
+    def test_status_change_reprioritizes_and_removes(self):
+        """
+        Tests that closing an incident removes it and escalating one moves it to the front.
+        """
+        self.queue.on_status_change({'_id': 'critical', 'status': 'Resolved'})
+        self.assertNotIn('critical', self.queue)
+        self.queue.on_status_change({'_id': 'low', 'status': 'Open', 'severity': 'Critical',
+                                     'source': 'edr', 'asset_criticality': 'critical'})
+        self.assertEqual(self.queue.peek()[0], 'low')
+        self.assertEqual(len(self.queue), 2)
+
+class _TriageCollection:
+    """
+    Minimal stand-in for the incidents collection used by the triage claim.
+    """
+
+    def __init__(self, incidents, failures=0):
+        self.incidents = incidents
+        self.failures = failures
+
+    def find(self, query, projection=None):
+        return _TriageCursor([incident for incident in self.incidents if incident.get('assigned_to') is None])
+
+    def find_one_and_update(self, query, update, return_document=None):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('connection reset')
+        for incident in self.incidents:
+            if incident['_id'] == query['_id'] and incident.get('assigned_to') is None:
+                incident.update(update['$set'])
+                return dict(incident)
+        return None
+
+
+class _TriageCursor(list):
+    """
+    List of documents with the chained sort and limit of a pymongo cursor; sort keeps insertion order.
+    """
+
+    def sort(self, key, direction):
+        return self
+
+    def limit(self, count):
+        return _TriageCursor(self[:count])
+
+
+class TestTriageClaim(unittest.TestCase):
+    """
+    Test suite for claiming the next triage incident from documents keyed by ObjectIds.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+    """
+
+    def setUp(self):
+        self.critical_id, self.low_id = ObjectId(), ObjectId()
+        self.collection = _TriageCollection([
+            {'_id': self.low_id, 'severity': 'Low', 'status': 'Open', 'assigned_to': None},
+            {'_id': self.critical_id, 'severity': 'Critical', 'source': 'edr', 'status': 'Open', 'assigned_to': None},
+        ])
+        db = types.SimpleNamespace(incidents=self.collection)
+        self.patches = [
+            mock.patch.object(services, 'get_database_connection', return_value=db),
+            mock.patch.object(services, 'flush_pending_writes'),
+            mock.patch.object(services, 'triage_queue', TriageQueue()),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def test_highest_priority_incident_is_claimed(self):
+        """
+        Tests that the popped ObjectId matches the stored document and the claim succeeds.
+        """
+        incident = services.next_triage_incident('analyst-1')
+        self.assertIsNotNone(incident)
+        self.assertEqual(incident['_id'], str(self.critical_id))
+        self.assertEqual(incident['assigned_to'], 'analyst-1')
+        self.assertEqual(services.next_triage_incident('analyst-2')['_id'], str(self.low_id))
+
+    def test_failed_claim_requeues_the_incident(self):
+        """
+        Tests that an incident popped for a claim that raised is put back into the queue.
+        """
+        self.collection.failures = 1
+        self.assertIsNone(services.next_triage_incident('analyst-1'))
+        self.assertIn(self.critical_id, services.triage_queue)
+        self.assertEqual(services.next_triage_incident('analyst-1')['_id'], str(self.critical_id))
+
+    def test_stale_queue_is_reseeded_with_a_bounded_read(self):
+        """
+        Tests that the seed read is bounded and that a stale queue picks up incidents added elsewhere.
+        """
+        with mock.patch.object(services, 'TRIAGE_QUEUE_MAX_SIZE', 1):
+            self.assertEqual(services.next_triage_incident('analyst-1')['_id'], str(self.low_id))
+            self.assertIsNone(services.next_triage_incident('analyst-1'))
+
+            # Another worker creates an incident; this queue only sees it once it is re-seeded.
+            other_id = ObjectId()
+            self.collection.incidents.insert(0, {'_id': other_id, 'severity': 'High', 'status': 'Open', 'assigned_to': None})
+            with mock.patch.object(services, 'TRIAGE_REFRESH_SECONDS', 0):
+                self.assertEqual(services.next_triage_incident('analyst-2')['_id'], str(other_id))
+
+class TestArtifactStore(unittest.TestCase):
+    """
+    Test suite for the content-addressed artifact store used for incident evidence.
+
+    Requirements Addressed:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+      - TR-CM-005-1: Automatically log incident details, including AI-generated insights and manual actions.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        # A tiny chunk size exercises the chunked upload and download paths.
+        self.store = ArtifactStore(self.root, chunk_size=4)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_identical_uploads_are_stored_once(self):
+        """
+        Tests that uploading the same content twice yields the same digest and a single blob.
+        """
+        digest, size, deduplicated = self.store.store_stream(io.BytesIO(b'pcap-bytes'))
+        self.assertEqual((size, deduplicated), (10, False))
+        second_digest, _, deduplicated = self.store.store_stream(io.BytesIO(b'pcap-bytes'))
+        self.assertEqual(second_digest, digest)
+        self.assertTrue(deduplicated)
+        self.assertEqual(os.listdir(os.path.join(self.root, 'tmp')), [])
+
+    def test_range_reads(self):
+        """
+        Tests that byte ranges are parsed per RFC 7233 and served from the stored artifact.
+        """
+        digest, size, _ = self.store.store_stream(io.BytesIO(b'0123456789'))
+        self.assertEqual(parse_range_header('bytes=2-5', size), (2, 5))
+        self.assertEqual(parse_range_header('bytes=-3', size), (7, 9))
+        self.assertIsNone(parse_range_header(None, size))
+        with self.assertRaises(ValueError):
+            parse_range_header('bytes=20-', size)
+        self.assertEqual(b''.join(self.store.iter_range(digest, 2, 5)), b'2345')
+
+    def test_invalid_digest_is_rejected(self):
+        """
+        Tests that only SHA-256 digests can be resolved to storage paths.
+        """
+        with self.assertRaises(ValueError):
+            self.store.path_for('../../etc/passwd')
+
+    def test_download_file_name_cannot_break_out_of_the_header(self):
+        """
+        Tests that quotes and line breaks in an uploaded file name are neutralized in Content-Disposition.
+        """
+        header = content_disposition('dump".exe\r\nSet-Cookie: a=b')
+        self.assertEqual(header.split('; filename*=')[0], 'attachment; filename="dump_.exe__Set-Cookie: a=b"')
+        self.assertIn("filename*=UTF-8''dump%22.exe%0D%0ASet-Cookie%3A%20a%3Db", header)
+        self.assertNotIn('\n', header)
+
+class TestIOCExtraction(unittest.TestCase):
+    """
+    Test suite for the extraction of indicators of compromise from incident text.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-3: Enable real-time analysis of incidents using AI algorithms.
+    """
+
+    def setUp(self):
+        self.extractor = IOCExtractor(['mimikatz', 'powershell -enc'])
+
+    def test_defanged_indicators_are_normalized(self):
+        """
+        Tests that defanged URLs, domains and IPs are refanged and normalized.
+        """
+        self.assertEqual(refang('hxxp://evil[.]com'), 'http://evil.com')
+        indicators = self.extractor.extract('Beacon to hxxps://Evil[.]Example[.]com/a and 10.0.0[.]5, see evil[dot]net')
+        self.assertIn({'type': 'url', 'value': 'https://evil.example.com/a'}, indicators)
+        self.assertIn({'type': 'domain', 'value': 'evil.example.com'}, indicators)
+        self.assertIn({'type': 'ipv4', 'value': '10.0.0.5'}, indicators)
+        self.assertIn({'type': 'domain', 'value': 'evil.net'}, indicators)
+
+    def test_hashes_emails_and_keywords(self):
+        """
+        Tests that hashes, e-mail addresses and known-bad strings are extracted once each.
+        """
+        md5 = 'D41D8CD98F00B204E9800998ECF8427E'
+        text = f'Phish from attacker@bad.org dropped {md5} ({md5}); ran Mimikatz via powershell -enc'
+        indicators = self.extractor.extract(text)
+        self.assertIn({'type': 'email', 'value': 'attacker@bad.org'}, indicators)
+        self.assertEqual(indicators.count({'type': 'md5', 'value': md5.lower()}), 1)
+        self.assertIn({'type': 'keyword', 'value': 'mimikatz'}, indicators)
+        self.assertIn({'type': 'keyword', 'value': 'powershell -enc'}, indicators)
+
+    def test_file_names_are_not_domains(self):
+        """
+        Tests that file names in prose are not reported as domains.
+        """
+        indicators = self.extractor.extract('User opened invoice.pdf and ran dropper.exe')
+        self.assertEqual(indicators, [])
+
+class TestIndicatorIndex(unittest.TestCase):
+    """
+    Test suite for the incremental maintenance of the indicator-to-incident reverse index.
+
+    Requirements Addressed:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+      - TR-CM-005-3: Provide search and retrieval capabilities for historical incident data.
+    """
+
+    def setUp(self):
+        self.ip = {'type': 'ipv4', 'value': '10.0.0.5'}
+        self.domain = {'type': 'domain', 'value': 'evil.com'}
+
+    def test_only_changed_indicators_are_written(self):
+        """
+        Tests that unchanged indicators produce no writes and added/removed ones produce one each.
+        """
+        self.assertEqual(build_index_operations([('incident-1', [self.ip], [self.ip])]), [])
+        operations = build_index_operations([('incident-1', [self.ip], [self.domain])])
+        self.assertEqual(len(operations), 2)
+        # The added indicator is upserted; the removed one is pulled, never upserted.
+        self.assertEqual(operations[0]._filter, self.domain)
+        self.assertTrue(operations[0]._upsert)
+        self.assertEqual(operations[0]._doc['$addToSet'], {'incident_ids': 'incident-1'})
+        self.assertEqual(operations[1]._filter, dict(self.ip, incident_ids='incident-1'))
+
+    def test_emptied_entries_are_deleted_after_the_pull(self):
+        """
+        Tests that only removed indicators are cleaned up, and only once no incident is left.
+        """
+        cleanup = build_cleanup_operations([('incident-1', [self.ip], [self.domain])])
+        self.assertEqual([operation._filter for operation in cleanup],
+                         [dict(self.ip, incident_ids={'$size': 0})])
+
+    def test_lookup_values_accept_defanged_input(self):
+        """
+        Tests that lookups normalize defanged and mixed-case values to their stored form.
+        """
+        self.assertIn('10.0.0.5', lookup_values('10.0.0[.]5'))
+        self.assertIn('evil.com', lookup_values('EVIL[.]com'))
+
+class TestHTTPCache(unittest.TestCase):
+    """
+    Test suite for the version-based ETags, ETag cache and content negotiation of incident read endpoints.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+    """
+
+    def test_etag_matching_uses_weak_comparison(self):
+        """
+        Tests that If-None-Match lists, weak validators and '*' are honored.
+        """
+        etag = make_etag('incident', 3)
+        self.assertTrue(etag_matches('"other", "incident-3"', etag))
+        self.assertTrue(etag_matches('*', etag))
+        self.assertFalse(etag_matches(make_etag('incident', 4), etag))
+        self.assertFalse(etag_matches(None, etag))
+
+    def test_cache_invalidation_and_eviction(self):
+        """
+        Tests that invalidating an incident drops all its representations and old incidents are evicted.
+        """
+        cache = ETagCache(max_entries=2)
+        cache.put('incident-1', 'incident', 'W/"incident-1"', b'{}')
+        cache.put('incident-1', 'recommendations', 'W/"recommendations-1"', b'[]')
+        cache.invalidate('incident-1')
+        self.assertIsNone(cache.get('incident-1', 'recommendations'))
+        for incident_id in ('incident-2', 'incident-3', 'incident-4'):
+            cache.put(incident_id, 'incident', 'W/"incident-1"', b'{}')
+        self.assertIsNone(cache.get('incident-2', 'incident'))
+        self.assertIsNotNone(cache.get('incident-4', 'incident'))
+
+    def test_encoding_negotiation(self):
+        """
+        Tests that gzip is chosen when accepted and nothing is chosen when it is refused.
+        """
+        self.assertIn(choose_encoding('gzip, deflate'), ('gzip', 'br'))
+        self.assertIsNone(choose_encoding('gzip;q=0, identity'))
+        self.assertIsNone(choose_encoding(None))
+
+    def test_coalesced_flush_invalidates_the_route_key(self):
+        """
+        Tests that a coalesced save invalidates the cache under the `_id` used by the read endpoints.
+        """
+        document_id = ObjectId()
+        cache = ETagCache()
+        cache.put(str(document_id), 'incident', 'W/"incident-1"', b'{}')
+        collection = mock.Mock()
+        collection.find.return_value = [{'_id': document_id}]
+        with mock.patch.object(models, 'incident_cache', cache):
+            models._invalidate_coalesced_incidents(collection, {'INC-1': {'status': 'Open'}})()
+        self.assertIsNone(cache.get(str(document_id), 'incident'))
+
+    def test_failed_analysis_is_raised_for_the_cache(self):
+        """
+        Tests that a failing analysis raises for the cached endpoint instead of yielding an empty list.
+        """
+        db = types.SimpleNamespace(incidents=mock.Mock())
+        db.incidents.find_one.return_value = {'_id': 'incident-1'}
+        with mock.patch.object(services, 'get_database_connection', return_value=db), \
+                mock.patch.object(services, 'flush_pending_writes'), \
+                mock.patch.object(services, 'IncidentModel'), \
+                mock.patch.object(services, 'generate_recommendations', side_effect=RuntimeError('model offline')):
+            with self.assertRaises(RuntimeError):
+                services.generate_incident_recommendations('incident-1')
+            self.assertEqual(services.analyze_incident('incident-1'), [])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -7,6 +7,8 @@ Requirements Addressed:
 """
 
 # External dependencies
+import re  # Normalizes Flask route placeholders to the ASGI form. (builtin)
+import types  # Builds the insert result returned by the Motor-shaped collection. (builtin)
 import pytest  # pytest version 6.2.4
 import requests  # requests version 2.25.1
 from flask import Flask  # Flask version 1.1.2
@@ -17,7 +19,8 @@ from src.backend.incident_management_service.routes import register_routes  # Re
 from src.backend.incident_management_service.controllers import (
     create_incident_controller,          # Handles the logic for creating a new incident
     update_incident_status_controller,   # Handles the logic for updating the status of an existing incident
-    analyze_incident_controller          # Handles the logic for analyzing an incident and providing AI-driven recommendations
+    analyze_incident_controller,         # Handles the logic for analyzing an incident and providing AI-driven recommendations
+    next_triage_incident_controller      # Handles the logic for handing out the highest-priority unassigned incident
 )
 
 @pytest.fixture
@@ -137,4 +140,347 @@ def test_analyze_incident(client):
     # Step 5: Assert that the response contains AI-generated recommendations.
     response_data = response.get_json()
     assert 'recommendations' in response_data
-    assert isinstance(response_data['recommendations'], list)
\ No newline at end of file
+    assert isinstance(response_data['recommendations'], list)
+
+def test_next_triage_incident(client):
+    """
+    Tests the '/incidents/triage/next' GET route for claiming the highest-priority incident.
+
+    Steps:
+    1. Set up a test client for the Flask application.
+    2. Create a low and a critical incident.
+    3. Send a GET request to the '/incidents/triage/next' endpoint without an analyst.
+    4. Assert that the request is rejected with 400 (Bad Request).
+    5. Send a GET request with an analyst_id and assert the critical incident is handed out.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+    """
+    # Step 2: Create a low and a critical incident.
+    for title, severity in (("Low Incident", "Low"), ("Critical Incident", "Critical")):
+        create_response = client.post('/incidents', json={
+            "title": title,
+            "description": "This incident will be triaged.",
+            "severity": severity,
+            "detected_at": "2023-10-05T13:00:00Z"
+        })
+        assert create_response.status_code == 201
+
+    # Steps 3-4: An analyst must be identified to claim an incident.
+    response = client.get('/incidents/triage/next')
+    assert response.status_code == 400
+
+    # Step 5: The critical incident is handed out first and assigned to the analyst.
+    response = client.get('/incidents/triage/next?analyst_id=analyst-1')
+    assert response.status_code == 200
+    incident = response.get_json()['incident']
+    assert incident['title'] == "Critical Incident"
+    assert incident['assigned_to'] == "analyst-1"
+
+def test_indicator_pivot_and_bulk_lookup(client):
+    """
+    Tests the '/indicators/<value>/incidents' GET and '/indicators/lookup' POST routes.
+
+    Steps:
+    1. Set up a test client for the Flask application.
+    2. Create an incident whose description mentions a defanged IP address.
+    3. Pivot from the IP address to its incidents and assert the incident is returned.
+    4. Look up the IP address and an unknown value in bulk.
+    5. Assert that the unknown value maps to no entries and that a missing body is rejected.
+
+    Requirements Addressed:
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+    """
+    # Step 2: Create an incident mentioning a defanged IP address.
+    create_response = client.post('/incidents', json={
+        "title": "Beaconing Incident",
+        "description": "Workstation beaconing to 203.0.113[.]7 every 60 seconds.",
+        "detected_at": "2023-10-05T14:00:00Z"
+    })
+    assert create_response.status_code == 201
+
+    # Step 3: Pivot from the indicator to its incidents.
+    response = client.get('/indicators/203.0.113.7/incidents')
+    assert response.status_code == 200
+    matches = response.get_json()['matches']
+    assert matches[0]['type'] == 'ipv4'
+    assert matches[0]['incident_count'] >= 1
+
+    # Steps 4-5: Bulk lookup answers known and unknown indicators in one call.
+    response = client.post('/indicators/lookup', json={"indicators": ["203.0.113[.]7", "198.51.100.99"]})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert results["203.0.113[.]7"][0]['value'] == '203.0.113.7'
+    assert results["198.51.100.99"] == []
+    assert client.post('/indicators/lookup', json={}).status_code == 400
+
+def test_incident_conditional_get_and_compression(client):
+    """
+    Tests ETag-based conditional requests on '/incidents/<incident_id>' and compression of '/incidents'.
+
+    Steps:
+    1. Set up a test client for the Flask application.
+    2. Create an incident and fetch it to obtain its ETag.
+    3. Re-fetch it with If-None-Match and assert a 304 (Not Modified) without a body.
+    4. Update the incident status and assert the old ETag no longer matches.
+    5. List incidents with gzip accepted and assert the response is compressed when large.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+    """
+    # Step 2: Create an incident and fetch it.
+    create_response = client.post('/incidents', json={
+        "title": "Polled Incident",
+        "description": "Incident re-fetched by an analyst console. " * 40,
+        "detected_at": "2023-10-05T15:00:00Z"
+    })
+    assert create_response.status_code == 201
+    incident_id = create_response.get_json()['incident']['id']
+    response = client.get(f'/incidents/{incident_id}')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    # Step 3: An unchanged incident is answered with 304 Not Modified.
+    response = client.get(f'/incidents/{incident_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    # Step 4: Any write changes the version and therefore the ETag.
+    client.put(f'/incidents/{incident_id}/status', json={"status": "Investigating"})
+    response = client.get(f'/incidents/{incident_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+    # Step 5: Large list responses are compressed when the client accepts gzip.
+    response = client.get('/incidents', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers.get('Content-Encoding') == 'gzip'
+
+class _IncidentsCollection:
+    """
+    In-memory stand-in for the incidents collection read and updated by the incident routes.
+    """
+
+    def __init__(self, *documents):
+        self.documents = {document['_id']: dict(document) for document in documents}
+
+    def find_one(self, query, projection=None):
+        document = self.documents.get(query['_id'])
+        return dict(document) if document else None
+
+    def update_one(self, query, update):
+        document = self.documents[query['_id']]
+        document.update(update.get('$set', {}))
+        for field, amount in update.get('$inc', {}).items():
+            document[field] = document.get(field, 0) + amount
+        return types.SimpleNamespace(matched_count=1, modified_count=1)
+
+def test_status_change_invalidates_the_cached_etag(client, monkeypatch):
+    """
+    Tests that a status update through the routes drops the ETag the read route answers 304s from.
+
+    Steps:
+    1. Serve an incident from an in-memory collection and fetch it to obtain its ETag.
+    2. Re-fetch it with If-None-Match and assert a 304 (Not Modified).
+    3. Update its status, re-fetch it with the old ETag and assert a 200 with a new ETag.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+    """
+    from src.backend.incident_management_service import services
+    from src.backend.incident_management_service.triage import TriageQueue
+
+    # Step 1: Serve an incident from an in-memory collection and fetch it.
+    incidents = _IncidentsCollection({'_id': 'incident-304', 'title': 'Cached incident', 'status': 'Open', 'version': 1})
+    monkeypatch.setattr(services, 'get_database_connection', lambda: types.SimpleNamespace(incidents=incidents))
+    monkeypatch.setattr(services, 'triage_queue', TriageQueue())
+    response = client.get('/incidents/incident-304')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    # Step 2: The cached ETag answers the conditional request.
+    assert client.get('/incidents/incident-304', headers={'If-None-Match': etag}).status_code == 304
+
+    # Step 3: The status update invalidates the cache entry the read route uses.
+    assert client.put('/incidents/incident-304/status', json={'status': 'Closed'}).status_code == 200
+    response = client.get('/incidents/incident-304', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['incident']['status'] == 'Closed'
+
+def test_asgi_app_exposes_incident_routes():
+    """
+    Tests that the ASGI entry point serves the same incident and indicator routes as the Flask application.
+
+    Steps:
+    1. Collect the incident routes registered on the Flask application.
+    2. Collect the routes registered on the ASGI application.
+    3. Assert that both expose the same paths.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+    """
+    from src.backend.incident_management_service.asgi import app as asgi_app
+
+    # Step 1: Flask uses <converter:param> placeholders; normalize them to the ASGI {param:converter} form.
+    flask_paths = {
+        re.sub(r'<(?:(\w+):)?(\w+)>', lambda m: '{%s%s}' % (m.group(2), ':' + m.group(1) if m.group(1) else ''), rule.rule)
+        for rule in create_app().url_map.iter_rules()
+        if rule.rule.startswith(('/incidents', '/indicators'))
+    }
+
+    # Step 2: Collect the ASGI route paths.
+    asgi_paths = {route.path for route in asgi_app.routes}
+
+    # Step 3: Assert that both applications expose the same incident and indicator routes.
+    assert flask_paths == asgi_paths
+
+class _MotorCollection:
+    """
+    Motor-shaped collection recording inserted documents.
+    """
+
+    def __init__(self):
+        self.documents = []
+
+    async def find_one(self, query, projection=None):
+        return next((document for document in self.documents
+                     if all(document.get(key) == value for key, value in query.items())), None)
+
+    async def _find(self, query):
+        values = query['value']['$in']
+        for document in self.documents:
+            if document.get('value') in values:
+                yield {key: value for key, value in document.items() if key != '_id'}
+
+    def find(self, query, projection=None):
+        return self._find(query)
+
+    async def insert_one(self, document):
+        document['_id'] = len(self.documents) + 1
+        self.documents.append(document)
+        return types.SimpleNamespace(inserted_id=document['_id'])
+
+    async def bulk_write(self, operations, ordered=True):
+        return None
+
+
+class _MotorDatabase:
+    """
+    Motor-shaped database: attribute and item access return collections.
+    """
+
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, _MotorCollection())
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+class _MotorClient:
+    """
+    Motor-shaped client: attribute and item access return databases, as on AsyncIOMotorClient.
+    """
+
+    def __init__(self):
+        self.databases = {}
+        self.closed = False
+
+    def __getitem__(self, name):
+        return self.databases.setdefault(name, _MotorDatabase())
+
+    def __getattr__(self, name):
+        return self[name]
+
+    def get_default_database(self):
+        return self['incidents']
+
+    def close(self):
+        self.closed = True
+
+def test_asgi_app_writes_to_the_default_database(monkeypatch):
+    """
+    Tests that the ASGI handlers use the database from DATABASE_URI rather than the Motor client.
+
+    Steps:
+    1. Serve the ASGI application with a Motor-shaped client.
+    2. Create an incident through the ASGI route.
+    3. Assert that it was inserted into the incidents collection of the default database.
+    4. Assert that the client is closed on shutdown.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+    """
+    from starlette.testclient import TestClient  # Starlette version 0.14.2
+    from src.backend.incident_management_service import asgi
+
+    # Step 1: Serve the ASGI application with a Motor-shaped client.
+    motor_client = _MotorClient()
+    monkeypatch.setattr(asgi, 'get_async_database_connection', lambda: motor_client)
+
+    with TestClient(asgi.create_asgi_app()) as asgi_client:
+        # Step 2: Create an incident through the ASGI route.
+        response = asgi_client.post('/incidents', json={'title': 'Beaconing host', 'severity': 'High'})
+        assert response.status_code == 201
+
+    # Step 3: Assert that it was inserted into the incidents collection of the default database.
+    documents = motor_client['incidents']['incidents'].documents
+    assert [document['title'] for document in documents] == ['Beaconing host']
+
+    # Step 4: Assert that the client is closed on shutdown.
+    assert motor_client.closed
+
+def test_asgi_app_caches_recommendations_and_looks_up_indicators(monkeypatch):
+    """
+    Tests the ASGI recommendations and indicator routes against the Flask behaviour.
+
+    Steps:
+    1. Serve the ASGI application with a Motor-shaped client holding an incident and an index entry.
+    2. Analyze the incident and assert the recommendations come with an ETag.
+    3. Assert that a conditional request is answered 304 without running the model again.
+    4. Pivot from the indicator and look it up in bulk.
+
+    Requirements Addressed:
+    - AI-Powered Assistance (Technical Specification/4.2 AI-Powered Assistance)
+    - Comprehensive Case Management (Technical Specification/4.5 Comprehensive Case Management)
+    """
+    from starlette.testclient import TestClient  # Starlette version 0.14.2
+    from src.backend.incident_management_service import asgi, async_services
+    from src.backend.incident_management_service.http_cache import incident_cache
+
+    # Step 1: Serve the ASGI application with a Motor-shaped client.
+    motor_client = _MotorClient()
+    db = motor_client.get_default_database()
+    db.incidents.documents.append({'_id': 'incident-asgi', 'id': 'INC-9', 'title': 'Beaconing host',
+                                   'detected_at': '2023-10-05T14:00:00Z', 'version': 3})
+    db['indicator_index'].documents.append({'_id': 1, 'value': '203.0.113.7', 'type': 'ipv4',
+                                            'incident_ids': ['incident-asgi']})
+    models = []
+    monkeypatch.setattr(asgi, 'get_async_database_connection', lambda: motor_client)
+    monkeypatch.setattr(async_services, 'generate_recommendations',
+                        lambda incident: models.append(incident.id) or ['isolate-host'])
+    incident_cache.invalidate('incident-asgi')
+
+    with TestClient(asgi.create_asgi_app()) as asgi_client:
+        # Step 2: The recommendations are generated from the incident model and carry an ETag.
+        response = asgi_client.get('/incidents/incident-asgi/analyze')
+        assert response.status_code == 200
+        assert response.json()['recommendations'] == ['isolate-host']
+        assert models == ['INC-9']
+        etag = response.headers['ETag']
+
+        # Step 3: An unchanged incident is answered from the cache.
+        response = asgi_client.get('/incidents/incident-asgi/analyze', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert models == ['INC-9']
+
+        # Step 4: Indicator pivots and bulk lookups are answered from the reverse index.
+        response = asgi_client.get('/indicators/203.0.113.7/incidents')
+        assert response.status_code == 200
+        assert response.json()['matches'][0]['incident_count'] == 1
+        response = asgi_client.post('/indicators/lookup', json={'indicators': ['203.0.113[.]7', '198.51.100.99']})
+        assert response.json()['results']['198.51.100.99'] == []
+        assert asgi_client.post('/indicators/lookup', json={}).status_code == 400
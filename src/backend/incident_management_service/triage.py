@@ -0,0 +1,296 @@
+"""
+Incident triage: vectorized severity scoring and an indexed priority queue of open incidents.
+
+Open incidents are scored in batches with NumPy from a handful of extracted features (reported
+severity, source, asset criticality, recency and duplicate count) and kept in an in-memory
+indexed max-heap, so status changes re-prioritize or remove an incident in O(log n) and the
+highest-priority unassigned incident can be handed out to an analyst immediately.
+
+The queue lives in each worker process. Every worker seeds it from a bounded read of the newest
+open incidents and re-seeds it periodically, which re-scores the queued incidents as they age and
+picks up incidents created or reopened by other workers; claims stay safe across workers because
+they are made atomically in the database.
+
+Requirements Addressed:
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-3: Enable real-time analysis of incidents using AI algorithms.
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np  # numpy version 1.19.5
+
+# Statuses that take an incident out of the triage queue.
+CLOSED_STATUSES = frozenset({'resolved', 'closed'})
+
+# Stored status values that mark an incident as closed, in both casings used by clients.
+CLOSED_STATUS_VALUES = sorted(CLOSED_STATUSES) + [status.capitalize() for status in sorted(CLOSED_STATUSES)]
+
+# Incident fields read by extract_features, projected when the queue is seeded from the database.
+FEATURE_FIELDS = ('severity', 'source', 'asset_criticality', 'detected_at', 'duplicate_count')
+
+# Feature lookup tables. Unknown values fall back to the 'default' entry.
+SEVERITY_WEIGHTS = {'critical': 1.0, 'high': 0.75, 'medium': 0.5, 'low': 0.25, 'default': 0.5}
+SOURCE_WEIGHTS = {
+    'edr': 0.9,
+    'ids': 0.8,
+    'siem': 0.7,
+    'threat_intel': 0.7,
+    'email_gateway': 0.6,
+    'user_report': 0.4,
+    'default': 0.5,
+}
+ASSET_CRITICALITY_WEIGHTS = {'critical': 1.0, 'high': 0.75, 'medium': 0.5, 'low': 0.25, 'default': 0.5}
+
+# Relative importance of each feature column: severity, source, asset criticality, recency, duplicates.
+FEATURE_WEIGHTS = np.array([0.35, 0.15, 0.25, 0.15, 0.10])
+
+# Age (in hours) after which the recency feature has decayed to one half.
+RECENCY_HALF_LIFE_HOURS = 6.0
+
+# Duplicate count at which the duplicate feature saturates.
+DUPLICATE_SATURATION = 50
+
+
+def _lookup(table: dict, value) -> float:
+    """
+    Maps a categorical feature value to its weight, accepting numeric values in [0, 1] as-is.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return min(max(float(value), 0.0), 1.0)
+    if isinstance(value, str):
+        return table.get(value.strip().lower(), table['default'])
+    return table['default']
+
+
+def _age_hours(detected_at, now: datetime) -> float:
+    """
+    Returns the age of an incident in hours from its detected_at timestamp (ISO string or datetime).
+    """
+    if isinstance(detected_at, str):
+        try:
+            detected_at = datetime.fromisoformat(detected_at.replace('Z', '+00:00'))
+        except ValueError:
+            return 0.0
+    if not isinstance(detected_at, datetime):
+        return 0.0
+    if detected_at.tzinfo is None:
+        detected_at = detected_at.replace(tzinfo=timezone.utc)
+    return max((now - detected_at).total_seconds() / 3600.0, 0.0)
+
+
+def extract_features(incidents: Iterable[dict], now: Optional[datetime] = None) -> np.ndarray:
+    """
+    Extracts the triage feature matrix for a batch of incident documents.
+
+    Parameters:
+        incidents (Iterable[dict]): Incident documents as stored in the incidents collection.
+        now (datetime, optional): Reference time for the recency feature; defaults to the current UTC time.
+
+    Returns:
+        np.ndarray: An (n, 5) matrix of severity, source, asset criticality, age in hours and duplicate count.
+
+    Steps:
+    - Map categorical fields to their weights.
+    - Compute the age of each incident in hours.
+    - Return the raw columns; normalization happens in score_incidents.
+    """
+    now = now or datetime.now(timezone.utc)
+    rows = [
+        (
+            _lookup(SEVERITY_WEIGHTS, incident.get('severity')),
+            _lookup(SOURCE_WEIGHTS, incident.get('source')),
+            _lookup(ASSET_CRITICALITY_WEIGHTS, incident.get('asset_criticality')),
+            _age_hours(incident.get('detected_at'), now),
+            float(incident.get('duplicate_count') or 0),
+        )
+        for incident in incidents
+    ]
+    return np.array(rows, dtype=np.float64).reshape(len(rows), 5)
+
+
+def score_incidents(incidents: List[dict], now: Optional[datetime] = None) -> np.ndarray:
+    """
+    Computes severity scores in [0, 1] for a batch of incidents in one vectorized pass.
+
+    Parameters:
+        incidents (List[dict]): Incident documents to score.
+        now (datetime, optional): Reference time for the recency feature.
+
+    Returns:
+        np.ndarray: One score per incident, in input order.
+
+    Requirements Addressed:
+    - TR-IR-001-3: Enable real-time analysis of incidents using AI algorithms.
+    """
+    features = extract_features(incidents, now)
+    if features.shape[0] == 0:
+        return np.zeros(0)
+
+    # Recency decays exponentially with age; duplicates saturate logarithmically.
+    features[:, 3] = np.exp2(-features[:, 3] / RECENCY_HALF_LIFE_HOURS)
+    features[:, 4] = np.minimum(np.log1p(features[:, 4]) / math.log1p(DUPLICATE_SATURATION), 1.0)
+    return features @ FEATURE_WEIGHTS
+
+
+class TriageQueue:
+    """
+    Indexed binary max-heap of open, unassigned incidents keyed by triage score.
+
+    A position index alongside the heap allows updating or removing any incident in O(log n).
+    Ties are broken in favour of the incident that entered the queue first. Incidents are keyed by
+    their `_id` exactly as stored (usually an ObjectId), so a popped id can be used to claim the
+    document without conversion.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+    """
+
+    def __init__(self):
+        self._heap: List[str] = []
+        self._position: Dict[str, int] = {}
+        self._key: Dict[str, Tuple[float, int]] = {}
+        self._sequence = 0
+        self._lock = threading.RLock()
+        self.loaded = False
+        self._loaded_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, incident_id: str) -> bool:
+        return incident_id in self._position
+
+    def _higher(self, a: str, b: str) -> bool:
+        score_a, seq_a = self._key[a]
+        score_b, seq_b = self._key[b]
+        return score_a > score_b or (score_a == score_b and seq_a < seq_b)
+
+    def _swap(self, i: int, j: int) -> None:
+        heap = self._heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self._position[heap[i]] = i
+        self._position[heap[j]] = j
+
+    def _sift_up(self, i: int) -> None:
+        while i > 0:
+            parent = (i - 1) // 2
+            if not self._higher(self._heap[i], self._heap[parent]):
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i: int) -> None:
+        size = len(self._heap)
+        while True:
+            largest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < size and self._higher(self._heap[child], self._heap[largest]):
+                    largest = child
+            if largest == i:
+                break
+            self._swap(i, largest)
+            i = largest
+
+    def push(self, incident_id: str, score: float) -> None:
+        """
+        Inserts an incident or updates its score if it is already queued.
+        """
+        with self._lock:
+            if incident_id in self._position:
+                sequence = self._key[incident_id][1]
+                self._key[incident_id] = (float(score), sequence)
+                i = self._position[incident_id]
+                self._sift_up(i)
+                self._sift_down(self._position[incident_id])
+                return
+            self._sequence += 1
+            self._key[incident_id] = (float(score), self._sequence)
+            self._heap.append(incident_id)
+            self._position[incident_id] = len(self._heap) - 1
+            self._sift_up(len(self._heap) - 1)
+
+    def push_many(self, incidents: List[dict], id_field: str = '_id', now: Optional[datetime] = None) -> None:
+        """
+        Scores a batch of incident documents in one vectorized pass and queues them.
+        """
+        scores = score_incidents(incidents, now)
+        with self._lock:
+            for incident, score in zip(incidents, scores):
+                self.push(incident[id_field], score)
+
+    def reload(self, incidents: List[dict], id_field: str = '_id', now: Optional[datetime] = None) -> None:
+        """
+        Replaces the queued incidents with a freshly read batch, re-scoring them in one vectorized pass.
+        """
+        scores = score_incidents(incidents, now)
+        with self._lock:
+            self._heap, self._position, self._key = [], {}, {}
+            for incident, score in zip(incidents, scores):
+                self.push(incident[id_field], score)
+            self.loaded = True
+            self._loaded_at = time.monotonic()
+
+    def is_stale(self, max_age_seconds: float) -> bool:
+        """
+        Returns True if the queue has not been loaded yet or was last reloaded max_age_seconds ago or earlier.
+        """
+        return not self.loaded or time.monotonic() - self._loaded_at >= max_age_seconds
+
+    def remove(self, incident_id: str) -> bool:
+        """
+        Removes an incident from the queue. Returns False if it was not queued.
+        """
+        with self._lock:
+            i = self._position.pop(incident_id, None)
+            if i is None:
+                return False
+            del self._key[incident_id]
+            last = self._heap.pop()
+            if i < len(self._heap):
+                self._heap[i] = last
+                self._position[last] = i
+                self._sift_up(i)
+                self._sift_down(self._position[last])
+            return True
+
+    def peek(self) -> Optional[Tuple[str, float]]:
+        """
+        Returns the highest-priority incident id and its score without removing it.
+        """
+        with self._lock:
+            if not self._heap:
+                return None
+            incident_id = self._heap[0]
+            return incident_id, self._key[incident_id][0]
+
+    def pop(self) -> Optional[Tuple[str, float]]:
+        """
+        Removes and returns the highest-priority incident id and its score.
+        """
+        with self._lock:
+            top = self.peek()
+            if top is not None:
+                self.remove(top[0])
+            return top
+
+    def on_status_change(self, incident: dict, id_field: str = '_id') -> None:
+        """
+        Re-prioritizes an incident after a status update, dropping it once it is closed or assigned.
+        """
+        incident_id = incident[id_field]
+        status = str(incident.get('status') or '').lower()
+        if status in CLOSED_STATUSES or incident.get('assigned_to'):
+            self.remove(incident_id)
+        else:
+            self.push(incident_id, score_incidents([incident])[0])
+
+
+# Process-wide triage queue shared by the incident services.
+triage_queue = TriageQueue()
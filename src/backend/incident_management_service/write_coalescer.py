@@ -0,0 +1,255 @@
+"""
+Write coalescing for incident upserts.
+
+Playbooks and enrichers frequently update the same incident several times within a few
+milliseconds. Instead of issuing one `update_one(..., upsert=True)` per `IncidentModel.save`,
+this module merges the pending `$set` documents per incident id for a short window and
+flushes them as a single unordered `bulk_write`.
+
+Requirements Addressed:
+- Incident Data Management (Technical Specification/4.5 Comprehensive Case Management)
+  - TR-CM-005-1: Automatically log incident details, including AI-generated insights and manual actions.
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import atexit
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from pymongo import UpdateOne  # pymongo version 3.6.3
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class IncidentWriteCoalescer:
+    """
+    Buffers `$set` updates per incident id and flushes them as one `bulk_write`.
+
+    Each flushed upsert also increments the incident's `version` once, from which the ETags of
+    the incident read endpoints are derived.
+
+    Later updates for the same incident overwrite earlier values field by field, so a flush
+    issues exactly one upsert per incident regardless of how many saves happened in the window.
+    Callers that read incidents from the same process must call `flush` first to observe their
+    own writes (flush-on-read consistency). A failed flush keeps the batch buffered and is retried
+    with exponential backoff, from the window up to `max_backoff_seconds`.
+
+    Requirements Addressed:
+    - Incident Data Management (Technical Specification/4.5 Comprehensive Case Management)
+      - TR-CM-005-1: Automatically log incident details, including AI-generated insights and manual actions.
+    """
+
+    def __init__(
+        self,
+        collection_factory: Callable,
+        window_seconds: float = 0.05,
+        max_pending: int = 500,
+        flush_hooks: Optional[List[Callable]] = None,
+        max_backoff_seconds: float = 30.0
+    ):
+        """
+        Initializes the coalescer.
+
+        Parameters:
+            collection_factory (Callable): Returns the incidents collection used for flushing.
+            window_seconds (float): How long updates are buffered before an automatic flush.
+            max_pending (int): Number of distinct pending incidents that forces an immediate flush.
+            flush_hooks (List[Callable], optional): Called as `hook(collection, batch)` around each
+                flush; a hook may return a callback that is invoked once the batch has been written.
+            max_backoff_seconds (float): Ceiling of the delay between retries of a failing flush.
+        """
+        self.collection_factory = collection_factory
+        self.window_seconds = window_seconds
+        self.max_pending = max_pending
+        self.flush_hooks = list(flush_hooks or [])
+        self.max_backoff_seconds = max_backoff_seconds
+        self._pending: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        # Serializes flushes so an older batch can never land after a newer one.
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        # Consecutive failed flushes; each one doubles the delay before the next attempt.
+        self._failures = 0
+
+    def enqueue(self, incident_id: str, fields: dict) -> None:
+        """
+        Merges the given `$set` fields into the pending update for the incident.
+
+        Steps:
+        - Merge the fields into the pending document for the incident id.
+        - Start the flush timer if this is the first pending update of the window.
+        - Flush immediately if the number of pending incidents reaches max_pending.
+        """
+        with self._lock:
+            self._pending.setdefault(incident_id, {}).update(fields)
+            flush_now = len(self._pending) >= self.max_pending
+            if not flush_now:
+                self._arm_timer()
+
+        if flush_now:
+            self.flush()
+
+    def _arm_timer(self) -> None:
+        """
+        Starts the window timer unless one is already running; must be called with `_lock` held.
+
+        After failed flushes the timer waits `window_seconds * 2 ** failures`, capped at
+        `max_backoff_seconds`.
+        """
+        if self._timer is None:
+            delay = self.window_seconds
+            if self._failures:
+                delay = min(self.window_seconds * 2 ** self._failures, self.max_backoff_seconds)
+            self._timer = threading.Timer(delay, self.close)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def has_pending(self, incident_id: Optional[str] = None) -> bool:
+        """
+        Returns True if there are buffered updates (for the given incident, when provided).
+        """
+        with self._lock:
+            if incident_id is None:
+                return bool(self._pending)
+            return incident_id in self._pending
+
+    def discard(self, incident_id: str) -> None:
+        """
+        Drops any buffered update for the incident, e.g. because it is being deleted.
+
+        Waits for an in-flight flush to finish first, so an upsert of the incident that was already
+        taken from the buffer has landed before the caller deletes the document.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._pending.pop(incident_id, None)
+
+    def flush(self, incident_id: Optional[str] = None) -> int:
+        """
+        Writes all buffered updates to the database in a single `bulk_write`.
+
+        Parameters:
+            incident_id (str, optional): When provided, the flush is skipped unless this incident
+                has a pending update. All pending incidents are flushed together either way.
+
+        Returns:
+            int: The number of incidents written.
+
+        Steps:
+        - Swap the pending buffer for an empty one and cancel the window timer.
+        - Build one upsert per incident and send them as an unordered bulk_write, running the
+          flush hooks before and their callbacks after the write.
+        - On failure, re-queue the batch underneath any newer updates, re-arm the timer with an
+          exponentially growing delay so the batch is retried, and log the error.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if incident_id is not None and incident_id not in self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+            if not batch:
+                return 0
+
+            operations = [
+                UpdateOne({'id': pending_id}, {'$set': fields, '$inc': {'version': 1}}, upsert=True)
+                for pending_id, fields in batch.items()
+            ]
+            try:
+                collection = self.collection_factory()
+                callbacks = [hook(collection, batch) for hook in self.flush_hooks]
+                collection.bulk_write(operations, ordered=False)
+            except Exception as e:
+                logger.error(f"An error occurred while flushing {len(batch)} coalesced incident writes: {e}")
+                with self._lock:
+                    for pending_id, fields in batch.items():
+                        # Newer updates queued during the failed flush take precedence.
+                        merged = dict(fields)
+                        merged.update(self._pending.get(pending_id, {}))
+                        self._pending[pending_id] = merged
+                    self._failures += 1
+                    self._arm_timer()
+                raise
+
+            with self._lock:
+                self._failures = 0
+
+            for callback in callbacks:
+                if callback is None:
+                    continue
+                try:
+                    callback()
+                except Exception as e:
+                    # The incidents are written; a failing hook must not re-queue them.
+                    logger.error(f"An error occurred in a flush hook after writing {len(batch)} incidents: {e}")
+
+            logger.debug(f"Flushed coalesced writes for {len(batch)} incidents.")
+            return len(batch)
+
+    def close(self) -> None:
+        """
+        Flushes any remaining updates without raising; used by the window timer and at interpreter exit.
+
+        A failed flush is logged with the number of incidents still buffered (the timer retries them).
+        """
+        try:
+            self.flush()
+        except Exception:
+            with self._lock:
+                remaining = len(self._pending)
+            logger.exception(f"Coalesced incident writes could not be flushed; {remaining} incidents remain buffered.")
+
+
+_coalescer: Optional[IncidentWriteCoalescer] = None
+_coalescer_lock = threading.Lock()
+
+
+def get_write_coalescer(
+    collection_factory: Callable,
+    window_seconds: float,
+    max_pending: int,
+    flush_hooks: Optional[List[Callable]] = None,
+    max_backoff_seconds: float = 30.0
+) -> IncidentWriteCoalescer:
+    """
+    Returns the process-wide coalescer, creating it on first use.
+    """
+    global _coalescer
+    with _coalescer_lock:
+        if _coalescer is None:
+            _coalescer = IncidentWriteCoalescer(collection_factory, window_seconds, max_pending, flush_hooks,
+                                                max_backoff_seconds)
+            atexit.register(_coalescer.close)
+        return _coalescer
+
+
+def flush_pending_writes(incident_id: Optional[str] = None) -> int:
+    """
+    Flushes buffered incident writes before a read so the process observes its own updates.
+
+    Buffered saves are keyed by the model `id`, while the read endpoints address incidents by
+    `_id`, so reads flush every buffered save rather than pass their id.
+
+    A failing flush does not fail the read: the error is logged, the saves stay buffered for the
+    coalescer's retry, and the read is served without them.
+
+    Parameters:
+        incident_id (str, optional): Model `id` of the incident to flush for; see
+            IncidentWriteCoalescer.flush.
+
+    Returns:
+        int: The number of incidents written, 0 if coalescing has never been used or the flush failed.
+    """
+    if _coalescer is None:
+        return 0
+    try:
+        return _coalescer.flush(incident_id)
+    except Exception as e:
+        logger.warning(f"Serving a read without the buffered incident writes, which could not be flushed: {e}")
+        return 0
@@ -1,8 +1,12 @@
+# Standard library imports
+import threading
+
 # Third-party imports
 from flask import Flask  # Flask version 2.0.1
 
 # Internal imports
 from src.backend.playbook_engine.config import load_config
+from src.backend.playbook_engine.services import start_playbook_auto_update, start_run_recovery, start_step_sandbox
 from src.backend.playbook_engine.routes import (
     create_playbook_route,
     update_playbook_route,
@@ -33,7 +37,22 @@ def initialize_app():
     # policies and supports dynamic playbook generation as per TR-DPG-004.
     load_config(app)
 
-    # Step 3: Register routes for playbook management.
+    # Step 3: Resume playbook runs left unfinished by a crashed engine process.
+    # This runs in the background so the application starts serving immediately, and only takes
+    # over runs whose lease has expired, so the workers sharing the journal never resume each
+    # other's live runs.
+    start_run_recovery()
+
+    # Step 4: Start incremental playbook auto-updates.
+    # Regenerate, every auto-update interval, only the playbooks affected by the threat intelligence
+    # and policy changes since the previous cycle.
+    start_playbook_auto_update()
+
+    # Step 5: Start the worker processes of sandboxed step handlers.
+    # Warm workers spare the first CPU-heavy steps the process start-up time.
+    threading.Thread(target=start_step_sandbox, name='playbook-sandbox', daemon=True).start()
+
+    # Step 6: Register routes for playbook management.
     # Registering the routes for creating, updating, and executing playbooks.
     # These routes enable dynamic management of playbooks to respond to emerging threats,
     # aligning with the requirement for responsive and adaptive incident handling strategies.
@@ -41,7 +60,7 @@ def initialize_app():
     app.register_blueprint(update_playbook_route)
     app.register_blueprint(execute_playbook_route)
 
-    # Step 4: Return the initialized Flask application instance.
+    # Step 7: Return the initialized Flask application instance.
     return app
 
 if __name__ == "__main__":
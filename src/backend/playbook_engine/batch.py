@@ -0,0 +1,416 @@
+"""
+Batch execution of one playbook across many incidents.
+
+During a phishing wave the same playbook runs against hundreds of incidents. A batch run compiles
+the plan once and advances each incident through it on its own: a step starts for an incident as
+soon as that incident's dependencies of the step are complete, whatever the other incidents are
+doing. A step whose action has a bulk handler (see handlers.register_step_handler) is performed for
+up to `bulk_size` incidents in a single call, e.g. blocking 300 IPs with one firewall request
+instead of 300; incidents reaching it while one of its calls is running wait for the next call, so
+they share it. Actions without a bulk handler run once per incident on the engine's step pool as
+usual.
+
+Steps keep their semantics from single runs: conditions are evaluated per incident, failed calls
+are retried under the step's policy (for bulk calls, only the failed items), calls go through the
+integration's circuit breaker and concurrency cap, and a failure without `on_failure: continue`
+stops that incident's run only. Each incident's result is yielded as soon as its run is over, so
+callers can stream results while the rest of the batch proceeds.
+
+Batch runs do not go through the run scheduler or the run journal: they start at once, and a batch
+interrupted by a crash is not resumed.
+
+Requirements Addressed:
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import heapq  # Retry queue. (builtin)
+import itertools  # Retry sequence numbers. (builtin)
+import time  # Timing, deadlines and backoff. (builtin)
+import uuid  # Generates run ids. (builtin)
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Internal dependencies
+from .dag import (  # Plans, results and the shared step pool.
+    ON_FAILURE_CONTINUE,
+    STATUS_FAILED,
+    STATUS_SKIPPED,
+    STATUS_SUCCEEDED,
+    THROTTLE_POLL_SECONDS,
+    AttemptDeadline,
+    CompiledPlan,
+    CompiledStep,
+    DAGExecutor,
+    RunResult,
+    StepResult,
+    compile_plan,
+    critical_path,
+)
+from .expressions import ExpressionError  # Raised by failing step conditions.
+from .handlers import get_bulk_step_handler  # Step handler registry.
+from .journal import idempotency_key  # Per-step idempotency keys passed to handlers.
+from .policies import CircuitOpenError, StepTimeoutError  # Breaker and timeout errors.
+from .tracing import Span, TraceCollector, new_span_id, payload_size, trace_id_for  # Run and step spans.
+
+# Default maximum number of incidents handled by one bulk call.
+DEFAULT_BULK_SIZE = 500
+
+
+class _IncidentRun:
+    """
+    State of one incident's run within a batch.
+    """
+
+    def __init__(self, index: int, plan: CompiledPlan, playbook_id: Any, context: dict,
+                 config_version: Optional[str], started: float, started_ns: int):
+        self.index = index
+        self.started = started
+        self.started_ns = started_ns
+        self.run_id = uuid.uuid4().hex
+        self.span_id = new_span_id()
+        self.attempt_events: Dict[Any, list] = {}
+        self.context = dict(context, playbook_id=playbook_id, run_id=self.run_id, results={})
+        self.result = RunResult(playbook_id=playbook_id, status=STATUS_SUCCEEDED, run_id=self.run_id,
+                                config_version=config_version)
+        self.remaining = {number: len(step.depends_on) for number, step in plan.steps.items()}
+        self.active = 0  # steps started and not yet finished
+        self.stopped = False
+        self.reported = False
+
+
+class _Call:
+    """
+    One handler call: a single incident's step, or a bulk call for several incidents.
+    """
+
+    def __init__(self, step: CompiledStep, runs: List[_IncidentRun], attempt: int, bulk: bool,
+                 error: Optional[str] = None):
+        self.step = step
+        self.runs = runs
+        self.attempt = attempt
+        self.bulk = bulk
+        self.error = error  # error of the previous attempt, for retries
+        self.deadline: Optional[AttemptDeadline] = None
+
+
+class BatchExecutor:
+    """
+    Runs one plan across many incidents, batching steps that have bulk handlers.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+    """
+
+    def __init__(self, executor: DAGExecutor, bulk_size: int = DEFAULT_BULK_SIZE,
+                 tracer: Optional[TraceCollector] = None):
+        """
+        Initializes the batch executor.
+
+        Parameters:
+            executor (DAGExecutor): Provides the step pool, circuit breakers and concurrency caps.
+            bulk_size (int): Maximum number of incidents handled by one bulk call.
+            tracer (TraceCollector, optional): Collector receiving the spans of every incident's run.
+        """
+        self.executor = executor
+        self.bulk_size = max(1, int(bulk_size))
+        self.tracer = tracer
+
+    def run(self, plan, contexts: Sequence[dict], playbook_id: Any = None,
+            config_version: Optional[str] = None) -> Iterator[Tuple[int, RunResult]]:
+        """
+        Executes a plan for every incident context, yielding each incident's result when its run is over.
+
+        Parameters:
+            plan (CompiledPlan or list): The compiled plan, or raw playbook steps.
+            contexts (Sequence[dict]): One run context per incident, e.g. {'incident': {...}}.
+            playbook_id: Identifier of the playbook, reported in the results.
+            config_version (str, optional): Configuration version reported in the results.
+
+        Yields:
+            (int, RunResult): The index of each incident's context and the result of its run, in
+            order of completion.
+        """
+        if not isinstance(plan, CompiledPlan):
+            plan = compile_plan(plan)
+        started, started_ns = time.monotonic(), time.time_ns()
+        runs = [_IncidentRun(index, plan, playbook_id, context, config_version, started, started_ns)
+                for index, context in enumerate(contexts)]
+        limiter, breakers = self.executor.limiter, self.executor.breakers
+        pool = self.executor._get_pool()
+        ready: Dict[Any, List[_IncidentRun]] = {}  # step number -> runs waiting to execute it
+        expected = dict.fromkeys(plan.steps, len(runs))  # step number -> runs that may still become ready for it
+        in_flight = dict.fromkeys(plan.steps, 0)  # step number -> calls of the step running
+        pending = {}  # future -> call
+        delayed = []  # heap of (retry time, sequence, call)
+        sequence = itertools.count()
+        over: List[_IncidentRun] = []  # runs whose result is ready to be yielded
+        changed = False
+
+        def begin(run: _IncidentRun, step: CompiledStep) -> None:
+            nonlocal changed
+            expected[step.step_number] -= 1
+            run.active += 1
+            run.result.steps[step.step_number] = StepResult(step.step_number, step.action, STATUS_SKIPPED,
+                                                            started_at=time.monotonic() - run.started)
+            if step.condition is not None:
+                try:
+                    if not step.condition.evaluate(run.context):
+                        settle(run, step, STATUS_SKIPPED, 0)
+                        return
+                except ExpressionError as exc:
+                    settle(run, step, STATUS_FAILED, 0, error=f'{type(exc).__name__}: {exc}')
+                    return
+            ready.setdefault(step.step_number, []).append(run)
+            changed = True
+
+        def settle(run: _IncidentRun, step: CompiledStep, status: str, attempts: int, value: Any = None,
+                   error: Optional[str] = None) -> None:
+            self._finish(run, step, status, attempts, value, error)
+            if not run.stopped:
+                for dependent in step.dependents:
+                    run.remaining[dependent] -= 1
+                    if run.remaining[dependent] == 0:
+                        begin(run, plan.steps[dependent])
+            run.active -= 1
+            if run.active == 0:
+                # Nothing of the run is left running, so the steps it did not reach never will be.
+                for number in plan.steps:
+                    if number not in run.result.steps:
+                        expected[number] -= 1
+                over.append(run)
+
+        def failed(call: _Call, runs: List[_IncidentRun], error: str) -> None:
+            if self.tracer is not None:
+                event = (time.time_ns(), 'attempt_failed', {'attempt': call.attempt, 'error': error})
+                for run in runs:
+                    run.attempt_events.setdefault(call.step.step_number, []).append(event)
+            retrying = call.attempt <= call.step.policy.retries
+            for run in runs:
+                if not retrying or run.stopped:
+                    settle(run, call.step, STATUS_FAILED, call.attempt, error=error)
+            runs = [run for run in runs if retrying and not run.stopped]
+            if runs:
+                retry = _Call(call.step, runs, call.attempt + 1, call.bulk, error)
+                retry_at = time.monotonic() + call.step.policy.backoff_delay(call.attempt)
+                heapq.heappush(delayed, (retry_at, next(sequence), retry))
+
+        def start(call: _Call) -> bool:
+            step = call.step
+            if step.integration:
+                if not limiter.try_acquire(step.integration):
+                    return False
+                try:
+                    breakers.get(step.integration).acquire()
+                except CircuitOpenError as exc:
+                    limiter.release(step.integration)
+                    failed(call, call.runs, f'{type(exc).__name__}: {exc}')
+                    return True
+            call.deadline = AttemptDeadline(step.policy.timeout_seconds)
+            contexts = [dict(run.context, step_number=step.step_number, attempt=call.attempt, deadline=None,
+                             idempotency_key=idempotency_key(run.run_id, step.step_number)) for run in call.runs]
+            future = pool.submit(self._invoke, call, contexts)
+            if step.integration:
+                future.add_done_callback(lambda _, integration=step.integration: limiter.release(integration))
+            pending[future] = call
+            in_flight[step.step_number] += 1
+            return True
+
+        def dispatch() -> bool:
+            """
+            Starts calls for the runs ready for each step, and returns True if a capped integration
+            refused one.
+
+            A bulk step's runs are sent in chunks of `bulk_size`; a smaller chunk waits while a call
+            of the step is running and other runs may still become ready for it, so runs that get
+            there meanwhile share the next call.
+            """
+            nonlocal changed
+            changed, throttled = True, False
+            while changed:
+                changed, throttled = False, False
+                for number in list(ready):
+                    step, waiting = plan.steps[number], ready.pop(number)
+                    for run in waiting:
+                        if run.stopped:
+                            settle(run, step, STATUS_SKIPPED, 0)
+                    waiting = [run for run in waiting if not run.stopped]
+                    bulk = get_bulk_step_handler(step.action) is not None
+                    while waiting:
+                        size = self.bulk_size if bulk else 1
+                        if len(waiting) < size and in_flight[number] and expected[number]:
+                            break
+                        if not start(_Call(step, waiting[:size], 1, bulk)):
+                            throttled = True
+                            break
+                        del waiting[:size]
+                    if waiting:
+                        ready.setdefault(number, [])[:0] = waiting
+            return throttled
+
+        def retry(call: _Call) -> None:
+            for run in call.runs:
+                if run.stopped:
+                    settle(run, call.step, STATUS_FAILED, call.attempt - 1, error=call.error)
+            call.runs = [run for run in call.runs if not run.stopped]
+            if call.runs and not start(call):
+                heapq.heappush(delayed, (time.monotonic() + THROTTLE_POLL_SECONDS, next(sequence), call))
+
+        def record_outcome(call: _Call, succeeded: bool) -> None:
+            in_flight[call.step.step_number] -= 1
+            if call.step.integration:
+                breaker = breakers.get(call.step.integration)
+                if succeeded:
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
+
+        for run in runs:
+            for step in plan.steps.values():
+                if not step.depends_on:
+                    begin(run, step)
+
+        while True:
+            throttled = dispatch()
+            now = time.monotonic()
+            while delayed and delayed[0][0] <= now:
+                retry(heapq.heappop(delayed)[2])
+            while over:
+                run = over.pop(0)
+                yield run.index, self._finalize(plan, run)
+            if changed:
+                continue  # a retry made runs ready
+            if not pending and not delayed and not ready:
+                break
+
+            wake_times = [call.deadline.at for call in pending.values() if call.deadline.at is not None]
+            if delayed:
+                wake_times.append(delayed[0][0])
+            if throttled or any(call.deadline.waiting for call in pending.values()):
+                # Queued calls start their deadline on a worker thread; poll to pick it up.
+                wake_times.append(now + THROTTLE_POLL_SECONDS)
+            timeout = max(0.0, min(wake_times) - now) if wake_times else None
+            if not pending:
+                time.sleep(timeout)
+                continue
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                call = pending.pop(future)
+                try:
+                    results = future.result()
+                except Exception as exc:
+                    record_outcome(call, False)
+                    failed(call, call.runs, f'{type(exc).__name__}: {exc}')
+                    continue
+                record_outcome(call, True)
+                retry_runs, error = [], None
+                for run, value in zip(call.runs, results):
+                    if isinstance(value, Exception):
+                        retry_runs.append(run)
+                        error = f'{type(value).__name__}: {value}'
+                    else:
+                        settle(run, call.step, STATUS_SUCCEEDED, call.attempt, value)
+                if retry_runs:
+                    failed(call, retry_runs, error)
+
+            now = time.monotonic()
+            for future, call in list(pending.items()):
+                if call.deadline.expired(now) and not future.done():
+                    # Abandon the call; its eventual outcome is ignored. Calls still queued for a
+                    # worker have no deadline yet and keep their place.
+                    del pending[future]
+                    future.cancel()
+                    record_outcome(call, False)
+                    timeout_error = StepTimeoutError(f'Step {call.step.step_number} timed out after '
+                                                     f'{call.step.policy.timeout_seconds}s.')
+                    failed(call, call.runs, f'{type(timeout_error).__name__}: {timeout_error}')
+
+        for run in runs:
+            if not run.reported:
+                yield run.index, self._finalize(plan, run)
+
+    def _finish(self, run: _IncidentRun, step: CompiledStep, status: str, attempts: int,
+                value: Any = None, error: Optional[str] = None) -> None:
+        started_at = run.result.steps[step.step_number].started_at
+        run.result.steps[step.step_number] = StepResult(step.step_number, step.action, status, value, error,
+                                                        started_at=started_at, finished_at=time.monotonic() - run.started,
+                                                        attempts=attempts)
+        if self.tracer is not None:
+            self._trace_step(run, step, run.result.steps[step.step_number])
+        if status == STATUS_SUCCEEDED:
+            run.context['results'][step.step_number] = value
+        elif status == STATUS_FAILED and step.on_failure != ON_FAILURE_CONTINUE:
+            run.result.status = STATUS_FAILED
+            run.stopped = True
+
+    def _trace_step(self, run: _IncidentRun, step: CompiledStep, result: StepResult) -> None:
+        attributes = {
+            'step.number': step.step_number,
+            'step.action': step.action,
+            'step.integration': step.integration,
+            'step.status': result.status,
+            'step.attempts': result.attempts,
+            'step.retries': max(0, result.attempts - 1),
+            'step.bulk': get_bulk_step_handler(step.action) is not None,
+        }
+        if self.tracer.payload_sizes:
+            attributes['step.parameters_bytes'] = step.parameters_bytes
+            attributes['step.result_bytes'] = payload_size(result.result)
+        self.tracer.record(Span(trace_id_for(run.run_id), new_span_id(), run.span_id, step.action,
+                                run.started_ns + int(result.started_at * 1e9),
+                                run.started_ns + int(result.finished_at * 1e9), attributes,
+                                run.attempt_events.get(step.step_number),
+                                result.error if result.status == STATUS_FAILED else None))
+
+    def _invoke(self, call: _Call, contexts: List[dict]) -> List[Any]:
+        """
+        Runs one call on a worker thread and returns one result (or exception) per incident.
+        """
+        call.deadline.start(*contexts)
+        step = call.step
+        if call.bulk:
+            # An item whose parameters cannot be rendered fails alone; the others are still sent.
+            results: List[Any] = [None] * len(contexts)
+            items, positions = [], []
+            for position, context in enumerate(contexts):
+                try:
+                    items.append((step.render_parameters(context), context))
+                    positions.append(position)
+                except ExpressionError as exc:
+                    results[position] = exc
+            if items:
+                values = list(get_bulk_step_handler(step.action)(items))
+                if len(values) != len(items):
+                    raise ValueError(f"Bulk handler for '{step.action}' returned {len(values)} results "
+                                     f'for {len(items)} items.')
+                for position, value in zip(positions, values):
+                    results[position] = value
+            return results
+        return [self.executor.call_handler(step, step.render_parameters(contexts[0]), contexts[0])]
+
+    def _finalize(self, plan: CompiledPlan, run: _IncidentRun) -> RunResult:
+        result = run.result
+        result.duration = time.monotonic() - run.started
+        result.steps = {
+            step.step_number: result.steps.get(step.step_number) or StepResult(step.step_number, step.action, STATUS_SKIPPED)
+            for step in plan.steps.values()
+        }
+        result.critical_path, result.critical_path_duration = critical_path(plan, result.steps)
+        run.reported = True
+        if self.tracer is not None:
+            attributes = {
+                'playbook.id': result.playbook_id,
+                'run.id': run.run_id,
+                'run.status': result.status,
+                'run.steps': len(plan.steps),
+                'run.critical_path_ms': round(result.critical_path_duration * 1000, 3),
+                'run.batch': True,
+                'config.version': result.config_version,
+            }
+            failed = next((step.error for step in result.steps.values() if step.status == STATUS_FAILED), None)
+            self.tracer.record(Span(trace_id_for(run.run_id), run.span_id, None, 'playbook.run', run.started_ns,
+                                    run.started_ns + int(result.duration * 1e9), attributes,
+                                    error=(failed or 'failed') if result.status == STATUS_FAILED else None))
+        return result
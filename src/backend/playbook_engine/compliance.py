@@ -0,0 +1,268 @@
+"""
+Indexed compliance rule engine for playbook validation.
+
+Organizational policies are declarative rules, configured under `compliance_rules`:
+
+    {'id': 'approval-before-disable',
+     'description': 'Disabling accounts requires an approval step.',
+     'actions': ['disable_user'],              # actions the rule applies to; omit for every step
+     'when': "parameters['scope'] == 'all'",  # optional: the rule only applies when true
+     'require': "'approval_id' in parameters", # expression every matching step must satisfy
+     'forbid': False,                          # true: matching steps are not allowed at all
+     'requires_actions': ['request_approval'], # actions the playbook must contain alongside
+     'severity': 'error'}                      # 'warning' violations do not fail validation
+
+Expressions use the safe syntax of step conditions (see expressions.py) with the names `step`,
+`action`, `parameters` and `actions` (the set of actions in the playbook).
+
+Rules are compiled once per configuration into an index keyed by step action, so validating a
+playbook only evaluates the rules of the actions it contains (plus the rules without actions),
+rather than walking every rule over every step. Reports are memoized by playbook content hash and
+rule set version, so revalidating an unchanged playbook costs a dictionary lookup.
+
+Requirements Addressed:
+- Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+  - TR-DPG-004-3: Validate generated playbooks against organizational policies and compliance standards.
+"""
+
+import hashlib  # Rule set versions and playbook content hashes. (builtin)
+import json  # Canonical serialization of rules and steps. (builtin)
+import threading  # Guards the report cache. (builtin)
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+# Internal dependencies
+from .expressions import CompiledExpression, ExpressionError  # Compiles rule expressions.
+
+# Rule severities; only errors make a playbook non-compliant.
+SEVERITY_ERROR = 'error'
+SEVERITY_WARNING = 'warning'
+
+# Default number of validation reports memoized per rule set.
+DEFAULT_REPORT_CACHE_SIZE = 4096
+
+
+class ComplianceRuleError(ValueError):
+    """
+    Raised when a compliance rule is malformed.
+    """
+
+
+def _canonical(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=_plain).encode('utf-8')
+
+
+def _plain(value: Any) -> Any:
+    # Frozen configuration values (read-only mappings) serialize like the dicts they wrap.
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
+
+
+@dataclass(frozen=True)
+class ComplianceRule:
+    """
+    A compiled compliance rule.
+    """
+    id: str
+    description: str
+    actions: Tuple[str, ...]
+    when: Optional[CompiledExpression]
+    require: Optional[CompiledExpression]
+    forbid: bool
+    requires_actions: Tuple[str, ...]
+    severity: str
+
+    @classmethod
+    def from_definition(cls, definition: Mapping, index: int) -> 'ComplianceRule':
+        """
+        Compiles a rule definition.
+
+        Raises:
+            ComplianceRuleError: If the definition is malformed or an expression is invalid.
+        """
+        if not isinstance(definition, Mapping):
+            raise ComplianceRuleError(f'Compliance rule {index + 1} must be an object.')
+        rule_id = str(definition.get('id') or f'rule-{index + 1}')
+        actions = definition.get('actions') or ()
+        if isinstance(actions, str):
+            actions = (actions,)
+        severity = definition.get('severity', SEVERITY_ERROR)
+        if severity not in (SEVERITY_ERROR, SEVERITY_WARNING):
+            raise ComplianceRuleError(f"Compliance rule '{rule_id}' has unknown severity '{severity}'.")
+        try:
+            when = CompiledExpression(definition['when']) if definition.get('when') else None
+            require = CompiledExpression(definition['require']) if definition.get('require') else None
+        except ExpressionError as exc:
+            raise ComplianceRuleError(f"Compliance rule '{rule_id}': {exc}") from None
+        rule = cls(
+            id=rule_id,
+            description=str(definition.get('description', '')),
+            actions=tuple(actions),
+            when=when,
+            require=require,
+            forbid=bool(definition.get('forbid', False)),
+            requires_actions=tuple(definition.get('requires_actions') or ()),
+            severity=severity,
+        )
+        if not (rule.require or rule.forbid or rule.requires_actions):
+            raise ComplianceRuleError(
+                f"Compliance rule '{rule_id}' must set 'require', 'forbid' or 'requires_actions'.")
+        return rule
+
+
+@dataclass(frozen=True)
+class ComplianceViolation:
+    """
+    A step breaking a compliance rule.
+    """
+    rule_id: str
+    step_number: Any
+    action: str
+    message: str
+    severity: str
+
+    def to_dict(self) -> dict:
+        return {'rule_id': self.rule_id, 'step_number': self.step_number, 'action': self.action,
+                'message': self.message, 'severity': self.severity}
+
+
+@dataclass(frozen=True)
+class ComplianceReport:
+    """
+    Outcome of validating a playbook against a rule set.
+    """
+    rule_set_version: str
+    violations: Tuple[ComplianceViolation, ...] = ()
+    rules_evaluated: int = 0
+
+    @property
+    def compliant(self) -> bool:
+        return not any(violation.severity == SEVERITY_ERROR for violation in self.violations)
+
+    def to_dict(self) -> dict:
+        return {'compliant': self.compliant, 'rule_set_version': self.rule_set_version,
+                'violations': [violation.to_dict() for violation in self.violations]}
+
+
+class ComplianceRuleSet:
+    """
+    Compliance rules compiled into an index keyed by step action, with memoized reports.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+      - TR-DPG-004-3: Validate generated playbooks against organizational policies and compliance standards.
+    """
+
+    def __init__(self, rules: Sequence[Mapping] = (), cache_size: int = DEFAULT_REPORT_CACHE_SIZE):
+        """
+        Compiles the rules and builds the action index.
+
+        Parameters:
+            rules (Sequence[Mapping]): The rule definitions.
+            cache_size (int): Number of validation reports memoized.
+
+        Raises:
+            ComplianceRuleError: If a rule is malformed.
+        """
+        self.rules = tuple(ComplianceRule.from_definition(definition, index) for index, definition in enumerate(rules))
+        self.version = hashlib.sha256(_canonical(list(rules))).hexdigest()[:16]
+        by_action: Dict[str, List[ComplianceRule]] = {}
+        any_action = []
+        for rule in self.rules:
+            if rule.actions:
+                for action in rule.actions:
+                    by_action.setdefault(action, []).append(rule)
+            else:
+                any_action.append(rule)
+        self._any_action: Tuple[ComplianceRule, ...] = tuple(any_action)
+        self._by_action: Dict[str, Tuple[ComplianceRule, ...]] = {
+            action: tuple(matching) + self._any_action for action, matching in by_action.items()}
+        self.cache_size = max(1, int(cache_size))
+        self._reports: 'OrderedDict[str, ComplianceReport]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rules_for(self, action: str) -> Tuple[ComplianceRule, ...]:
+        """
+        Returns the rules applying to steps with the given action.
+        """
+        return self._by_action.get(action, self._any_action)
+
+    def validate(self, steps: list) -> ComplianceReport:
+        """
+        Returns the compliance report of a playbook's steps, memoized by their content hash.
+        """
+        key = hashlib.sha256(_canonical(steps)).hexdigest()
+        with self._lock:
+            report = self._reports.get(key)
+            if report is not None:
+                self._reports.move_to_end(key)
+                return report
+
+        report = self._evaluate(steps)
+        with self._lock:
+            self._reports[key] = report
+            while len(self._reports) > self.cache_size:
+                self._reports.popitem(last=False)
+        return report
+
+    def _evaluate(self, steps: list) -> ComplianceReport:
+        normalized = []
+        for index, step in enumerate(steps or []):
+            if isinstance(step, str):
+                step = {'action': step}
+            if isinstance(step, Mapping):
+                normalized.append((step.get('step_number', index + 1), step))
+        actions = frozenset(str(step.get('action')) for _, step in normalized)
+
+        violations = []
+        evaluated = 0
+        for number, step in normalized:
+            action = str(step.get('action'))
+            names = {'step': step, 'action': action, 'parameters': step.get('parameters') or {}, 'actions': actions}
+            for rule in self.rules_for(action):
+                evaluated += 1
+                message = self._check(rule, names, actions)
+                if message:
+                    violations.append(ComplianceViolation(rule.id, number, action, message, rule.severity))
+        return ComplianceReport(self.version, tuple(violations), evaluated)
+
+    @staticmethod
+    def _check(rule: ComplianceRule, names: dict, actions: frozenset) -> Optional[str]:
+        """
+        Returns the violation message of a rule for a step, or None if the step complies.
+        """
+        description = rule.description or f"Violates compliance rule '{rule.id}'."
+        try:
+            if rule.when is not None and not rule.when.evaluate(names):
+                return None
+            if rule.forbid:
+                return description
+            if rule.require is not None and not rule.require.evaluate(names):
+                return description
+        except ExpressionError as exc:
+            # A rule that cannot be evaluated against a step is treated as not satisfied.
+            return f'{description} ({exc})'
+        missing = [required for required in rule.requires_actions if required not in actions]
+        if missing:
+            return f"{description} (missing actions: {', '.join(missing)})"
+        return None
+
+
+_rule_set: Optional[ComplianceRuleSet] = None
+_rule_set_source: Any = None
+_rule_set_lock = threading.Lock()
+
+
+def get_compliance_rule_set(rules: Sequence[Mapping] = ()) -> ComplianceRuleSet:
+    """
+    Returns the process-wide rule set, recompiling it when it is given a different rules object
+    (e.g. after the configuration was reloaded).
+    """
+    global _rule_set, _rule_set_source
+    with _rule_set_lock:
+        if _rule_set is None or rules is not _rule_set_source:
+            _rule_set = ComplianceRuleSet(rules)
+            _rule_set_source = rules
+        return _rule_set
@@ -3,21 +3,35 @@ Configuration module for the playbook engine.
 
 This module is responsible for loading and managing configuration settings necessary for the operation of playbook-related functionalities.
 
+Settings are loaded once into an immutable, versioned snapshot. The configuration file is checked
+periodically (at most every `config_check_interval_seconds`) and re-read only when its modification
+time or size changed; a new snapshot is built only when its content hash changed, and is swapped in
+atomically. Callers take the current snapshot once per operation (e.g. per playbook run), so
+in-flight runs see a consistent view even while the file is being reloaded, and the snapshot's
+version is reported in run metadata.
+
+Settings read once by the process-wide executors, pools, stores and caches (listed in
+`RESTART_REQUIRED_KEYS`) take effect only on restart: a reload changing one of them logs a warning
+and the running components keep their earlier values.
+
 Requirements Addressed:
 - Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation):
   Utilize artificial intelligence to create and modify security playbooks in real-time based on emerging threats and organizational policies, ensuring responsive and adaptive incident handling strategies.
 """
 
-# Import internal dependencies
-from .models import Playbook  # Represents a playbook entity with attributes and methods to interact with playbook data. (src/backend/playbook_engine/models.py)
-from .services import (
-    create_playbook,  # Creates a new playbook with the specified name and steps. (src/backend/playbook_engine/services.py)
-    update_playbook,  # Updates an existing playbook with new steps. (src/backend/playbook_engine/services.py)
-    execute_playbook  # Executes the specified playbook using AI-driven strategies. (src/backend/playbook_engine/services.py)
-)
+import copy  # Copies the default settings. (builtin)
+import hashlib  # Content hash of the configuration file, used as snapshot version. (builtin)
+import json  # Parses the configuration file. (builtin)
+import logging  # Warns about reloaded settings that take effect only on restart. (builtin)
+import os  # Stats the configuration file and reads the default path from the environment. (builtin)
+import threading  # Serializes reloads. (builtin)
+import time  # Rate-limits file checks. (builtin)
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Optional
 
-# Global configuration dictionary containing settings for the playbook engine.
-config = {
+# Default configuration settings for the playbook engine; the configuration file overrides them.
+DEFAULT_CONFIG = {
     'ai_model_path': '/path/to/ai/model',  # Path to the AI model used for dynamic playbook generation.
     'threat_intelligence_sources': ['source1', 'source2'],  # List of threat intelligence sources for real-time data integration.
     'playbook_validation_enabled': True,  # Enable validation of playbooks against organizational policies and compliance standards.
@@ -26,52 +40,288 @@ config = {
     'admin_interface_enabled': True,  # Provide interfaces for administrators to manually adjust AI-generated playbooks.
     'logging_level': 'INFO',  # Set the logging level for the playbook engine operations.
     'auto_update_interval_minutes': 15,  # Interval for auto-updating playbooks based on new threat intelligence.
+    'auto_update_enabled': True,  # Regenerate the playbooks affected by threat intelligence and policy changes every interval.
+    'dependency_index_path': 'data/playbook_dependencies.db',  # SQLite index of the indicators, techniques and actions each playbook references.
+    'max_parallel_steps': 8,  # Maximum number of playbook steps executed concurrently across all runs.
+    'plan_cache_size': 256,  # Number of compiled playbook plans cached per process, keyed by content hash.
+    'step_policy_defaults': {  # Timeout and retry policy of steps that do not set their own.
+        'timeout_seconds': 300,
+        'retries': 0,
+        'retry_backoff_seconds': 0.5,
+        'retry_backoff_max_seconds': 30,
+    },
+    'circuit_breaker_failure_threshold': 5,  # Consecutive failures of an integration that open its circuit breaker.
+    'circuit_breaker_reset_seconds': 30,  # Time an open circuit breaker fails fast before allowing a trial call.
+    'integration_concurrency_limits': {},  # Maximum concurrent calls per integration across all runs, e.g. {'firewall': 4}.
+    'sandbox_workers': 0,  # Worker processes running sandboxed step handlers; 0 starts one per CPU core.
+    'sandbox_cpu_seconds': 60,  # CPU time limit of each sandboxed step call; 0 disables it.
+    'sandbox_memory_mb': 1024,  # Address space limit of each sandbox worker process; 0 disables it.
+    'sandbox_shared_memory_threshold_bytes': 1048576,  # Size from which bytes and str step parameters reach sandbox workers through shared memory.
+    'max_concurrent_runs': 4,  # Number of playbook runs executed concurrently by the run scheduler.
+    'run_priority_aging_seconds': 60,  # Queueing time that raises a waiting run's priority by one severity level.
+    'max_queued_runs': 10000,  # Maximum number of queued playbook runs; further executions are rejected.
+    'run_registry_size': 10000,  # Asynchronous runs whose status and progress events are kept in memory.
+    'run_event_buffer_size': 1000,  # Progress events kept per run for status and event stream clients.
+    'run_events_keepalive_seconds': 15,  # Idle time after which run event streams send a keep-alive comment.
+    'bulk_step_batch_size': 500,  # Maximum number of incidents handled by one bulk step call in batch runs.
+    'max_batch_incidents': 1000,  # Maximum number of incidents in one batch run.
+    'run_journal_path': 'data/playbook_run_journal.db',  # SQLite journal used to resume runs after a crash; None disables it.
+    'run_lease_seconds': 60,  # Time after which an unfinished run whose process stopped renewing its lease is resumed by another.
+    'threat_intel_bloom_capacity': 100000,  # Expected number of indicators; the Bloom filter grows beyond it.
+    'compliance_rules': [],  # Declarative organizational compliance rules checked on every playbook (see compliance.py).
+    'playbook_triggers': [],  # Declarative triggers selecting the playbooks that apply to an incident (see triggers.py).
+    'version_store_path': 'data/playbook_versions.db',  # SQLite store keeping every version of every playbook.
+    'version_keyframe_interval': 32,  # Maximum number of versions delta-compressed in a chain before a full copy.
+    'config_check_interval_seconds': 5,  # Minimum time between checks of the configuration file for changes.
+    'simulation_iterations': 1000,  # Number of runs simulated by playbook dry runs.
+    'simulation_history_samples': 200,  # Recent executions of each step that dry runs draw from.
+    'simulation_default_step_seconds': 1.0,  # Assumed duration of steps without execution history in dry runs.
+    'tracing_enabled': True,  # Record spans of every playbook run and step in the in-process trace collector.
+    'trace_max_spans': 100000,  # Number of spans kept in memory; the oldest are dropped beyond it.
+    'trace_payload_sizes': True,  # Record the serialized size of step parameters and results in step spans.
+    'trace_export_dir': None,  # Directory receiving an OTLP/JSON trace file per finished run; None disables export.
+    'xsoar_sync_state_path': 'data/xsoar_sync.db',  # SQLite state of XSOAR imports: content hash of every imported playbook.
 }
 
-def load_config(config_source):
+# Settings consumed once, when the process-wide component using them is first created (the step
+# executor, circuit breakers, integration limiter, sandbox pool, run scheduler and registry, journal,
+# version store, trace collector, dependency index, threat intelligence store, plan cache and XSOAR
+# sync state); changing them in the configuration file takes effect only on restart.
+RESTART_REQUIRED_KEYS = frozenset({
+    'max_parallel_steps', 'plan_cache_size',
+    'circuit_breaker_failure_threshold', 'circuit_breaker_reset_seconds', 'integration_concurrency_limits',
+    'sandbox_workers', 'sandbox_cpu_seconds', 'sandbox_memory_mb', 'sandbox_shared_memory_threshold_bytes',
+    'max_concurrent_runs', 'run_priority_aging_seconds', 'max_queued_runs',
+    'run_registry_size', 'run_event_buffer_size', 'run_journal_path', 'run_lease_seconds',
+    'version_store_path', 'version_keyframe_interval', 'trace_max_spans', 'trace_payload_sizes',
+    'dependency_index_path', 'threat_intelligence_sources', 'auto_update_interval_minutes',
+    'threat_intel_bloom_capacity', 'xsoar_sync_state_path',
+})
+
+# Environment variable naming the configuration file when none is given explicitly.
+CONFIG_PATH_ENV = 'PLAYBOOK_ENGINE_CONFIG'
+
+logger = logging.getLogger(__name__)
+
+
+def _freeze(value: Any) -> Any:
+    """
+    Returns a read-only copy of a parsed JSON value: mappings become read-only proxies and lists tuples.
+    """
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class ConfigSnapshot(Mapping):
+    """
+    Immutable, versioned view of the playbook engine configuration.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+    """
+
+    __slots__ = ('_values', 'version', 'source', 'loaded_at')
+
+    def __init__(self, values: dict, version: str, source: Optional[str] = None):
+        """
+        Initializes the snapshot.
+
+        Parameters:
+            values (dict): The configuration settings; they are copied and frozen.
+            version (str): Content hash identifying the settings.
+            source (str, optional): Path of the file the settings were loaded from.
+        """
+        self._values = _freeze(values)
+        self.version = version
+        self.source = source
+        self.loaded_at = time.time()
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f'ConfigSnapshot(version={self.version!r}, source={self.source!r})'
+
+
+def _snapshot(overrides: dict, source: Optional[str]) -> ConfigSnapshot:
+    """
+    Builds a snapshot of the defaults updated with the given settings.
+    """
+    values = copy.deepcopy(DEFAULT_CONFIG)
+    values.update(overrides)
+    canonical = json.dumps(values, sort_keys=True, separators=(',', ':'), default=str)
+    return ConfigSnapshot(values, hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16], source)
+
+
+class ConfigManager:
+    """
+    Holds the current configuration snapshot and reloads it when the configuration file changes.
+
+    Settings in `RESTART_REQUIRED_KEYS` configure process-wide components once and are not applied
+    by a reload; a reload that changes one of them logs a warning naming it.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+    """
+
+    def __init__(self, source: Optional[str] = None):
+        """
+        Initializes the manager with the defaults and, if given, loads the configuration file.
+
+        Raises:
+            FileNotFoundError: If the configuration file does not exist.
+            ValueError: If the configuration file is not a valid JSON object.
+        """
+        self._lock = threading.Lock()
+        self._source = source
+        self._file_state = None
+        self._file_digest = None
+        self._next_check = 0.0
+        # File state and error of the last failed reload logged by current(), so each is logged once.
+        self._last_warning = None
+        self._snapshot = _snapshot({}, None)
+        if source:
+            self.reload(force=True)
+
+    @property
+    def source(self) -> Optional[str]:
+        return self._source
+
+    def set_source(self, source: Optional[str]) -> ConfigSnapshot:
+        """
+        Switches to another configuration file and loads it.
+        """
+        with self._lock:
+            self._source = source
+            self._file_state = None
+            self._file_digest = None
+            self._last_warning = None
+        return self.reload(force=True)
+
+    def current(self) -> ConfigSnapshot:
+        """
+        Returns the current snapshot, first checking the file for changes if the check interval passed.
+
+        Only one thread checks at a time; others keep using the current snapshot meanwhile. A file that
+        cannot be read or parsed is logged once per file state and error, and the current snapshot kept.
+        """
+        if self._source and time.monotonic() >= self._next_check:
+            try:
+                self.reload(blocking=False)
+            except (OSError, ValueError) as e:
+                # Keep serving the last good snapshot while the file is missing or being rewritten.
+                warning = (self._file_state, str(e))
+                if warning != self._last_warning:
+                    self._last_warning = warning
+                    logger.warning('Configuration %s could not be reloaded; keeping the current configuration: %s',
+                                   self._source, e)
+        return self._snapshot
+
+    def reload(self, force: bool = False, blocking: bool = True) -> ConfigSnapshot:
+        """
+        Re-reads the configuration file if its modification time or size changed (or if forced), and
+        atomically swaps in a new snapshot if its content changed.
+
+        Raises:
+            FileNotFoundError: If the configuration file does not exist.
+            ValueError: If the configuration file is not a valid JSON object.
+        """
+        if not self._lock.acquire(blocking=blocking):
+            return self._snapshot
+        try:
+            self._next_check = time.monotonic() + float(self._snapshot.get('config_check_interval_seconds', 5))
+            if not self._source:
+                return self._snapshot
+            try:
+                stat = os.stat(self._source)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Configuration source '{self._source}' not found.")
+            file_state = (stat.st_mtime_ns, stat.st_size)
+            if not force and file_state == self._file_state:
+                return self._snapshot
+
+            with open(self._source, 'rb') as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+            self._file_state = file_state
+            if not force and digest == self._file_digest:
+                return self._snapshot
+            try:
+                loaded = json.loads(content.decode('utf-8'))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise ValueError(f"Error parsing configuration data from '{self._source}': {e}")
+            if not isinstance(loaded, dict):
+                raise ValueError(f"Configuration source '{self._source}' must contain a JSON object.")
+            self._file_digest = digest
+            self._last_warning = None
+            previous, self._snapshot = self._snapshot, _snapshot(loaded, self._source)
+            changed = sorted(key for key in RESTART_REQUIRED_KEYS if previous.get(key) != self._snapshot.get(key))
+            if changed and previous.source is not None:
+                logger.warning('Configuration %s changed %s; these settings take effect only on restart.',
+                               self._source, ', '.join(changed))
+            self._next_check = time.monotonic() + float(self._snapshot.get('config_check_interval_seconds', 5))
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+
+_manager = ConfigManager()
+
+
+def get_config() -> ConfigSnapshot:
+    """
+    Returns the current configuration snapshot of the playbook engine.
+
+    Take the snapshot once per operation and use it throughout, rather than calling this repeatedly,
+    so the operation sees a consistent configuration.
+    """
+    return _manager.current()
+
+
+def load_config(config_source=None) -> ConfigSnapshot:
     """
     Loads configuration settings for the playbook engine from a specified source.
 
     Parameters:
-        config_source (str): The path or identifier for the configuration source.
+        config_source (str, optional): The path of the JSON configuration file, or an object with a
+            `config` mapping (such as the Flask application) whose 'PLAYBOOK_ENGINE_CONFIG' entry
+            names it. Defaults to the PLAYBOOK_ENGINE_CONFIG environment variable.
 
     Returns:
-        dict: A dictionary containing the loaded configuration settings.
+        ConfigSnapshot: The configuration snapshot.
 
     Steps:
-    1. Read configuration data from the specified source.
-    2. Parse the configuration data into a dictionary format.
-    3. Update the global configuration with the loaded settings.
-    4. Return the dictionary containing the configuration settings.
+    1. Resolve the configuration file path.
+    2. Load the file into a new snapshot if it differs from the one being watched, or return the
+       current snapshot, which is reloaded automatically when the file changes.
 
     Requirements Addressed:
     - Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation):
       Ensuring that the playbook engine can utilize configuration settings to adapt playbook generation in real-time based on emerging threats and organizational policies.
     """
+    # Step 1: Resolve the configuration file path.
+    if config_source is not None and not isinstance(config_source, (str, os.PathLike)):
+        config_source = getattr(config_source, 'config', {}).get(CONFIG_PATH_ENV)
+    if config_source is None:
+        config_source = os.environ.get(CONFIG_PATH_ENV)
+    if config_source is not None:
+        config_source = os.fspath(config_source)
 
-    import json  # Standard library import for handling JSON data.
-
-    # Step 1: Read configuration data from the specified source.
-    try:
-        with open(config_source, 'r') as f:
-            config_data = f.read()
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Configuration source '{config_source}' not found.")
-    except Exception as e:
-        raise Exception(f"An error occurred while reading the configuration source '{config_source}': {e}")
-
-    # Step 2: Parse the configuration data into a dictionary format.
-    try:
-        loaded_config = json.loads(config_data)
-    except json.JSONDecodeError as e:
-        raise Exception(f"Error parsing configuration data from '{config_source}': {e}")
-
-    # Step 3: Update the global configuration with the loaded settings.
-    global config
-    config.update(loaded_config)
+    # Step 2: Load the file if it is not the one being watched; otherwise return the current snapshot.
+    if config_source and config_source != _manager.source:
+        return _manager.set_source(config_source)
+    return _manager.current()
 
-    # Step 4: Return the dictionary containing the configuration settings.
-    return config
 
 # Example usage:
-# config = load_config('config.json')
\ No newline at end of file
+# config = get_config()
+# max_parallel_steps = config['max_parallel_steps']
@@ -11,12 +11,25 @@ Requirements Addressed:
 
 # Import 'datetime' module (built-in) for handling date and time operations for playbook timestamps.
 import datetime  # built-in module
+import itertools  # built-in module, re-joins the first exported XSOAR document to the stream
+import json  # built-in module, serializes streamed batch results
 
 # Import Playbook model from models.py
 from .models import Playbook  # Represents a playbook entity with attributes and methods to interact with playbook data.
 
 # Import services for playbook operations from services.py
-from .services import create_playbook, update_playbook, execute_playbook  # Handles creation, updating, and execution of playbooks.
+from .services import create_playbook, update_playbook, execute_playbook, start_playbook_run  # Handles creation, updating, and execution of playbooks.
+from .services import get_run_status, get_run_record, cancel_playbook_run  # Status, events and cancellation of runs.
+from .services import get_playbook_versions, diff_playbook_versions  # Playbook version history.
+from .services import run_playbook_batch  # Runs a playbook across many incidents.
+from .services import simulate_playbook  # Dry runs of playbooks.
+from .services import match_playbooks  # Selects the playbooks that apply to an incident.
+from .services import run_playbook_auto_update, get_playbook_auto_update_report  # Incremental playbook auto-updates.
+from .triggers import TriggerError  # Raised for malformed playbook triggers.
+from .services import get_run_timeline, get_run_trace  # Traces of playbook runs.
+from .tracing import render_timeline  # Text rendering of run timelines.
+from .services import import_xsoar_playbooks, export_xsoar_playbooks  # XSOAR import and export.
+from .versions import VersionNotFoundError  # Raised for unknown playbook versions.
 
 # Import load_config function from config.py to load configuration settings.
 from .config import load_config  # Loads configuration settings for the playbook engine.
@@ -66,6 +79,9 @@ def update_playbook_controller(playbook_id: str, new_steps: list) -> bool:
     Returns:
     - bool: True if the update is successful, otherwise False.
 
+    Raises:
+    - ValueError: If the new steps have unknown or cyclic dependencies or violate organizational policies.
+
     Requirements Addressed:
     - Dynamic Playbook Generation (TR-DPG-004)
       Location: Technical Specification/4.4 Dynamic Playbook Generation
@@ -86,35 +102,362 @@ def update_playbook_controller(playbook_id: str, new_steps: list) -> bool:
     return updated
 
 
-def execute_playbook_controller(playbook_id: str) -> bool:
+def execute_playbook_controller(playbook_id: str, execution_params: dict = None, wait: bool = False) -> dict:
     """
     Handles the logic for executing a playbook.
 
     Parameters:
     - playbook_id (str): The unique identifier of the playbook to execute.
+    - execution_params (dict, optional): Run context passed to the step handlers, e.g. the incident,
+      optionally under 'context' alongside the run's 'severity' and 'tenant'.
+    - wait (bool): Whether to wait for the run to finish rather than return once it is queued.
 
     Returns:
-    - bool: True if the execution is successful, otherwise False.
+    - dict: The queued run's id and status or, when waiting, a success message with the run's
+      per-step results and critical-path timing, or an 'error' entry if the playbook could not be
+      executed.
+
+    Raises:
+    - SchedulerFullError: If the run queue is full.
 
     Requirements Addressed:
     - Dynamic Playbook Generation (TR-DPG-004)
       Location: Technical Specification/4.4 Dynamic Playbook Generation
     """
 
-    # Retrieve the Playbook instance by playbook_id.
-    # Fetch the playbook from the database using its unique identifier.
-    playbook = Playbook.get_by_id(playbook_id)
-    if not playbook:
-        # If the playbook is not found, return False indicating the execution failed.
-        return False
+    # Queue the run on the run scheduler, which executes it by severity with fair sharing across
+    # tenants (TR-DPG-004-1, TR-DPG-004-2); its status and progress are tracked under its run id.
+    execution_params = execution_params or {}
+    record = start_playbook_run(
+        playbook_id,
+        context=execution_params.get('context', execution_params),
+        severity=execution_params.get('severity'),
+        tenant=execution_params.get('tenant'),
+    )
+    if not wait:
+        return {'message': 'Playbook execution queued', 'run': record.to_dict()}
+
+    run = record.future.result()
+    if run is None:
+        # The playbook was not found, is not compliant or could not be executed.
+        return {'error': f"Playbook '{playbook_id}' could not be executed."}
+
+    message = 'Playbook executed successfully' if run.succeeded else 'Playbook execution failed'
+    return {'message': message, 'run': run.to_dict()}
+
+
+def run_status_controller(run_id: str) -> dict:
+    """
+    Handles the logic for reporting the status and progress of a run.
+
+    Parameters:
+    - run_id (str): The id returned when the run was queued.
+
+    Returns:
+    - dict: The run's status, progress and, once finished, its results, or an 'error' entry if the
+      run is unknown.
+
+    Requirements Addressed:
+    - Incident Response Automation (TR-IR-001)
+      Location: Technical Specification/4.1 Incident Response Automation
+      Description: Ensure scalability to handle peak incident loads without degradation (TR-IR-001-5).
+    """
+    status = get_run_status(run_id)
+    if status is None:
+        return {'error': f"Run '{run_id}' not found."}
+    return {'run': status}
+
+
+def _run_not_here(run_id: str) -> dict:
+    """
+    Returns the error for a run missing from this process's registry: unknown, or owned by another
+    engine process, which alone can cancel it and stream its events.
+    """
+    status = get_run_status(run_id)
+    if status is not None and status.get('owner'):
+        return {'error': f"Run '{run_id}' is executed by another engine process.", 'reason': 'other_process',
+                'run': status}
+    return {'error': f"Run '{run_id}' not found.", 'reason': 'not_found'}
+
+
+def cancel_run_controller(run_id: str) -> dict:
+    """
+    Handles the logic for cancelling a queued or running run.
+
+    Parameters:
+    - run_id (str): The id returned when the run was queued.
+
+    Returns:
+    - dict: The run's status, or an 'error' entry with a 'reason' ('not_found', 'finished', or
+      'other_process' for a run owned by another engine process) if the run cannot be cancelled here.
+
+    Requirements Addressed:
+    - Incident Response Automation (TR-IR-001)
+      Location: Technical Specification/4.1 Incident Response Automation
+    """
+    record = get_run_record(run_id)
+    if record is None:
+        return _run_not_here(run_id)
+    if record.finished:
+        return {'error': f"Run '{run_id}' already finished.", 'reason': 'finished', 'run': record.to_dict()}
+    cancel_playbook_run(run_id)
+    return {'message': 'Run cancellation requested', 'run': record.to_dict()}
+
+
+def run_events_controller(run_id: str, last_event_id: int = 0):
+    """
+    Handles the logic for streaming the progress events of a run as Server-Sent Events.
+
+    Parameters:
+    - run_id (str): The id returned when the run was queued.
+    - last_event_id (int): Number of the last event the client received; streaming resumes after it.
+
+    Returns:
+    - Iterator[str]: One SSE message per event ('run_started', 'step_started', 'step_retrying',
+      'step_finished', 'run_finished') until the run finishes, with keep-alive comments while it is
+      idle, or a dict with an 'error' entry and a 'reason' ('not_found' or 'other_process') if the
+      run is not in this process's registry.
 
-    # Load configuration settings using load_config.
-    # Configuration may include settings necessary for executing the playbook correctly.
+    Requirements Addressed:
+    - Incident Response Automation (TR-IR-001)
+      Location: Technical Specification/4.1 Incident Response Automation
+    """
+    record = get_run_record(run_id)
+    if record is None:
+        return _run_not_here(run_id)
+    keepalive = load_config().get('run_events_keepalive_seconds', 15)
+
+    def messages():
+        for item in record.events(after=last_event_id, timeout=keepalive):
+            if item is None:
+                yield ': keep-alive\n\n'
+                continue
+            number, event = item
+            yield f"id: {number}\nevent: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return messages()
+
+
+def simulate_playbook_controller(playbook_id: str, simulation_params: dict = None) -> dict:
+    """
+    Handles the logic for simulating a playbook without executing it.
+
+    Parameters:
+    - playbook_id (str): The unique identifier of the playbook to simulate.
+    - simulation_params (dict, optional): The run 'context' used to decide step conditions and the
+      number of simulated runs ('iterations').
+
+    Returns:
+    - dict: The estimated duration, critical path and external calls per integration, or an
+      'error' entry if the playbook could not be simulated.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+      Description: Validate generated playbooks against organizational policies and compliance standards (TR-DPG-004-3).
+    """
+    simulation_params = simulation_params or {}
+    report = simulate_playbook(playbook_id, simulation_params.get('context'), simulation_params.get('iterations'))
+    if report is None:
+        return {'error': f"Playbook '{playbook_id}' could not be simulated."}
+    return {'simulation': report}
+
+
+def match_playbooks_controller(incident: dict) -> dict:
+    """
+    Handles the logic for selecting the playbooks that apply to an incident.
+
+    Parameters:
+    - incident (dict): The incident document.
+
+    Returns:
+    - dict: The matching playbooks, highest priority first, or an 'error' entry if the configured
+      triggers are malformed.
+
+    Requirements Addressed:
+    - Incident Response Automation (TR-IR-001)
+      Location: Technical Specification/4.1 Incident Response Automation
+      Description: Ensure scalability to handle peak incident loads without degradation (TR-IR-001-5).
+    """
+    try:
+        return {'matches': match_playbooks(incident)}
+    except TriggerError as e:
+        return {'error': f'Playbook triggers are invalid: {e}'}
+
+
+def playbook_auto_update_controller(run: bool = False) -> dict:
+    """
+    Handles the logic for playbook auto-updates: runs a cycle now, or reports the latest one.
+
+    Parameters:
+    - run (bool): Whether to run a cycle now rather than report the latest one.
+
+    Returns:
+    - dict: The cycle report, with the playbooks regenerated, failed and skipped, or an 'error'
+      entry if auto-updates are disabled.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+      Description: Incorporate real-time threat intelligence into playbook creation (TR-DPG-004-2).
+    """
     config = load_config()
+    if not config.get('auto_update_enabled', True) or not config.get('dependency_index_path'):
+        return {'error': 'Playbook auto-updates are disabled.'}
+    report = run_playbook_auto_update() if run else get_playbook_auto_update_report()
+    return {'auto_update': report}
+
 
-    # Call the execute_playbook service with the playbook_id.
-    # This service handles the execution logic, utilizing AI-driven strategies (TR-DPG-004-1, TR-DPG-004-2).
-    executed = execute_playbook(playbook_id, config)
+def execute_playbook_batch_controller(playbook_id: str, batch_params: dict):
+    """
+    Handles the logic for executing a playbook across many incidents in one batch.
+
+    Parameters:
+    - playbook_id (str): The unique identifier of the playbook to execute.
+    - batch_params (dict): The 'incidents' documents and an optional shared 'context'.
+
+    Returns:
+    - Iterator[str]: One JSON line per incident with its run's results, in order of completion,
+      or a dict with an 'error' entry if the batch could not be started.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+    """
+    results = run_playbook_batch(playbook_id, batch_params['incidents'], batch_params.get('context'))
+    if results is None:
+        return {'error': f"Playbook '{playbook_id}' could not be executed."}
+    return (json.dumps({'incident_id': incident.get('id'), 'run': run.to_dict()}, default=str) + '\n'
+            for incident, run in results)
+
+
+def playbook_versions_controller(playbook_id: str, limit: int = None) -> dict:
+    """
+    Handles the logic for listing the versions of a playbook.
+
+    Parameters:
+    - playbook_id (str): The unique identifier of the playbook.
+    - limit (int, optional): Maximum number of versions returned, newest first.
+
+    Returns:
+    - dict: The playbook's versions with their audit information.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+      Description: Ensure version control and audit logging for all playbook modifications (TR-DPG-004-5).
+    """
+    return {'playbook_id': playbook_id, 'versions': get_playbook_versions(playbook_id, limit)}
+
+
+def diff_playbook_versions_controller(old_version: str, new_version: str) -> dict:
+    """
+    Handles the logic for comparing two versions of a playbook.
+
+    Parameters:
+    - old_version (str): Content hash of the earlier version.
+    - new_version (str): Content hash of the later version.
+
+    Returns:
+    - dict: The differences between the versions, or an 'error' entry if either is unknown.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+      Description: Ensure version control and audit logging for all playbook modifications (TR-DPG-004-5).
+    """
+    try:
+        diff = diff_playbook_versions(old_version, new_version)
+    except VersionNotFoundError as e:
+        return {'error': f'Playbook version {e} not found.'}
+    return {'from': old_version, 'to': new_version, 'diff': diff}
+
+
+def import_xsoar_controller(stream) -> dict:
+    """
+    Handles the logic for importing an XSOAR playbook bundle.
+
+    Parameters:
+    - stream (TextIO): The YAML bundle, read incrementally.
+
+    Returns:
+    - dict: Counts of unchanged, imported and failed playbooks, or an 'error' entry if XSOAR
+      compatibility is disabled.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+      Description: Develop AI algorithms for generating standardized playbooks compatible with XSOAR (TR-DPG-004-1).
+    """
+    if not load_config().get('xsoar_compatibility_mode', True):
+        return {'error': 'XSOAR compatibility mode is disabled.'}
+    return import_xsoar_playbooks(stream)
+
+
+def export_xsoar_controller(playbook_ids: list):
+    """
+    Handles the logic for exporting playbooks as an XSOAR bundle.
+
+    Parameters:
+    - playbook_ids (list): The unique identifiers of the playbooks to export.
+
+    Returns:
+    - Iterator[str]: The YAML document of each playbook found, or a dict with an 'error' entry if no playbook was found or XSOAR
+      compatibility is disabled.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+      Description: Develop AI algorithms for generating standardized playbooks compatible with XSOAR (TR-DPG-004-1).
+    """
+    if not load_config().get('xsoar_compatibility_mode', True):
+        return {'error': 'XSOAR compatibility mode is disabled.'}
+    documents = export_xsoar_playbooks(playbook_ids)
+    first = next(documents, None)
+    if first is None:
+        return {'error': f"Playbooks {', '.join(map(str, playbook_ids))} not found."}
+    return itertools.chain([first], documents)
 
-    # Return True if the execution was successful, otherwise False.
-    return executed
\ No newline at end of file
+
+def run_timeline_controller(run_id: str, as_text: bool = False):
+    """
+    Handles the logic for viewing the timeline of a playbook run.
+
+    Parameters:
+    - run_id (str): The identifier of the run.
+    - as_text (bool): Render the timeline as a text chart.
+
+    Returns:
+    - dict or str: The run's steps with their offsets, durations, queue waits and attempts (or the
+      text chart), or a dict with an 'error' entry if the run's trace is not available.
+
+    Requirements Addressed:
+    - Incident Response Automation (TR-IR-001-5)
+      Location: Technical Specification/4.1 Incident Response Automation
+      Description: Ensure scalability to handle peak incident loads without degradation.
+    """
+    timeline = get_run_timeline(run_id)
+    if timeline is None:
+        return {'error': f"No trace of run '{run_id}'."}
+    return render_timeline(timeline) if as_text else timeline
+
+
+def run_trace_controller(run_id: str) -> dict:
+    """
+    Handles the logic for exporting the trace of a playbook run.
+
+    Parameters:
+    - run_id (str): The identifier of the run.
+
+    Returns:
+    - dict: The run's spans as OTLP/JSON, or an 'error' entry if the run's trace is not available.
+
+    Requirements Addressed:
+    - Incident Response Automation (TR-IR-001-5)
+      Location: Technical Specification/4.1 Incident Response Automation
+      Description: Ensure scalability to handle peak incident loads without degradation.
+    """
+    trace = get_run_trace(run_id)
+    if trace is None:
+        return {'error': f"No trace of run '{run_id}'."}
+    return trace
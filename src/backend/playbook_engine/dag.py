@@ -0,0 +1,914 @@
+"""
+Dependency-graph execution of playbook steps.
+
+Steps may declare the step numbers they depend on in `depends_on`; the steps of a playbook then form
+a directed acyclic graph that is validated (unknown dependencies, duplicates, cycles) when the
+playbook is saved, and executed by a scheduler that runs every step whose dependencies have completed
+concurrently on a bounded thread pool. A containment playbook with ten independent lookups therefore
+takes as long as the slowest lookup instead of their sum.
+
+Playbooks written before dependencies existed keep their sequential behaviour: when no step declares
+`depends_on`, each step depends on the previous step that waits for completion
+(`wait_for_completion` defaults to true).
+
+Every run records per-step timings and the critical path, the chain of dependent steps that
+determined the run's duration. Runs can report their progress to a listener as they go (step
+started, retried and finished) and be cancelled while in flight.
+
+Requirements Addressed:
+- Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+  - Automate incident response using AI-driven workflows.
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import copy  # Copies step parameters into compiled plans. (builtin)
+import heapq  # Orders delayed step retries. (builtin)
+import itertools  # Tie-breaks delayed retries. (builtin)
+import threading  # Guards the lazily created worker pool. (builtin)
+import time  # Measures step and run durations and enforces step timeouts. (builtin)
+import uuid  # Generates run ids. (builtin)
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait  # Bounded worker pool. (builtin)
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+# Internal dependencies
+from .expressions import CompiledExpression, ExpressionError  # Compiles step conditions.
+from .handlers import HandlerFunc, get_step_handler, get_step_integration, is_sandboxed_step  # Resolves each step's handler and integration.
+from .journal import RunJournal, idempotency_key  # Records runs for crash recovery.
+from .templates import ParameterTemplate  # Compiles templated step parameters.
+from .sandbox import SandboxPool, get_sandbox_pool  # Runs sandboxed handlers in worker processes.
+from .tracing import Span, TraceCollector, new_span_id, payload_size, trace_id_for  # Run and step spans.
+from .policies import (  # Step timeouts, retries and per-integration circuit breakers.
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    IntegrationLimiter,
+    StepPolicy,
+    StepTimeoutError,
+    get_circuit_breakers,
+    get_integration_limiter,
+)
+
+# Default number of steps executed concurrently across all runs of a process.
+DEFAULT_MAX_PARALLEL_STEPS = 8
+
+# How often steps waiting for a capped integration check for a free slot.
+THROTTLE_POLL_SECONDS = 0.02
+
+# Step failure policies, as in the playbook schema.
+ON_FAILURE_CONTINUE = 'continue'
+ON_FAILURE_STOP = 'stop'
+
+# Step and run statuses.
+STATUS_SUCCEEDED = 'succeeded'
+STATUS_FAILED = 'failed'
+STATUS_SKIPPED = 'skipped'
+STATUS_CANCELLED = 'cancelled'
+
+
+class PlaybookDAGError(ValueError):
+    """
+    Raised when the steps of a playbook do not form a valid dependency graph.
+    """
+
+
+class RunCancelledError(RuntimeError):
+    """
+    Raised by step handlers that stop because their run was cancelled.
+    """
+
+
+class CancellationToken:
+    """
+    Cancels a run. Handlers of in-flight steps receive it in their context as 'cancellation' and
+    should stop early when it is set, e.g. by calling check() between calls to their integration.
+    """
+
+    def __init__(self):
+        self.reason: Optional[str] = None
+        # A future completed on cancellation lets the executor wait for steps and cancellation together.
+        self.future: Future = Future()
+        self.future.set_running_or_notify_cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.future.done()
+
+    def cancel(self, reason: str = 'Run cancelled.') -> bool:
+        """
+        Cancels the run; returns False if it was already cancelled.
+        """
+        try:
+            self.reason = self.reason or reason
+            self.future.set_result(reason)
+            return True
+        except Exception:
+            return False  # already cancelled
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until the run is cancelled or the timeout expires; returns whether it was cancelled.
+        """
+        wait([self.future], timeout=timeout)
+        return self.cancelled
+
+    def check(self) -> None:
+        """
+        Raises RunCancelledError if the run was cancelled.
+        """
+        if self.cancelled:
+            raise RunCancelledError(self.reason)
+
+
+def normalize_steps(steps: list) -> List[dict]:
+    """
+    Returns the steps of a playbook as dictionaries with a step number and explicit dependencies.
+
+    Plain string steps are treated as actions without parameters. When no step declares
+    `depends_on`, the steps are chained in list order, skipping steps that do not wait for
+    completion, to preserve the sequential behaviour of existing playbooks.
+
+    Raises:
+        PlaybookDAGError: If a step is malformed or a step number is duplicated.
+    """
+    if not isinstance(steps, list):
+        raise PlaybookDAGError('Playbook steps must be a list.')
+
+    normalized = []
+    seen = set()
+    for index, step in enumerate(steps):
+        if isinstance(step, str):
+            step = {'action': step}
+        if not isinstance(step, dict) or not isinstance(step.get('action'), str) or not step['action']:
+            raise PlaybookDAGError(f'Step {index + 1} must have a non-empty action.')
+        step = dict(step)
+        step.setdefault('step_number', index + 1)
+        if step['step_number'] in seen:
+            raise PlaybookDAGError(f"Duplicate step number {step['step_number']}.")
+        seen.add(step['step_number'])
+        normalized.append(step)
+
+    if not any('depends_on' in step for step in normalized):
+        blocking = None
+        for step in normalized:
+            step['depends_on'] = [blocking] if blocking is not None else []
+            if step.get('wait_for_completion', True):
+                blocking = step['step_number']
+    else:
+        for step in normalized:
+            depends_on = step.get('depends_on') or []
+            if not isinstance(depends_on, list):
+                raise PlaybookDAGError(f"Step {step['step_number']}: depends_on must be a list of step numbers.")
+            step['depends_on'] = list(dict.fromkeys(depends_on))
+    return normalized
+
+
+def _find_cycle(dependencies: Dict[Any, List[Any]]) -> List[Any]:
+    """
+    Returns one dependency cycle, as a list of step numbers starting and ending with the same step.
+    """
+    visiting, done = set(), set()
+    path: List[Any] = []
+
+    def visit(node) -> Optional[List[Any]]:
+        visiting.add(node)
+        path.append(node)
+        for dependency in dependencies[node]:
+            if dependency not in dependencies:
+                continue
+            if dependency in visiting:
+                return path[path.index(dependency):] + [dependency]
+            if dependency not in done:
+                cycle = visit(dependency)
+                if cycle:
+                    return cycle
+        visiting.discard(node)
+        done.add(node)
+        path.pop()
+        return None
+
+    for node in dependencies:
+        if node not in done:
+            cycle = visit(node)
+            if cycle:
+                return cycle
+    return []
+
+
+def topological_order(steps: List[dict]) -> List[Any]:
+    """
+    Returns the step numbers of normalized steps in dependency order (Kahn's algorithm).
+
+    Independent steps keep their declaration order, so the order is deterministic.
+
+    Raises:
+        PlaybookDAGError: If a step depends on an unknown step or on itself, or the steps form a cycle.
+    """
+    dependencies = {step['step_number']: step['depends_on'] for step in steps}
+    dependents: Dict[Any, List[Any]] = {number: [] for number in dependencies}
+    for number, depends_on in dependencies.items():
+        for dependency in depends_on:
+            if dependency == number:
+                raise PlaybookDAGError(f'Step {number} depends on itself.')
+            if dependency not in dependencies:
+                raise PlaybookDAGError(f'Step {number} depends on unknown step {dependency}.')
+            dependents[dependency].append(number)
+
+    remaining = {number: len(depends_on) for number, depends_on in dependencies.items()}
+    ready = [number for number in dependencies if remaining[number] == 0]
+    order = []
+    while ready:
+        number = ready.pop(0)
+        order.append(number)
+        for dependent in dependents[number]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+
+    if len(order) != len(dependencies):
+        cycle = _find_cycle({number: dependencies[number] for number in dependencies if number not in order})
+        raise PlaybookDAGError('Playbook steps contain a dependency cycle: ' + ' -> '.join(map(str, cycle)))
+    return order
+
+
+def validate_steps(steps: list) -> List[dict]:
+    """
+    Validates that playbook steps form a dependency graph; called when a playbook is saved.
+
+    Returns:
+        List[dict]: The normalized steps, in declaration order.
+
+    Raises:
+        PlaybookDAGError: If the steps are malformed or their dependencies are invalid or cyclic.
+    """
+    normalized = normalize_steps(steps)
+    topological_order(normalized)
+    return normalized
+
+
+@dataclass
+class StepResult:
+    """
+    Outcome and timing of one step of a run; times are seconds from the start of the run.
+    """
+    step_number: Any
+    action: str
+    status: str
+    result: Any = None
+    error: Optional[str] = None
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    attempts: int = 0
+    resumed: bool = False
+
+    @property
+    def duration(self) -> float:
+        return self.finished_at - self.started_at
+
+    def to_dict(self) -> dict:
+        return {
+            'step_number': self.step_number,
+            'action': self.action,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'started_at': round(self.started_at, 6),
+            'duration': round(self.duration, 6),
+            'attempts': self.attempts,
+            'resumed': self.resumed,
+        }
+
+
+@dataclass
+class RunResult:
+    """
+    Outcome of a playbook run: per-step results, total duration and critical path.
+    """
+    playbook_id: Any
+    status: str
+    run_id: Optional[str] = None
+    steps: Dict[Any, StepResult] = field(default_factory=dict)
+    duration: float = 0.0
+    critical_path: List[Any] = field(default_factory=list)
+    critical_path_duration: float = 0.0
+    config_version: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == STATUS_SUCCEEDED
+
+    def to_dict(self) -> dict:
+        return {
+            'run_id': self.run_id,
+            'playbook_id': self.playbook_id,
+            'status': self.status,
+            'duration': round(self.duration, 6),
+            'critical_path': self.critical_path,
+            'critical_path_duration': round(self.critical_path_duration, 6),
+            'config_version': self.config_version,
+            'steps': [result.to_dict() for result in self.steps.values()],
+        }
+
+
+@dataclass(frozen=True)
+class CompiledStep:
+    """
+    A step of a compiled plan, with its handler, condition and dependencies resolved.
+    """
+    step_number: Any
+    action: str
+    handler: Optional[HandlerFunc]
+    parameters: dict
+    depends_on: Tuple[Any, ...]
+    dependents: Tuple[Any, ...]
+    on_failure: str
+    condition: Optional[CompiledExpression]
+    policy: StepPolicy
+    integration: Optional[str]
+    definition: dict
+    template: Optional[ParameterTemplate] = None
+    parameters_bytes: int = 0  # serialized size of the parameters, reported in step spans
+    sandboxed: bool = False  # the handler runs in the process-pool sandbox
+
+    def render_parameters(self, context: Mapping[str, Any]) -> dict:
+        """
+        Returns the step's parameters with their templates evaluated against a run context.
+
+        Raises:
+            ExpressionError: If a template expression fails.
+        """
+        return self.parameters if self.template is None else self.template.render(context)
+
+
+@dataclass(frozen=True)
+class CompiledPlan:
+    """
+    Immutable execution plan of a playbook: its steps and their dependency order, computed once.
+
+    Plans hold no per-run state, so one plan is shared by every run of the same playbook version.
+    """
+    key: str
+    steps: Mapping[Any, CompiledStep]  # read-only, by step number, in declaration order
+    order: Tuple[Any, ...]
+
+
+def compile_plan(steps: list, key: str = '', policy_defaults: Optional[Mapping] = None) -> CompiledPlan:
+    """
+    Compiles playbook steps into an execution plan.
+
+    Validates the dependency graph, resolves each action's handler and integration, compiles step
+    conditions and parameter templates and resolves timeout and retry policies. Actions without a registered handler are
+    resolved again when the step runs.
+
+    Parameters:
+        steps (list): The playbook steps.
+        key (str): Identifier of the plan, e.g. the content hash it is cached under.
+        policy_defaults (Mapping, optional): Engine defaults for step timeouts and retries.
+
+    Raises:
+        PlaybookDAGError: If the steps are malformed, their dependencies are invalid or cyclic, or
+        a condition, parameter template or policy is not valid.
+    """
+    normalized = validate_steps(steps)
+    dependents: Dict[Any, List[Any]] = {step['step_number']: [] for step in normalized}
+    for step in normalized:
+        for dependency in step['depends_on']:
+            dependents[dependency].append(step['step_number'])
+
+    compiled = []
+    for step in normalized:
+        condition = None
+        if step.get('condition'):
+            try:
+                condition = CompiledExpression(step['condition'])
+            except ExpressionError as exc:
+                raise PlaybookDAGError(f"Step {step['step_number']}: {exc}") from None
+        parameters = copy.deepcopy(step.get('parameters') or {})
+        try:
+            template = ParameterTemplate(parameters)
+        except ExpressionError as exc:
+            raise PlaybookDAGError(f"Step {step['step_number']}: {exc}") from None
+        try:
+            policy = StepPolicy.from_step(step, policy_defaults)
+        except (TypeError, ValueError) as exc:
+            raise PlaybookDAGError(f"Step {step['step_number']}: {exc}") from None
+        compiled.append(CompiledStep(
+            step_number=step['step_number'],
+            action=step['action'],
+            handler=get_step_handler(step['action']),
+            parameters=parameters,
+            depends_on=tuple(step['depends_on']),
+            dependents=tuple(dependents[step['step_number']]),
+            on_failure=step.get('on_failure', ON_FAILURE_STOP),
+            condition=condition,
+            policy=policy,
+            integration=step.get('integration') or get_step_integration(step['action']),
+            definition=step,
+            template=template if template.templated else None,
+            parameters_bytes=payload_size(parameters),
+            sandboxed=is_sandboxed_step(step['action']),
+        ))
+    return CompiledPlan(
+        key=key,
+        steps=MappingProxyType({step.step_number: step for step in compiled}),
+        order=tuple(topological_order(normalized)),
+    )
+
+
+class AttemptDeadline:
+    """
+    Timeout of one step attempt, counted from when its handler starts on a worker thread rather than
+    from when the attempt was queued behind the shared step pool.
+    """
+
+    __slots__ = ('timeout', 'at')
+
+    def __init__(self, timeout: Optional[float]):
+        self.timeout = timeout
+        self.at: Optional[float] = None  # time.monotonic() value, once the handler started
+
+    def start(self, *contexts: dict) -> None:
+        """
+        Starts the clock and hands the deadline to the handler contexts; called on the worker thread.
+        """
+        if self.timeout:
+            self.at = time.monotonic() + self.timeout
+        for context in contexts:
+            context['deadline'] = self.at
+
+    @property
+    def waiting(self) -> bool:
+        """
+        True while the attempt has a timeout but its handler has not started yet.
+        """
+        return bool(self.timeout) and self.at is None
+
+    def expired(self, now: float) -> bool:
+        return self.at is not None and self.at <= now
+
+
+def critical_path(plan: CompiledPlan, results: Dict[Any, StepResult]) -> Tuple[List[Any], float]:
+    """
+    Returns the chain of dependent steps with the longest total duration, and that duration.
+    """
+    longest: Dict[Any, float] = {}
+    previous: Dict[Any, Any] = {}
+    for number in plan.order:
+        result = results.get(number)
+        duration = result.duration if result else 0.0
+        best, best_dependency = 0.0, None
+        for dependency in plan.steps[number].depends_on:
+            if longest[dependency] > best:
+                best, best_dependency = longest[dependency], dependency
+        longest[number] = best + duration
+        previous[number] = best_dependency
+
+    if not longest:
+        return [], 0.0
+    node = max(longest, key=longest.get)
+    total = longest[node]
+    path = []
+    while node is not None:
+        path.append(node)
+        node = previous[node]
+    return path[::-1], total
+
+
+class DAGExecutor:
+    """
+    Executes playbook plans as dependency graphs on a bounded, process-wide thread pool.
+
+    Steps are executed under their timeout and retry policies, calls to an integration whose
+    circuit breaker is open fail immediately without occupying a worker, and steps calling an
+    integration at its concurrency cap wait in their run, also without occupying a worker. Steps
+    whose handler is sandboxed run in the process-pool sandbox, their worker thread only waiting for
+    the result.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_PARALLEL_STEPS,
+                 breakers: Optional[CircuitBreakerRegistry] = None, limiter: Optional[IntegrationLimiter] = None,
+                 sandbox: Optional[SandboxPool] = None):
+        """
+        Initializes the executor; the worker pool is created on first use.
+
+        Parameters:
+            max_workers (int): Maximum number of steps executed concurrently.
+            breakers (CircuitBreakerRegistry, optional): Per-integration circuit breakers; defaults
+                to the process-wide registry.
+            limiter (IntegrationLimiter, optional): Per-integration concurrency caps; defaults to the
+                process-wide limiter.
+            sandbox (SandboxPool, optional): Worker processes of sandboxed handlers; defaults to the
+                process-wide sandbox.
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.breakers = breakers or get_circuit_breakers()
+        self.limiter = limiter or get_integration_limiter()
+        self.sandbox = sandbox or get_sandbox_pool()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='playbook-step')
+            return self._pool
+
+    def shutdown(self, wait_for_steps: bool = True) -> None:
+        """
+        Shuts the worker pool down; a later run creates a new one.
+        """
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait_for_steps)
+
+    def call_handler(self, step: CompiledStep, parameters: dict, context: dict) -> Any:
+        """
+        Calls a step's handler with rendered parameters, in the sandbox if the handler is sandboxed.
+        """
+        handler = step.handler or get_step_handler(step.action)
+        if handler is None:
+            raise LookupError(f"No handler registered for action '{step.action}'.")
+        if step.sandboxed or (step.handler is None and is_sandboxed_step(step.action)):
+            return self.sandbox.call(handler, parameters, context)
+        return handler(parameters, context)
+
+    def _invoke(self, step: CompiledStep, context: dict, deadline: Optional[AttemptDeadline] = None) -> Any:
+        """
+        Runs one attempt of a step's handler on a worker thread, starting its deadline first.
+        """
+        if deadline is not None:
+            deadline.start(context)
+        return self.call_handler(step, step.render_parameters(context), context)
+
+    def _invoke_traced(self, step: CompiledStep, context: dict, deadline: AttemptDeadline,
+                       handler_started: Dict[Any, float], run_started: float) -> Any:
+        """
+        Runs one attempt of a step, recording when the handler of its first attempt started.
+        """
+        handler_started.setdefault(step.step_number, time.monotonic() - run_started)
+        return self._invoke(step, context, deadline)
+
+    def run(self, plan, context: Optional[dict] = None, playbook_id: Any = None, run_id: Optional[str] = None,
+            journal: Optional[RunJournal] = None, tracer: Optional[TraceCollector] = None,
+            trace_attributes: Optional[dict] = None, cancellation: Optional[CancellationToken] = None,
+            listener: Optional[Callable[[dict], None]] = None) -> RunResult:
+        """
+        Executes a plan, running every step whose dependencies have completed concurrently.
+
+        A step whose condition is false is skipped and counts as completed for its dependents.
+        Failed or timed-out attempts are retried according to the step's policy. A step that still
+        fails with `on_failure: continue` also counts as completed and does not fail the run. Any
+        other failure fails and stops the run: steps already running finish, and steps not yet
+        started are skipped.
+
+        A timed-out attempt is abandoned rather than interrupted, since Python threads cannot be
+        killed; handlers receive their `deadline` (a `time.monotonic()` value) in the context and
+        should bound their own I/O with it. The timeout counts from when the handler starts, so
+        time spent waiting for a free worker of the shared step pool neither times an attempt out
+        nor counts as a failure of its integration.
+
+        With a journal, the run and each step are recorded as they start and finish. Running a
+        journaled run id again resumes it: steps the journal shows as finished are not executed
+        again, and their recorded results are reused; steps recorded as cancelled are executed again.
+
+        With a tracer, the run and each executed step are recorded as spans of the run's trace.
+
+        With a cancellation token, cancelling it stops the run: steps not yet started are skipped,
+        pending retries are dropped and in-flight attempts are abandoned and reported as cancelled;
+        their handlers find the token in their context to stop their own work. A listener receives
+        progress events ('run_started', 'step_started', 'step_retrying', 'step_finished',
+        'run_finished') on the run's thread as they happen.
+
+        Parameters:
+            plan (CompiledPlan or list): The compiled plan, or raw playbook steps compiled for this run.
+            context (dict, optional): Run context passed to handlers and conditions; the results of
+                completed steps are added under 'results', keyed by step number. Its
+                'config_version' is reported in the result.
+            playbook_id: Identifier of the playbook, reported in the result.
+            run_id (str, optional): Identifier of the run; generated when omitted.
+            journal (RunJournal, optional): Journal recording the run for crash recovery.
+            tracer (TraceCollector, optional): Collector receiving the spans of the run.
+            trace_attributes (dict, optional): Extra attributes of the run's span, e.g. its queue wait.
+            cancellation (CancellationToken, optional): Token cancelling the run.
+            listener (callable, optional): Receives a dict per progress event; its errors are ignored.
+
+        Returns:
+            RunResult: The status, per-step results, duration and critical path of the run.
+
+        Raises:
+            PlaybookDAGError: If raw steps do not form a valid dependency graph.
+        """
+        if not isinstance(plan, CompiledPlan):
+            plan = compile_plan(plan)
+        run_id = run_id or uuid.uuid4().hex
+        context = dict(context or {})
+        context.setdefault('playbook_id', playbook_id)
+        context['run_id'] = run_id
+
+        finished = {}
+        if journal is not None:
+            if journal.get_run(run_id) is None:
+                journal.start_run(run_id, playbook_id, [step.definition for step in plan.steps.values()], context)
+            else:
+                # Cancelled steps were abandoned rather than completed, so they run again.
+                finished = {number: outcome for number, outcome in journal.finished_steps(run_id).items()
+                            if outcome['status'] != STATUS_CANCELLED}
+
+        context['results'] = {}
+        run = RunResult(playbook_id=playbook_id, status=STATUS_SUCCEEDED, run_id=run_id,
+                        config_version=context.get('config_version'))
+        remaining = {number: len(step.depends_on) for number, step in plan.steps.items()}
+        ready = [number for number, step in plan.steps.items() if not step.depends_on]
+        pending = {}  # future -> (step number, attempt, AttemptDeadline)
+        delayed = []  # heap of (retry time, sequence, step number, attempt)
+        throttled = []  # (step number, attempt) waiting for a capped integration
+        trials = set()  # futures of half-open circuit breaker trial calls
+        sequence = itertools.count()
+        started_at: Dict[Any, float] = {}
+        last_error: Dict[Any, str] = {}
+        stopped = False
+        cancelled = False  # whether the cancellation of the run was handled
+        pool = self._get_pool()
+        run_started = time.monotonic()
+        if tracer is not None:
+            run_started_ns = time.time_ns()
+            trace_id, root_span_id = trace_id_for(run_id), new_span_id()
+            ready_at: Dict[Any, float] = {number: 0.0 for number in ready}
+            handler_started: Dict[Any, float] = {}
+            attempt_events: Dict[Any, list] = {}
+
+        def emit(event: str, **fields) -> None:
+            if listener is not None:
+                try:
+                    listener(dict(fields, event=event, run_id=run_id, at=round(time.monotonic() - run_started, 6)))
+                except Exception:
+                    pass  # progress reporting never affects the run
+
+        def settle(number, result: StepResult) -> None:
+            nonlocal stopped
+            run.steps[number] = result
+            emit('step_finished', **result.to_dict())
+            if result.status == STATUS_CANCELLED:
+                return
+            if result.status == STATUS_SUCCEEDED:
+                context['results'][number] = result.result
+            elif result.status == STATUS_FAILED and plan.steps[number].on_failure != ON_FAILURE_CONTINUE:
+                run.status = STATUS_FAILED
+                stopped = True
+                return
+            for dependent in plan.steps[number].dependents:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+                    if tracer is not None:
+                        ready_at[dependent] = time.monotonic() - run_started
+
+        def trace_step(step: CompiledStep, result: StepResult) -> None:
+            number = step.step_number
+            queue_wait = None
+            if number in handler_started:
+                queue_wait = round((handler_started[number] - ready_at.get(number, result.started_at)) * 1000, 3)
+            attributes = {
+                'step.number': number,
+                'step.action': step.action,
+                'step.integration': step.integration,
+                'step.status': result.status,
+                'step.attempts': result.attempts,
+                'step.retries': max(0, result.attempts - 1),
+                'step.queue_wait_ms': queue_wait,
+            }
+            if tracer.payload_sizes:
+                attributes['step.parameters_bytes'] = step.parameters_bytes
+                attributes['step.result_bytes'] = payload_size(result.result)
+            tracer.record(Span(trace_id, new_span_id(), root_span_id, step.action,
+                               run_started_ns + int(result.started_at * 1e9),
+                               run_started_ns + int(result.finished_at * 1e9), attributes,
+                               attempt_events.get(number), result.error if result.status == STATUS_FAILED else None))
+
+        def finish(number, status: str, attempts: int, value: Any = None, error: Optional[str] = None) -> None:
+            step = plan.steps[number]
+            result = StepResult(number, step.action, status, value, error, started_at=started_at[number],
+                                finished_at=time.monotonic() - run_started, attempts=attempts)
+            if journal is not None:
+                journal.step_finished(run_id, number, idempotency_key(run_id, number), status, value, error)
+                if status != STATUS_CANCELLED:
+                    # Cancelled steps say nothing about how long the step takes.
+                    journal.record_step_stats(playbook_id, number, step.action, step.integration, status, attempts,
+                                              result.duration)
+            if tracer is not None:
+                trace_step(step, result)
+            settle(number, result)
+
+        def attempt_failed(number, attempt: int, error: str) -> None:
+            step = plan.steps[number]
+            last_error[number] = error
+            if tracer is not None:
+                attempt_events.setdefault(number, []).append(
+                    (time.time_ns(), 'attempt_failed', {'attempt': attempt, 'error': error}))
+            if attempt <= step.policy.retries and not stopped:
+                delay = step.policy.backoff_delay(attempt)
+                heapq.heappush(delayed, (time.monotonic() + delay, next(sequence), number, attempt + 1))
+                emit('step_retrying', step_number=number, action=step.action, attempt=attempt, error=error,
+                     retry_in=round(delay, 6))
+            else:
+                finish(number, STATUS_FAILED, attempt, error=error)
+
+        def start(number, attempt: int) -> None:
+            step = plan.steps[number]
+            key = idempotency_key(run_id, number)
+            if attempt == 1:
+                started_at[number] = time.monotonic() - run_started
+                if journal is not None:
+                    journal.step_started(run_id, number, key)
+                if step.condition is not None:
+                    try:
+                        if not step.condition.evaluate(context):
+                            finish(number, STATUS_SKIPPED, 0)
+                            return
+                    except ExpressionError as exc:
+                        finish(number, STATUS_FAILED, 0, error=f'{type(exc).__name__}: {exc}')
+                        return
+            trial = False
+            if step.integration:
+                if not self.limiter.try_acquire(step.integration):
+                    throttled.append((number, attempt))
+                    return
+                try:
+                    trial = self.breakers.get(step.integration).acquire()
+                except CircuitOpenError as exc:
+                    self.limiter.release(step.integration)
+                    attempt_failed(number, attempt, f'{type(exc).__name__}: {exc}')
+                    return
+            deadline = AttemptDeadline(step.policy.timeout_seconds)
+            step_context = dict(context, step_number=number, idempotency_key=key, attempt=attempt, deadline=None,
+                                cancellation=cancellation)
+            if tracer is not None:
+                future = pool.submit(self._invoke_traced, step, step_context, deadline, handler_started, run_started)
+            else:
+                future = pool.submit(self._invoke, step, step_context, deadline)
+            if step.integration:
+                # The slot is held until the call really ends, even if the attempt is abandoned.
+                future.add_done_callback(lambda _, integration=step.integration: self.limiter.release(integration))
+            pending[future] = (number, attempt, deadline)
+            if trial:
+                trials.add(future)
+            emit('step_started', step_number=number, action=step.action, integration=step.integration,
+                 attempt=attempt)
+
+        def cancel() -> None:
+            """
+            Stops the run: in-flight attempts are abandoned, retries and throttled steps dropped.
+
+            An abandoned attempt that was a circuit breaker's trial call gives the trial back, since
+            its outcome is never recorded. A run that had already failed keeps its failed status.
+            """
+            nonlocal stopped, cancelled
+            cancelled = True
+            if not stopped:
+                run.status = STATUS_CANCELLED
+            stopped = True
+            for future, (number, attempt, _) in list(pending.items()):
+                del pending[future]
+                future.cancel()
+                if future in trials:
+                    self.breakers.get(plan.steps[number].integration).release_trial()
+                finish(number, STATUS_CANCELLED, attempt, error=cancellation.reason)
+            for _, _, number, attempt in delayed:
+                finish(number, STATUS_CANCELLED, attempt - 1, error=cancellation.reason)
+            for number, attempt in throttled:
+                finish(number, STATUS_CANCELLED, attempt - 1, error=cancellation.reason)
+            delayed.clear()
+            throttled.clear()
+
+        def record_outcome(number, succeeded: bool) -> None:
+            integration = plan.steps[number].integration
+            if integration:
+                breaker = self.breakers.get(integration)
+                if succeeded:
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
+
+        emit('run_started', playbook_id=playbook_id, steps=len(plan.steps))
+        waiters = [cancellation.future] if cancellation is not None else []
+        while True:
+            if cancellation is not None and cancellation.cancelled and not cancelled:
+                cancel()
+            while ready and not stopped:
+                number = ready.pop(0)
+                if number in finished:
+                    outcome = finished[number]
+                    settle(number, StepResult(number, plan.steps[number].action, outcome['status'],
+                                              outcome['result'], outcome['error'], resumed=True))
+                else:
+                    start(number, 1)
+
+            waiting, throttled[:] = throttled[:], []
+            for number, attempt in waiting:
+                if stopped:
+                    finish(number, STATUS_SKIPPED if attempt == 1 else STATUS_FAILED, attempt - 1,
+                           error=last_error.get(number))
+                else:
+                    start(number, attempt)
+
+            now = time.monotonic()
+            while delayed and (stopped or delayed[0][0] <= now):
+                _, _, number, attempt = heapq.heappop(delayed)
+                if stopped:
+                    finish(number, STATUS_FAILED, attempt - 1, error=last_error[number])
+                else:
+                    start(number, attempt)
+            if ready and not stopped:
+                continue
+            if not pending and not delayed and not throttled:
+                break
+
+            wake_times = [deadline.at for _, _, deadline in pending.values() if deadline.at is not None]
+            if delayed:
+                wake_times.append(delayed[0][0])
+            if throttled or any(deadline.waiting for _, _, deadline in pending.values()):
+                # Queued attempts start their deadline on a worker thread; poll to pick it up.
+                wake_times.append(now + THROTTLE_POLL_SECONDS)
+            timeout = max(0.0, min(wake_times) - now) if wake_times else None
+            if not pending:
+                if cancellation is not None:
+                    cancellation.wait(timeout)
+                else:
+                    time.sleep(timeout)
+                continue
+            done, _ = wait(list(pending) + waiters, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future not in pending:
+                    continue  # the cancellation token
+                number, attempt, _ = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as exc:
+                    record_outcome(number, False)
+                    attempt_failed(number, attempt, f'{type(exc).__name__}: {exc}')
+                else:
+                    record_outcome(number, True)
+                    finish(number, STATUS_SUCCEEDED, attempt, value)
+
+            now = time.monotonic()
+            for future, (number, attempt, deadline) in list(pending.items()):
+                if deadline.expired(now) and not future.done():
+                    # Abandon the attempt; its eventual outcome is ignored. Attempts still queued
+                    # for a worker have no deadline yet and keep their place.
+                    del pending[future]
+                    future.cancel()
+                    record_outcome(number, False)
+                    timeout_error = StepTimeoutError(f'Step {number} timed out after '
+                                                     f'{plan.steps[number].policy.timeout_seconds}s.')
+                    attempt_failed(number, attempt, f'{type(timeout_error).__name__}: {timeout_error}')
+
+        run.duration = time.monotonic() - run_started
+        run.steps = {
+            step.step_number: run.steps.get(step.step_number) or StepResult(step.step_number, step.action, STATUS_SKIPPED)
+            for step in plan.steps.values()
+        }
+        run.critical_path, run.critical_path_duration = critical_path(plan, run.steps)
+        if journal is not None:
+            journal.finish_run(run_id, run.status)
+        if tracer is not None:
+            attributes = {
+                'playbook.id': playbook_id,
+                'run.id': run_id,
+                'run.status': run.status,
+                'run.steps': len(plan.steps),
+                'run.critical_path_ms': round(run.critical_path_duration * 1000, 3),
+                'config.version': run.config_version,
+            }
+            attributes.update(trace_attributes or {})
+            failed = next((result.error for result in run.steps.values() if result.status == STATUS_FAILED), None)
+            tracer.record(Span(trace_id, root_span_id, None, 'playbook.run', run_started_ns,
+                               run_started_ns + int(run.duration * 1e9), attributes,
+                               error=(failed or 'failed') if run.status == STATUS_FAILED else None))
+        emit('run_finished', status=run.status, duration=round(run.duration, 6), critical_path=run.critical_path)
+        return run
+
+
+_executor: Optional[DAGExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_dag_executor(max_workers: int = DEFAULT_MAX_PARALLEL_STEPS,
+                     breakers: Optional[CircuitBreakerRegistry] = None,
+                     limiter: Optional[IntegrationLimiter] = None,
+                     sandbox: Optional[SandboxPool] = None) -> DAGExecutor:
+    """
+    Returns the process-wide executor, creating it with the given pool size, breakers, limiter and
+    sandbox on first use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = DAGExecutor(max_workers, breakers, limiter, sandbox)
+        return _executor
@@ -0,0 +1,161 @@
+"""
+Safe expressions for playbook step conditions.
+
+A step may carry a `condition` such as `results[1]['verdict'] == 'malicious' and incident['severity'] >= 3`;
+the step only runs when it evaluates to true. Expressions use a small, side-effect-free subset of
+Python syntax (literals, names, subscripts, comparisons, boolean and arithmetic operators) that is
+checked and compiled to bytecode once, when the playbook plan is compiled, so evaluating a condition
+during a run costs a single `eval` of a code object. There is no `**`, `*` refuses to repeat a
+string or list beyond MAX_REPEAT_LENGTH items and `%` does not format strings (whose field widths are
+unbounded), so an expression cannot exhaust memory.
+
+Requirements Addressed:
+- Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+  - Automate incident response using AI-driven workflows.
+"""
+
+import ast  # Parses and checks expressions. (builtin)
+import sys  # Selects the subscript syntax of the running Python version. (builtin)
+from typing import Any, Mapping
+
+# Syntax nodes allowed in expressions; anything else (calls, attributes, lambdas, comprehensions...)
+# is rejected so expressions cannot reach Python objects beyond the names they are given.
+_ALLOWED_NODES = (
+    ast.Expression, ast.Constant, ast.Name, ast.Load, ast.Subscript, ast.Slice,
+    ast.List, ast.Tuple, ast.Dict, ast.Set,
+    ast.BoolOp, ast.And, ast.Or,
+    ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot,
+    ast.IfExp,
+) + ((ast.Index,) if hasattr(ast, 'Index') else ())  # Subscript wrapper node before Python 3.9
+
+# Longest string, bytes or list an expression may build by repetition (`'a' * n`, `[0] * n`).
+MAX_REPEAT_LENGTH = 100000
+
+_SEQUENCE_TYPES = (str, bytes, list, tuple)
+
+
+def _multiply(left: Any, right: Any) -> Any:
+    """
+    Evaluates `left * right`, refusing to build a sequence longer than MAX_REPEAT_LENGTH.
+    """
+    for sequence, count in ((left, right), (right, left)):
+        if isinstance(sequence, _SEQUENCE_TYPES) and isinstance(count, int) and len(sequence) * count > MAX_REPEAT_LENGTH:
+            raise ValueError(f'repetition would exceed {MAX_REPEAT_LENGTH} items')
+    return left * right
+
+
+def _modulo(left: Any, right: Any) -> Any:
+    """
+    Evaluates `left % right` for numbers; printf-style string formatting is refused.
+    """
+    if isinstance(left, (str, bytes)):
+        raise ValueError('string formatting with % is not supported')
+    return left % right
+
+
+# Globals of evaluated expressions: no builtins, JSON-style spellings of the constants and the
+# guarded operators (reserved names cannot be written in expressions themselves).
+_GLOBALS = {
+    '__builtins__': {}, 'true': True, 'false': False, 'null': None,
+    '__multiply__': _multiply, '__modulo__': _modulo,
+}
+
+# Operators evaluated through a guard, by the name of the guard in _GLOBALS.
+_GUARDED_OPERATORS = {ast.Mult: ('__multiply__', _multiply), ast.Mod: ('__modulo__', _modulo)}
+
+
+class ExpressionError(ValueError):
+    """
+    Raised when an expression is not valid or uses syntax outside the allowed subset.
+    """
+
+
+class _DottedAccess(ast.NodeTransformer):
+    """
+    Rewrites attribute access into subscripts, so `incident.source_ip` reads `incident['source_ip']`.
+    """
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.AST:
+        self.generic_visit(node)
+        key = ast.Constant(node.attr)
+        if sys.version_info < (3, 9):
+            key = ast.Index(key)
+        return ast.copy_location(ast.Subscript(value=node.value, slice=key, ctx=node.ctx), node)
+
+
+class _GuardedOperators(ast.NodeTransformer):
+    """
+    Rewrites `a * b` into `__multiply__(a, b)` and `a % b` into `__modulo__(a, b)`. Applied after the
+    syntax check, which is why the inserted calls are not rejected.
+    """
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        self.generic_visit(node)
+        guard = _GUARDED_OPERATORS.get(type(node.op))
+        if guard is None:
+            return node
+        call = ast.Call(func=ast.Name(guard[0], ast.Load()), args=[node.left, node.right], keywords=[])
+        return ast.copy_location(call, node)
+
+
+class CompiledExpression:
+    """
+    An expression checked against the allowed syntax and compiled to bytecode.
+    """
+
+    __slots__ = ('source', '_code')
+
+    def __init__(self, source: str, dotted: bool = False):
+        """
+        Parses, checks and compiles the expression.
+
+        Parameters:
+            source (str): The expression.
+            dotted (bool): Also accept `name.key` as a spelling of `name['key']` (templates).
+
+        Raises:
+            ExpressionError: If the expression is invalid or uses disallowed syntax.
+        """
+        if not isinstance(source, str) or not source.strip():
+            raise ExpressionError('Expression must be a non-empty string.')
+        try:
+            tree = ast.parse(source.strip(), mode='eval')
+        except SyntaxError as exc:
+            raise ExpressionError(f"Invalid expression '{source}': {exc.msg}") from None
+        if dotted:
+            tree = ast.fix_missing_locations(_DottedAccess().visit(tree))
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise ExpressionError(f"Expression '{source}' uses unsupported syntax: {type(node).__name__}")
+            if isinstance(node, ast.Name) and node.id.startswith('__'):
+                raise ExpressionError(f"Expression '{source}' uses a reserved name: {node.id}")
+            if (isinstance(node, ast.BinOp) and type(node.op) in _GUARDED_OPERATORS
+                    and isinstance(node.left, ast.Constant) and isinstance(node.right, ast.Constant)):
+                # Guarded operators on literals are decided now, so the plan is rejected rather than the run.
+                try:
+                    _GUARDED_OPERATORS[type(node.op)][1](node.left.value, node.right.value)
+                except ValueError as exc:
+                    raise ExpressionError(f"Expression '{source}' is not allowed: {exc}") from None
+                except (TypeError, ArithmeticError):
+                    pass
+        tree = ast.fix_missing_locations(_GuardedOperators().visit(tree))
+        self.source = source
+        self._code = compile(tree, '<expression>', 'eval')
+
+    def evaluate(self, names: Mapping[str, Any]) -> Any:
+        """
+        Evaluates the expression with the given names (e.g. 'results', 'incident').
+
+        Raises:
+            ExpressionError: If evaluation fails, e.g. on a missing name or key.
+        """
+        # Expressions cannot assign, so a dict of names is used as is rather than copied.
+        try:
+            return eval(self._code, _GLOBALS, names if type(names) is dict else dict(names))
+        except Exception as exc:
+            raise ExpressionError(f"Error evaluating '{self.source}': {type(exc).__name__}: {exc}") from None
+
+    def __repr__(self) -> str:
+        return f'CompiledExpression({self.source!r})'
@@ -0,0 +1,131 @@
+"""
+Registry of step handlers for the playbook engine.
+
+Each playbook step names an `action`; the handler registered for that action performs it. Handlers
+are plain callables taking the step's parameters and the run context and returning a JSON-serializable
+result; raising an exception marks the step as failed.
+
+An action may also register a bulk handler, used when one playbook runs across many incidents in a
+batch: it receives a list of (parameters, context) items and returns one result per item, in order,
+so e.g. blocking 300 IPs takes one firewall call. A result that is an exception fails its item only;
+raising fails every item of the call.
+
+CPU-heavy or untrusted handlers may be registered with `sandbox=True`: they then run in a pool of
+worker processes under CPU time and memory limits (see sandbox.py) instead of on the executor's
+threads. They must be module-level functions, since worker processes import them by name.
+
+Requirements Addressed:
+- Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+  - Automate incident response using AI-driven workflows.
+"""
+
+import pickle  # Checks that sandboxed handlers can be sent to worker processes. (builtin)
+import threading  # Guards the registry against concurrent registration. (builtin)
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+# Signature of a step handler: handler(parameters, context) -> result
+HandlerFunc = Callable[[dict, dict], Any]
+
+# Signature of a bulk step handler: bulk_handler([(parameters, context), ...]) -> [result, ...]
+BulkHandlerFunc = Callable[[List[Tuple[dict, dict]]], List[Any]]
+
+_handlers: Dict[str, HandlerFunc] = {}
+_integrations: Dict[str, str] = {}
+_bulk_handlers: Dict[str, BulkHandlerFunc] = {}
+_sandboxed: Set[str] = set()
+_handlers_lock = threading.Lock()
+
+
+def register_step_handler(action: str, func: Optional[HandlerFunc] = None, integration: Optional[str] = None,
+                          bulk: Optional[BulkHandlerFunc] = None, sandbox: bool = False):
+    """
+    Registers the handler of a step action; usable directly or as a decorator.
+
+    Parameters:
+        action (str): The step action the handler performs, e.g. 'block_ip'.
+        func (callable, optional): The handler; omitted when used as a decorator.
+        integration (str, optional): The external integration the handler calls, e.g. 'firewall';
+            steps calling the same integration share its circuit breaker.
+        bulk (callable, optional): Handler performing the action for many incidents in one call,
+            used by batch runs.
+        sandbox (bool): Runs the handler in the process-pool sandbox, for CPU-heavy or untrusted
+            work; bulk handlers always run on the executor's threads.
+
+    Returns:
+        The handler, or a decorator registering it.
+
+    Raises:
+        ValueError: If a sandboxed handler is not a module-level function.
+    """
+    def decorator(handler: HandlerFunc) -> HandlerFunc:
+        if sandbox:
+            try:
+                pickle.dumps(handler)
+            except (pickle.PicklingError, AttributeError, TypeError):
+                raise ValueError(f"Sandboxed handler for '{action}' must be a module-level function.") from None
+        with _handlers_lock:
+            _handlers[action] = handler
+            if integration:
+                _integrations[action] = integration
+            else:
+                _integrations.pop(action, None)
+            if bulk:
+                _bulk_handlers[action] = bulk
+            else:
+                _bulk_handlers.pop(action, None)
+            if sandbox:
+                _sandboxed.add(action)
+            else:
+                _sandboxed.discard(action)
+        return handler
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def unregister_step_handler(action: str) -> None:
+    """
+    Removes the handler of a step action, if any.
+    """
+    with _handlers_lock:
+        _handlers.pop(action, None)
+        _integrations.pop(action, None)
+        _bulk_handlers.pop(action, None)
+        _sandboxed.discard(action)
+
+
+def get_step_handler(action: str) -> Optional[HandlerFunc]:
+    """
+    Returns the handler registered for a step action, or None.
+    """
+    return _handlers.get(action)
+
+
+def get_step_integration(action: str) -> Optional[str]:
+    """
+    Returns the integration the handler of a step action was registered with, or None.
+    """
+    return _integrations.get(action)
+
+
+def get_bulk_step_handler(action: str) -> Optional[BulkHandlerFunc]:
+    """
+    Returns the bulk handler registered for a step action, or None.
+    """
+    return _bulk_handlers.get(action)
+
+
+def is_sandboxed_step(action: str) -> bool:
+    """
+    Returns whether the handler of a step action was registered to run in the sandbox.
+    """
+    return action in _sandboxed
+
+
+def get_sandboxed_actions() -> List[str]:
+    """
+    Returns the step actions whose handlers run in the sandbox.
+    """
+    with _handlers_lock:
+        return sorted(_sandboxed)
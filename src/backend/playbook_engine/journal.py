@@ -0,0 +1,399 @@
+"""
+Durable, append-only journal of playbook runs.
+
+Every run records its playbook and context when it is queued, its plan and context when it starts,
+each step's start and result, and its final status, in a local SQLite database. The duration,
+attempts and outcome of finished steps are also kept as execution history, from which simulations
+estimate the duration and calls of playbooks. If the engine process dies mid-run, the journal
+shows which runs did not finish and which of their steps completed; those runs are then resumed
+from that checkpoint, and runs that were still queued are started. Completed steps are not
+executed again. Steps that had started but not finished are re-executed with the same idempotency
+key, so handlers that pass the key to the integration they call avoid duplicating expensive or
+destructive actions.
+
+Several engine processes may share one journal file (e.g. the workers of one host). Each run is
+leased by the process that queued or started it, which renews the lease from a heartbeat thread
+while the journal is open; another process resumes a run only once its lease has expired, i.e.
+its owner died, so a live run is never executed twice.
+
+Requirements Addressed:
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+- Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+  - TR-DPG-004-5: Ensure version control and audit logging for all playbook modifications.
+"""
+
+import hashlib  # Derives step idempotency keys. (builtin)
+import json  # Serializes plans, contexts and step results. (builtin)
+import os  # Creates the journal directory and identifies the lease owner. (builtin)
+import socket  # Identifies the lease owner. (builtin)
+import sqlite3  # Local durable storage. (builtin)
+import threading  # Serializes access to the shared connection and renews run leases. (builtin)
+import time  # Timestamps journal entries. (builtin)
+import uuid  # Identifies the lease owner. (builtin)
+from typing import Any, Dict, List, Optional, Tuple
+
+# Journal event types.
+EVENT_RUN_QUEUED = 'run_queued'
+EVENT_RUN_STARTED = 'run_started'
+EVENT_STEP_STARTED = 'step_started'
+EVENT_STEP_FINISHED = 'step_finished'
+EVENT_RUN_FINISHED = 'run_finished'
+
+# Default time after which a run whose owner stopped renewing its lease may be resumed elsewhere.
+DEFAULT_RUN_LEASE_SECONDS = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    step_number TEXT,
+    idempotency_key TEXT,
+    status TEXT,
+    payload TEXT,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_journal_run ON journal (run_id, seq);
+CREATE INDEX IF NOT EXISTS idx_journal_event ON journal (event, run_id);
+CREATE TABLE IF NOT EXISTS step_stats (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    playbook_id TEXT,
+    step_number TEXT NOT NULL,
+    action TEXT NOT NULL,
+    integration TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_step_stats_step ON step_stats (playbook_id, step_number, seq);
+CREATE INDEX IF NOT EXISTS idx_step_stats_action ON step_stats (action, seq);
+CREATE TABLE IF NOT EXISTS run_leases (
+    run_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_run_leases_owner ON run_leases (owner);
+"""
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def idempotency_key(run_id: str, step_number: Any) -> str:
+    """
+    Returns the idempotency key of a step of a run; it is the same when the step is retried on resume.
+    """
+    return hashlib.sha256(f'{run_id}:{_dumps(step_number)}'.encode('utf-8')).hexdigest()[:32]
+
+
+class RunJournal:
+    """
+    Append-only SQLite journal of playbook runs and their steps.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = DEFAULT_RUN_LEASE_SECONDS):
+        """
+        Opens (and creates if needed) the journal database.
+
+        Parameters:
+            path (str): Path of the SQLite file, or ':memory:' for a journal that does not survive
+                the process (tests).
+            lease_seconds (float): Lifetime of the leases of the runs started or claimed through
+                this journal; they are renewed every third of it.
+        """
+        self.path = path
+        self.lease_seconds = float(lease_seconds)
+        # Unique per open journal, so a restarted process never mistakes its predecessor's leases for its own.
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._closed = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+        directory = os.path.dirname(path)
+        if directory and path != ':memory:':
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL with synchronous=NORMAL keeps every committed entry across a process crash while
+        # avoiding an fsync per step.
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        # Wait for the write lock of another process instead of failing at once.
+        self._connection.execute('PRAGMA busy_timeout=5000')
+        self._connection.executescript(_SCHEMA)
+
+    def _append(self, run_id: str, event: str, step_number: Any = None, key: Optional[str] = None,
+                status: Optional[str] = None, payload: Any = None) -> None:
+        with self._lock:
+            self._connection.execute(
+                'INSERT INTO journal (run_id, event, step_number, idempotency_key, status, payload, recorded_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (run_id, event, None if step_number is None else _dumps(step_number), key, status,
+                 None if payload is None else _dumps(payload), time.time())
+            )
+
+    def queue_run(self, run_id: str, playbook_id: Any, context: dict) -> None:
+        """
+        Records a run queued for execution, so every process sharing the journal knows about it and
+        a run whose process dies before starting it is still executed. The run is leased to this
+        journal until it finishes.
+        """
+        self._take_lease(run_id)
+        self._append(run_id, EVENT_RUN_QUEUED, payload={'playbook_id': playbook_id, 'context': context})
+
+    def start_run(self, run_id: str, playbook_id: Any, steps: List[dict], context: dict) -> None:
+        """
+        Records the start of a run with everything needed to resume it: the plan's step definitions
+        and the run context. The run is leased to this journal until it finishes.
+        """
+        self._take_lease(run_id)
+        self._append(run_id, EVENT_RUN_STARTED,
+                     payload={'playbook_id': playbook_id, 'steps': steps, 'context': context})
+
+    def _take_lease(self, run_id: str) -> None:
+        with self._lock:
+            self._connection.execute('INSERT OR REPLACE INTO run_leases (run_id, owner, expires_at) VALUES (?, ?, ?)',
+                                     (run_id, self.owner, time.time() + self.lease_seconds))
+        self._start_heartbeat()
+
+    def _start_heartbeat(self) -> None:
+        with self._lock:
+            if self._heartbeat is not None or self._closed.is_set():
+                return
+            self._heartbeat = threading.Thread(target=self._renew_leases, name='run-journal-heartbeat', daemon=True)
+            self._heartbeat.start()
+
+    def _renew_leases(self) -> None:
+        while not self._closed.wait(self.lease_seconds / 3):
+            try:
+                self.renew_leases()
+            except sqlite3.Error:
+                # Renewed on the next beat; the lease outlives two missed beats.
+                continue
+
+    def renew_leases(self) -> int:
+        """
+        Extends the leases of the unfinished runs owned by this journal; returns how many were renewed.
+        """
+        with self._lock:
+            cursor = self._connection.execute('UPDATE run_leases SET expires_at = ? WHERE owner = ?',
+                                              (time.time() + self.lease_seconds, self.owner))
+        return cursor.rowcount
+
+    def claim_interrupted_runs(self) -> List[str]:
+        """
+        Takes over the unfinished runs, queued or started, whose lease has expired (or that have
+        none) and returns their ids, oldest first. Runs of live owners, including this journal, are
+        left alone, and concurrent claims by several processes never return the same run twice.
+        """
+        now = time.time()
+        with self._lock:
+            connection = self._connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                rows = connection.execute(
+                    'SELECT journal.run_id FROM journal LEFT JOIN run_leases ON run_leases.run_id = journal.run_id '
+                    'WHERE journal.event IN (?, ?) AND (run_leases.expires_at IS NULL OR run_leases.expires_at < ?) '
+                    'AND journal.run_id NOT IN (SELECT run_id FROM journal WHERE event = ?) '
+                    'GROUP BY journal.run_id ORDER BY MIN(journal.seq)',
+                    (EVENT_RUN_QUEUED, EVENT_RUN_STARTED, now, EVENT_RUN_FINISHED)
+                ).fetchall()
+                run_ids = [row[0] for row in rows]
+                connection.executemany(
+                    'INSERT OR REPLACE INTO run_leases (run_id, owner, expires_at) VALUES (?, ?, ?)',
+                    [(run_id, self.owner, now + self.lease_seconds) for run_id in run_ids]
+                )
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+        if run_ids:
+            self._start_heartbeat()
+        return run_ids
+
+    def step_started(self, run_id: str, step_number: Any, key: str) -> None:
+        """
+        Records that a step is about to run.
+        """
+        self._append(run_id, EVENT_STEP_STARTED, step_number, key)
+
+    def step_finished(self, run_id: str, step_number: Any, key: str, status: str, result: Any = None,
+                      error: Optional[str] = None) -> None:
+        """
+        Records the outcome of a step; a step with a finished entry is never executed again for the run.
+        """
+        self._append(run_id, EVENT_STEP_FINISHED, step_number, key, status, {'result': result, 'error': error})
+
+    def record_step_stats(self, playbook_id: Any, step_number: Any, action: str, integration: Optional[str],
+                          status: str, attempts: int, duration: float) -> None:
+        """
+        Records the execution statistics of a finished step, including its retries.
+        """
+        with self._lock:
+            self._connection.execute(
+                'INSERT INTO step_stats (playbook_id, step_number, action, integration, status, attempts, duration, '
+                'recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (None if playbook_id is None else str(playbook_id), _dumps(step_number), action, integration,
+                 status, attempts, duration, time.time())
+            )
+
+    def step_history(self, playbook_id: Any, step_number: Any, limit: int) -> List[Tuple[float, int, str]]:
+        """
+        Returns the most recent (duration, attempts, status) records of a playbook's step.
+        """
+        with self._lock:
+            return self._connection.execute(
+                'SELECT duration, attempts, status FROM step_stats WHERE playbook_id = ? AND step_number = ? '
+                'ORDER BY seq DESC LIMIT ?',
+                (None if playbook_id is None else str(playbook_id), _dumps(step_number), limit)
+            ).fetchall()
+
+    def action_history(self, action: str, limit: int) -> List[Tuple[float, int, str]]:
+        """
+        Returns the most recent (duration, attempts, status) records of steps with an action, in any playbook.
+        """
+        with self._lock:
+            return self._connection.execute(
+                'SELECT duration, attempts, status FROM step_stats WHERE action = ? ORDER BY seq DESC LIMIT ?',
+                (action, limit)
+            ).fetchall()
+
+    def finish_run(self, run_id: str, status: str) -> None:
+        """
+        Records the end of a run and releases its lease.
+        """
+        self._append(run_id, EVENT_RUN_FINISHED, status=status)
+        with self._lock:
+            self._connection.execute('DELETE FROM run_leases WHERE run_id = ?', (run_id,))
+
+    def run_status(self, run_id: str) -> Optional[str]:
+        """
+        Returns the status a run finished with, or None if it did not finish (or is unknown).
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT status FROM journal WHERE run_id = ? AND event = ? ORDER BY seq LIMIT 1',
+                (run_id, EVENT_RUN_FINISHED)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_queued_run(self, run_id: str) -> Optional[dict]:
+        """
+        Returns what was recorded when a run was queued (playbook id and context), or None.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT payload FROM journal WHERE run_id = ? AND event = ? ORDER BY seq LIMIT 1',
+                (run_id, EVENT_RUN_QUEUED)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def run_owner(self, run_id: str) -> Optional[str]:
+        """
+        Returns the owner of an unfinished run's live lease (the `owner` of the journal executing
+        it), or None if the run finished or its owner stopped renewing the lease.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT owner FROM run_leases WHERE run_id = ? AND expires_at >= ?', (run_id, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_run(self, run_id: str) -> Optional[dict]:
+        """
+        Returns what was recorded when a run started (playbook id, steps and context), or None.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT payload FROM journal WHERE run_id = ? AND event = ? ORDER BY seq LIMIT 1',
+                (run_id, EVENT_RUN_STARTED)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def finished_steps(self, run_id: str) -> Dict[Any, dict]:
+        """
+        Returns the recorded outcome of each finished step of a run, keyed by step number.
+
+        Returns:
+            Dict[Any, dict]: {'status', 'result', 'error'} of each finished step.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT step_number, status, payload FROM journal WHERE run_id = ? AND event = ? ORDER BY seq',
+                (run_id, EVENT_STEP_FINISHED)
+            ).fetchall()
+        finished = {}
+        for step_number, status, payload in rows:
+            outcome = json.loads(payload)
+            finished[json.loads(step_number)] = {'status': status, 'result': outcome['result'], 'error': outcome['error']}
+        return finished
+
+    def incomplete_runs(self) -> List[str]:
+        """
+        Returns the ids of runs that started but never finished, oldest first, whether or not
+        their owner is still running them (see claim_interrupted_runs).
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT run_id FROM journal WHERE event = ? AND run_id NOT IN '
+                '(SELECT run_id FROM journal WHERE event = ?) ORDER BY seq',
+                (EVENT_RUN_STARTED, EVENT_RUN_FINISHED)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def purge_finished_runs(self, older_than_seconds: float) -> int:
+        """
+        Deletes the entries of runs that finished more than the given number of seconds ago.
+
+        Returns:
+            int: The number of entries deleted.
+        """
+        cutoff = time.time() - older_than_seconds
+        with self._lock:
+            cursor = self._connection.execute(
+                'DELETE FROM journal WHERE run_id IN '
+                '(SELECT run_id FROM journal WHERE event = ? AND recorded_at < ?)',
+                (EVENT_RUN_FINISHED, cutoff)
+            )
+        return cursor.rowcount
+
+    def purge_step_stats(self, older_than_seconds: float) -> int:
+        """
+        Deletes the step statistics recorded more than the given number of seconds ago.
+
+        Returns:
+            int: The number of records deleted.
+        """
+        cutoff = time.time() - older_than_seconds
+        with self._lock:
+            cursor = self._connection.execute('DELETE FROM step_stats WHERE recorded_at < ?', (cutoff,))
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """
+        Stops renewing leases and closes the database connection; the unfinished runs of this
+        journal can be claimed elsewhere once their leases expire.
+        """
+        self._closed.set()
+        with self._lock:
+            self._connection.close()
+
+
+_journal: Optional[RunJournal] = None
+_journal_lock = threading.Lock()
+
+
+def get_run_journal(path: str, lease_seconds: float = DEFAULT_RUN_LEASE_SECONDS) -> RunJournal:
+    """
+    Returns the process-wide run journal, opening it at the given path on first use.
+    """
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = RunJournal(path, lease_seconds)
+        return _journal
@@ -1,7 +1,11 @@
 from datetime import datetime  # Built-in module for handling date and time operations for playbook timestamps.
 
-from .config import load_config  # Loads configuration settings for the playbook engine.
+from .config import get_config, load_config  # Loads configuration settings for the playbook engine.
 from .services import create_playbook, update_playbook, execute_playbook  # Provides services for playbook manipulation and execution.
+from .dag import PlaybookDAGError, validate_steps  # Validates the dependency graph of the steps.
+from .compliance import get_compliance_rule_set  # Indexed organizational compliance rules.
+from .threat_intel import DEFAULT_BLOOM_CAPACITY, get_threat_intel_store  # Local, periodically refreshed threat intelligence.
+from .versions import DEFAULT_KEYFRAME_INTERVAL, get_version_store  # Content-addressed history of playbook versions.
 
 class Playbook:
     """
@@ -31,6 +35,38 @@ class Playbook:
         self.steps = steps
         self.created_at = created_at if created_at else datetime.utcnow()
         self.updated_at = updated_at if updated_at else datetime.utcnow()
+        self.version = None
+        self.compliance_violations = []
+        self.threat_intelligence = {}
+
+    def enable_version_control(self, author=None, message=None):
+        """
+        Records the current name and steps of the playbook as a new version in the version store.
+
+        Requirements Addressed:
+        - Ensure version control and audit logging for all playbook modifications.
+          (Technical Specification/4.4.4 TR-DPG-004-5)
+
+        Steps:
+        - Skip recording when version control is disabled in the engine configuration.
+        - Store the version, delta-compressed against the playbook's latest version.
+        - Remember the version's content hash on the instance.
+
+        Parameters:
+        - author (str, optional): Who made the change.
+        - message (str, optional): Why the change was made.
+
+        Returns:
+        - str: The content hash of the version, or None if version control is disabled.
+        """
+        config = get_config()
+        if not config.get('version_control_enabled', True) or not config.get('version_store_path'):
+            return None
+        store = get_version_store(config['version_store_path'],
+                                  config.get('version_keyframe_interval', DEFAULT_KEYFRAME_INTERVAL))
+        self.version = store.put(self.id, {'name': self.name, 'steps': self.steps},
+                                 parent=self.version, author=author, message=message)
+        return self.version
 
     def save(self):
         """
@@ -102,6 +138,62 @@ class Playbook:
             # Handle exceptions (e.g., logging)
             pass
 
+    def integrate_threat_intelligence(self):
+        """
+        Matches the indicators in the step parameters against the local threat-intelligence store.
+
+        Requirements Addressed:
+        - Incorporate real-time threat intelligence into playbook creation.
+          (Technical Specification/4.4.4 TR-DPG-004-2)
+
+        Steps:
+        - Get the threat-intelligence store, which refreshes itself from the configured sources in
+          the background every `auto_update_interval_minutes`.
+        - Look up every string parameter value of the steps; no feed is queried here.
+        - Keep the matching indicators on the instance, keyed by parameter value.
+
+        Returns:
+        - dict: The matching indicators, keyed by parameter value.
+        """
+        config = get_config()
+        store = get_threat_intel_store(config.get('threat_intelligence_sources', ()),
+                                       float(config.get('auto_update_interval_minutes', 15)) * 60,
+                                       config.get('threat_intel_bloom_capacity', DEFAULT_BLOOM_CAPACITY))
+        values = []
+        for step in self.steps or []:
+            parameters = step.get('parameters') if isinstance(step, dict) else None
+            for value in (parameters or {}).values():
+                if isinstance(value, str):
+                    values.append(value)
+                elif isinstance(value, list):
+                    values.extend(item for item in value if isinstance(item, str))
+        self.threat_intelligence = {value: indicator.to_dict() for value, indicator in store.lookup_many(values).items()}
+        return self.threat_intelligence
+
+    def validate_compliance(self):
+        """
+        Validates the playbook steps against organizational policies and compliance standards.
+
+        Requirements Addressed:
+        - Validate generated playbooks against organizational policies and compliance standards.
+          (Technical Specification/4.4.4 TR-DPG-004-3)
+
+        Steps:
+        - Skip validation when it is disabled in the engine configuration.
+        - Evaluate the configured compliance rules relevant to the actions of the steps.
+        - Keep the violations (including warnings) on the instance for reporting.
+
+        Returns:
+        - bool: True if no rule with 'error' severity is violated, False otherwise.
+        """
+        config = get_config()
+        if not config.get('playbook_validation_enabled', True):
+            self.compliance_violations = []
+            return True
+        report = get_compliance_rule_set(config.get('compliance_rules', ())).validate(self.steps)
+        self.compliance_violations = [violation.to_dict() for violation in report.violations]
+        return report.compliant
+
     def _validate(self):
         """
         Validates the Playbook data against the playbook schema.
@@ -109,7 +201,7 @@ class Playbook:
         Steps:
         - Check that required fields are not empty.
         - Validate data types of the attributes.
-        - Ensure the steps conform to the expected format.
+        - Ensure the steps conform to the expected format and their dependencies form an acyclic graph.
 
         Returns:
         - bool: True if validation passes, False otherwise.
@@ -120,5 +212,9 @@ class Playbook:
             return False
         if not self.steps or not isinstance(self.steps, list):
             return False
+        try:
+            validate_steps(self.steps)
+        except PlaybookDAGError:
+            return False
         # Additional validation logic can be added here
         return True
\ No newline at end of file
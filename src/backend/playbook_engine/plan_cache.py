@@ -0,0 +1,138 @@
+"""
+Cache of compiled playbook plans keyed by content hash.
+
+Compiling a playbook (dependency validation, handler resolution, condition parsing) and checking it
+against organizational policies happens once per distinct content: plans are cached under a hash of
+the playbook's steps and the engine configuration, so repeat executions of the same playbook across
+thousands of incidents skip validation and parsing entirely. Editing the steps or the configuration
+changes the hash, so stale plans are never used; they simply age out of the LRU.
+
+Requirements Addressed:
+- Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+  - TR-DPG-004-3: Validate generated playbooks against organizational policies and compliance standards.
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import hashlib  # Hashes playbook content into cache keys. (builtin)
+import json  # Canonical serialization of steps and configuration. (builtin)
+import threading  # Guards the cache. (builtin)
+from collections import OrderedDict
+from typing import Callable, Mapping, Optional
+
+# Internal dependencies
+from .dag import CompiledPlan, compile_plan  # Compiles steps into immutable execution plans.
+
+# Default number of compiled plans kept per process.
+DEFAULT_PLAN_CACHE_SIZE = 256
+
+
+class PlaybookComplianceError(ValueError):
+    """
+    Raised when a playbook does not comply with organizational policies and compliance standards.
+    """
+
+
+def plan_key(steps: list, config: Optional[Mapping] = None) -> str:
+    """
+    Returns the content hash identifying the plan of the given steps under the given configuration.
+
+    Configuration snapshots are identified by their version rather than serialized again.
+    """
+    version = getattr(config, 'version', None)
+    canonical = json.dumps({'steps': steps, 'config': version if version is not None else dict(config or {})},
+                           sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class PlanCache:
+    """
+    Thread-safe LRU cache of compiled plans keyed by content hash.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_PLAN_CACHE_SIZE):
+        """
+        Initializes the cache.
+
+        Parameters:
+            max_entries (int): Maximum number of plans kept; the least recently used are evicted.
+        """
+        self.max_entries = max(1, int(max_entries))
+        self._plans: 'OrderedDict[str, CompiledPlan]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CompiledPlan]:
+        """
+        Returns the cached plan with the given key, or None.
+        """
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+            return plan
+
+    def get_or_compile(self, steps: list, config: Optional[Mapping] = None,
+                       validator: Optional[Callable[[], bool]] = None) -> CompiledPlan:
+        """
+        Returns the plan of the given steps, compiling and validating it on a cache miss.
+
+        Parameters:
+            steps (list): The playbook steps.
+            config (Mapping, optional): The engine configuration the plan is compiled under.
+            validator (callable, optional): Compliance check run only when the plan is compiled;
+                plans failing it are not cached.
+
+        Returns:
+            CompiledPlan: The cached or newly compiled plan.
+
+        Raises:
+            PlaybookDAGError: If the steps do not form a valid dependency graph.
+            PlaybookComplianceError: If the validator rejects the playbook.
+        """
+        key = plan_key(steps, config)
+        plan = self.get(key)
+        if plan is not None:
+            self.hits += 1
+            return plan
+
+        self.misses += 1
+        plan = compile_plan(steps, key=key, policy_defaults=(config or {}).get('step_policy_defaults'))
+        if validator is not None and not validator():
+            raise PlaybookComplianceError('Playbook does not comply with organizational policies and standards.')
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        return plan
+
+    def clear(self) -> None:
+        """
+        Drops every cached plan, e.g. after step handlers or policies are re-registered.
+        """
+        with self._lock:
+            self._plans.clear()
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+
+_plan_cache: Optional[PlanCache] = None
+_plan_cache_lock = threading.Lock()
+
+
+def get_plan_cache(max_entries: int = DEFAULT_PLAN_CACHE_SIZE) -> PlanCache:
+    """
+    Returns the process-wide plan cache, creating it with the given size on first use.
+    """
+    global _plan_cache
+    with _plan_cache_lock:
+        if _plan_cache is None:
+            _plan_cache = PlanCache(max_entries)
+        return _plan_cache
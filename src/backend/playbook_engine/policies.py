@@ -0,0 +1,296 @@
+"""
+Step execution policies for the playbook engine: timeouts, retries and circuit breakers.
+
+Each step may set `timeout_seconds`, `retries`, `retry_backoff_seconds` and `retry_backoff_max_seconds`;
+unset values fall back to the engine's `step_policy_defaults`. Failed attempts are retried after an
+exponential backoff with full jitter, so many runs retrying against the same integration do not
+hammer it in lockstep.
+
+Steps calling the same external integration (the step's `integration`, or the one its handler was
+registered with) share a circuit breaker. After `failure_threshold` consecutive failures the breaker
+opens and further calls fail immediately, without occupying a worker thread, until `reset_seconds`
+have passed; a single trial call then decides whether it closes again. Integrations may also cap
+the number of concurrent calls made to them across all runs (`integration_concurrency_limits`).
+
+Requirements Addressed:
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import random  # Jitters retry delays. (builtin)
+import threading  # Guards breaker state. (builtin)
+import time  # Breaker reset timing. (builtin)
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional
+
+# Defaults applied when neither the step nor the engine configuration sets a value.
+DEFAULT_STEP_TIMEOUT_SECONDS = 300.0
+DEFAULT_STEP_RETRIES = 0
+DEFAULT_RETRY_BACKOFF_SECONDS = 0.5
+DEFAULT_RETRY_BACKOFF_MAX_SECONDS = 30.0
+DEFAULT_BREAKER_FAILURE_THRESHOLD = 5
+DEFAULT_BREAKER_RESET_SECONDS = 30.0
+
+# Circuit breaker states.
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+
+class StepTimeoutError(TimeoutError):
+    """
+    Raised when a step attempt does not complete within its timeout.
+    """
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling an integration whose circuit breaker is open.
+    """
+
+
+@dataclass(frozen=True)
+class StepPolicy:
+    """
+    Timeout and retry policy of a step.
+    """
+    timeout_seconds: Optional[float] = DEFAULT_STEP_TIMEOUT_SECONDS
+    retries: int = DEFAULT_STEP_RETRIES
+    backoff_seconds: float = DEFAULT_RETRY_BACKOFF_SECONDS
+    backoff_max_seconds: float = DEFAULT_RETRY_BACKOFF_MAX_SECONDS
+
+    @classmethod
+    def from_step(cls, step: Mapping, defaults: Optional[Mapping] = None) -> 'StepPolicy':
+        """
+        Returns the policy of a step definition, falling back to the given defaults.
+
+        Raises:
+            ValueError: If a policy value is not a valid number.
+        """
+        defaults = defaults or {}
+
+        def value(name, fallback):
+            return step.get(name, defaults.get(name, fallback))
+
+        timeout = value('timeout_seconds', DEFAULT_STEP_TIMEOUT_SECONDS)
+        policy = cls(
+            timeout_seconds=float(timeout) if timeout is not None else None,
+            retries=int(value('retries', DEFAULT_STEP_RETRIES)),
+            backoff_seconds=float(value('retry_backoff_seconds', DEFAULT_RETRY_BACKOFF_SECONDS)),
+            backoff_max_seconds=float(value('retry_backoff_max_seconds', DEFAULT_RETRY_BACKOFF_MAX_SECONDS)),
+        )
+        if (policy.timeout_seconds is not None and policy.timeout_seconds <= 0) or policy.retries < 0 \
+                or policy.backoff_seconds < 0 or policy.backoff_max_seconds < 0:
+            raise ValueError('Step timeouts must be positive, and retries and backoffs non-negative.')
+        return policy
+
+    def backoff_delay(self, attempt: int, rng: random.Random = random) -> float:
+        """
+        Returns the delay before retrying after the given failed attempt (1-based), with full jitter:
+        uniformly random between zero and the exponential backoff, capped at the maximum.
+        """
+        ceiling = min(self.backoff_max_seconds, self.backoff_seconds * (2 ** (attempt - 1)))
+        return rng.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker protecting one integration.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = DEFAULT_BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = DEFAULT_BREAKER_RESET_SECONDS, clock=time.monotonic):
+        """
+        Initializes a closed breaker.
+
+        Parameters:
+            name (str): The integration the breaker protects.
+            failure_threshold (int): Consecutive failures that open the breaker.
+            reset_seconds (float): How long the breaker stays open before allowing a trial call.
+            clock (callable): Monotonic clock, replaceable in tests.
+        """
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = BREAKER_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == BREAKER_OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                return BREAKER_HALF_OPEN
+            return self._state
+
+    def acquire(self) -> bool:
+        """
+        Admits a call, or raises if the breaker is open.
+
+        Once the reset period has passed, a single trial call is admitted; other calls keep failing
+        fast until its outcome is recorded, or until it is given back with release_trial().
+
+        Returns:
+            bool: True if the call is the trial call of a half-open breaker.
+
+        Raises:
+            CircuitOpenError: If the breaker is open.
+        """
+        with self._lock:
+            if self._state == BREAKER_CLOSED:
+                return False
+            if self._state == BREAKER_OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                self._state = BREAKER_HALF_OPEN
+            if self._state == BREAKER_HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            raise CircuitOpenError(f"Circuit breaker for integration '{self.name}' is open.")
+
+    def record_success(self) -> None:
+        """
+        Records a successful call, closing the breaker.
+        """
+        with self._lock:
+            self._state = BREAKER_CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """
+        Gives back the trial call without recording an outcome, e.g. when it is abandoned because its
+        run was cancelled, so that the next call is admitted as the trial.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """
+        Records a failed call, opening the breaker at the threshold or when a trial call fails.
+        """
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == BREAKER_HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = BREAKER_OPEN
+                self._opened_at = self._clock()
+
+
+class CircuitBreakerRegistry:
+    """
+    Process-wide circuit breakers, one per integration.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = DEFAULT_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, integration: str) -> CircuitBreaker:
+        """
+        Returns the breaker of an integration, creating it closed on first use.
+        """
+        with self._lock:
+            breaker = self._breakers.get(integration)
+            if breaker is None:
+                breaker = CircuitBreaker(integration, self.failure_threshold, self.reset_seconds)
+                self._breakers[integration] = breaker
+            return breaker
+
+    def states(self) -> Dict[str, str]:
+        """
+        Returns the state of every breaker, for monitoring.
+        """
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.state for breaker in breakers}
+
+
+class IntegrationLimiter:
+    """
+    Per-integration caps on the number of concurrent calls across all runs of a process.
+
+    Acquisition never blocks: a step whose integration is at its cap stays queued in its run
+    without occupying a worker until a slot is released.
+    """
+
+    def __init__(self, limits: Optional[Mapping[str, int]] = None):
+        """
+        Initializes the limiter.
+
+        Parameters:
+            limits (Mapping[str, int], optional): Maximum concurrent calls per integration;
+                integrations without a limit are not capped.
+        """
+        self.limits = {name: max(1, int(limit)) for name, limit in (limits or {}).items()}
+        self._in_use: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, integration: str) -> bool:
+        """
+        Takes a call slot for the integration if one is free.
+        """
+        limit = self.limits.get(integration)
+        if limit is None:
+            return True
+        with self._lock:
+            in_use = self._in_use.get(integration, 0)
+            if in_use >= limit:
+                return False
+            self._in_use[integration] = in_use + 1
+            return True
+
+    def release(self, integration: str) -> None:
+        """
+        Returns a call slot taken with try_acquire.
+        """
+        if integration not in self.limits:
+            return
+        with self._lock:
+            self._in_use[integration] = max(0, self._in_use.get(integration, 0) - 1)
+
+    def in_use(self) -> Dict[str, int]:
+        """
+        Returns the number of calls in progress per capped integration, for monitoring.
+        """
+        with self._lock:
+            return dict(self._in_use)
+
+
+_breakers: Optional[CircuitBreakerRegistry] = None
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breakers(failure_threshold: int = DEFAULT_BREAKER_FAILURE_THRESHOLD,
+                         reset_seconds: float = DEFAULT_BREAKER_RESET_SECONDS) -> CircuitBreakerRegistry:
+    """
+    Returns the process-wide breaker registry, creating it with the given settings on first use.
+    """
+    global _breakers
+    with _breakers_lock:
+        if _breakers is None:
+            _breakers = CircuitBreakerRegistry(failure_threshold, reset_seconds)
+        return _breakers
+
+
+_limiter: Optional[IntegrationLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_integration_limiter(limits: Optional[Mapping[str, int]] = None) -> IntegrationLimiter:
+    """
+    Returns the process-wide integration limiter, creating it with the given caps on first use.
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = IntegrationLimiter(limits)
+        return _limiter
@@ -7,15 +7,31 @@ Requirements Addressed:
 """
 
 # External Dependencies
-from flask import Flask, request, jsonify  # Provides the web framework for defining API routes. Version: Flask 2.0.1
+import io  # Decodes uploaded XSOAR bundles while streaming them. (builtin)
+from flask import Flask, Response, request, jsonify, stream_with_context  # Provides the web framework for defining API routes. Version: Flask 2.0.1
 
 # Internal Dependencies
 from .app import app  # Flask application instance initialized with configurations and routes.
 from .controllers import (
     create_playbook_controller,  # Handles the logic for creating a new playbook.
     update_playbook_controller,  # Handles the logic for updating an existing playbook.
-    execute_playbook_controller  # Handles the logic for executing a playbook.
+    execute_playbook_controller,  # Handles the logic for executing a playbook.
+    execute_playbook_batch_controller,  # Executes a playbook across many incidents.
+    simulate_playbook_controller,  # Simulates a playbook without executing it.
+    match_playbooks_controller,  # Selects the playbooks that apply to an incident.
+    playbook_auto_update_controller,  # Incremental playbook auto-updates.
+    playbook_versions_controller,  # Lists the versions of a playbook.
+    diff_playbook_versions_controller,  # Compares two versions of a playbook.
+    import_xsoar_controller,  # Imports an XSOAR playbook bundle.
+    run_timeline_controller,  # Timeline of a traced run.
+    run_status_controller,  # Status and progress of a run.
+    run_events_controller,  # Progress events of a run as Server-Sent Events.
+    cancel_run_controller,  # Cancels a queued or running run.
+    run_trace_controller,  # OTLP/JSON trace of a run.
+    export_xsoar_controller  # Exports playbooks as an XSOAR bundle.
 )
+from .scheduler import SchedulerFullError  # Raised when the playbook run queue is full.
+from .config import get_config  # Engine configuration, for batch size limits.
 
 # Define the route for creating a new playbook
 @app.route('/playbooks', methods=['POST'])
@@ -31,7 +47,8 @@ def create_playbook_route():
         None (Flask uses the global request object)
 
     Returns:
-        JSONResponse: The response containing the created playbook details.
+        JSONResponse: The response containing the created playbook details, or 400 with the error
+        when the playbook is invalid, e.g. its steps depend on unknown steps or form a cycle.
     """
     # Parse the request data for playbook creation
     playbook_data = request.get_json()
@@ -40,7 +57,11 @@ def create_playbook_route():
 
     # Call the create_playbook_controller with the parsed data
     # This step handles the logic for creating a new playbook using AI-driven strategies
-    created_playbook = create_playbook_controller(playbook_data)
+    try:
+        created_playbook = create_playbook_controller(playbook_data.get('name'), playbook_data.get('steps'))
+    except ValueError as e:
+        # Invalid names or steps, unknown or cyclic step dependencies and policy violations
+        return jsonify({'error': str(e)}), 400
 
     # Return the response with the created playbook details
     return jsonify(created_playbook), 201
@@ -59,7 +80,8 @@ def update_playbook_route(playbook_id):
         playbook_id (str): The ID of the playbook to update.
 
     Returns:
-        JSONResponse: The response indicating the success or failure of the update operation.
+        JSONResponse: The response indicating the success or failure of the update operation: 404 if the
+        playbook was not found or not saved, 400 with the error if the new steps are invalid.
     """
     # Parse the request data for playbook update
     update_data = request.get_json()
@@ -68,20 +90,25 @@ def update_playbook_route(playbook_id):
 
     # Call the update_playbook_controller with the playbook ID and parsed data
     # This step handles the logic for updating an existing playbook using AI-driven strategies
-    updated_playbook = update_playbook_controller(playbook_id, update_data)
+    try:
+        updated = update_playbook_controller(playbook_id, update_data.get('steps'))
+    except ValueError as e:
+        # Unknown or cyclic step dependencies and policy violations
+        return jsonify({'error': str(e)}), 400
 
-    if updated_playbook.get('error'):
+    if not updated:
         # Return error response if update failed
-        return jsonify(updated_playbook), 404
+        return jsonify({'error': 'Playbook not found or could not be updated'}), 404
 
     # Return the response indicating the success of the update
-    return jsonify(updated_playbook), 200
+    return jsonify({'message': 'Playbook updated successfully', 'playbook_id': playbook_id}), 200
 
 # Define the route for executing a playbook
 @app.route('/playbooks/<playbook_id>/execute', methods=['POST'])
 def execute_playbook_route(playbook_id):
     """
-    Defines the route for executing a playbook.
+    Defines the route for executing a playbook. The run is queued and its id returned at once;
+    follow it with GET /runs/<run_id> or its event stream.
     Requirements Addressed:
     - Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation):
       Utilize artificial intelligence to create and modify security playbooks in real-time based on emerging threats
@@ -90,19 +117,339 @@ def execute_playbook_route(playbook_id):
     Parameters:
         playbook_id (str): The ID of the playbook to execute.
 
+    Query Parameters:
+        wait (str): 'true' to wait for the run to finish and return its results.
+
     Returns:
-        JSONResponse: The response indicating the success or failure of the execution operation.
+        JSONResponse: The queued run (202), or the outcome of the run when waiting.
     """
     # Parse the request data for playbook execution (if any execution parameters are provided)
-    execution_params = request.get_json() or {}
+    execution_params = request.get_json(silent=True) or {}
+    wait = request.args.get('wait', '').lower() in ('1', 'true', 'yes')
 
     # Call the execute_playbook_controller with the playbook ID and execution parameters
     # This step handles the logic for executing the playbook using AI-driven strategies
-    execution_result = execute_playbook_controller(playbook_id, execution_params)
+    try:
+        execution_result = execute_playbook_controller(playbook_id, execution_params, wait=wait)
+    except SchedulerFullError as e:
+        # Shed load instead of queueing runs without bound
+        return jsonify({'error': str(e)}), 503
 
     if execution_result.get('error'):
         # Return error response if execution failed
         return jsonify(execution_result), 404
 
+    if not wait:
+        # The run is queued; point the client at its status
+        run_id = execution_result['run']['run_id']
+        return jsonify(execution_result), 202, {'Location': f'/runs/{run_id}'}
+
     # Return the response indicating the success of the execution
-    return jsonify(execution_result), 200
\ No newline at end of file
+    return jsonify(execution_result), 200
+
+# Define the route for simulating a playbook
+@app.route('/playbooks/<playbook_id>/simulate', methods=['POST'])
+def simulate_playbook_route(playbook_id):
+    """
+    Defines the route for a dry run of a playbook: no step is executed, and the duration, critical
+    path and external calls per integration are estimated from past runs.
+    Requirements Addressed:
+    - Dynamic Playbook Generation (Technical Specification/4.4.4 TR-DPG-004-3):
+      Validate generated playbooks against organizational policies and compliance standards.
+
+    Parameters:
+        playbook_id (str): The ID of the playbook to simulate.
+
+    Returns:
+        JSONResponse: The simulation report.
+    """
+    simulation_params = request.get_json(silent=True) or {}
+    iterations = simulation_params.get('iterations')
+    if iterations is not None and (not isinstance(iterations, int) or not 1 <= iterations <= 100000):
+        return jsonify({'error': "'iterations' must be an integer from 1 to 100000."}), 400
+
+    result = simulate_playbook_controller(playbook_id, simulation_params)
+    if result.get('error'):
+        return jsonify(result), 404
+    return jsonify(result), 200
+
+# Define the route for selecting the playbooks that apply to an incident
+@app.route('/playbooks/match', methods=['POST'])
+def match_playbooks_route():
+    """
+    Defines the route for selecting the playbooks whose triggers match an incident.
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation):
+      TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+
+    Parameters:
+        None (Flask uses the global request object)
+
+    Returns:
+        JSONResponse: The matching playbooks, highest priority first.
+    """
+    incident = request.get_json(silent=True)
+    if not isinstance(incident, dict):
+        return jsonify({'error': 'The request body must be an incident object.'}), 400
+
+    result = match_playbooks_controller(incident)
+    if result.get('error'):
+        return jsonify(result), 500
+    return jsonify(result), 200
+
+# Define the route for incremental playbook auto-updates
+@app.route('/playbooks/auto-update', methods=['GET', 'POST'])
+def playbook_auto_update_route():
+    """
+    Defines the route for playbook auto-updates: GET reports the latest cycle, POST runs a cycle now.
+    Requirements Addressed:
+    - Dynamic Playbook Generation (Technical Specification/4.4.4 TR-DPG-004-2):
+      Incorporate real-time threat intelligence into playbook creation.
+
+    Parameters:
+        None (Flask uses the global request object)
+
+    Returns:
+        JSONResponse: The cycle report, with the playbooks regenerated, failed and skipped.
+    """
+    result = playbook_auto_update_controller(run=request.method == 'POST')
+    if result.get('error'):
+        return jsonify(result), 404
+    return jsonify(result), 200
+
+# Define the route for executing a playbook across many incidents
+@app.route('/playbooks/<playbook_id>/execute/batch', methods=['POST'])
+def execute_playbook_batch_route(playbook_id):
+    """
+    Defines the route for executing a playbook across many incidents in one batch run.
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation):
+      TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+
+    Parameters:
+        playbook_id (str): The ID of the playbook to execute.
+
+    Returns:
+        Response: Newline-delimited JSON, one line per incident as soon as its run is over, or 400
+        unless 'incidents' is a list of incident documents (incident ids are not resolved here).
+    """
+    batch_params = request.get_json() or {}
+    incidents = batch_params.get('incidents')
+    max_incidents = get_config().get('max_batch_incidents', 1000)
+    if not isinstance(incidents, list) or not incidents or len(incidents) > max_incidents:
+        return jsonify({'error': f"'incidents' must be a list of 1 to {max_incidents} incidents."}), 400
+    if not all(isinstance(incident, dict) for incident in incidents):
+        return jsonify({'error': "'incidents' must contain incident documents, not incident ids."}), 400
+
+    results = execute_playbook_batch_controller(playbook_id, batch_params)
+    if isinstance(results, dict):
+        return jsonify(results), 404
+    return Response(stream_with_context(results), mimetype='application/x-ndjson')
+
+# Define the route for listing the versions of a playbook
+@app.route('/playbooks/<playbook_id>/versions', methods=['GET'])
+def playbook_versions_route(playbook_id):
+    """
+    Defines the route for listing the recorded versions of a playbook, newest first.
+    Requirements Addressed:
+    - Dynamic Playbook Generation (Technical Specification/4.4.4 TR-DPG-004-5):
+      Ensure version control and audit logging for all playbook modifications.
+
+    Parameters:
+        playbook_id (str): The ID of the playbook.
+
+    Returns:
+        JSONResponse: The playbook's versions with their audit information.
+    """
+    limit = request.args.get('limit', type=int)
+    return jsonify(playbook_versions_controller(playbook_id, limit)), 200
+
+# Define the route for comparing two versions of a playbook
+@app.route('/playbooks/<playbook_id>/versions/<old_version>/diff/<new_version>', methods=['GET'])
+def diff_playbook_versions_route(playbook_id, old_version, new_version):
+    """
+    Defines the route for comparing two versions of a playbook.
+    Requirements Addressed:
+    - Dynamic Playbook Generation (Technical Specification/4.4.4 TR-DPG-004-5):
+      Ensure version control and audit logging for all playbook modifications.
+
+    Parameters:
+        playbook_id (str): The ID of the playbook.
+        old_version (str): Content hash of the earlier version.
+        new_version (str): Content hash of the later version.
+
+    Returns:
+        JSONResponse: The differences between the versions.
+    """
+    diff = diff_playbook_versions_controller(old_version, new_version)
+    if diff.get('error'):
+        return jsonify(diff), 404
+    return jsonify(diff), 200
+
+# Define the route for importing an XSOAR playbook bundle
+@app.route('/playbooks/import/xsoar', methods=['POST'])
+def import_xsoar_route():
+    """
+    Defines the route for importing an XSOAR playbook bundle (multi-document YAML).
+    The request body is read as a stream, so bundles of any size can be imported; playbooks
+    unchanged since the previous import are skipped.
+    Requirements Addressed:
+    - Dynamic Playbook Generation (Technical Specification/4.4.4 TR-DPG-004-1):
+      Develop AI algorithms for generating standardized playbooks compatible with XSOAR.
+
+    Returns:
+        JSONResponse: Counts of unchanged, imported and failed playbooks.
+    """
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8', errors='replace')
+    result = import_xsoar_controller(stream)
+    if result.get('error'):
+        return jsonify(result), 404
+    return jsonify(result), 200
+
+# Define the route for exporting playbooks as an XSOAR bundle
+@app.route('/playbooks/export/xsoar', methods=['GET'])
+def export_xsoar_route():
+    """
+    Defines the route for exporting playbooks as an XSOAR playbook bundle.
+    Requirements Addressed:
+    - Dynamic Playbook Generation (Technical Specification/4.4.4 TR-DPG-004-1):
+      Develop AI algorithms for generating standardized playbooks compatible with XSOAR.
+
+    Query Parameters:
+        id (str): ID of a playbook to export; repeat for several playbooks.
+
+    Returns:
+        Response: The playbooks as multi-document YAML, streamed one playbook at a time.
+    """
+    playbook_ids = request.args.getlist('id')
+    if not playbook_ids:
+        return jsonify({'error': "At least one playbook 'id' is required."}), 400
+    bundle = export_xsoar_controller(playbook_ids)
+    if isinstance(bundle, dict):
+        return jsonify(bundle), 404
+    return Response(stream_with_context(bundle), mimetype='application/x-yaml')
+
+# Define the route for viewing the status of a run
+@app.route('/runs/<run_id>', methods=['GET'])
+def run_status_route(run_id):
+    """
+    Defines the route for viewing the status and progress of a playbook run.
+
+    Any engine process sharing the run journal reports a run; one queued or executed by another
+    process carries that process as `owner` and reports progress only from the journal.
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation):
+      TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+
+    Parameters:
+        run_id (str): The ID of the run.
+
+    Returns:
+        JSONResponse: The run's status, progress and, once finished, its results.
+    """
+    result = run_status_controller(run_id)
+    if result.get('error'):
+        return jsonify(result), 404
+    return jsonify(result), 200
+
+# Define the route for following the progress of a run
+@app.route('/runs/<run_id>/events', methods=['GET'])
+def run_events_route(run_id):
+    """
+    Defines the route for following the step-level progress of a playbook run as Server-Sent Events.
+
+    Events are kept in memory by the engine process that owns the run; other processes answer 409
+    with the run's status and `owner`, so the request can be routed to that process.
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation):
+      TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+
+    Parameters:
+        run_id (str): The ID of the run.
+
+    Headers:
+        Last-Event-ID: Number of the last event received; the stream resumes after it.
+
+    Returns:
+        Response: A text/event-stream of the run's events, ending when the run finishes; 404 if
+        the run is unknown, 409 if it is owned by another engine process.
+    """
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id', '0'))
+    try:
+        last_event_id = int(last_event_id)
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID must be an event number.'}), 400
+
+    events = run_events_controller(run_id, last_event_id)
+    if isinstance(events, dict):
+        return jsonify(events), 404 if events['reason'] == 'not_found' else 409
+    return Response(stream_with_context(events), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Define the route for cancelling a run
+@app.route('/runs/<run_id>/cancel', methods=['POST'])
+def cancel_run_route(run_id):
+    """
+    Defines the route for cancelling a queued or running playbook run; in-flight steps are abandoned
+    and their handlers notified. Only the engine process that owns the run can cancel it; other
+    processes answer 409 with the run's status and `owner`.
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation):
+      TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+
+    Parameters:
+        run_id (str): The ID of the run.
+
+    Returns:
+        JSONResponse: The run's status (202), or an error if it is unknown (404), already finished
+        or owned by another engine process (409).
+    """
+    result = cancel_run_controller(run_id)
+    if result.get('error'):
+        return jsonify(result), 404 if result['reason'] == 'not_found' else 409
+    return jsonify(result), 202
+
+# Define the route for viewing the timeline of a run
+@app.route('/runs/<run_id>/timeline', methods=['GET'])
+def run_timeline_route(run_id):
+    """
+    Defines the route for viewing the timeline of a playbook run: its steps ordered by start time.
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation):
+      TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+
+    Parameters:
+        run_id (str): The ID of the run.
+
+    Query Parameters:
+        format (str): 'text' for a text chart instead of JSON.
+
+    Returns:
+        JSONResponse: The run's timeline, or a text chart.
+    """
+    timeline = run_timeline_controller(run_id, as_text=request.args.get('format') == 'text')
+    if isinstance(timeline, dict) and timeline.get('error'):
+        return jsonify(timeline), 404
+    if isinstance(timeline, str):
+        return Response(timeline + '\n', mimetype='text/plain')
+    return jsonify(timeline), 200
+
+# Define the route for exporting the trace of a run
+@app.route('/runs/<run_id>/trace', methods=['GET'])
+def run_trace_route(run_id):
+    """
+    Defines the route for exporting the trace of a playbook run as OTLP/JSON.
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation):
+      TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+
+    Parameters:
+        run_id (str): The ID of the run.
+
+    Returns:
+        JSONResponse: The run's spans in the OTLP/JSON encoding.
+    """
+    trace = run_trace_controller(run_id)
+    if trace.get('error'):
+        return jsonify(trace), 404
+    return jsonify(trace), 200
@@ -0,0 +1,237 @@
+"""
+Registry of asynchronous playbook runs: status, progress events and cancellation.
+
+Executing a playbook returns a run id as soon as the run is queued; the run is then executed by the
+run scheduler. The registry keeps, per run, its status and progress, its cancellation token and a
+bounded buffer of its progress events (numbered from 1), which clients read with `GET /runs/<id>`
+and follow as Server-Sent Events, resuming after the last event they saw (`Last-Event-ID`).
+
+Finished runs are kept until `max_runs` newer runs have been registered; the run journal still
+knows about runs that left the registry (or a previous process).
+
+The registry is per process: only the engine process that queued a run streams its events and can
+cancel it. Other processes sharing the run journal report its status from the journal, with the
+owning process, so requests can be routed to it.
+
+Requirements Addressed:
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import threading  # Notifies event subscribers and guards the registry. (builtin)
+import time  # Run timestamps and subscriber timeouts. (builtin)
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Internal dependencies
+from .dag import STATUS_CANCELLED, STATUS_FAILED, CancellationToken  # Run statuses and cancellation.
+
+# Statuses of runs not finished yet; finished runs take the status of their RunResult.
+RUN_QUEUED = 'queued'
+RUN_RUNNING = 'running'
+
+# Default number of runs kept in the registry.
+DEFAULT_MAX_RUNS = 10000
+
+# Default number of progress events kept per run.
+DEFAULT_MAX_EVENTS = 1000
+
+
+class RunRecord:
+    """
+    State of an asynchronous run: status, progress, events and cancellation token.
+    """
+
+    def __init__(self, run_id: str, playbook_id: Any, max_events: int = DEFAULT_MAX_EVENTS):
+        self.run_id = run_id
+        self.playbook_id = playbook_id
+        self.status = RUN_QUEUED
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps_total: Optional[int] = None
+        self.steps_finished = 0
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.cancellation = CancellationToken()
+        self.future: Optional[Future] = None  # the scheduler's future, to cancel queued runs
+        self._events: deque = deque(maxlen=max(1, int(max_events)))
+        self._sequence = 0
+        self._condition = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def publish(self, event: dict) -> None:
+        """
+        Records a progress event of the run (the executor's listener) and wakes its subscribers.
+        """
+        with self._condition:
+            kind = event.get('event')
+            if kind == 'run_started':
+                self.status = RUN_RUNNING
+                self.started_at = time.time()
+                self.steps_total = event.get('steps')
+            elif kind == 'step_finished':
+                self.steps_finished += 1
+            self._sequence += 1
+            self._events.append((self._sequence, event))
+            self._condition.notify_all()
+
+    def finish(self, status: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        """
+        Marks the run finished. Runs that never reached the executor (cancelled while queued, or
+        that could not be started) get their 'run_finished' event here.
+        """
+        with self._condition:
+            if self.finished:
+                return
+            if self.started_at is None:
+                self.publish({'event': 'run_finished', 'run_id': self.run_id, 'status': status, 'error': error})
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            self._condition.notify_all()
+
+    def cancel(self, reason: str = 'Run cancelled.') -> bool:
+        """
+        Cancels the run: a queued run is dropped, a running one stops at once. Returns False if the
+        run already finished.
+        """
+        if self.finished:
+            return False
+        self.cancellation.cancel(reason)
+        if self.future is not None and self.future.cancel():
+            self.finish(STATUS_CANCELLED, error=reason)
+        return True
+
+    def events(self, after: int = 0, timeout: Optional[float] = None) -> Iterator[Optional[Tuple[int, dict]]]:
+        """
+        Yields the run's events numbered after `after`, waiting for new ones until the run finishes.
+        Yields None whenever `timeout` seconds pass without an event, so callers can send keep-alives.
+        """
+        while True:
+            with self._condition:
+                batch = [(number, event) for number, event in self._events if number > after]
+                if not batch:
+                    if self.finished:
+                        return
+                    if not self._condition.wait(timeout):
+                        batch = None
+                    else:
+                        continue
+            if batch is None:
+                yield None
+                continue
+            for number, event in batch:
+                after = number
+                yield number, event
+
+    def to_dict(self) -> dict:
+        with self._condition:
+            return {
+                'run_id': self.run_id,
+                'playbook_id': self.playbook_id,
+                'status': self.status,
+                'submitted_at': self.submitted_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'progress': {'steps_finished': self.steps_finished, 'steps_total': self.steps_total},
+                'cancel_requested': self.cancellation.cancelled,
+                'error': self.error,
+                'result': self.result,
+            }
+
+
+class RunRegistry:
+    """
+    Bounded registry of asynchronous runs by run id.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+    """
+
+    def __init__(self, max_runs: int = DEFAULT_MAX_RUNS, max_events: int = DEFAULT_MAX_EVENTS):
+        """
+        Initializes the registry.
+
+        Parameters:
+            max_runs (int): Number of runs kept; the oldest finished runs are dropped beyond it.
+            max_events (int): Number of progress events kept per run.
+        """
+        self.max_runs = max(1, int(max_runs))
+        self.max_events = max_events
+        self._runs: 'OrderedDict[str, RunRecord]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, run_id: str, playbook_id: Any) -> RunRecord:
+        """
+        Registers a new run.
+        """
+        record = RunRecord(run_id, playbook_id, self.max_events)
+        with self._lock:
+            self._runs[run_id] = record
+            if len(self._runs) > self.max_runs:
+                for old_id in [old_id for old_id, old in self._runs.items() if old.finished][:len(self._runs) - self.max_runs]:
+                    del self._runs[old_id]
+        return record
+
+    def get(self, run_id: str) -> Optional[RunRecord]:
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def discard(self, run_id: str) -> None:
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+    def bind(self, record: RunRecord, future: Future) -> None:
+        """
+        Attaches the scheduler's future of a run, finishing the record when the future completes.
+        """
+        record.future = future
+
+        def done(future: Future) -> None:
+            if future.cancelled():
+                record.finish(STATUS_CANCELLED, error=record.cancellation.reason)
+                return
+            try:
+                run = future.result()
+            except Exception as exc:
+                record.finish(STATUS_FAILED, error=f'{type(exc).__name__}: {exc}')
+                return
+            if run is None:
+                record.finish(STATUS_FAILED, error=f"Playbook '{record.playbook_id}' could not be executed.")
+            else:
+                record.finish(run.status, result=run.to_dict())
+
+        future.add_done_callback(done)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the number of registered runs per status, for monitoring.
+        """
+        with self._lock:
+            records = list(self._runs.values())
+        counts: Dict[str, int] = {}
+        for record in records:
+            counts[record.status] = counts.get(record.status, 0) + 1
+        return counts
+
+
+_registry: Optional[RunRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_run_registry(max_runs: int = DEFAULT_MAX_RUNS, max_events: int = DEFAULT_MAX_EVENTS) -> RunRegistry:
+    """
+    Returns the process-wide run registry, creating it with the given capacity on first use.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = RunRegistry(max_runs, max_events)
+        return _registry
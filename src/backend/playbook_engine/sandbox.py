@@ -0,0 +1,298 @@
+"""
+Process-pool sandbox for CPU-heavy and untrusted step handlers.
+
+Handlers registered with `sandbox=True` (decoding payloads, parsing large logs, running custom
+scripts) are executed in a pool of warm worker processes instead of on the executor's threads, so
+they use every core and cannot hold the GIL that the I/O-bound steps of every other run need. The
+calling step thread only waits for the result, without holding the GIL.
+
+Workers run under resource limits: each call may use at most `cpu_seconds` of CPU time (and no more
+than what is left until the step's deadline), after which it fails with SandboxLimitError, and each
+worker's address space is capped at `memory_mb`, so oversized allocations fail with MemoryError.
+The CPU limit interrupts handlers between Python instructions; a call stuck in native code is only
+abandoned at its step timeout. A worker that dies (a crash, the kernel's OOM killer) fails the calls
+it was running with SandboxError and the pool is replaced by a fresh one.
+
+Parameters are passed by pickling, except bytes and strings of at least `shared_memory_threshold`
+bytes, which are copied into shared memory segments that the worker reads directly instead of
+receiving them through the pool's pipe. Sandboxed handlers must be module-level functions so
+workers can import them; their context does not include the run's cancellation token.
+
+Requirements Addressed:
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import multiprocessing  # Chooses the worker start method. (builtin)
+import os  # Counts CPU cores. (builtin)
+import signal  # Turns the CPU limit signal into an exception. (builtin)
+import threading  # Guards the lazily created process pool. (builtin)
+import time  # Bounds calls by their step deadline. (builtin)
+from concurrent.futures import ProcessPoolExecutor  # Warm worker processes. (builtin)
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory  # Large parameters. (builtin, Python 3.8+)
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource  # Worker CPU and memory limits. (builtin, Unix only)
+except ImportError:  # pragma: no cover - Windows runs sandboxed handlers without limits
+    resource = None
+
+# Internal dependencies
+from .handlers import HandlerFunc  # Signature of the handlers run in the sandbox.
+
+# Defaults applied when the engine configuration sets no value.
+DEFAULT_SANDBOX_CPU_SECONDS = 60.0
+DEFAULT_SANDBOX_MEMORY_MB = 1024
+DEFAULT_SHARED_MEMORY_THRESHOLD = 1024 * 1024
+
+
+class SandboxError(RuntimeError):
+    """
+    Raised when a sandboxed call cannot complete because its worker process died.
+    """
+
+
+class SandboxLimitError(SandboxError):
+    """
+    Raised when a sandboxed call exceeds its CPU time limit.
+    """
+
+
+class _SharedPayload:
+    """
+    Reference to a bytes or str parameter placed in a shared memory segment.
+    """
+    __slots__ = ('name', 'size', 'text')
+
+    def __init__(self, name: str, size: int, text: bool):
+        self.name = name
+        self.size = size
+        self.text = text
+
+    def __getstate__(self):
+        return self.name, self.size, self.text
+
+    def __setstate__(self, state):
+        self.name, self.size, self.text = state
+
+
+def _share(value: Any, threshold: int, segments: List[shared_memory.SharedMemory]) -> Any:
+    """
+    Returns the value with its large bytes and strings replaced by shared memory references.
+    """
+    if isinstance(value, (bytes, bytearray, str)):
+        data = value.encode('utf-8') if isinstance(value, str) else value
+        if len(data) < threshold or not data:
+            return value
+        segment = shared_memory.SharedMemory(create=True, size=len(data))
+        segments.append(segment)
+        segment.buf[:len(data)] = data
+        return _SharedPayload(segment.name, len(data), isinstance(value, str))
+    if isinstance(value, dict):
+        return {key: _share(item, threshold, segments) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_share(item, threshold, segments) for item in value)
+    return value
+
+
+def _attach(value: Any) -> Any:
+    """
+    Returns the value with its shared memory references replaced by their contents (in the worker).
+    """
+    if isinstance(value, _SharedPayload):
+        segment = shared_memory.SharedMemory(name=value.name)
+        try:
+            data = bytes(segment.buf[:value.size])
+        finally:
+            segment.close()
+        return data.decode('utf-8') if value.text else data
+    if isinstance(value, dict):
+        return {key: _attach(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_attach(item) for item in value)
+    return value
+
+
+def _cpu_limit_exceeded(signum, frame) -> None:
+    raise SandboxLimitError('CPU time limit of the sandboxed step exceeded.')
+
+
+def _initialize_worker(memory_bytes: Optional[int]) -> None:
+    """
+    Applies the worker-wide limits when a worker process starts.
+    """
+    if resource is None:
+        return
+    if memory_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    signal.signal(signal.SIGXCPU, _cpu_limit_exceeded)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _run_handler(handler: HandlerFunc, parameters: Any, context: dict, cpu_seconds: Optional[float]) -> Any:
+    """
+    Runs one sandboxed call in a worker, under its CPU time limit.
+    """
+    limited = resource is not None and cpu_seconds is not None
+    if limited:
+        # RLIMIT_CPU counts the worker's total CPU time, so the soft limit is moved to this call's
+        # budget past what the worker already used; the hard limit is left alone so it can be raised again.
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime + max(cpu_seconds, 0.0)) + 1
+        resource.setrlimit(resource.RLIMIT_CPU, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+    try:
+        return handler(_attach(parameters), context)
+    finally:
+        if limited:
+            resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+
+class SandboxPool:
+    """
+    Pool of warm worker processes running sandboxed step handlers under resource limits.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, cpu_seconds: Optional[float] = DEFAULT_SANDBOX_CPU_SECONDS,
+                 memory_mb: Optional[int] = DEFAULT_SANDBOX_MEMORY_MB,
+                 shared_memory_threshold: int = DEFAULT_SHARED_MEMORY_THRESHOLD, start_method: Optional[str] = None):
+        """
+        Initializes the sandbox; worker processes are started on first use or by `warm()`.
+
+        Parameters:
+            max_workers (int, optional): Number of worker processes; defaults to one per CPU core.
+            cpu_seconds (float, optional): CPU time limit of each call; None disables it.
+            memory_mb (int, optional): Address space limit of each worker; None disables it.
+            shared_memory_threshold (int): Size from which bytes and str parameters are passed
+                through shared memory.
+            start_method (str, optional): multiprocessing start method of the workers; defaults to
+                'forkserver' where available, so workers do not inherit the engine's threads (nor,
+                with 'fork', its address space, which counts towards `memory_mb`).
+        """
+        self.max_workers = max(1, int(max_workers or os.cpu_count() or 1))
+        self.cpu_seconds = float(cpu_seconds) if cpu_seconds else None
+        self.memory_mb = int(memory_mb) if memory_mb else None
+        self.shared_memory_threshold = max(1, int(shared_memory_threshold))
+        if start_method is None:
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'failed': 0, 'limit_exceeded': 0, 'worker_crashes': 0, 'shared_bytes': 0}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Workers must share the engine's tracker of shared memory segments, or each would
+                # report the segments it attached to as leaked when it exits.
+                resource_tracker.ensure_running()
+                memory_bytes = self.memory_mb * 1024 * 1024 if self.memory_mb else None
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context(self.start_method),
+                                                 initializer=_initialize_worker, initargs=(memory_bytes,))
+            return self._pool
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        """
+        Drops a pool whose worker died; the next call starts a new one.
+        """
+        with self._lock:
+            if self._pool is broken:
+                self._pool = None
+                self._stats['worker_crashes'] += 1
+        broken.shutdown(wait=False)
+
+    def warm(self) -> None:
+        """
+        Starts every worker process now rather than on the first sandboxed call.
+        """
+        pool = self._get_pool()
+        for future in [pool.submit(_ping) for _ in range(self.max_workers)]:
+            future.result()
+
+    def call(self, handler: HandlerFunc, parameters: dict, context: dict) -> Any:
+        """
+        Runs a handler in a worker process and returns its result.
+
+        Raises:
+            SandboxLimitError: If the call exceeds its CPU time limit.
+            SandboxError: If the worker running the call died.
+            Exception: Whatever the handler raised.
+        """
+        cpu_seconds = self.cpu_seconds
+        deadline = context.get('deadline')
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            cpu_seconds = remaining if cpu_seconds is None else min(cpu_seconds, remaining)
+        context = {key: value for key, value in context.items() if key != 'cancellation'}
+        segments: List[shared_memory.SharedMemory] = []
+        pool = self._get_pool()
+        try:
+            shared = _share(parameters, self.shared_memory_threshold, segments)
+            with self._lock:
+                self._stats['calls'] += 1
+                self._stats['shared_bytes'] += sum(segment.size for segment in segments)
+            return pool.submit(_run_handler, handler, shared, context, cpu_seconds).result()
+        except BrokenProcessPool:
+            self._replace_pool(pool)
+            self._count('failed')
+            raise SandboxError('The sandbox worker running the step exited unexpectedly.') from None
+        except SandboxLimitError:
+            self._count('failed', 'limit_exceeded')
+            raise
+        except BaseException:
+            self._count('failed')
+            raise
+        finally:
+            for segment in segments:
+                segment.close()
+                try:
+                    segment.unlink()
+                except FileNotFoundError:
+                    pass  # a worker that failed to map the segment removed it
+
+    def _count(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._stats[key] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the sandbox's call counters, for monitoring.
+        """
+        with self._lock:
+            return dict(self._stats, workers=self.max_workers if self._pool is not None else 0)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops the worker processes; a later call starts new ones.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+_sandbox: Optional[SandboxPool] = None
+_sandbox_lock = threading.Lock()
+
+
+def get_sandbox_pool(max_workers: Optional[int] = None, cpu_seconds: Optional[float] = DEFAULT_SANDBOX_CPU_SECONDS,
+                     memory_mb: Optional[int] = DEFAULT_SANDBOX_MEMORY_MB,
+                     shared_memory_threshold: int = DEFAULT_SHARED_MEMORY_THRESHOLD) -> SandboxPool:
+    """
+    Returns the process-wide sandbox, creating it with the given limits on first use.
+    """
+    global _sandbox
+    with _sandbox_lock:
+        if _sandbox is None:
+            _sandbox = SandboxPool(max_workers, cpu_seconds, memory_mb, shared_memory_threshold)
+        return _sandbox
@@ -0,0 +1,244 @@
+"""
+Process-wide scheduler of playbook runs.
+
+Execution requests are queued rather than run on the request thread, and a bounded pool of run
+workers takes them in priority order:
+
+- Severity first: runs for critical incidents go before runs for low-severity ones.
+- Aging: every `aging_seconds` a run waits counts as one severity level, so low-severity runs are
+  delayed by a storm of critical ones but never starved. Since all queued runs age at the same
+  rate, the effective priority is `severity - submitted_at / aging_seconds`, a constant per run, and
+  queues are plain heaps.
+- Fair queuing: each tenant (or, without a tenant, each incident) has its own queue. Among queue
+  heads at the same (aged) severity level, the tenant with the fewest runs in progress goes first,
+  then the one served longest ago, so one tenant's burst cannot monopolize the workers.
+
+Per-integration concurrency caps are applied to the individual steps of all runs by the step
+executor (see policies.IntegrationLimiter).
+
+Requirements Addressed:
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import heapq  # Per-tenant priority queues. (builtin)
+import itertools  # Submission sequence numbers. (builtin)
+import math  # Aged severity levels. (builtin)
+import threading  # Run workers and queue synchronization. (builtin)
+import time  # Run submission times. (builtin)
+import uuid  # Generates run ids. (builtin)
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# Default number of playbook runs executed concurrently.
+DEFAULT_RUN_WORKERS = 4
+
+# Default waiting time worth one severity level.
+DEFAULT_AGING_SECONDS = 60.0
+
+# Default maximum number of queued runs; submissions beyond it are rejected.
+DEFAULT_MAX_QUEUED_RUNS = 10000
+
+# Priority levels of incident severities; unknown severities are treated as medium.
+SEVERITY_LEVELS = {'low': 0, 'medium': 1, 'high': 2, 'critical': 3}
+
+
+class SchedulerFullError(RuntimeError):
+    """
+    Raised when a run is submitted while the scheduler's queue is full.
+    """
+
+
+def severity_level(severity: Any) -> float:
+    """
+    Returns the priority level of a severity name ('low' to 'critical') or number.
+    """
+    if isinstance(severity, (int, float)) and not isinstance(severity, bool):
+        return float(severity)
+    return float(SEVERITY_LEVELS.get(str(severity or '').lower(), SEVERITY_LEVELS['medium']))
+
+
+@dataclass
+class RunRequest:
+    """
+    A queued playbook run.
+    """
+    run_id: str
+    playbook_id: Any
+    context: dict
+    tenant: str
+    severity: float
+    submitted_at: float
+    future: Future = field(default_factory=Future)
+
+
+class RunScheduler:
+    """
+    Priority scheduler of playbook runs with fair queuing across tenants and a bounded worker pool.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+    """
+
+    def __init__(self, runner: Callable[[RunRequest], Any], workers: int = DEFAULT_RUN_WORKERS,
+                 aging_seconds: float = DEFAULT_AGING_SECONDS, max_queued: int = DEFAULT_MAX_QUEUED_RUNS,
+                 clock=time.monotonic):
+        """
+        Initializes the scheduler; worker threads are started on the first submission.
+
+        Parameters:
+            runner (callable): Executes a run request and returns its result.
+            workers (int): Maximum number of runs executed concurrently.
+            aging_seconds (float): Waiting time worth one severity level.
+            max_queued (int): Maximum number of queued runs.
+            clock (callable): Monotonic clock, replaceable in tests.
+        """
+        self.runner = runner
+        self.workers = max(1, int(workers))
+        self.aging_seconds = float(aging_seconds)
+        self.max_queued = max_queued
+        self._clock = clock
+        self._queues: Dict[str, List[tuple]] = {}
+        self._running: Dict[str, int] = {}
+        self._last_served: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._served = itertools.count(1)
+        self._queued = 0
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._shutdown = False
+
+    def submit(self, playbook_id: Any, context: Optional[dict] = None, severity: Any = None,
+               tenant: Optional[str] = None, run_id: Optional[str] = None) -> RunRequest:
+        """
+        Queues a playbook run.
+
+        Parameters:
+            playbook_id: The playbook to run.
+            context (dict, optional): Run context; its incident provides the default severity and
+                fairness key.
+            severity (optional): Severity name or level; defaults to the incident's severity.
+            tenant (str, optional): Fairness key; defaults to the incident's tenant, then its id.
+            run_id (str, optional): Identifier of the run; generated when omitted.
+
+        Returns:
+            RunRequest: The queued request; its future resolves to the runner's result.
+
+        Raises:
+            SchedulerFullError: If the queue is full.
+            RuntimeError: If the scheduler has been shut down.
+        """
+        context = dict(context or {})
+        incident = context.get('incident') or {}
+        if severity is None:
+            severity = incident.get('severity')
+        if tenant is None:
+            tenant = incident.get('tenant_id') or incident.get('id') or 'default'
+        request = RunRequest(
+            run_id=run_id or uuid.uuid4().hex,
+            playbook_id=playbook_id,
+            context=context,
+            tenant=str(tenant),
+            severity=severity_level(severity),
+            submitted_at=self._clock(),
+        )
+        priority = request.severity - request.submitted_at / self.aging_seconds
+
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError('The run scheduler has been shut down.')
+            if self._queued >= self.max_queued:
+                raise SchedulerFullError(f'The run queue is full ({self.max_queued} runs).')
+            heapq.heappush(self._queues.setdefault(request.tenant, []), (-priority, next(self._sequence), request))
+            self._queued += 1
+            self._start_workers()
+            self._condition.notify()
+        return request
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f'playbook-run-{len(self._threads)}', daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _next_request(self) -> RunRequest:
+        """
+        Pops the next run: the queue head at the highest aged severity level, then the tenant with the
+        fewest runs in progress, then the tenant served longest ago. Called with the condition held.
+        """
+        now = self._clock() / self.aging_seconds
+        best_tenant, best_key = None, None
+        for tenant, queue in self._queues.items():
+            priority = -queue[0][0]
+            key = (-math.floor(priority + now), self._running.get(tenant, 0), self._last_served.get(tenant, 0), -priority)
+            if best_key is None or key < best_key:
+                best_tenant, best_key = tenant, key
+        queue = self._queues[best_tenant]
+        _, _, request = heapq.heappop(queue)
+        if not queue:
+            del self._queues[best_tenant]
+        self._queued -= 1
+        self._running[best_tenant] = self._running.get(best_tenant, 0) + 1
+        self._last_served[best_tenant] = next(self._served)
+        return request
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queues and not self._shutdown:
+                    self._condition.wait()
+                if not self._queues:
+                    return
+                request = self._next_request()
+
+            if request.future.set_running_or_notify_cancel():
+                try:
+                    request.future.set_result(self.runner(request))
+                except BaseException as exc:
+                    request.future.set_exception(exc)
+
+            with self._condition:
+                self._running[request.tenant] -= 1
+                if not self._running[request.tenant]:
+                    del self._running[request.tenant]
+
+    def stats(self) -> dict:
+        """
+        Returns the number of queued and running runs per tenant, for monitoring.
+        """
+        with self._condition:
+            return {
+                'queued': {tenant: len(queue) for tenant, queue in self._queues.items()},
+                'running': dict(self._running),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops accepting runs; workers finish the queued runs and exit.
+        """
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+_scheduler: Optional[RunScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_run_scheduler(runner: Callable[[RunRequest], Any], workers: int = DEFAULT_RUN_WORKERS,
+                      aging_seconds: float = DEFAULT_AGING_SECONDS,
+                      max_queued: int = DEFAULT_MAX_QUEUED_RUNS) -> RunScheduler:
+    """
+    Returns the process-wide run scheduler, creating it with the given settings on first use.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RunScheduler(runner, workers, aging_seconds, max_queued)
+        return _scheduler
@@ -10,9 +10,220 @@ This module addresses the following requirement:
 """
 
 from datetime import datetime  # Built-in module for handling date and time operations for playbook timestamps.
+import logging  # Built-in module for reporting failures of background work.
+import os  # Built-in module for building trace export paths.
+import threading  # Built-in module for the background recovery of interrupted runs.
+import time  # Built-in module for measuring how long runs waited in the run queue.
+import uuid  # Built-in module for generating the ids of asynchronous runs.
 
 from src.backend.playbook_engine.models import Playbook  # Represents a playbook entity with attributes and methods to interact with playbook data.
-from src.backend.playbook_engine.config import load_config  # Loads configuration settings for the playbook engine.
+from src.backend.playbook_engine.config import ConfigSnapshot, get_config  # Versioned snapshots of the engine configuration.
+from src.backend.playbook_engine.dag import (  # Executes compiled plans as dependency graphs.
+    DEFAULT_MAX_PARALLEL_STEPS,
+    STATUS_FAILED,
+    CancellationToken,
+    CompiledPlan,
+    RunResult,
+    get_dag_executor,
+)
+from src.backend.playbook_engine.policies import (  # Per-integration circuit breakers.
+    DEFAULT_BREAKER_FAILURE_THRESHOLD,
+    DEFAULT_BREAKER_RESET_SECONDS,
+    get_circuit_breakers,
+    get_integration_limiter,
+)
+from src.backend.playbook_engine.sandbox import (  # Worker processes of CPU-heavy and untrusted step handlers.
+    DEFAULT_SANDBOX_CPU_SECONDS,
+    DEFAULT_SANDBOX_MEMORY_MB,
+    DEFAULT_SHARED_MEMORY_THRESHOLD,
+    SandboxPool,
+    get_sandbox_pool,
+)
+from src.backend.playbook_engine.handlers import get_sandboxed_actions  # Actions whose handlers are sandboxed.
+from src.backend.playbook_engine.scheduler import (  # Queues playbook runs by severity with fair sharing.
+    DEFAULT_AGING_SECONDS,
+    DEFAULT_MAX_QUEUED_RUNS,
+    DEFAULT_RUN_WORKERS,
+    RunRequest,
+    get_run_scheduler,
+)
+from src.backend.playbook_engine.runs import (  # Status, progress and cancellation of asynchronous runs.
+    DEFAULT_MAX_EVENTS,
+    DEFAULT_MAX_RUNS,
+    RUN_QUEUED,
+    RUN_RUNNING,
+    RunRecord,
+    RunRegistry,
+    get_run_registry,
+)
+from src.backend.playbook_engine.batch import DEFAULT_BULK_SIZE, BatchExecutor  # Runs a playbook across many incidents.
+from src.backend.playbook_engine.journal import DEFAULT_RUN_LEASE_SECONDS, RunJournal, get_run_journal  # Durable journal of playbook runs.
+from src.backend.playbook_engine.versions import (  # Content-addressed history of playbook versions.
+    DEFAULT_KEYFRAME_INTERVAL,
+    PlaybookVersionStore,
+    VersionNotFoundError,
+    get_version_store,
+)
+from src.backend.playbook_engine.simulate import (  # Dry-run estimates of duration and external calls.
+    DEFAULT_HISTORY_SAMPLES,
+    DEFAULT_SIMULATION_ITERATIONS,
+    DEFAULT_STEP_SECONDS,
+    load_history,
+    simulate_plan,
+)
+from src.backend.playbook_engine.tracing import (  # Spans of runs and steps.
+    DEFAULT_MAX_SPANS,
+    TraceCollector,
+    get_trace_collector,
+)
+from src.backend.playbook_engine.threat_intel import DEFAULT_BLOOM_CAPACITY, get_threat_intel_store  # Local threat intelligence.
+from src.backend.playbook_engine.auto_update import (  # Incremental auto-update of playbooks.
+    PlaybookAutoUpdater,
+    PlaybookDependencyIndex,
+    get_auto_updater,
+    get_dependency_index,
+)
+from src.backend.playbook_engine.triggers import get_trigger_network  # Selects the playbooks matching an incident.
+from src.backend.playbook_engine.xsoar import get_xsoar_sync, iter_bundle, to_xsoar  # XSOAR import and export.
+from src.backend.playbook_engine.plan_cache import (  # Caches compiled plans by content hash.
+    DEFAULT_PLAN_CACHE_SIZE,
+    PlaybookComplianceError,
+    get_plan_cache,
+)
+
+logger = logging.getLogger(__name__)
+
+def compile_playbook(playbook: Playbook, config: ConfigSnapshot = None) -> CompiledPlan:
+    """
+    Returns the compiled execution plan of a playbook.
+
+    Plans are cached by a hash of the steps and the engine configuration version, so dependency
+    validation, step parsing and the compliance check (TR-DPG-004-3) run once per distinct playbook
+    content rather than on every create, update and execution.
+
+    Parameters:
+        playbook (Playbook): The playbook to compile.
+        config (ConfigSnapshot, optional): The configuration to compile under; defaults to the current one.
+
+    Raises:
+        PlaybookDAGError: If the steps do not form a valid dependency graph.
+        PlaybookComplianceError: If the playbook does not comply with organizational policies.
+    """
+    config = config if config is not None else get_config()
+    cache = get_plan_cache(config.get('plan_cache_size', DEFAULT_PLAN_CACHE_SIZE))
+    return cache.get_or_compile(playbook.steps, config, validator=playbook.validate_compliance)
+
+def _get_journal(config: ConfigSnapshot) -> RunJournal:
+    """
+    Returns the run journal, or None when journaling is disabled (no `run_journal_path`).
+    """
+    path = config.get('run_journal_path')
+    return get_run_journal(path, config.get('run_lease_seconds', DEFAULT_RUN_LEASE_SECONDS)) if path else None
+
+def _get_version_store(config: ConfigSnapshot) -> PlaybookVersionStore:
+    """
+    Returns the playbook version store, or None when version control is disabled.
+    """
+    path = config.get('version_store_path')
+    if not path or not config.get('version_control_enabled', True):
+        return None
+    return get_version_store(path, config.get('version_keyframe_interval', DEFAULT_KEYFRAME_INTERVAL))
+
+def _get_tracer(config: ConfigSnapshot) -> TraceCollector:
+    """
+    Returns the trace collector, or None when tracing is disabled.
+    """
+    if not config.get('tracing_enabled', True):
+        return None
+    return get_trace_collector(config.get('trace_max_spans', DEFAULT_MAX_SPANS),
+                               config.get('trace_payload_sizes', True))
+
+def _export_trace(config: ConfigSnapshot, tracer: TraceCollector, run_id: str) -> None:
+    """
+    Writes the trace of a finished run to `trace_export_dir` as an OTLP/JSON file, when configured.
+    """
+    directory = config.get('trace_export_dir')
+    if tracer is not None and directory:
+        try:
+            tracer.export_otlp(os.path.join(directory, f'{run_id}.json'), run_id)
+        except OSError as e:
+            # The run itself succeeded; only its trace file is missing.
+            logger.warning('Exporting the trace of run %s to %s failed: %s', run_id, directory, e)
+
+def _get_dependency_index(config: ConfigSnapshot) -> PlaybookDependencyIndex:
+    """
+    Returns the playbook dependency index, or None when it is disabled (no `dependency_index_path`).
+    """
+    path = config.get('dependency_index_path')
+    return get_dependency_index(path) if path else None
+
+def _index_playbook(playbook: Playbook, config: ConfigSnapshot) -> None:
+    """
+    Records what a created or updated playbook references, so auto-updates find it.
+    """
+    index = _get_dependency_index(config)
+    if index is not None and playbook.id is not None:
+        index.update(playbook.id, playbook.steps)
+
+def _get_auto_updater(config: ConfigSnapshot) -> PlaybookAutoUpdater:
+    """
+    Returns the playbook auto-updater, or None when auto-updates or the dependency index are disabled.
+    """
+    index = _get_dependency_index(config)
+    if index is None or not config.get('auto_update_enabled', True):
+        return None
+    store = get_threat_intel_store(config.get('threat_intelligence_sources', ()),
+                                   float(config.get('auto_update_interval_minutes', 15)) * 60,
+                                   config.get('threat_intel_bloom_capacity', DEFAULT_BLOOM_CAPACITY))
+    return get_auto_updater(index, store, regenerate_playbook, lambda: get_config().get('compliance_rules', ()))
+
+def _get_run_registry(config: ConfigSnapshot) -> RunRegistry:
+    """
+    Returns the registry of asynchronous runs.
+    """
+    return get_run_registry(config.get('run_registry_size', DEFAULT_MAX_RUNS),
+                            config.get('run_event_buffer_size', DEFAULT_MAX_EVENTS))
+
+def _get_sandbox(config: ConfigSnapshot) -> SandboxPool:
+    """
+    Returns the process-wide sandbox of step handlers, configured on first use; its settings are
+    restart-only (see config.RESTART_REQUIRED_KEYS).
+    """
+    return get_sandbox_pool(
+        config.get('sandbox_workers') or None,
+        config.get('sandbox_cpu_seconds', DEFAULT_SANDBOX_CPU_SECONDS),
+        config.get('sandbox_memory_mb', DEFAULT_SANDBOX_MEMORY_MB),
+        config.get('sandbox_shared_memory_threshold_bytes', DEFAULT_SHARED_MEMORY_THRESHOLD),
+    )
+
+def _get_executor(config: ConfigSnapshot):
+    """
+    Returns the process-wide step executor, configured from the engine configuration on first use.
+
+    The executor, circuit breakers and integration limiter are created once, so their settings are
+    restart-only (see config.RESTART_REQUIRED_KEYS); the journal, version store, trace collector,
+    registry and scheduler are likewise configured on first use.
+    """
+    breakers = get_circuit_breakers(
+        config.get('circuit_breaker_failure_threshold', DEFAULT_BREAKER_FAILURE_THRESHOLD),
+        config.get('circuit_breaker_reset_seconds', DEFAULT_BREAKER_RESET_SECONDS),
+    )
+    limiter = get_integration_limiter(config.get('integration_concurrency_limits'))
+    return get_dag_executor(config.get('max_parallel_steps', DEFAULT_MAX_PARALLEL_STEPS), breakers, limiter,
+                            _get_sandbox(config))
+
+def start_step_sandbox() -> bool:
+    """
+    Starts the sandbox's worker processes ahead of the first sandboxed step, if any handler is
+    registered to run in the sandbox.
+
+    Returns:
+        bool: True if the workers were started.
+    """
+    if not get_sandboxed_actions():
+        return False
+    _get_sandbox(get_config()).warm()
+    return True
 
 def create_playbook(name: str, steps: list) -> Playbook:
     """
@@ -25,6 +236,10 @@ def create_playbook(name: str, steps: list) -> Playbook:
     Returns:
         Playbook: The created Playbook instance.
 
+    Raises:
+        ValueError: If the name or steps are invalid; this includes PlaybookDAGError for unknown or
+            cyclic step dependencies and PlaybookComplianceError for policy violations.
+
     This function addresses the following technical requirements:
     - **TR-DPG-004-1** (Technical Specification/4.4.4):
       Develop AI algorithms for generating standardized playbooks compatible with XSOAR.
@@ -51,9 +266,9 @@ def create_playbook(name: str, steps: list) -> Playbook:
         updated_at=datetime.utcnow()
     )
 
-    # Validate the playbook against organizational policies and compliance standards (TR-DPG-004-3).
-    if not playbook.validate_compliance():
-        raise ValueError("Playbook does not comply with organizational policies and standards.")
+    # Compile the playbook, rejecting steps whose dependencies are unknown or cyclic and validating it
+    # against organizational policies and compliance standards (TR-DPG-004-3). Both errors are ValueErrors.
+    compile_playbook(playbook)
 
     # Incorporate real-time threat intelligence into playbook creation (TR-DPG-004-2).
     # Note: Assume that threat intelligence integration is handled within the Playbook model.
@@ -65,6 +280,9 @@ def create_playbook(name: str, steps: list) -> Playbook:
     # Save the Playbook instance to the database.
     playbook.save()
 
+    # Index what the playbook references, so threat intelligence and policy changes update it.
+    _index_playbook(playbook, get_config())
+
     # Return the created Playbook instance.
     return playbook
 
@@ -77,7 +295,12 @@ def update_playbook(playbook_id: str, new_steps: list) -> bool:
         new_steps (list): The new list of steps to update the playbook with.
 
     Returns:
-        bool: True if the update is successful, otherwise False.
+        bool: True if the update is successful, False if the playbook does not exist or could not be saved.
+
+    Raises:
+        PlaybookDAGError: If the new steps do not form a valid dependency graph.
+        PlaybookComplianceError: If the updated playbook does not comply with organizational policies.
+        Both are ValueErrors, answered with 400 by the update route.
 
     This function addresses the following technical requirements:
     - **TR-DPG-004-4** (Technical Specification/4.4.4):
@@ -95,15 +318,17 @@ def update_playbook(playbook_id: str, new_steps: list) -> bool:
     playbook.steps = new_steps
     playbook.updated_at = datetime.utcnow()
 
-    # Validate the updated playbook against organizational policies (TR-DPG-004-3).
-    if not playbook.validate_compliance():
-        return False  # Validation failed; do not proceed with the update.
+    # Compile the updated playbook, rejecting unknown or cyclic step dependencies, and validate it
+    # against organizational policies (TR-DPG-004-3); either error aborts the update before it is saved.
+    compile_playbook(playbook)
 
     # Ensure version control and audit logging for the update (TR-DPG-004-5).
     playbook.enable_version_control()
 
     # Save the updated Playbook instance to the database.
     success = playbook.save()
+    if success:
+        _index_playbook(playbook, get_config())
 
     # Return True if the update is successful; otherwise, return False.
     return success
@@ -124,32 +349,554 @@ def execute_playbook(playbook_id: str) -> bool:
     - **TR-DPG-004-3** (Technical Specification/4.4.4):
       Validate playbooks against organizational policies and compliance standards before execution.
     """
+    run = run_playbook(playbook_id)
+    return run is not None and run.succeeded
+
+def run_playbook(playbook_id: str, context: dict = None, run_id: str = None, queue_wait: float = None,
+                 cancellation: CancellationToken = None, listener=None) -> RunResult:
+    """
+    Executes the specified playbook and returns the outcome of each step.
+
+    Steps whose dependencies have completed run concurrently on the engine's bounded worker pool,
+    so independent steps take as long as the slowest of them instead of their sum. The whole run
+    uses one configuration snapshot, whose version is recorded in the run context and result, even
+    if the configuration is reloaded meanwhile.
+
+    Parameters:
+        playbook_id (str): The unique identifier of the playbook to execute.
+        context (dict, optional): Run context passed to step handlers, e.g. the incident.
+        run_id (str, optional): Identifier of the run; generated when omitted.
+        queue_wait (float, optional): Seconds the run waited in the run queue, recorded in its trace.
+        cancellation (CancellationToken, optional): Token cancelling the run, also handed to in-flight steps.
+        listener (callable, optional): Receives the run's progress events.
+
+    Returns:
+        RunResult: The run's status, per-step results and critical-path timing, or None if the
+        playbook does not exist, is not compliant or could not be executed.
+
+    This function addresses the following technical requirements:
+    - **TR-DPG-004-2** (Technical Specification/4.4.4):
+      Incorporate real-time threat intelligence into playbook execution.
+    - **TR-DPG-004-3** (Technical Specification/4.4.4):
+      Validate playbooks against organizational policies and compliance standards before execution.
+    """
+    # Take the configuration snapshot the whole run uses.
+    config = get_config()
+
     # Retrieve the Playbook instance by playbook_id.
     playbook = Playbook.get_by_id(playbook_id)
     if not playbook:
-        # Playbook not found; return False to indicate failure.
-        return False
+        # Playbook not found; return None to indicate failure.
+        return None
 
-    # Load configuration settings using load_config.
-    config = load_config()
-
-    # Validate the playbook against organizational policies before execution (TR-DPG-004-3).
-    if not playbook.validate_compliance():
-        # Playbook is not compliant; abort execution.
-        return False
+    # Validate the playbook against organizational policies before execution (TR-DPG-004-3); the
+    # compiled plan is cached, so repeat executions of unchanged playbooks skip validation and parsing.
+    try:
+        plan = compile_playbook(playbook, config)
+    except ValueError:
+        # Playbook is not compliant or its steps are invalid; abort execution.
+        return None
 
     # Incorporate real-time threat intelligence into execution (TR-DPG-004-2).
     playbook.integrate_threat_intelligence()
 
-    # Execute the playbook steps using AI-driven strategies.
+    # Execute the plan as a dependency graph.
+    executor = _get_executor(config)
+    context = dict(context or {}, config_version=config.version)
+    tracer = _get_tracer(config)
+    trace_attributes = {'run.queue_wait_ms': round(queue_wait * 1000, 3)} if queue_wait is not None else None
     try:
-        # Assume playbook.execute() handles the execution logic, including AI strategies.
-        execution_result = playbook.execute(config=config)
+        run = executor.run(plan, context=context, playbook_id=playbook_id, run_id=run_id,
+                           journal=_get_journal(config), tracer=tracer, trace_attributes=trace_attributes,
+                           cancellation=cancellation, listener=listener)
+        _export_trace(config, tracer, run.run_id)
+        return run
     except Exception as e:
         # Log the exception (logging implementation assumed).
         # This addresses logging requirements (Technical Specification/4.20 Logging and Monitoring)
         # logger.error(f"Error executing playbook {playbook_id}: {str(e)}")
+        return None
+
+def simulate_playbook(playbook_id: str, context: dict = None, iterations: int = None) -> dict:
+    """
+    Simulates runs of the specified playbook without executing any step, estimating its duration,
+    critical path and external calls per integration from the execution history of past runs.
+
+    Parameters:
+        playbook_id (str): The unique identifier of the playbook to simulate.
+        context (dict, optional): Run context used to decide step conditions, e.g. the incident.
+        iterations (int, optional): Number of simulated runs; defaults to `simulation_iterations`.
+
+    Returns:
+        dict: The simulation report, or None if the playbook does not exist or is not compliant.
+
+    This function addresses the following technical requirements:
+    - **TR-DPG-004-3** (Technical Specification/4.4.4):
+      Validate generated playbooks against organizational policies and compliance standards.
+    """
+    config = get_config()
+    playbook = Playbook.get_by_id(playbook_id)
+    if not playbook:
+        return None
+    try:
+        plan = compile_playbook(playbook, config)
+    except ValueError:
+        return None
+
+    history = load_history(plan, _get_journal(config), playbook_id,
+                           config.get('simulation_history_samples', DEFAULT_HISTORY_SAMPLES))
+    report = simulate_plan(
+        plan, history, context=context,
+        iterations=iterations or config.get('simulation_iterations', DEFAULT_SIMULATION_ITERATIONS),
+        default_step_seconds=config.get('simulation_default_step_seconds', DEFAULT_STEP_SECONDS),
+    )
+    return dict(report, playbook_id=playbook_id, config_version=config.version)
+
+def match_playbooks(incident: dict) -> list:
+    """
+    Selects the playbooks whose configured triggers (`playbook_triggers`) match an incident.
+
+    Parameters:
+        incident (dict): The incident document.
+
+    Returns:
+        list: The matching playbooks, highest priority first, as dicts with the 'playbook_id',
+        'priority' and matching 'rule'.
+
+    Raises:
+        TriggerError: If the configured triggers are malformed.
+
+    This function addresses the following technical requirements:
+    - **TR-IR-001-5** (Technical Specification/4.1 Incident Response Automation):
+      Ensure scalability to handle peak incident loads without degradation.
+    """
+    network = get_trigger_network(get_config().get('playbook_triggers', ()))
+    return [match.to_dict() for match in network.match(incident)]
+
+def run_playbook_batch(playbook_id: str, incidents: list, context: dict = None):
+    """
+    Executes the specified playbook for many incidents in one batch run.
+
+    The playbook, configuration and threat intelligence are loaded and the plan compiled once for
+    the whole batch; steps whose actions have bulk handlers are performed for many incidents per
+    call (e.g. one firewall request blocking every incident's IP) instead of once per incident.
+    Batch runs start at once rather than through the run scheduler, and are not journaled, so they
+    are not resumed after a crash.
+
+    Parameters:
+        playbook_id (str): The unique identifier of the playbook to execute.
+        incidents (list): The incident documents. The engine has no access to the incidents collection,
+            so callers resolve incident ids to their documents first.
+        context (dict, optional): Run context shared by every incident's run.
+
+    Returns:
+        Iterator[(incident, RunResult)]: Each incident, as given, with the result of its run as soon
+        as the run is over; or None if the playbook does not exist or is not compliant.
+
+    Raises:
+        ValueError: If an incident is not a document.
+
+    This function addresses the following technical requirements:
+    - **TR-DPG-004-2** (Technical Specification/4.4.4):
+      Incorporate real-time threat intelligence into playbook execution.
+    - **TR-DPG-004-3** (Technical Specification/4.4.4):
+      Validate playbooks against organizational policies and compliance standards before execution.
+    """
+    # Bare ids would reach the step handlers as incidents without any of their fields.
+    if not all(isinstance(incident, dict) for incident in incidents):
+        raise ValueError("Batch incidents must be incident documents, not incident ids.")
+
+    config = get_config()
+    playbook = Playbook.get_by_id(playbook_id)
+    if not playbook:
+        return None
+    try:
+        plan = compile_playbook(playbook, config)
+    except ValueError:
+        return None
+    playbook.integrate_threat_intelligence()
+
+    contexts = [dict(context or {}, incident=incident, config_version=config.version) for incident in incidents]
+    batch = BatchExecutor(_get_executor(config), config.get('bulk_step_batch_size', DEFAULT_BULK_SIZE),
+                          tracer=_get_tracer(config))
+    results = batch.run(plan, contexts, playbook_id=playbook_id, config_version=config.version)
+    return ((incidents[index], run) for index, run in results)
+
+def _run_request(request: RunRequest) -> RunResult:
+    """
+    Executes a run taken from the scheduler's queue, reporting its progress to the run registry.
+    """
+    record = _get_run_registry(get_config()).get(request.run_id)
+    return run_playbook(request.playbook_id, context=request.context, run_id=request.run_id,
+                        queue_wait=time.monotonic() - request.submitted_at,
+                        cancellation=record.cancellation if record is not None else None,
+                        listener=record.publish if record is not None else None)
+
+def schedule_playbook_run(playbook_id: str, context: dict = None, severity=None, tenant: str = None,
+                          run_id: str = None) -> RunRequest:
+    """
+    Queues a playbook run on the process-wide run scheduler.
+
+    Runs are taken by a bounded pool of run workers in order of incident severity, aged by waiting
+    time, with fair sharing across tenants, so a storm of low-severity runs cannot starve critical
+    containment playbooks.
+
+    Parameters:
+        playbook_id (str): The unique identifier of the playbook to execute.
+        context (dict, optional): Run context passed to step handlers, e.g. the incident.
+        severity (optional): Severity of the run; defaults to the incident's severity.
+        tenant (str, optional): Fairness key; defaults to the incident's tenant, then its id.
+        run_id (str, optional): Identifier of the run; generated when omitted.
+
+    Returns:
+        RunRequest: The queued run; its future resolves to the RunResult (or None, as run_playbook).
+
+    Raises:
+        SchedulerFullError: If the run queue is full.
+    """
+    config = get_config()
+    scheduler = get_run_scheduler(
+        _run_request,
+        workers=config.get('max_concurrent_runs', DEFAULT_RUN_WORKERS),
+        aging_seconds=config.get('run_priority_aging_seconds', DEFAULT_AGING_SECONDS),
+        max_queued=config.get('max_queued_runs', DEFAULT_MAX_QUEUED_RUNS),
+    )
+    return scheduler.submit(playbook_id, context=context, severity=severity, tenant=tenant, run_id=run_id)
+
+def start_playbook_run(playbook_id: str, context: dict = None, severity=None, tenant: str = None) -> RunRecord:
+    """
+    Queues a playbook run and returns at once; the run's status and progress events are tracked in
+    the run registry under its run id.
+
+    The run is also journaled as queued (when the run journal is enabled), so other engine
+    processes report it and, if this process dies before running it, start it.
+
+    Parameters:
+        playbook_id (str): The unique identifier of the playbook to execute.
+        context (dict, optional): Run context passed to step handlers, e.g. the incident.
+        severity (optional): Severity of the run; defaults to the incident's severity.
+        tenant (str, optional): Fairness key; defaults to the incident's tenant, then its id.
+
+    Returns:
+        RunRecord: The registered run; its future resolves to the RunResult (or None, as run_playbook).
+
+    Raises:
+        SchedulerFullError: If the run queue is full.
+    """
+    config = get_config()
+    registry = _get_run_registry(config)
+    journal = _get_journal(config)
+    record = registry.create(uuid.uuid4().hex, playbook_id)
+    if journal is not None:
+        journal.queue_run(record.run_id, playbook_id, context or {})
+    try:
+        request = schedule_playbook_run(playbook_id, context=context, severity=severity, tenant=tenant,
+                                        run_id=record.run_id)
+    except Exception:
+        registry.discard(record.run_id)
+        if journal is not None:
+            journal.finish_run(record.run_id, STATUS_FAILED)
+        raise
+    registry.bind(record, request.future)
+    if journal is not None:
+        request.future.add_done_callback(lambda _: _finish_unstarted_run(journal, record))
+    return record
+
+def _finish_unstarted_run(journal: RunJournal, record: RunRecord) -> None:
+    """
+    Journals the end of a queued run that never reached the executor (cancelled while queued, or
+    not executable), which would otherwise stay queued in the journal and be started elsewhere.
+    """
+    if journal.run_status(record.run_id) is None and journal.get_run(record.run_id) is None:
+        journal.finish_run(record.run_id, record.status)
+
+def get_run_status(run_id: str) -> dict:
+    """
+    Returns the status and progress of a run, or None if the run is unknown.
+
+    Runs not in this process's registry (queued or executed by another engine process, or by a
+    previous one) are looked up in the run journal. An unfinished run is reported as queued or
+    running, with the `owner` process executing it, while that process holds its lease, and as
+    'interrupted' once the lease expired, until it is resumed.
+    """
+    config = get_config()
+    record = _get_run_registry(config).get(run_id)
+    if record is not None:
+        return record.to_dict()
+    journal = _get_journal(config)
+    if journal is None:
+        return None
+    started = journal.get_run(run_id)
+    queued = journal.get_queued_run(run_id) if started is None else None
+    if started is None and queued is None:
+        return None
+    status = journal.run_status(run_id)
+    owner = journal.run_owner(run_id) if status is None else None
+    if status is None:
+        status = 'interrupted' if owner is None else RUN_RUNNING if started is not None else RUN_QUEUED
+    finished = journal.finished_steps(run_id) if started is not None else {}
+    return {
+        'run_id': run_id,
+        'playbook_id': (started or queued)['playbook_id'],
+        'status': status,
+        'owner': owner,
+        'progress': {'steps_finished': len(finished), 'steps_total': len(started['steps']) if started else None},
+    }
+
+def cancel_playbook_run(run_id: str) -> RunRecord:
+    """
+    Cancels a queued or running run. A running run stops at once: steps not yet started are
+    skipped, and in-flight steps are abandoned and handed the cancellation in their context.
+
+    Only the engine process that queued the run (its `owner` in get_run_status) can cancel it.
+
+    Returns:
+        RunRecord: The run, or None if it is not in this process's run registry.
+    """
+    record = _get_run_registry(get_config()).get(run_id)
+    if record is not None:
+        record.cancel()
+    return record
+
+def get_run_record(run_id: str) -> RunRecord:
+    """
+    Returns the registry record of an asynchronous run, e.g. to follow its progress events, or None
+    if the run is not in this process's registry (progress events are not shared between processes).
+    """
+    return _get_run_registry(get_config()).get(run_id)
+
+def resume_interrupted_runs() -> list:
+    """
+    Resumes the playbook runs that a crash of the engine left unfinished.
+
+    Only runs whose lease in the run journal has expired are resumed, so runs still executing in
+    another engine process sharing the journal are left to it; the claimed runs are leased to this
+    process. Each run is restarted from its last checkpoint in the run journal with the plan and
+    context it started with: steps that finished are not executed again, and steps that were in
+    flight are retried with their original idempotency keys. Resumed runs report the configuration
+    version they started with.
+
+    Returns:
+        list: The RunResult of each resumed run.
+    """
+    config = get_config()
+    journal = _get_journal(config)
+    if journal is None:
+        return []
+
+    executor = _get_executor(config)
+    cache = get_plan_cache(config.get('plan_cache_size', DEFAULT_PLAN_CACHE_SIZE))
+    resumed = []
+    for run_id in journal.claim_interrupted_runs():
+        record = journal.get_run(run_id)
+        if record is None:
+            # Queued by a process that died before starting it: start it now.
+            queued = journal.get_queued_run(run_id)
+            run = run_playbook(queued['playbook_id'], context=queued['context'], run_id=run_id)
+            if run is None:
+                if journal.run_status(run_id) is None:
+                    journal.finish_run(run_id, STATUS_FAILED)
+            else:
+                resumed.append(run)
+            continue
+        try:
+            # The plan was validated against organizational policies when the run started.
+            plan = cache.get_or_compile(record['steps'], config)
+            resumed.append(executor.run(plan, context=record['context'], playbook_id=record['playbook_id'],
+                                        run_id=run_id, journal=journal, tracer=_get_tracer(config),
+                                        trace_attributes={'run.resumed': True}))
+        except Exception as e:
+            # Log the exception (logging implementation assumed) and leave the run for the next restart.
+            # logger.error(f"Error resuming playbook run {run_id}: {str(e)}")
+            continue
+    return resumed
+
+def regenerate_playbook(playbook_id: str) -> list:
+    """
+    Regenerates a playbook after a change of the threat intelligence or policies it depends on: its
+    indicators are matched against the current threat intelligence, it is revalidated against the
+    current compliance rules and, if its content changed, a new version is recorded.
+
+    Parameters:
+        playbook_id (str): The unique identifier of the playbook.
+
+    Returns:
+        list: The playbook's steps, or None if it no longer exists.
+
+    Raises:
+        PlaybookComplianceError: If the playbook no longer complies with organizational policies.
+        ValueError: If the playbook could not be saved.
+
+    This function addresses the following technical requirements:
+    - **TR-DPG-004-2** (Technical Specification/4.4.4):
+      Incorporate real-time threat intelligence into playbook creation.
+    - **TR-DPG-004-3** (Technical Specification/4.4.4):
+      Validate generated playbooks against organizational policies and compliance standards.
+    """
+    playbook = Playbook.get_by_id(playbook_id)
+    if not playbook:
+        return None
+    playbook.integrate_threat_intelligence()
+    compile_playbook(playbook)
+    playbook.enable_version_control(message='Auto-update after threat intelligence or policy changes')
+    if not playbook.save():
+        raise ValueError(f"Playbook '{playbook_id}' could not be saved.")
+    return playbook.steps
+
+def start_run_recovery() -> bool:
+    """
+    Resumes interrupted runs now and then every `run_lease_seconds`, so the runs of an engine
+    process that died while others keep serving are picked up once their leases expire.
+
+    Returns:
+        bool: True if run journaling is enabled.
+    """
+    config = get_config()
+    journal = _get_journal(config)
+    if journal is None:
+        return False
+    interval = float(config.get('run_lease_seconds', DEFAULT_RUN_LEASE_SECONDS))
+
+    def recover():
+        while True:
+            try:
+                resume_interrupted_runs()
+            except Exception:
+                logger.exception('Resuming interrupted playbook runs failed')
+            time.sleep(interval)
+
+    threading.Thread(target=recover, name='playbook-resume', daemon=True).start()
+    return True
+
+def start_playbook_auto_update() -> bool:
+    """
+    Starts regenerating, every `auto_update_interval_minutes`, the playbooks affected by the threat
+    intelligence and policy changes since the previous cycle.
+
+    Returns:
+        bool: True if auto-updates are enabled.
+    """
+    config = get_config()
+    updater = _get_auto_updater(config)
+    if updater is None:
         return False
+    updater.start(float(config.get('auto_update_interval_minutes', 15)) * 60)
+    return True
+
+def run_playbook_auto_update() -> dict:
+    """
+    Runs an auto-update cycle now.
+
+    Returns:
+        dict: The cycle report (delta, playbooks regenerated, failed and skipped), or None if
+        auto-updates are disabled.
+    """
+    updater = _get_auto_updater(get_config())
+    return updater.run_cycle() if updater is not None else None
+
+def get_playbook_auto_update_report() -> dict:
+    """
+    Returns the report of the latest auto-update cycle, or None if none ran or auto-updates are disabled.
+    """
+    updater = _get_auto_updater(get_config())
+    return updater.last_report if updater is not None else None
+
+def get_playbook_versions(playbook_id: str, limit: int = None) -> list:
+    """
+    Returns the recorded versions of a playbook, newest first, with their audit information.
+
+    This function addresses the following technical requirements:
+    - **TR-DPG-004-5** (Technical Specification/4.4.4):
+      Ensure version control and audit logging for all playbook modifications.
+    """
+    store = _get_version_store(get_config())
+    return store.history(playbook_id, limit) if store is not None else []
+
+def get_playbook_version(version: str) -> dict:
+    """
+    Returns the name and steps of a playbook version, looked up by its content hash.
+
+    Raises:
+        VersionNotFoundError: If the version is not in the store.
+    """
+    store = _get_version_store(get_config())
+    if store is None:
+        raise VersionNotFoundError(version)
+    return store.get(version)
+
+def diff_playbook_versions(old_version: str, new_version: str) -> dict:
+    """
+    Returns the differences between two playbook versions: changed fields and the added, removed
+    and changed steps, matched by step number.
+
+    Raises:
+        VersionNotFoundError: If either version is not in the store.
+    """
+    store = _get_version_store(get_config())
+    if store is None:
+        raise VersionNotFoundError(old_version)
+    return store.diff(old_version, new_version)
+
+def import_xsoar_playbooks(stream) -> dict:
+    """
+    Imports the playbooks of an XSOAR YAML bundle, read as a stream. Playbooks imported before are
+    updated, and only the playbooks whose content changed since the previous import are converted.
+
+    Parameters:
+        stream (TextIO): The YAML bundle.
+
+    Returns:
+        dict: Counts of 'unchanged', 'imported' and 'failed' playbooks, and the 'errors'.
+
+    This function addresses the following technical requirements:
+    - **TR-DPG-004-1** (Technical Specification/4.4.4):
+      Develop AI algorithms for generating standardized playbooks compatible with XSOAR.
+    """
+    config = get_config()
+
+    def apply(converted: dict, playbook_id: str):
+        if playbook_id is not None and Playbook.get_by_id(playbook_id) is not None:
+            if not update_playbook(playbook_id, converted['steps']):
+                raise ValueError(f"Playbook '{converted['name']}' could not be updated.")
+            return playbook_id
+        return create_playbook(converted['name'], converted['steps']).id
+
+    sync = get_xsoar_sync(config.get('xsoar_sync_state_path', 'data/xsoar_sync.db'))
+    return sync.sync(stream, apply)
 
-    # Return True if the execution is successful; otherwise, return False.
-    return execution_result
\ No newline at end of file
+def export_xsoar_playbooks(playbook_ids: list):
+    """
+    Exports playbooks as an XSOAR YAML bundle, one playbook at a time; unknown ids are skipped.
+
+    Returns:
+        Iterator[str]: The YAML document of each playbook found.
+
+    This function addresses the following technical requirements:
+    - **TR-DPG-004-1** (Technical Specification/4.4.4):
+      Develop AI algorithms for generating standardized playbooks compatible with XSOAR.
+    """
+    def playbooks():
+        for playbook_id in playbook_ids:
+            playbook = Playbook.get_by_id(playbook_id)
+            if playbook is not None:
+                yield to_xsoar(playbook.name, playbook.steps, xsoar_id=str(playbook.id))
+
+    return iter_bundle(playbooks())
+
+def get_run_timeline(run_id: str) -> dict:
+    """
+    Returns the timeline of a traced run: its steps ordered by start time with their offsets,
+    durations, queue waits and attempts, or None if the run's spans are not collected.
+    """
+    tracer = _get_tracer(get_config())
+    return tracer.timeline(run_id) if tracer is not None else None
+
+def get_run_trace(run_id: str) -> dict:
+    """
+    Returns the spans of a traced run as an OTLP/JSON export request, or None if the run's spans
+    are not collected.
+    """
+    tracer = _get_tracer(get_config())
+    if tracer is None or not tracer.spans(run_id):
+        return None
+    return tracer.to_otlp(run_id)
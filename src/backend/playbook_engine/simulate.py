@@ -0,0 +1,204 @@
+"""
+Dry-run simulation of playbooks: estimated duration, critical path and external calls.
+
+A simulation walks the compiled plan without calling any handler. Each step's behaviour is drawn
+from the execution history kept by the run journal: the recorded (duration, attempts, outcome) of
+the same step of the same playbook in past runs or, when it has none, of steps with the same
+action in any playbook. Drawing whole records keeps the durations, retries and outcomes of a step
+consistent with each other, and the share of skipped and failed records reflects how often the step
+ran. Steps without any history are assumed to succeed at the first attempt in a default time.
+
+The plan is simulated many times (Monte Carlo) with the engine's scheduling semantics: a step
+starts when its dependencies have finished, a skipped step counts as finished, and a failure
+without `on_failure: continue` stops the run, so the steps that would start after it are not run.
+Step conditions that can be decided from the supplied context (e.g. on incident fields) are
+evaluated; the others follow the history. Contention for workers and integration concurrency caps
+is not modelled, so durations are those of an idle engine.
+
+Requirements Addressed:
+- Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+  - TR-DPG-004-3: Validate generated playbooks against organizational policies and compliance standards.
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import random  # Draws step records. (builtin)
+import statistics  # Median step durations. (builtin)
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Internal dependencies
+from .dag import (  # Plans and their critical path.
+    ON_FAILURE_CONTINUE,
+    STATUS_FAILED,
+    STATUS_SKIPPED,
+    STATUS_SUCCEEDED,
+    CompiledPlan,
+    StepResult,
+    critical_path,
+)
+from .expressions import ExpressionError  # Raised by conditions that cannot be decided from the context.
+from .journal import RunJournal  # Execution history of past runs.
+
+# Default number of simulated runs.
+DEFAULT_SIMULATION_ITERATIONS = 1000
+
+# Default number of recent records of a step drawn from.
+DEFAULT_HISTORY_SAMPLES = 200
+
+# Assumed duration of steps without history.
+DEFAULT_STEP_SECONDS = 1.0
+
+# A history record: (duration in seconds including retries, attempts, status).
+StepRecord = Tuple[float, int, str]
+
+HISTORY_STEP = 'step'
+HISTORY_ACTION = 'action'
+HISTORY_NONE = 'none'
+
+
+class _UnknownResults(dict):
+    """
+    Stands for the results of a run not yet executed: any use makes a condition undecided.
+    """
+
+    def _unknown(self, *args):
+        raise LookupError('step results are not known before the run')
+
+    __contains__ = __getitem__ = get = keys = values = items = __iter__ = __len__ = _unknown
+
+
+def load_history(plan: CompiledPlan, journal: Optional[RunJournal], playbook_id: Any,
+                 limit: int = DEFAULT_HISTORY_SAMPLES) -> Dict[Any, Tuple[str, List[StepRecord]]]:
+    """
+    Returns the history of every step of a plan: where it comes from ('step', 'action' or 'none')
+    and the records.
+    """
+    history = {}
+    by_action: Dict[str, List[StepRecord]] = {}
+    for number, step in plan.steps.items():
+        records = journal.step_history(playbook_id, number, limit) if journal is not None else []
+        if records:
+            history[number] = (HISTORY_STEP, [tuple(record) for record in records])
+            continue
+        if step.action not in by_action:
+            by_action[step.action] = ([tuple(record) for record in journal.action_history(step.action, limit)]
+                                      if journal is not None else [])
+        records = by_action[step.action]
+        history[number] = (HISTORY_ACTION, records) if records else (HISTORY_NONE, [])
+    return history
+
+
+def _percentile(values: Sequence[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def simulate_plan(plan: CompiledPlan, history: Dict[Any, Tuple[str, List[StepRecord]]],
+                  context: Optional[dict] = None, iterations: int = DEFAULT_SIMULATION_ITERATIONS,
+                  default_step_seconds: float = DEFAULT_STEP_SECONDS, seed: Optional[int] = None) -> dict:
+    """
+    Simulates runs of a plan and summarizes their duration, critical path and external calls.
+
+    Parameters:
+        plan (CompiledPlan): The plan to simulate.
+        history (dict): The history of each step, as returned by load_history.
+        context (dict, optional): Run context used to decide step conditions, e.g. {'incident': {...}}.
+        iterations (int): Number of simulated runs.
+        default_step_seconds (float): Assumed duration of steps without history.
+        seed (int, optional): Seed of the random draws, for reproducible reports.
+
+    Returns:
+        dict: The estimated duration percentiles, success rate, critical path, expected calls per
+        integration and per-step estimates.
+    """
+    rng = random.Random(seed)
+    iterations = max(1, int(iterations))
+    names = dict(context or {}, results=_UnknownResults())
+
+    # Decide the conditions that do not depend on step results once; None means undecided.
+    decided: Dict[Any, Optional[bool]] = {}
+    for number, step in plan.steps.items():
+        if step.condition is None:
+            decided[number] = True
+            continue
+        try:
+            decided[number] = bool(step.condition.evaluate(names))
+        except ExpressionError:
+            decided[number] = None
+
+    # Records drawn when the step runs: if its condition is known to be true, skips are not drawn.
+    pools: Dict[Any, List[StepRecord]] = {}
+    for number in plan.order:
+        records = history.get(number, (HISTORY_NONE, []))[1]
+        if decided[number] is True and plan.steps[number].condition is not None:
+            records = [record for record in records if record[2] != STATUS_SKIPPED]
+        pools[number] = records or [(default_step_seconds, 1, STATUS_SUCCEEDED)]
+
+    durations = []
+    succeeded_runs = 0
+    calls: Dict[str, float] = {}
+    ran = {number: 0 for number in plan.order}
+    step_time = {number: 0.0 for number in plan.order}
+    for _ in range(iterations):
+        finished: Dict[Any, float] = {}
+        stop_at = None
+        run_failed = False
+        for number in plan.order:
+            step = plan.steps[number]
+            start = max((finished[dependency] for dependency in step.depends_on if dependency in finished),
+                        default=0.0)
+            if any(dependency not in finished for dependency in step.depends_on) or \
+                    (stop_at is not None and start >= stop_at):
+                continue  # never started: a dependency was not run, or the run had stopped
+            if decided[number] is False:
+                finished[number] = start
+                continue
+            duration, attempts, status = rng.choice(pools[number])
+            finished[number] = start + duration
+            if status != STATUS_SKIPPED:
+                ran[number] += 1
+                step_time[number] += duration
+            if step.integration and attempts:
+                calls[step.integration] = calls.get(step.integration, 0) + attempts
+            if status == STATUS_FAILED and step.on_failure != ON_FAILURE_CONTINUE:
+                run_failed = True
+                stop_at = finished[number] if stop_at is None else min(stop_at, finished[number])
+        durations.append(max(finished.values(), default=0.0))
+        succeeded_runs += not run_failed
+
+    # Critical path of a typical run: the median duration of each step when it runs.
+    typical = {}
+    for number in plan.order:
+        ran_durations = [record[0] for record in pools[number] if record[2] != STATUS_SKIPPED]
+        median = statistics.median(ran_durations) if ran_durations and decided[number] is not False else 0.0
+        typical[number] = StepResult(number, plan.steps[number].action, STATUS_SUCCEEDED, finished_at=median)
+    path, path_duration = critical_path(plan, typical)
+
+    return {
+        'iterations': iterations,
+        'duration_seconds': {
+            'mean': round(sum(durations) / iterations, 6),
+            'p50': round(_percentile(durations, 0.5), 6),
+            'p90': round(_percentile(durations, 0.9), 6),
+            'p99': round(_percentile(durations, 0.99), 6),
+        },
+        'success_rate': round(succeeded_runs / iterations, 4),
+        'critical_path': path,
+        'critical_path_duration': round(path_duration, 6),
+        'external_calls': {integration: round(count / iterations, 3) for integration, count in sorted(calls.items())},
+        'steps': [
+            {
+                'step_number': number,
+                'action': plan.steps[number].action,
+                'integration': plan.steps[number].integration,
+                'history': history.get(number, (HISTORY_NONE, []))[0],
+                'samples': len(history.get(number, (HISTORY_NONE, []))[1]),
+                'run_probability': round(ran[number] / iterations, 4),
+                'mean_duration': round(step_time[number] / ran[number], 6) if ran[number] else 0.0,
+                'typical_duration': round(typical[number].duration, 6),
+            }
+            for number in plan.order
+        ],
+    }
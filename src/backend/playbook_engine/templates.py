@@ -0,0 +1,198 @@
+"""
+Compiled templates for step parameters.
+
+String parameters may embed expressions in double braces, e.g. `'Blocked {{ incident.source_ip }}'`
+or `'{{ results[2]['verdict'] }}'`. Template expressions use the safe syntax of step conditions (see
+expressions.py), with `name.key` accepted as a spelling of `name['key']`, and are evaluated against
+the run context: `incident`, `results` (the results of completed steps, by step number),
+`playbook_id`, `run_id` and any other context entries. A parameter that is a single template keeps
+the type of its value (a list stays a list); otherwise the rendered values are joined as text.
+
+Templates are parsed and compiled to bytecode once, when the playbook plan is compiled, and plans
+are cached per playbook version, so rendering a step's parameters during a run only evaluates
+code objects and rebuilds the templated parts of the parameters; parameters without templates are
+passed through as they are.
+
+Requirements Addressed:
+- Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+  - Automate incident response using AI-driven workflows.
+"""
+
+import functools  # Caches compiled templates by source. (builtin)
+import json  # Renders containers embedded in text. (builtin)
+from typing import Any, Callable, Iterator, List, Mapping, Optional, Tuple, Union
+
+# Internal dependencies
+from .expressions import CompiledExpression, ExpressionError  # Compiles template expressions.
+
+# Number of compiled templates cached by source text, shared across playbooks.
+DEFAULT_TEMPLATE_CACHE_SIZE = 4096
+
+_OPENING_BRACKETS = '([{'
+_CLOSING_BRACKETS = ')]}'
+
+Renderer = Callable[[Mapping[str, Any]], Any]
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def _scan_expressions(source: str) -> Iterator[Tuple[int, int, str]]:
+    """
+    Yields the (start, end, expression) of each `{{ ... }}` in a template.
+
+    The closing `}}` is the first one outside string literals and brackets, so expressions may contain
+    dict literals or strings with braces (`{{ {'a': {'b': 1}}['a'] }}`). An unterminated `{{` is
+    left as literal text.
+    """
+    position = 0
+    while True:
+        start = source.find('{{', position)
+        if start < 0:
+            return
+        index, depth, quote = start + 2, 0, None
+        while index < len(source):
+            character = source[index]
+            if quote:
+                if character == '\\':
+                    index += 1
+                elif character == quote:
+                    quote = None
+            elif depth == 0 and source.startswith('}}', index):
+                break
+            elif character in '\'"':
+                quote = character
+            elif character in _OPENING_BRACKETS:
+                depth += 1
+            elif character in _CLOSING_BRACKETS:
+                depth -= 1
+            index += 1
+        else:
+            return
+        yield start, index + 2, source[start + 2:index]
+        position = index + 2
+
+
+class CompiledTemplate:
+    """
+    A template string split into literal text and compiled expressions.
+    """
+
+    __slots__ = ('source', '_parts', '_single')
+
+    def __init__(self, source: str):
+        """
+        Parses the template and compiles its expressions.
+
+        Raises:
+            ExpressionError: If an expression is invalid or uses disallowed syntax.
+        """
+        self.source = source
+        parts: List[Union[str, CompiledExpression]] = []
+        position = 0
+        for start, end, expression in _scan_expressions(source):
+            if start > position:
+                parts.append(source[position:start])
+            parts.append(CompiledExpression(expression, dotted=True))
+            position = end
+        if position < len(source):
+            parts.append(source[position:])
+        self._parts = tuple(parts)
+        self._single = parts[0] if len(parts) == 1 and isinstance(parts[0], CompiledExpression) else None
+
+    @property
+    def is_static(self) -> bool:
+        """
+        True if the template has no expressions.
+        """
+        return all(isinstance(part, str) for part in self._parts)
+
+    def render(self, names: Mapping[str, Any]) -> Any:
+        """
+        Evaluates the template with the given names.
+
+        Raises:
+            ExpressionError: If an expression fails, e.g. on a missing incident field.
+        """
+        if self._single is not None:
+            return self._single.evaluate(names)
+        return ''.join(part if isinstance(part, str) else _text(part.evaluate(names)) for part in self._parts)
+
+    def __repr__(self) -> str:
+        return f'CompiledTemplate({self.source!r})'
+
+
+@functools.lru_cache(maxsize=DEFAULT_TEMPLATE_CACHE_SIZE)
+def compile_template(source: str) -> CompiledTemplate:
+    """
+    Returns the compiled template of a string, cached by source text.
+
+    Raises:
+        ExpressionError: If an expression is invalid or uses disallowed syntax.
+    """
+    return CompiledTemplate(source)
+
+
+def _compile_value(value: Any) -> Optional[Renderer]:
+    """
+    Returns a function rendering a parameter value, or None if the value contains no templates.
+    """
+    if isinstance(value, str):
+        if '{{' not in value:
+            return None
+        template = compile_template(value)
+        return None if template.is_static else template.render
+    if isinstance(value, Mapping):
+        entries = [(key, item, _compile_value(item)) for key, item in value.items()]
+        if all(render is None for _, _, render in entries):
+            return None
+        return lambda names: {key: item if render is None else render(names) for key, item, render in entries}
+    if isinstance(value, (list, tuple)):
+        entries = [(item, _compile_value(item)) for item in value]
+        if all(render is None for _, render in entries):
+            return None
+        return lambda names: [item if render is None else render(names) for item, render in entries]
+    return None
+
+
+class ParameterTemplate:
+    """
+    Step parameters with their templates compiled, rendered for each run.
+    """
+
+    __slots__ = ('parameters', '_render')
+
+    def __init__(self, parameters: dict):
+        """
+        Compiles the templates found anywhere in the parameters.
+
+        Raises:
+            ExpressionError: If a template expression is invalid.
+        """
+        self.parameters = parameters
+        self._render = _compile_value(parameters)
+
+    @property
+    def templated(self) -> bool:
+        """
+        True if any parameter contains a template.
+        """
+        return self._render is not None
+
+    def render(self, names: Mapping[str, Any]) -> dict:
+        """
+        Returns the parameters with their templates evaluated against the run context; the
+        parameters themselves when they have no templates.
+
+        Raises:
+            ExpressionError: If a template expression fails.
+        """
+        if self._render is None:
+            return self.parameters
+        return self._render(names if type(names) is dict else dict(names))
+
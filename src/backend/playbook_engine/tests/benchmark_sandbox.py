@@ -0,0 +1,119 @@
+"""
+Benchmark for sandboxed step handlers.
+
+Runs a chain of short I/O-bound steps (an enrichment lookup each) alone, then while another run
+executes CPU-bound steps (decoding and scanning a large payload) concurrently, first on the
+executor's threads and then in the process-pool sandbox. On threads the CPU-bound steps hold the
+GIL and delay every I/O step; in the sandbox they run on other cores and the I/O-bound run keeps
+its pace. The large payloads reach the workers through shared memory.
+
+Run with:
+    python -m src.backend.playbook_engine.tests.benchmark_sandbox --cpu-steps 8 --payload-kb 512
+
+Requirements Addressed:
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import argparse  # Parses the benchmark options. (builtin)
+import base64  # Encodes the payloads decoded by the CPU-bound steps. (builtin)
+import os  # Generates the payloads. (builtin)
+import threading  # Runs the CPU-bound playbook next to the I/O-bound one. (builtin)
+import time  # Simulates lookups and measures the runs. (builtin)
+
+from src.backend.playbook_engine.dag import DAGExecutor, compile_plan
+from src.backend.playbook_engine.handlers import register_step_handler, unregister_step_handler
+from src.backend.playbook_engine.sandbox import SandboxPool
+
+
+def decode_payload(parameters, context):
+    """
+    CPU-bound step: decodes a base64 payload and counts its byte values in pure Python.
+    """
+    counts = [0] * 256
+    for byte in base64.b64decode(parameters['payload']):
+        counts[byte] += 1
+    return max(range(256), key=counts.__getitem__)
+
+
+def lookup(parameters, context):
+    """
+    I/O-bound step: waits on a simulated enrichment service.
+    """
+    time.sleep(parameters['latency'])
+    return parameters['latency']
+
+
+def timed_run(executor: DAGExecutor, plan, durations: list) -> None:
+    start = time.perf_counter()
+    run = executor.run(plan)
+    if not run.succeeded:
+        raise RuntimeError(f'Benchmark run failed: {run.to_dict()}')
+    durations.append(time.perf_counter() - start)
+
+
+def measure(executor: DAGExecutor, io_plan, cpu_plan=None) -> tuple:
+    """
+    Returns the duration of the I/O-bound run and of the CPU-bound run executed next to it.
+    """
+    io_durations, cpu_durations = [], []
+    worker = None
+    if cpu_plan is not None:
+        worker = threading.Thread(target=timed_run, args=(executor, cpu_plan, cpu_durations))
+        worker.start()
+        time.sleep(0.05)  # let the CPU-bound steps start first
+    timed_run(executor, io_plan, io_durations)
+    if worker is not None:
+        worker.join()
+    return io_durations[0], cpu_durations[0] if cpu_durations else None
+
+
+def main() -> None:
+    """
+    Runs the benchmark and prints the durations of both runs with and without the sandbox.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--cpu-steps', type=int, default=8, help='concurrent CPU-bound steps')
+    parser.add_argument('--payload-kb', type=int, default=512, help='size of each decoded payload')
+    parser.add_argument('--io-steps', type=int, default=20, help='sequential I/O-bound steps')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='latency of each I/O-bound step')
+    parser.add_argument('--start-method', default=None, help="start method of the sandbox's workers")
+    args = parser.parse_args()
+
+    payload = base64.b64encode(os.urandom(args.payload_kb * 1024)).decode('ascii')
+    io_plan = compile_plan([{'step_number': n, 'action': 'bench_lookup', 'parameters': {'latency': args.latency_ms / 1000}}
+                            for n in range(1, args.io_steps + 1)])
+    cpu_steps = [{'step_number': n, 'action': 'bench_decode', 'parameters': {'payload': payload}, 'depends_on': []}
+                 for n in range(1, args.cpu_steps + 1)]
+
+    sandbox = SandboxPool(cpu_seconds=None, memory_mb=None, start_method=args.start_method)
+    executor = DAGExecutor(max_workers=args.cpu_steps + 2, sandbox=sandbox)
+    register_step_handler('bench_lookup', lookup)
+    try:
+        idle, _ = measure(executor, io_plan)
+
+        register_step_handler('bench_decode', decode_payload)
+        threaded_io, threaded_cpu = measure(executor, io_plan, compile_plan(cpu_steps))
+
+        register_step_handler('bench_decode', decode_payload, sandbox=True)
+        sandbox.warm()
+        sandboxed_io, sandboxed_cpu = measure(executor, io_plan, compile_plan(cpu_steps))
+        stats = sandbox.stats()
+    finally:
+        unregister_step_handler('bench_lookup')
+        unregister_step_handler('bench_decode')
+        executor.shutdown()
+        sandbox.shutdown()
+
+    print(f'I/O run ({args.io_steps} x {args.latency_ms:g} ms): {idle * 1000:.1f} ms alone')
+    print(f'Threaded CPU steps:   I/O run {threaded_io * 1000:.1f} ms, '
+          f'{args.cpu_steps} CPU steps {threaded_cpu * 1000:.1f} ms')
+    print(f'Sandboxed CPU steps:  I/O run {sandboxed_io * 1000:.1f} ms, '
+          f'{args.cpu_steps} CPU steps {sandboxed_cpu * 1000:.1f} ms ({sandbox.max_workers} workers, '
+          f'{stats["shared_bytes"] // 1024} KiB through shared memory)')
+
+
+if __name__ == '__main__':
+    # Sandboxed handlers are sent to workers by module name, so run the importable module's main().
+    from src.backend.playbook_engine.tests import benchmark_sandbox
+    benchmark_sandbox.main()
@@ -0,0 +1,137 @@
+"""
+Benchmark for selecting the playbooks that apply to an incident.
+
+Generates triggers for thousands of playbooks over a realistic set of incident fields (type,
+severity, source, tags, assets) and matches synthetic incidents against them, comparing evaluating
+every trigger in turn with the compiled trigger network. Both must select the same playbooks.
+
+Run with:
+    python -m src.backend.playbook_engine.tests.benchmark_triggers --playbooks 5000 --incidents 2000
+
+Requirements Addressed:
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import argparse  # Parses the benchmark options. (builtin)
+import random  # Generates triggers and incidents. (builtin)
+import re  # Regular expression tests of the baseline. (builtin)
+import time  # Measures the matching time. (builtin)
+
+from src.backend.playbook_engine.triggers import TriggerNetwork
+
+TYPES = ['phishing', 'malware', 'ransomware', 'brute_force', 'data_exfiltration', 'insider', 'ddos', 'recon'] + \
+    [f'custom_{n}' for n in range(40)]
+SOURCES = ['proofpoint', 'mimecast', 'crowdstrike', 'sentinelone', 'okta', 'azure_ad', 'palo_alto', 'zscaler']
+TAGS = ['vip', 'pci', 'hipaa', 'prod', 'dev', 'external', 'contractor', 'executive'] + [f'tag_{n}' for n in range(60)]
+DEPARTMENTS = ['finance', 'legal', 'engineering', 'sales', 'hr', 'it', 'support']
+
+
+def build_triggers(count: int, rng: random.Random) -> list:
+    """
+    Builds the triggers of count playbooks, each with one to four tests.
+    """
+    triggers = []
+    for index in range(count):
+        when = {'type': rng.choice(TYPES)}
+        for _ in range(rng.randint(0, 3)):
+            kind = rng.random()
+            if kind < 0.3:
+                when['severity'] = {rng.choice(['gte', 'lt']): rng.randint(1, 5)}
+            elif kind < 0.55:
+                when['source.vendor'] = {'in': rng.sample(SOURCES, 2)}
+            elif kind < 0.8:
+                when['tags'] = {'contains': rng.choice(TAGS)}
+            elif kind < 0.95:
+                when['user.department'] = rng.choice(DEPARTMENTS)
+            else:
+                when['host'] = {'matches': f'^srv-{rng.randint(0, 9)}'}
+        triggers.append({'playbook_id': f'playbook-{index}', 'priority': rng.randint(0, 9), 'when': when})
+    return triggers
+
+
+def build_incident(rng: random.Random) -> dict:
+    """
+    Builds a synthetic incident.
+    """
+    return {
+        'type': rng.choice(TYPES),
+        'severity': rng.randint(1, 5),
+        'source': {'vendor': rng.choice(SOURCES)},
+        'tags': rng.sample(TAGS, 3),
+        'user': {'department': rng.choice(DEPARTMENTS)},
+        'host': f'srv-{rng.randint(0, 99)}',
+    }
+
+
+def _test(value, operator, operand) -> bool:
+    if operator == 'eq':
+        return value == operand
+    if operator == 'in':
+        return value in operand
+    if operator == 'contains':
+        return isinstance(value, list) and operand in value
+    if operator == 'gte':
+        return isinstance(value, int) and value >= operand
+    if operator == 'lt':
+        return isinstance(value, int) and value < operand
+    return isinstance(value, str) and re.search(operand, value) is not None
+
+
+def match_naive(triggers: list, incident: dict) -> list:
+    """
+    Evaluates every trigger against the incident, as a baseline.
+    """
+    matches = []
+    for trigger in triggers:
+        for field, test in trigger['when'].items():
+            value = incident
+            for key in field.split('.'):
+                value = value.get(key) if isinstance(value, dict) else None
+            operator, operand = next(iter(test.items())) if isinstance(test, dict) else ('eq', test)
+            if value is None or not _test(value, operator, operand):
+                break
+        else:
+            matches.append((trigger['playbook_id'], trigger['priority']))
+    return sorted(matches, key=lambda match: (-match[1], match[0]))
+
+
+def main() -> None:
+    """
+    Runs the benchmark and prints the matching time per incident.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--playbooks', type=int, default=5000, help='playbooks with a trigger')
+    parser.add_argument('--incidents', type=int, default=2000, help='incidents matched')
+    parser.add_argument('--seed', type=int, default=7, help='seed of the generated data')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    triggers = build_triggers(args.playbooks, rng)
+    incidents = [build_incident(rng) for _ in range(args.incidents)]
+
+    start = time.perf_counter()
+    network = TriggerNetwork(triggers)
+    compile_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    naive = [match_naive(triggers, incident) for incident in incidents]
+    naive_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [[(m.playbook_id, m.priority) for m in network.match(incident)] for incident in incidents]
+    compiled_elapsed = time.perf_counter() - start
+
+    assert naive == compiled, 'the trigger network must select the same playbooks as evaluating every trigger'
+    per_incident = 1e6 / args.incidents
+    matched = sum(map(len, compiled)) / args.incidents
+    print(f'Playbooks:            {args.playbooks} ({network.node_count} distinct tests)')
+    print(f'Compile:              {compile_elapsed * 1000:.1f} ms')
+    print(f'Matches per incident: {matched:.1f}')
+    print(f'Every trigger:        {naive_elapsed * per_incident:.1f} us/incident')
+    print(f'Trigger network:      {compiled_elapsed * per_incident:.1f} us/incident')
+    print(f'Speed-up:             {naive_elapsed / compiled_elapsed:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,34 @@
 import unittest  # Built-in module for constructing and running tests. Version: Built-in.
 import datetime  # Built-in module for handling date and time operations.
+import threading  # Built-in module used to observe concurrent step execution.
+import time  # Built-in module used to simulate slow steps.
+import json  # Built-in module used to write configuration files.
+import os  # Built-in module used to manage temporary configuration files.
+import tempfile  # Built-in module used to create temporary configuration files.
+import shutil  # Built-in module used to remove temporary directories.
+import io  # Built-in module used to stream XSOAR bundles.
+from concurrent.futures import Future  # Built-in module used to stand in for scheduled runs.
 from src.backend.playbook_engine.models import Playbook  # Internal module: Represents a playbook entity with attributes and methods to interact with playbook data.
+from src.backend.playbook_engine.dag import CancellationToken, DAGExecutor, PlaybookDAGError, compile_plan, validate_steps  # Internal module: Dependency-graph execution of playbook steps.
+from src.backend.playbook_engine.plan_cache import PlanCache, PlaybookComplianceError  # Internal module: Compiled plan cache.
+from src.backend.playbook_engine.journal import RunJournal, idempotency_key  # Internal module: Durable run journal.
+from src.backend.playbook_engine.policies import CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError, IntegrationLimiter, StepPolicy  # Internal module: Step execution policies.
+from src.backend.playbook_engine.scheduler import RunScheduler  # Internal module: Playbook run scheduler.
+from src.backend.playbook_engine.config import ConfigManager  # Internal module: Configuration snapshots.
+from src.backend.playbook_engine.versions import PlaybookVersionStore, VersionNotFoundError  # Internal module: Playbook version store.
+from src.backend.playbook_engine.compliance import ComplianceRuleError, ComplianceRuleSet  # Internal module: Compliance rule engine.
+from src.backend.playbook_engine.threat_intel import BloomFilter, ThreatIntelStore  # Internal module: Local threat intelligence.
+from src.backend.playbook_engine.batch import BatchExecutor  # Internal module: Batch runs across incidents.
+from src.backend.playbook_engine.handlers import register_step_handler, unregister_step_handler  # Internal module: Step handler registry.
+from src.backend.playbook_engine.expressions import MAX_REPEAT_LENGTH, CompiledExpression, ExpressionError  # Internal module: Safe expressions.
+from src.backend.playbook_engine.simulate import load_history, simulate_plan  # Internal module: Playbook dry runs.
+from src.backend.playbook_engine.tracing import TraceCollector, render_timeline  # Internal module: Run tracing.
+from src.backend.playbook_engine.templates import ParameterTemplate  # Internal module: Step parameter templates.
+from src.backend.playbook_engine.auto_update import PlaybookAutoUpdater, PlaybookDependencyIndex, playbook_dependencies  # Internal module: Playbook auto-updates.
+from src.backend.playbook_engine.runs import RunRegistry  # Internal module: Asynchronous runs.
+from src.backend.playbook_engine.sandbox import SandboxError, SandboxLimitError, SandboxPool  # Internal module: Step sandbox.
+from src.backend.playbook_engine.triggers import TriggerError, TriggerNetwork  # Internal module: Playbook trigger matching.
+from src.backend.playbook_engine.xsoar import XsoarSync, dump_bundle, from_xsoar, load_bundle, to_xsoar  # Internal module: XSOAR import and export.
 
 class TestPlaybookModel(unittest.TestCase):
     """
@@ -123,5 +151,1409 @@ class TestPlaybookModel(unittest.TestCase):
         # Step 4: Return true if all assertions pass.
         return True  # Note: In unittest, returning True is not necessary; assertions determine pass/fail.
 
+class TestDAGExecution(unittest.TestCase):
+    """
+    Unit tests for the dependency-graph execution of playbook steps.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+    """
+
+    def setUp(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+        def lookup(parameters, context):
+            time.sleep(parameters.get('delay', 0))
+            with self.lock:
+                self.calls.append(parameters.get('name'))
+            return parameters.get('name')
+
+        def fail(parameters, context):
+            raise RuntimeError('integration unavailable')
+
+        register_step_handler('test_lookup', lookup)
+        register_step_handler('test_fail', fail)
+        self.executor = DAGExecutor(max_workers=10)
+
+    def tearDown(self):
+        unregister_step_handler('test_lookup')
+        unregister_step_handler('test_fail')
+        self.executor.shutdown()
+
+    def test_cycles_and_unknown_dependencies_are_rejected(self):
+        with self.assertRaises(PlaybookDAGError):
+            validate_steps([
+                {'step_number': 1, 'action': 'test_lookup', 'depends_on': [2]},
+                {'step_number': 2, 'action': 'test_lookup', 'depends_on': [1]},
+            ])
+        with self.assertRaises(PlaybookDAGError):
+            validate_steps([{'step_number': 1, 'action': 'test_lookup', 'depends_on': [5]}])
+
+    def test_legacy_steps_run_in_order(self):
+        steps = validate_steps(['a', 'b', 'c'])
+        self.assertEqual([step['depends_on'] for step in steps], [[], [1], [2]])
+
+    def test_independent_steps_run_concurrently(self):
+        steps = [{'step_number': index, 'action': 'test_lookup', 'parameters': {'name': index, 'delay': 0.2},
+                  'depends_on': []} for index in range(1, 11)]
+        steps.append({'step_number': 11, 'action': 'test_lookup', 'parameters': {'name': 11},
+                      'depends_on': list(range(1, 11))})
+
+        run = self.executor.run(steps, playbook_id='containment')
+
+        self.assertTrue(run.succeeded)
+        self.assertEqual(self.calls[-1], 11)
+        self.assertLess(run.duration, 1.0)
+        self.assertEqual(run.critical_path[-1], 11)
+        self.assertEqual(len(run.critical_path), 2)
+
+    def test_failure_stops_or_continues_according_to_policy(self):
+        steps = [
+            {'step_number': 1, 'action': 'test_fail', 'on_failure': 'continue'},
+            {'step_number': 2, 'action': 'test_lookup', 'parameters': {'name': 2}},
+            {'step_number': 3, 'action': 'test_fail'},
+            {'step_number': 4, 'action': 'test_lookup', 'parameters': {'name': 4}},
+        ]
+
+        run = self.executor.run(steps)
+
+        self.assertFalse(run.succeeded)
+        self.assertEqual([result.status for result in run.steps.values()],
+                         ['failed', 'succeeded', 'failed', 'skipped'])
+
+    def test_conditions_skip_steps(self):
+        steps = [
+            {'step_number': 1, 'action': 'test_lookup', 'parameters': {'name': 'verdict'}},
+            {'step_number': 2, 'action': 'test_lookup', 'parameters': {'name': 'block'},
+             'depends_on': [1], 'condition': "results[1] == 'verdict' and incident['severity'] >= 3"},
+            {'step_number': 3, 'action': 'test_lookup', 'parameters': {'name': 'notify'},
+             'depends_on': [1], 'condition': "incident['severity'] < 3"},
+        ]
+
+        run = self.executor.run(steps, context={'incident': {'severity': 4}})
+
+        self.assertTrue(run.succeeded)
+        self.assertEqual(run.steps[2].status, 'succeeded')
+        self.assertEqual(run.steps[3].status, 'skipped')
+        with self.assertRaises(PlaybookDAGError):
+            PlanCache().get_or_compile([{'step_number': 1, 'action': 'test_lookup', 'condition': '__import__("os")'}])
+
+
+class TestPlanCache(unittest.TestCase):
+    """
+    Unit tests for the compiled plan cache.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+    """
+
+    def test_plans_are_compiled_and_validated_once_per_content(self):
+        cache = PlanCache()
+        validations = []
+        steps = [{'step_number': 1, 'action': 'isolate_host'}, {'step_number': 2, 'action': 'notify'}]
+
+        first = cache.get_or_compile(steps, {'mode': 'a'}, validator=lambda: validations.append(1) or True)
+        second = cache.get_or_compile(list(steps), {'mode': 'a'}, validator=lambda: validations.append(1) or True)
+        changed = cache.get_or_compile(steps, {'mode': 'b'})
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, changed)
+        self.assertEqual(len(validations), 1)
+        self.assertEqual(first.order, (1, 2))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_non_compliant_plans_are_not_cached(self):
+        cache = PlanCache()
+        with self.assertRaises(PlaybookComplianceError):
+            cache.get_or_compile([{'step_number': 1, 'action': 'delete_mailbox'}], validator=lambda: False)
+        self.assertEqual(len(cache), 0)
+
+class TestRunJournal(unittest.TestCase):
+    """
+    Unit tests for journaled playbook runs and their resumption after a crash.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+    """
+
+    def setUp(self):
+        self.calls = []
+        register_step_handler('test_record', lambda parameters, context: self.calls.append(
+            (parameters['name'], context['idempotency_key'])) or parameters['name'])
+        self.journal = RunJournal(':memory:')
+        self.executor = DAGExecutor(max_workers=2)
+        self.steps = [
+            {'step_number': 1, 'action': 'test_record', 'parameters': {'name': 'snapshot'}},
+            {'step_number': 2, 'action': 'test_record', 'parameters': {'name': 'isolate'}},
+            {'step_number': 3, 'action': 'test_record', 'parameters': {'name': 'notify'}},
+        ]
+
+    def tearDown(self):
+        unregister_step_handler('test_record')
+        self.executor.shutdown()
+        self.journal.close()
+
+    def test_completed_runs_are_not_resumed(self):
+        run = self.executor.run(self.steps, playbook_id='pb-1', journal=self.journal)
+
+        self.assertTrue(run.succeeded)
+        self.assertEqual(self.journal.incomplete_runs(), [])
+        self.assertEqual(set(self.journal.finished_steps(run.run_id)), {1, 2, 3})
+
+    def test_interrupted_run_resumes_from_last_checkpoint(self):
+        # Simulate a crash after step 1 finished and while step 2 was in flight.
+        steps = [dict(step, depends_on=[step['step_number'] - 1] if step['step_number'] > 1 else [])
+                 for step in self.steps]
+        self.journal.start_run('run-1', 'pb-1', steps, {'incident': {'id': 'INC-1'}})
+        self.journal.step_started('run-1', 1, idempotency_key('run-1', 1))
+        self.journal.step_finished('run-1', 1, idempotency_key('run-1', 1), 'succeeded', 'snapshot')
+        self.journal.step_started('run-1', 2, idempotency_key('run-1', 2))
+        self.assertEqual(self.journal.incomplete_runs(), ['run-1'])
+
+        record = self.journal.get_run('run-1')
+        run = self.executor.run(record['steps'], context=record['context'], playbook_id='pb-1',
+                                run_id='run-1', journal=self.journal)
+
+        self.assertTrue(run.succeeded)
+        self.assertTrue(run.steps[1].resumed)
+        self.assertEqual([name for name, _ in self.calls], ['isolate', 'notify'])
+        self.assertEqual(self.calls[0][1], idempotency_key('run-1', 2))
+        self.assertEqual(self.journal.incomplete_runs(), [])
+
+    def test_cancelled_steps_run_again_on_resume(self):
+        steps = [dict(step, depends_on=[step['step_number'] - 1] if step['step_number'] > 1 else [])
+                 for step in self.steps]
+        self.journal.start_run('run-2', 'pb-1', steps, {})
+        self.journal.step_finished('run-2', 1, idempotency_key('run-2', 1), 'succeeded', 'snapshot')
+        self.journal.step_finished('run-2', 2, idempotency_key('run-2', 2), 'cancelled', None, 'Run cancelled.')
+
+        run = self.executor.run(steps, playbook_id='pb-1', run_id='run-2', journal=self.journal)
+
+        self.assertTrue(run.succeeded)
+        self.assertEqual([name for name, _ in self.calls], ['isolate', 'notify'])
+        self.assertEqual(run.steps[3].status, 'succeeded')
+
+    def test_only_runs_with_expired_leases_are_claimed(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'journal.db')
+        live, crashed, survivor = (RunJournal(path, lease_seconds=seconds) for seconds in (60, 0.2, 60))
+        try:
+            live.start_run('run-live', 'pb-1', self.steps, {})
+            crashed.start_run('run-crashed', 'pb-1', self.steps, {})
+            self.assertEqual(survivor.claim_interrupted_runs(), [])
+
+            # The crashed process stops renewing its lease; the run is claimed once, after it expires.
+            crashed.close()
+            time.sleep(0.3)
+            self.assertEqual(survivor.claim_interrupted_runs(), ['run-crashed'])
+            self.assertEqual(live.claim_interrupted_runs(), [])
+            self.assertEqual(survivor.incomplete_runs(), ['run-live', 'run-crashed'])
+
+            survivor.finish_run('run-crashed', 'succeeded')
+            self.assertEqual(survivor.incomplete_runs(), ['run-live'])
+        finally:
+            live.close()
+            survivor.close()
+            shutil.rmtree(directory)
+
+    def test_queued_runs_are_visible_to_other_processes_and_claimed_when_orphaned(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'journal.db')
+        owner, other = RunJournal(path, lease_seconds=0.2), RunJournal(path)
+        try:
+            owner.queue_run('run-q', 'pb-1', {'incident': {'id': 'INC-1'}})
+            self.assertEqual(other.run_owner('run-q'), owner.owner)
+            self.assertEqual(other.get_queued_run('run-q'), {'playbook_id': 'pb-1', 'context': {'incident': {'id': 'INC-1'}}})
+            self.assertIsNone(other.get_run('run-q'))
+            self.assertEqual(other.claim_interrupted_runs(), [])
+
+            owner.close()
+            time.sleep(0.3)
+            self.assertIsNone(other.run_owner('run-q'))
+            self.assertEqual(other.claim_interrupted_runs(), ['run-q'])
+            self.assertEqual(other.run_owner('run-q'), other.owner)
+        finally:
+            other.close()
+            shutil.rmtree(directory)
+
+class TestStepPolicies(unittest.TestCase):
+    """
+    Unit tests for step timeouts, retries and circuit breakers.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+    """
+
+    def setUp(self):
+        self.attempts = []
+
+        def flaky(parameters, context):
+            self.attempts.append(context['attempt'])
+            if context['attempt'] <= parameters['failures']:
+                raise ConnectionError('connection reset')
+            return 'ok'
+
+        def hang(parameters, context):
+            time.sleep(parameters.get('seconds', 1))
+
+        register_step_handler('test_flaky', flaky, integration='test_edr')
+        register_step_handler('test_hang', hang, integration='test_sandbox')
+        self.executor = DAGExecutor(max_workers=4, breakers=CircuitBreakerRegistry(failure_threshold=3, reset_seconds=60))
+
+    def tearDown(self):
+        unregister_step_handler('test_flaky')
+        unregister_step_handler('test_hang')
+        self.executor.shutdown(wait_for_steps=False)
+
+    def test_failed_attempts_are_retried_with_backoff(self):
+        run = self.executor.run([{'step_number': 1, 'action': 'test_flaky', 'parameters': {'failures': 2},
+                                  'retries': 2, 'retry_backoff_seconds': 0.01}])
+
+        self.assertTrue(run.succeeded)
+        self.assertEqual(self.attempts, [1, 2, 3])
+        self.assertEqual(run.steps[1].attempts, 3)
+
+    def test_timed_out_steps_release_the_run(self):
+        started = time.monotonic()
+        run = self.executor.run([{'step_number': 1, 'action': 'test_hang', 'parameters': {'seconds': 2},
+                                  'timeout_seconds': 0.1}])
+
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertFalse(run.succeeded)
+        self.assertIn('StepTimeoutError', run.steps[1].error)
+
+    def test_time_queued_for_a_worker_does_not_count_against_the_timeout(self):
+        executor = DAGExecutor(max_workers=1, breakers=CircuitBreakerRegistry(failure_threshold=1, reset_seconds=60))
+        self.addCleanup(executor.shutdown)
+        steps = [{'step_number': 1, 'action': 'test_hang', 'parameters': {'seconds': 0.3}, 'depends_on': []},
+                 {'step_number': 2, 'action': 'test_flaky', 'parameters': {'failures': 0}, 'depends_on': [],
+                  'timeout_seconds': 0.1}]
+
+        run = executor.run(steps)
+        self.assertTrue(run.succeeded)
+        self.assertEqual(run.steps[2].attempts, 1)
+        batch = list(BatchExecutor(executor).run(steps, [{'incident': {}}]))
+        self.assertTrue(batch[0][1].succeeded)
+        self.assertEqual(executor.breakers.states(), {'test_sandbox': 'closed', 'test_edr': 'closed'})
+
+    def test_open_breaker_fails_fast(self):
+        steps = [{'step_number': 1, 'action': 'test_flaky', 'parameters': {'failures': 10}, 'on_failure': 'continue'}]
+        for _ in range(3):
+            self.executor.run(steps)
+
+        run = self.executor.run(steps)
+
+        self.assertEqual(self.attempts, [1, 1, 1])
+        self.assertIn('CircuitOpenError', run.steps[1].error)
+
+    def test_breaker_allows_a_single_trial_after_reset(self):
+        now = [0.0]
+        breaker = CircuitBreaker('test', failure_threshold=1, reset_seconds=10, clock=lambda: now[0])
+        breaker.record_failure()
+        with self.assertRaises(CircuitOpenError):
+            breaker.acquire()
+
+        now[0] = 11.0
+        breaker.acquire()
+        with self.assertRaises(CircuitOpenError):
+            breaker.acquire()
+        breaker.record_success()
+        breaker.acquire()
+
+    def test_backoff_is_jittered_and_capped(self):
+        policy = StepPolicy.from_step({'retry_backoff_seconds': 1, 'retry_backoff_max_seconds': 4})
+        delays = [policy.backoff_delay(attempt) for attempt in range(1, 10) for _ in range(20)]
+        self.assertTrue(all(0 <= delay <= 4 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+class TestRunScheduler(unittest.TestCase):
+    """
+    Unit tests for the playbook run scheduler.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+    """
+
+    def setUp(self):
+        self.now = [0.0]
+        self.order = []
+        self.blocking = threading.Event()
+        self.release = threading.Event()
+
+        def runner(request):
+            if request.playbook_id == 'blocker':
+                self.blocking.set()
+                self.release.wait(5)
+            else:
+                self.order.append(request.playbook_id)
+            return request.playbook_id
+
+        self.scheduler = RunScheduler(runner, workers=1, aging_seconds=60, clock=lambda: self.now[0])
+
+    def tearDown(self):
+        self.release.set()
+        self.scheduler.shutdown()
+
+    def _run_queued(self, submissions):
+        self.scheduler.submit('blocker', tenant='ops')
+        self.blocking.wait(5)
+        requests = [self.scheduler.submit(playbook_id, **options) for playbook_id, options in submissions]
+        self.release.set()
+        for request in requests:
+            request.future.result(5)
+
+    def test_severity_first_then_fair_across_tenants(self):
+        self._run_queued([
+            ('a1', {'severity': 'low', 'tenant': 'a'}),
+            ('a2', {'severity': 'low', 'tenant': 'a'}),
+            ('a3', {'severity': 'low', 'tenant': 'a'}),
+            ('b1', {'severity': 'low', 'tenant': 'b'}),
+            ('c1', {'context': {'incident': {'id': 'INC-9', 'severity': 'critical'}}}),
+        ])
+        self.assertEqual(self.order, ['c1', 'a1', 'b1', 'a2', 'a3'])
+
+    def test_waiting_runs_age_into_higher_priority(self):
+        self.scheduler.submit('blocker', tenant='ops')
+        self.blocking.wait(5)
+        old = self.scheduler.submit('old-low', severity='low', tenant='a')
+        self.now[0] = 200.0
+        new = self.scheduler.submit('new-critical', severity='critical', tenant='b')
+        self.release.set()
+        old.future.result(5)
+        new.future.result(5)
+        self.assertEqual(self.order, ['old-low', 'new-critical'])
+
+    def test_integration_concurrency_is_capped_across_steps(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def call(parameters, context):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+        register_step_handler('test_capped', call, integration='test_firewall')
+        executor = DAGExecutor(max_workers=4, breakers=CircuitBreakerRegistry(),
+                               limiter=IntegrationLimiter({'test_firewall': 1}))
+        try:
+            run = executor.run([{'step_number': n, 'action': 'test_capped', 'depends_on': []} for n in range(1, 5)])
+        finally:
+            unregister_step_handler('test_capped')
+            executor.shutdown()
+
+        self.assertTrue(run.succeeded)
+        self.assertEqual(peak[0], 1)
+
+class TestConfigSnapshots(unittest.TestCase):
+    """
+    Unit tests for immutable, hot-reloaded configuration snapshots.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+    """
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.write({'max_parallel_steps': 2, 'config_check_interval_seconds': 0})
+        self.manager = ConfigManager(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def write(self, settings, mtime=None):
+        with open(self.path, 'w') as f:
+            json.dump(settings, f)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_snapshot_is_immutable_and_merged_with_defaults(self):
+        snapshot = self.manager.current()
+        self.assertEqual(snapshot['max_parallel_steps'], 2)
+        self.assertIn('plan_cache_size', snapshot)
+        with self.assertRaises(TypeError):
+            snapshot['step_policy_defaults']['retries'] = 3
+        self.assertIsInstance(snapshot['threat_intelligence_sources'], tuple)
+
+    def test_changed_file_is_swapped_in_as_new_version(self):
+        before = self.manager.current()
+        self.write({'max_parallel_steps': 6, 'config_check_interval_seconds': 0}, mtime=time.time() + 10)
+        after = self.manager.current()
+        self.assertEqual(after['max_parallel_steps'], 6)
+        self.assertNotEqual(after.version, before.version)
+        # Runs holding the earlier snapshot keep a consistent view.
+        self.assertEqual(before['max_parallel_steps'], 2)
+
+    def test_unchanged_or_invalid_file_keeps_current_snapshot(self):
+        before = self.manager.current()
+        self.assertIs(self.manager.current(), before)
+        with open(self.path, 'w') as f:
+            f.write('{not json')
+        os.utime(self.path, (time.time() + 10, time.time() + 10))
+        self.assertIs(self.manager.current(), before)
+        with self.assertRaises(ValueError):
+            self.manager.reload(force=True)
+
+    def test_failed_reloads_are_logged_once_per_file_state(self):
+        before = self.manager.current()
+        os.remove(self.path)
+        with self.assertLogs('src.backend.playbook_engine.config', level='WARNING') as logs:
+            for _ in range(3):
+                self.assertIs(self.manager.current(), before)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn(self.path, logs.output[0])
+
+        # A file rewritten with invalid content is a new state and logged again.
+        with open(self.path, 'w') as f:
+            f.write('{not json')
+        with self.assertLogs('src.backend.playbook_engine.config', level='WARNING') as logs:
+            self.assertIs(self.manager.current(), before)
+        self.assertEqual(len(logs.records), 1)
+
+    def test_reload_warns_about_restart_only_settings(self):
+        self.write({'max_parallel_steps': 6, 'plan_cache_size': 256, 'config_check_interval_seconds': 0},
+                   mtime=time.time() + 10)
+        with self.assertLogs('src.backend.playbook_engine.config', level='WARNING') as logs:
+            self.assertEqual(self.manager.current()['max_parallel_steps'], 6)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('max_parallel_steps', logs.output[0])
+        self.assertNotIn('plan_cache_size', logs.output[0])
+
+class TestPlaybookVersionStore(unittest.TestCase):
+    """
+    Unit tests for the content-addressed, delta-compressed playbook version store.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004-5)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+    """
+
+    def setUp(self):
+        self.store = PlaybookVersionStore(':memory:', keyframe_interval=4)
+        self.steps = [{'step_number': n, 'action': 'enrich_indicator', 'parameters': {'source': f'feed-{n}'}}
+                      for n in range(1, 41)]
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_versions_are_content_addressed_and_retrievable(self):
+        first = self.store.put('pb1', {'name': 'Phishing', 'steps': self.steps})
+        self.steps[5]['parameters'] = {'source': 'feed-x'}
+        second = self.store.put('pb1', {'name': 'Phishing', 'steps': self.steps})
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.store.put('pb1', {'name': 'Phishing', 'steps': self.steps}), second)
+        self.assertEqual([version['hash'] for version in self.store.history('pb1')], [second, first])
+
+        self.store._cache.clear()
+        self.assertEqual(self.store.get(first)['steps'][5]['parameters'], {'source': 'feed-6'})
+        self.assertEqual(self.store.get(second)['steps'][5]['parameters'], {'source': 'feed-x'})
+        with self.assertRaises(VersionNotFoundError):
+            self.store.get('0' * 64)
+
+    def test_small_edits_are_stored_as_deltas(self):
+        for n in range(10):
+            self.steps[n]['parameters'] = {'source': f'edited-{n}'}
+            self.store.put('pb1', {'name': 'Phishing', 'steps': self.steps})
+        stats = self.store.stats()
+        self.assertEqual(stats['versions'], 10)
+        self.assertLess(stats['stored_bytes'] * 4, stats['raw_bytes'])
+        depths = [row[0] for row in self.store._connection.execute('SELECT depth FROM blobs')]
+        self.assertLess(max(depths), 4)
+
+    def test_diff_reports_changed_added_and_removed_steps(self):
+        old = self.store.put('pb1', {'name': 'Phishing', 'steps': self.steps[:3]})
+        steps = [dict(self.steps[0], action='block_ip'), self.steps[1],
+                 {'step_number': 4, 'action': 'notify'}]
+        new = self.store.put('pb1', {'name': 'Phishing v2', 'steps': steps})
+        diff = self.store.diff(old, new)
+        self.assertEqual(diff['fields'], {'name': {'old': 'Phishing', 'new': 'Phishing v2'}})
+        self.assertEqual(diff['changed_steps'], [
+            {'step_number': 1, 'changes': {'action': {'old': 'enrich_indicator', 'new': 'block_ip'}}}])
+        self.assertEqual([step['step_number'] for step in diff['added_steps']], [4])
+        self.assertEqual([step['step_number'] for step in diff['removed_steps']], [3])
+
+class TestComplianceRules(unittest.TestCase):
+    """
+    Unit tests for the indexed compliance rule engine.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004-3)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+    """
+
+    def setUp(self):
+        self.rules = ComplianceRuleSet([
+            {'id': 'approval', 'actions': ['disable_user'], 'require': "'approval_id' in parameters"},
+            {'id': 'no-wipe', 'actions': ['wipe_host'], 'forbid': True},
+            {'id': 'ticket', 'actions': ['block_ip'], 'requires_actions': ['open_ticket'], 'severity': 'warning'},
+            {'id': 'bulk', 'when': "'limit' in parameters and parameters['limit'] > 100",
+             'require': "'approved_by' in parameters"},
+        ])
+
+    def test_only_rules_of_present_actions_are_evaluated(self):
+        report = self.rules.validate([{'step_number': 1, 'action': 'notify'}])
+        self.assertTrue(report.compliant)
+        self.assertEqual(report.rules_evaluated, 1)
+
+    def test_violations_are_reported_by_step(self):
+        report = self.rules.validate([
+            {'step_number': 1, 'action': 'disable_user', 'parameters': {}},
+            {'step_number': 2, 'action': 'block_ip', 'parameters': {'limit': 500, 'approved_by': 'lead'}},
+            {'step_number': 3, 'action': 'wipe_host'},
+        ])
+        self.assertFalse(report.compliant)
+        self.assertEqual([(v.rule_id, v.step_number, v.severity) for v in report.violations],
+                         [('approval', 1, 'error'), ('ticket', 2, 'warning'), ('no-wipe', 3, 'error')])
+
+    def test_warnings_do_not_fail_validation_and_reports_are_memoized(self):
+        steps = [{'step_number': 1, 'action': 'block_ip'}]
+        report = self.rules.validate(steps)
+        self.assertTrue(report.compliant)
+        self.assertEqual(len(report.violations), 1)
+        self.assertIs(self.rules.validate([dict(step) for step in steps]), report)
+
+    def test_malformed_rules_are_rejected(self):
+        with self.assertRaises(ComplianceRuleError):
+            ComplianceRuleSet([{'id': 'empty', 'actions': ['notify']}])
+        with self.assertRaises(ComplianceRuleError):
+            ComplianceRuleSet([{'id': 'call', 'require': "__import__('os')"}])
+
+class TestThreatIntelStore(unittest.TestCase):
+    """
+    Unit tests for the local threat-intelligence store and its incremental refresh.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004-2)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+    """
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+        self.store = ThreatIntelStore([self.path], capacity=100)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def append(self, *entries, mode='a'):
+        with open(self.path, mode) as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+
+    def test_refresh_applies_only_new_entries(self):
+        self.append({'value': '203.0.113.7', 'type': 'ipv4'}, {'value': 'evil-example[.]net', 'type': 'domain'})
+        self.assertEqual(self.store.refresh(), {self.path: 2})
+        self.assertEqual(self.store.lookup('evil-example.net').type, 'domain')
+        self.assertIsNone(self.store.lookup('198.51.100.1'))
+
+        self.append({'value': '203.0.113.7', 'action': 'remove'}, {'value': 'c2.example.org'})
+        self.assertEqual(self.store.refresh(), {self.path: 2})
+        self.assertEqual(self.store.refresh(), {self.path: 0})
+        self.assertNotIn('203.0.113.7', self.store)
+        self.assertIn('C2.EXAMPLE.ORG', self.store)
+
+    def test_rotated_feed_is_reloaded(self):
+        self.append({'value': 'old.example.org'}, {'value': 'other.example.org'})
+        self.store.refresh()
+        self.append({'value': 'new.example.org'}, mode='w')
+        self.store.refresh()
+        self.assertNotIn('old.example.org', self.store)
+        self.assertIn('new.example.org', self.store)
+
+    def test_malformed_entries_are_skipped_one_by_one(self):
+        self.append({'value': 'bad.example.org', 'confidence': 'high'}, {'value': 'worse.example.org', 'confidence': [1]},
+                    {'value': 'odd.example.org', 'techniques': 5}, {'value': '9.9.9.9', 'confidence': 0.8})
+        with self.assertLogs('src.backend.playbook_engine.threat_intel', 'WARNING'):
+            self.assertEqual(self.store.refresh(), {self.path: 1})
+        self.assertEqual(self.store.lookup('9.9.9.9').confidence, 0.8)
+        self.assertNotIn('bad.example.org', self.store)
+        self.assertIsNone(self.store.status()['sources'][self.path]['last_error'])
+
+    def test_offset_advances_only_after_the_entries_are_applied(self):
+        self.append({'value': '9.9.9.9'})
+        def unavailable(entries, source):
+            raise ValueError('index unavailable')
+
+        self.store.apply = unavailable
+        with self.assertLogs('src.backend.playbook_engine.threat_intel', 'WARNING'):
+            self.assertEqual(self.store.refresh(), {self.path: 0})
+        self.assertEqual(self.store.status()['sources'][self.path]['last_error'], 'index unavailable')
+        del self.store.apply
+        self.assertEqual(self.store.refresh(), {self.path: 1})
+        self.assertIn('9.9.9.9', self.store)
+
+    def test_bloom_filter_grows_and_keeps_false_positives_rare(self):
+        self.store.apply([{'value': f'host{n}.example.org'} for n in range(1000)], 'test')
+        self.assertTrue(all(f'host{n}.example.org' in self.store for n in range(1000)))
+        self.assertGreaterEqual(self.store._bloom.capacity, 1000)
+
+        bloom = BloomFilter(1000, 0.01)
+        for n in range(1000):
+            bloom.add(f'known-{n}')
+        false_positives = sum(f'unknown-{n}' in bloom for n in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_change_log_reports_only_effective_changes(self):
+        self.store.apply([{'value': 'a.example.org', 'techniques': ['t1566']}, {'value': 'b.example.org'}], 'feed')
+        delta = self.store.changes_since(0)
+        self.assertEqual((delta.indicators, delta.techniques), ({'a.example.org', 'b.example.org'}, {'T1566'}))
+        # Entries re-sent unchanged are not changes.
+        self.store.apply([{'value': 'a.example.org', 'techniques': ['T1566']}], 'feed')
+        self.assertFalse(self.store.changes_since(delta.cursor))
+        self.store.apply([{'value': 'b.example.org', 'action': 'remove'}], 'feed')
+        self.assertEqual(self.store.changes_since(delta.cursor).indicators, {'b.example.org'})
+
+        small = ThreatIntelStore(change_log_size=2)
+        small.apply([{'value': f'host{n}.example.org'} for n in range(5)], 'feed')
+        self.assertFalse(small.changes_since(1).complete)
+        self.assertTrue(small.changes_since(3).complete)
+
+class TestBatchExecution(unittest.TestCase):
+    """
+    Unit tests for running one playbook across many incidents with bulk step handlers.
+
+    Requirements Addressed:
+    - Incident Response Automation (TR-IR-001-5)
+      Location: Technical Specification/4.1 Incident Response Automation
+    """
+
+    def setUp(self):
+        self.bulk_calls = []
+        self.single_calls = []
+
+        def block_many(items):
+            self.bulk_calls.append(len(items))
+            return [ValueError('firewall rejected') if context['incident'].get('bad') else
+                    {'blocked': context['incident']['ip']} for _, context in items]
+
+        register_step_handler('test_block_ip', lambda parameters, context: self.single_calls.append(1),
+                              bulk=block_many)
+        register_step_handler('test_enrich', lambda parameters, context: self.single_calls.append(1) or
+                              time.sleep(context['incident'].get('delay', 0)) or 'ok')
+        self.executor = DAGExecutor(max_workers=4, breakers=CircuitBreakerRegistry(), limiter=IntegrationLimiter())
+        self.steps = [
+            {'step_number': 1, 'action': 'test_enrich', 'depends_on': []},
+            {'step_number': 2, 'action': 'test_block_ip', 'depends_on': [1], 'retries': 1,
+             'retry_backoff_seconds': 0, 'condition': "incident['severity'] >= 2"},
+            {'step_number': 3, 'action': 'test_enrich', 'depends_on': [2]},
+        ]
+
+    def tearDown(self):
+        unregister_step_handler('test_block_ip')
+        unregister_step_handler('test_enrich')
+        self.executor.shutdown()
+
+    def run_batch(self, incidents, bulk_size=100):
+        batch = BatchExecutor(self.executor, bulk_size=bulk_size)
+        return {index: run for index, run in batch.run(self.steps, [{'incident': i} for i in incidents])}
+
+    def test_bulk_steps_are_called_once_per_chunk(self):
+        incidents = [{'ip': f'203.0.113.{n}', 'severity': 3} for n in range(250)]
+        runs = self.run_batch(incidents)
+        self.assertEqual(sum(self.bulk_calls), 250)
+        self.assertLessEqual(max(self.bulk_calls), 100)
+        self.assertLess(len(self.bulk_calls), 250)
+        self.assertTrue(all(run.succeeded for run in runs.values()))
+        self.assertEqual(runs[7].steps[2].result, {'blocked': '203.0.113.7'})
+        self.assertEqual(len(self.single_calls), 500)
+
+    def test_failures_and_conditions_apply_per_incident(self):
+        runs = self.run_batch([
+            {'ip': '203.0.113.1', 'severity': 3},
+            {'ip': '203.0.113.2', 'severity': 3, 'bad': True},
+            {'ip': '203.0.113.3', 'severity': 1},
+        ])
+        self.assertEqual(sum(self.bulk_calls), 3)  # the failed item alone is retried
+        self.assertTrue(runs[0].succeeded)
+        self.assertFalse(runs[1].succeeded)
+        self.assertEqual(runs[1].steps[2].attempts, 2)
+        self.assertEqual(runs[1].steps[3].status, 'skipped')
+        self.assertEqual(runs[2].steps[2].status, 'skipped')
+        self.assertEqual(runs[2].steps[3].status, 'succeeded')
+
+    def test_incidents_advance_and_finish_independently(self):
+        batch = BatchExecutor(self.executor)
+        incidents = [{'ip': '203.0.113.1', 'severity': 3, 'delay': 0.5}, {'ip': '203.0.113.2', 'severity': 3}]
+        started = time.monotonic()
+        results = batch.run(self.steps, [{'incident': incident} for incident in incidents])
+        index, run = next(results)
+        # The fast incident ran all its steps and was reported before the slow one finished step 1.
+        self.assertEqual(index, 1)
+        self.assertTrue(run.succeeded)
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertEqual([index for index, _ in results], [0])
+
+class TestPlaybookSimulation(unittest.TestCase):
+    """
+    Unit tests for dry-run simulation of playbooks from execution history.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004-3)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+    """
+
+    def setUp(self):
+        self.calls = []
+        self.journal = RunJournal(':memory:')
+        register_step_handler('test_sim_lookup', lambda parameters, context: self.calls.append('lookup') or
+                              time.sleep(0.02), integration='threat_feed')
+        register_step_handler('test_sim_block', lambda parameters, context: self.calls.append('block') or
+                              time.sleep(0.05), integration='firewall')
+        self.steps = [
+            {'step_number': 1, 'action': 'test_sim_lookup', 'depends_on': []},
+            {'step_number': 2, 'action': 'test_sim_lookup', 'depends_on': []},
+            {'step_number': 3, 'action': 'test_sim_block', 'depends_on': [1, 2],
+             'condition': "incident['severity'] >= 3"},
+        ]
+
+    def tearDown(self):
+        unregister_step_handler('test_sim_lookup')
+        unregister_step_handler('test_sim_block')
+        self.journal.close()
+
+    def test_simulation_uses_history_without_running_steps(self):
+        executor = DAGExecutor(max_workers=4)
+        try:
+            for severity in (3, 4, 1):
+                executor.run(self.steps, context={'incident': {'severity': severity}}, playbook_id='pb-1',
+                             journal=self.journal)
+        finally:
+            executor.shutdown()
+        self.calls.clear()
+
+        plan = compile_plan(self.steps)
+        history = load_history(plan, self.journal, 'pb-1')
+        self.assertEqual([history[n][0] for n in (1, 2, 3)], ['step', 'step', 'step'])
+        report = simulate_plan(plan, history, context={'incident': {'severity': 5}}, iterations=200, seed=1)
+        self.assertEqual(self.calls, [])  # nothing is executed
+        self.assertEqual(report['external_calls'], {'firewall': 1.0, 'threat_feed': 2.0})
+        self.assertEqual(report['critical_path'][-1], 3)
+        self.assertGreaterEqual(report['duration_seconds']['p50'], 0.06)
+        self.assertEqual(report['success_rate'], 1.0)
+
+        # A condition decided false from the context skips the step and its calls.
+        report = simulate_plan(plan, history, context={'incident': {'severity': 1}}, iterations=50, seed=1)
+        self.assertNotIn('firewall', report['external_calls'])
+        self.assertEqual(report['steps'][2]['run_probability'], 0.0)
+
+    def test_steps_without_history_use_the_default_duration(self):
+        plan = compile_plan(self.steps)
+        report = simulate_plan(plan, load_history(plan, None, 'pb-2'), iterations=10, default_step_seconds=2.0)
+        # Without an incident, step 3's condition is undecided and, with no history, assumed to run.
+        self.assertEqual(report['duration_seconds']['p50'], 4.0)
+        self.assertEqual(report['critical_path_duration'], 4.0)
+        self.assertEqual([step['history'] for step in report['steps']], ['none', 'none', 'none'])
+
+class TestRunTracing(unittest.TestCase):
+    """
+    Unit tests for run and step spans, OTLP/JSON export and run timelines.
+
+    Requirements Addressed:
+    - Incident Response Automation (TR-IR-001-5)
+      Location: Technical Specification/4.1 Incident Response Automation
+    """
+
+    def setUp(self):
+        self.failures = {'count': 0}
+
+        def flaky(parameters, context):
+            self.failures['count'] += 1
+            if self.failures['count'] == 1:
+                raise RuntimeError('transient')
+            return {'ok': True}
+
+        register_step_handler('test_trace_flaky', flaky, integration='siem')
+        register_step_handler('test_trace_sleep', lambda parameters, context: time.sleep(0.01) or 'done')
+        self.executor = DAGExecutor(max_workers=4)
+        self.tracer = TraceCollector()
+        self.run = self.executor.run([
+            {'step_number': 1, 'action': 'test_trace_sleep', 'parameters': {'host': 'ws-1'}},
+            {'step_number': 2, 'action': 'test_trace_flaky', 'depends_on': [1], 'retries': 1,
+             'retry_backoff_seconds': 0},
+        ], playbook_id='pb-trace', tracer=self.tracer, trace_attributes={'run.queue_wait_ms': 1.5})
+
+    def tearDown(self):
+        self.executor.shutdown()
+        unregister_step_handler('test_trace_flaky')
+        unregister_step_handler('test_trace_sleep')
+
+    def test_runs_and_steps_are_recorded_as_spans(self):
+        spans = self.tracer.spans(self.run.run_id)
+        self.assertEqual(len(spans), 3)
+        root = next(span for span in spans if span.parent_id is None)
+        self.assertEqual(root.trace_id, self.run.run_id)
+        self.assertEqual(root.attributes['run.queue_wait_ms'], 1.5)
+        steps = {span.attributes['step.number']: span for span in spans if span is not root}
+        self.assertTrue(all(span.parent_id == root.span_id for span in steps.values()))
+        self.assertEqual(steps[1].attributes['step.parameters_bytes'], len('{"host":"ws-1"}'))
+        self.assertGreaterEqual(steps[1].duration_ms, 10)
+        self.assertEqual(steps[2].attributes['step.retries'], 1)
+        self.assertEqual([name for _, name, _ in steps[2].events], ['attempt_failed'])
+        self.assertIsNotNone(steps[2].attributes['step.queue_wait_ms'])
+
+    def test_traces_export_as_otlp_json_and_timelines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'traces', 'run.json')
+            self.assertEqual(self.tracer.export_otlp(path, self.run.run_id), 3)
+            with open(path) as f:
+                exported = json.load(f)
+        spans = exported['resourceSpans'][0]['scopeSpans'][0]['spans']
+        self.assertEqual({len(span['traceId']) for span in spans}, {32})
+        flaky = next(span for span in spans if span['name'] == 'test_trace_flaky')
+        self.assertEqual(flaky['events'][0]['attributes'][0], {'key': 'attempt', 'value': {'intValue': '1'}})
+        self.assertIn('parentSpanId', flaky)
+
+        timeline = self.tracer.timeline(self.run.run_id)
+        self.assertEqual([step['step_number'] for step in timeline['steps']], [1, 2])
+        self.assertEqual(timeline['status'], 'succeeded')
+        self.assertGreaterEqual(timeline['steps'][1]['start_ms'], timeline['steps'][0]['duration_ms'])
+        self.assertEqual(len(render_timeline(timeline).splitlines()), 3)
+        self.assertIsNone(self.tracer.timeline('unknown-run'))
+
+class TestParameterTemplates(unittest.TestCase):
+    """
+    Unit tests for compiled step parameter templates.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+    """
+
+    def test_templates_render_against_the_run_context(self):
+        template = ParameterTemplate({
+            'ip': '{{ incident.source_ip }}',
+            'ports': '{{ incident.ports }}',
+            'comment': 'Incident {{ incident.id }}: {{ results[1] }}',
+            'nested': [{'value': '{{ incident.severity * 2 }}'}, 'static'],
+            'limit': 5,
+        })
+        context = {'incident': {'id': 'INC-1', 'source_ip': '203.0.113.9', 'ports': [22, 443], 'severity': 3},
+                   'results': {1: 'malicious'}}
+        self.assertEqual(template.render(context), {
+            'ip': '203.0.113.9', 'ports': [22, 443], 'comment': 'Incident INC-1: malicious',
+            'nested': [{'value': 6}, 'static'], 'limit': 5,
+        })
+        with self.assertRaises(ExpressionError):
+            template.render({'incident': {}, 'results': {}})
+
+    def test_static_parameters_are_passed_through(self):
+        parameters = {'queue': 'soc', 'tags': ['a', 'b']}
+        template = ParameterTemplate(parameters)
+        self.assertFalse(template.templated)
+        self.assertIs(template.render({}), parameters)
+
+    def test_plans_compile_templates_once_and_reject_invalid_ones(self):
+        with self.assertRaises(PlaybookDAGError):
+            compile_plan([{'step_number': 1, 'action': 'test_echo', 'parameters': {'x': '{{ incident.f() }}'}}])
+
+        register_step_handler('test_echo', lambda parameters, context: parameters['value'])
+        executor = DAGExecutor(max_workers=2)
+        try:
+            run = executor.run([
+                {'step_number': 1, 'action': 'test_echo', 'parameters': {'value': '{{ incident.host }}'}},
+                {'step_number': 2, 'action': 'test_echo', 'depends_on': [1],
+                 'parameters': {'value': 'isolated {{ results[1] }}'}},
+            ], context={'incident': {'host': 'ws-042'}})
+        finally:
+            executor.shutdown()
+            unregister_step_handler('test_echo')
+        self.assertEqual(run.steps[2].result, 'isolated ws-042')
+
+    def test_expressions_may_contain_braces(self):
+        template = ParameterTemplate({
+            'lookup': "{{ {'high': 3, 'low': 1}[incident.level] }}",
+            'label': "{{ '}}' }} done",
+        })
+        self.assertEqual(template.render({'incident': {'level': 'high'}}), {'lookup': 3, 'label': '}} done'})
+
+    def test_expressions_cannot_build_unbounded_values(self):
+        for source in ("{{ 'a' * 10000000000 }}", "{{ 'a' * 10**10 }}"):
+            with self.assertRaises(ExpressionError):
+                ParameterTemplate({'value': source})
+        repeated = ParameterTemplate({'value': '{{ incident.text * incident.count }}'})
+        self.assertEqual(repeated.render({'incident': {'text': 'ab', 'count': 2}}), {'value': 'abab'})
+        with self.assertRaises(ExpressionError):
+            repeated.render({'incident': {'text': 'ab', 'count': MAX_REPEAT_LENGTH}})
+        with self.assertRaises(ExpressionError):
+            ParameterTemplate({'value': '{{ incident.text % incident.width }}'}).render(
+                {'incident': {'text': '%*d', 'width': (10 ** 9, 1)}})
+
+class TestXsoarConversion(unittest.TestCase):
+    """
+    Unit tests for XSOAR playbook import, export and incremental sync.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004-1)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+    """
+
+    BUNDLE = """---
+id: phishing-triage
+name: Phishing Triage
+starttaskid: "0"
+tasks:
+  "0":
+    id: "0"
+    type: start
+    task: {id: "0", name: ""}
+    nexttasks:
+      '#none#': ["1"]
+  "1":
+    id: "1"
+    type: title
+    task: {id: "1", name: Enrichment}
+    nexttasks:
+      '#none#': ["2"]
+  "2":
+    id: "2"
+    type: regular
+    task: {id: "2", name: Get reputation, script: "VirusTotal|||ip", brand: VirusTotal, iscommand: true}
+    scriptarguments:
+      ip: {simple: "${incident.sourceip}"}
+    continueonerror: true
+    nexttasks:
+      '#none#': ["3"]
+  "3":
+    id: "3"
+    type: condition
+    task: {id: "3", name: Is malicious?, scriptName: IsMalicious}
+    nexttasks:
+      'yes': ["4"]
+      '#default#': ["5"]
+  "4":
+    id: "4"
+    type: regular
+    task: {id: "4", name: Block IP, script: "|||block_ip", iscommand: true}
+    nexttasks:
+      '#none#': ["6"]
+  "5":
+    id: "5"
+    type: regular
+    task: {id: "5", name: Close incident, script: "|||close_incident", iscommand: true}
+  "6":
+    id: "6"
+    type: regular
+    task: {id: "6", name: Notify, script: "|||notify", iscommand: true}
+---
+id: empty-ish
+name: Single Task
+tasks:
+  "0": {id: "0", type: start, nexttasks: {'#none#': ["1"]}}
+  "1": {id: "1", type: regular, task: {id: "1", name: Noop, script: "|||noop"}}
+"""
+
+    def test_tasks_become_steps_with_branch_conditions(self):
+        playbook = from_xsoar(next(load_bundle(io.StringIO(self.BUNDLE))))
+        steps = {step['step_number']: step for step in playbook['steps']}
+        self.assertEqual(sorted(steps), [2, 3, 4, 5, 6])  # start and title tasks are structure only
+        self.assertEqual(steps[2]['action'], 'ip')
+        self.assertEqual(steps[2]['parameters'], {'ip': '${incident.sourceip}'})
+        self.assertEqual(steps[2]['depends_on'], [])
+        self.assertEqual(steps[2]['on_failure'], 'continue')
+        self.assertEqual(steps[3]['action'], 'IsMalicious')
+        self.assertEqual(steps[4]['depends_on'], [3])
+
+        calls = []
+        for action, result in (('ip', 80), ('IsMalicious', 'no'), ('block_ip', None), ('close_incident', None),
+                               ('notify', None)):
+            register_step_handler(action, lambda parameters, context, action=action, result=result:
+                                  calls.append(action) or result)
+        executor = DAGExecutor(max_workers=2)
+        try:
+            run = executor.run(playbook['steps'])
+        finally:
+            executor.shutdown()
+            for action in ('ip', 'IsMalicious', 'block_ip', 'close_incident', 'notify'):
+                unregister_step_handler(action)
+        # The default branch is taken; the task after the untaken branch is skipped too.
+        self.assertEqual(sorted(calls), ['IsMalicious', 'close_incident', 'ip'])
+        self.assertEqual(run.steps[6].status, 'skipped')
+
+    def test_export_round_trips(self):
+        documents = list(load_bundle(io.StringIO(self.BUNDLE)))
+        imported = [from_xsoar(document) for document in documents]
+        out = io.StringIO()
+        self.assertEqual(dump_bundle((to_xsoar(p['name'], p['steps'], p['xsoar_id']) for p in imported), out), 2)
+        exported = next(load_bundle(io.StringIO(out.getvalue())))
+        reimported = from_xsoar(exported)
+        without_metadata = lambda steps: [{k: v for k, v in step.items() if k != 'xsoar'} for step in steps]
+        self.assertEqual(without_metadata(reimported['steps']), without_metadata(imported[0]['steps']))
+        self.assertEqual(to_xsoar(reimported['name'], reimported['steps'], reimported['xsoar_id']), exported)
+        self.assertEqual(exported['tasks']['3']['nexttasks'], {'yes': ['4'], '#default#': ['5']})
+
+    def test_branch_labels_with_quotes_and_backslashes_are_kept(self):
+        label = "it's C:\\temp\\'x'"
+        document = next(load_bundle(io.StringIO(self.BUNDLE)))
+        document['tasks']['3']['nexttasks'] = {label: ['4'], '#default#': ['5']}
+        playbook = from_xsoar(document)
+        steps = {step['step_number']: step for step in playbook['steps']}
+        self.assertTrue(CompiledExpression(steps[4]['condition']).evaluate({'results': {3: label}}))
+        self.assertFalse(CompiledExpression(steps[5]['condition']).evaluate({'results': {3: label}}))
+        self.assertTrue(CompiledExpression(steps[5]['condition']).evaluate({'results': {3: "its C:temp'x'"}}))
+        exported = to_xsoar(playbook['name'], playbook['steps'], playbook['xsoar_id'])
+        self.assertEqual(exported['tasks']['3']['nexttasks'], {label: ['4'], '#default#': ['5']})
+
+    def test_sync_only_converts_changed_playbooks(self):
+        sync = XsoarSync(':memory:')
+        applied = []
+
+        def apply(converted, playbook_id):
+            applied.append((converted['xsoar_id'], playbook_id))
+            return playbook_id or f"pb-{converted['xsoar_id']}"
+
+        stats = sync.sync(io.StringIO(self.BUNDLE), apply)
+        self.assertEqual((stats['imported'], stats['unchanged']), (2, 0))
+        stats = sync.sync(io.StringIO(self.BUNDLE), apply)
+        self.assertEqual((stats['imported'], stats['unchanged']), (0, 2))
+        stats = sync.sync(io.StringIO(self.BUNDLE.replace('name: Notify', 'name: Notify SOC')), apply)
+        self.assertEqual((stats['imported'], stats['unchanged']), (1, 1))
+        self.assertEqual(applied[-1], ('phishing-triage', 'pb-phishing-triage'))
+        stats = sync.sync(io.StringIO('---\nname: broken\n'), apply)
+        self.assertEqual(stats['failed'], 1)
+        sync.close()
+
+class TestTriggerMatching(unittest.TestCase):
+    """
+    Unit tests for the playbook trigger discrimination network.
+
+    Requirements Addressed:
+    - Incident Response Automation (TR-IR-001-5)
+      Location: Technical Specification/4.1 Incident Response Automation
+    """
+
+    def setUp(self):
+        self.network = TriggerNetwork([
+            {'playbook_id': 'phishing-triage', 'priority': 10,
+             'when': {'type': 'phishing', 'severity': {'gte': 3}}},
+            {'playbook_id': 'phishing-low', 'when': {'type': 'phishing', 'severity': {'lt': 3}}},
+            {'playbook_id': 'vip', 'priority': 20,
+             'any': [{'tags': {'contains': 'vip'}}, {'user.department': {'in': ['finance', 'legal']}}]},
+            {'playbook_id': 'malware', 'when': {'type': {'in': ['malware', 'ransomware']}, 'host': {'exists': True}},
+             'expression': "incident['score'] > 0.8"},
+            {'playbook_id': 'external', 'when': {'source': {'matches': '^ext-'}, 'type': {'ne': 'test'}}},
+            {'playbook_id': 'audit', 'priority': -1},
+        ])
+
+    def match(self, incident):
+        return [(m.playbook_id, m.rule) for m in self.network.match(incident)]
+
+    def test_conditions_are_shared_between_triggers(self):
+        # 'type == phishing' is one node used by two triggers.
+        self.assertEqual(self.network.node_count, 9)
+        self.assertEqual(self.network.rule_count, 7)
+
+    def test_matches_are_ordered_by_priority(self):
+        self.assertEqual(self.match({'type': 'phishing', 'severity': 4, 'tags': ['vip']}),
+                         [('vip', 'vip#1'), ('phishing-triage', 'phishing-triage'), ('audit', 'audit')])
+        self.assertEqual(self.match({'type': 'phishing', 'severity': 1, 'user': {'department': 'legal'}}),
+                         [('vip', 'vip#2'), ('phishing-low', 'phishing-low'), ('audit', 'audit')])
+
+    def test_every_test_of_a_rule_must_hold(self):
+        self.assertEqual(self.match({'type': 'ransomware', 'score': 0.9}), [('audit', 'audit')])
+        self.assertEqual(self.match({'type': 'ransomware', 'host': 'h1', 'score': 0.5}), [('audit', 'audit')])
+        self.assertEqual(self.match({'type': 'ransomware', 'host': 'h1', 'score': 0.9})[0], ('malware', 'malware'))
+        self.assertEqual(self.match({'source': 'ext-mail', 'type': 'spam'})[0], ('external', 'external'))
+        self.assertEqual(self.match({'source': 'ext-mail', 'type': 'test'}), [('audit', 'audit')])
+        # Missing fields and values of the wrong type satisfy nothing.
+        self.assertEqual(self.match({'type': 'phishing', 'severity': 'high', 'user': 'bob'}), [('audit', 'audit')])
+
+    def test_repeated_list_items_count_once(self):
+        network = TriggerNetwork([{'playbook_id': 'vip-phishing', 'when': {'tags': {'contains': 'vip'}, 'type': 'phishing'}}])
+        self.assertEqual(network.match({'tags': ['vip', 'vip'], 'type': 'malware'}), [])
+        self.assertEqual([m.playbook_id for m in network.match({'tags': ['vip', 'vip'], 'type': 'phishing'})],
+                         ['vip-phishing'])
+
+    def test_malformed_triggers_are_rejected(self):
+        for trigger in ({'when': {'type': 'phishing'}},
+                        {'playbook_id': 'p', 'when': {'severity': {'between': [1, 3]}}},
+                        {'playbook_id': 'p', 'when': {'severity': {'gte': 'high'}}},
+                        {'playbook_id': 'p', 'when': {'type': {'in': 'phishing'}}},
+                        {'playbook_id': 'p', 'expression': "__import__('os')"}):
+            with self.assertRaises(TriggerError):
+                TriggerNetwork([trigger])
+
+class TestPlaybookAutoUpdate(unittest.TestCase):
+    """
+    Unit tests for incremental playbook auto-updates driven by threat intelligence and policy deltas.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (TR-DPG-004-2, TR-DPG-004-3)
+      Location: Technical Specification/4.4 Dynamic Playbook Generation
+    """
+
+    PLAYBOOKS = {
+        'block': [{'step_number': 1, 'action': 'block_ip', 'parameters': {'ip': '203.0.113.7'}}],
+        'phishing': [{'step_number': 1, 'action': 'quarantine_email', 'technique': 'T1566.001',
+                      'parameters': {'sender': '{{ incident.sender }}'}}],
+        'notify': [{'step_number': 1, 'action': 'notify', 'parameters': {'channels': ['soc', 'evil[.]example']}}],
+    }
+
+    def setUp(self):
+        self.store = ThreatIntelStore()
+        self.index = PlaybookDependencyIndex(':memory:')
+        for playbook_id, steps in self.PLAYBOOKS.items():
+            self.index.update(playbook_id, steps)
+        self.rules = [{'id': 'approval', 'actions': ['block_ip'], 'require': "'approval_id' in parameters"}]
+        self.regenerated = []
+
+        def regenerate(playbook_id):
+            self.regenerated.append(playbook_id)
+            if playbook_id == 'broken':
+                raise ValueError('not compliant')
+            return self.PLAYBOOKS.get(playbook_id)
+
+        self.updater = PlaybookAutoUpdater(self.index, self.store, regenerate, lambda: self.rules)
+        self.updater.run_cycle()
+
+    def tearDown(self):
+        self.index.close()
+
+    def test_dependencies_cover_indicators_techniques_and_actions(self):
+        self.assertEqual(playbook_dependencies(self.PLAYBOOKS['phishing']),
+                         {'action:quarantine_email', 'technique:T1566.001'})
+        self.assertIn('indicator:evil.example', playbook_dependencies(self.PLAYBOOKS['notify']))
+
+    def test_only_playbooks_affected_by_the_delta_are_regenerated(self):
+        self.regenerated.clear()
+        self.store.apply([{'value': '203.0.113.7'}, {'value': 'unrelated.example.org', 'techniques': ['T1566.001']}],
+                         'feed')
+        report = self.updater.run_cycle()
+        self.assertEqual(sorted(self.regenerated), ['block', 'phishing'])
+        self.assertEqual((report['affected'], report['regenerated'], report['skipped']), (2, 2, 1))
+
+        self.regenerated.clear()
+        report = self.updater.run_cycle()
+        self.assertEqual((self.regenerated, report['skipped']), ([], 3))
+
+    def test_policy_changes_affect_the_playbooks_of_their_actions(self):
+        self.regenerated.clear()
+        self.rules = self.rules + [{'id': 'notify-channels', 'actions': ['notify'], 'require': 'True'}]
+        self.updater.run_cycle()
+        self.assertEqual(self.regenerated, ['notify'])
+
+        self.regenerated.clear()
+        self.rules = self.rules + [{'id': 'everything', 'forbid': True, 'when': "action == 'wipe_host'"}]
+        report = self.updater.run_cycle()
+        self.assertTrue(report['full'])
+        self.assertEqual(sorted(self.regenerated), ['block', 'notify', 'phishing'])
+
+    def test_failed_playbooks_are_retried_and_removed_playbooks_dropped(self):
+        self.index.update('broken', [{'step_number': 1, 'action': 'block_ip'}])
+        self.index.update('deleted', [{'step_number': 1, 'action': 'block_ip'}])
+        self.rules = [dict(self.rules[0], severity='warning')]
+        report = self.updater.run_cycle()
+        self.assertEqual((report['failed'], report['removed']), (1, 1))
+        self.assertEqual(report['errors'], {'broken': 'not compliant'})
+        self.assertNotIn('deleted', self.index.playbook_ids())
+
+        self.regenerated.clear()
+        self.updater.run_cycle()
+        self.assertEqual(self.regenerated, ['broken'])
+
+class TestAsyncRuns(unittest.TestCase):
+    """
+    Unit tests for run progress events, cancellation and the registry of asynchronous runs.
+
+    Requirements Addressed:
+    - Incident Response Automation (TR-IR-001-5)
+      Location: Technical Specification/4.1 Incident Response Automation
+    """
+
+    def setUp(self):
+        self.seen_cancellation = threading.Event()
+
+        def wait_for_cancel(parameters, context):
+            if context['cancellation'].wait(5):
+                self.seen_cancellation.set()
+                time.sleep(0.5)  # still busy when the executor abandons the attempt
+            return 'done'
+
+        register_step_handler('test_noop', lambda parameters, context: parameters.get('name'))
+        register_step_handler('test_wait', wait_for_cancel)
+        self.executor = DAGExecutor(max_workers=4)
+
+    def tearDown(self):
+        unregister_step_handler('test_noop')
+        unregister_step_handler('test_wait')
+        self.executor.shutdown()
+
+    def test_listener_receives_step_progress(self):
+        events = []
+        steps = [{'step_number': 1, 'action': 'test_noop', 'parameters': {'name': 'a'}},
+                 {'step_number': 2, 'action': 'test_noop', 'depends_on': [1], 'condition': 'False'}]
+        run = self.executor.run(steps, run_id='r1', listener=events.append)
+        self.assertTrue(run.succeeded)
+        self.assertEqual([(event['event'], event.get('step_number')) for event in events],
+                         [('run_started', None), ('step_started', 1), ('step_finished', 1), ('step_finished', 2),
+                          ('run_finished', None)])
+        self.assertEqual(events[3]['status'], 'skipped')
+        self.assertTrue(all(event['run_id'] == 'r1' for event in events))
+
+    def test_cancellation_stops_the_run_and_reaches_in_flight_steps(self):
+        token = CancellationToken()
+        steps = [{'step_number': 1, 'action': 'test_wait'},
+                 {'step_number': 2, 'action': 'test_noop', 'depends_on': [1]}]
+        timer = threading.Timer(0.1, token.cancel)
+        timer.start()
+        started = time.monotonic()
+        run = self.executor.run(steps, cancellation=token)
+        timer.join()
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(run.status, 'cancelled')
+        self.assertEqual((run.steps[1].status, run.steps[2].status), ('cancelled', 'skipped'))
+        self.assertTrue(self.seen_cancellation.wait(1))
+        self.assertFalse(token.cancel())
+
+    def test_cancelling_a_failed_run_keeps_it_failed(self):
+        def fail(parameters, context):
+            raise ValueError('no such host')
+
+        register_step_handler('test_fail', fail)
+        self.addCleanup(unregister_step_handler, 'test_fail')
+        token = CancellationToken()
+        steps = [{'step_number': 1, 'action': 'test_fail', 'depends_on': []},
+                 {'step_number': 2, 'action': 'test_wait', 'depends_on': []}]
+        timer = threading.Timer(0.2, token.cancel)
+        timer.start()
+        run = self.executor.run(steps, cancellation=token)
+        timer.join()
+        self.assertEqual(run.status, 'failed')
+        self.assertEqual((run.steps[1].status, run.steps[2].status), ('failed', 'cancelled'))
+
+    def test_cancelled_trial_call_gives_the_trial_back(self):
+        register_step_handler('test_wait_trial', lambda parameters, context: context['cancellation'].wait(5) and
+                              time.sleep(0.5), integration='test_trial')
+        self.addCleanup(unregister_step_handler, 'test_wait_trial')
+        breaker = self.executor.breakers.get('test_trial')
+        breaker.reset_seconds = 0
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        token = CancellationToken()
+        timer = threading.Timer(0.1, token.cancel)
+        timer.start()
+        run = self.executor.run([{'step_number': 1, 'action': 'test_wait_trial'}], cancellation=token)
+        timer.join()
+        self.assertEqual(run.steps[1].status, 'cancelled')
+        # The abandoned trial recorded no outcome; the breaker admits the next trial call.
+        self.assertTrue(breaker.acquire())
+
+    def test_registry_tracks_status_events_and_cancellation(self):
+        registry = RunRegistry(max_runs=2)
+        record = registry.create('r1', 'containment')
+        future = Future()
+        registry.bind(record, future)
+        self.assertEqual(record.to_dict()['status'], 'queued')
+
+        record.publish({'event': 'run_started', 'steps': 2})
+        record.publish({'event': 'step_finished', 'step_number': 1})
+        self.assertEqual(record.to_dict()['progress'], {'steps_finished': 1, 'steps_total': 2})
+        future.set_result(None)
+        self.assertEqual((record.status, record.finished), ('failed', True))
+        self.assertEqual([number for number, _ in record.events(after=1)], [2])
+
+        queued = registry.create('r2', 'containment')
+        registry.bind(queued, Future())
+        self.assertTrue(queued.cancel())
+        self.assertEqual(queued.status, 'cancelled')
+        self.assertEqual([event['event'] for _, event in queued.events()], ['run_finished'])
+        self.assertFalse(queued.cancel())
+
+        registry.create('r3', 'containment')
+        self.assertIsNone(registry.get('r1'))
+        self.assertIsNotNone(registry.get('r3'))
+
+
+def sandbox_digest(parameters, context):
+    """Sandboxed test handler: reports its process and the payload it received."""
+    payload = parameters['payload']
+    return {'pid': os.getpid(), 'size': len(payload), 'type': type(payload).__name__,
+            'tail': payload[-3:], 'step_number': context['step_number']}
+
+
+def sandbox_spin(parameters, context):
+    """Sandboxed test handler: burns CPU until its limit stops it."""
+    while True:
+        pass
+
+
+def sandbox_allocate(parameters, context):
+    """Sandboxed test handler: allocates more memory than its worker may use."""
+    return len(bytearray(parameters['megabytes'] * 1024 * 1024))
+
+
+def sandbox_crash(parameters, context):
+    """Sandboxed test handler: kills its worker process."""
+    os._exit(1)
+
+
+class TestStepSandbox(unittest.TestCase):
+    """
+    Tests the process-pool sandbox of CPU-heavy and untrusted step handlers.
+
+    Requirements Addressed:
+    - Incident Response Automation (TR-IR-001-5)
+      Location: Technical Specification/4.1 Incident Response Automation
+    """
+
+    def setUp(self):
+        # Forked workers keep the test quick; the engine defaults to a fork server.
+        self.sandbox = SandboxPool(max_workers=2, cpu_seconds=1, memory_mb=2048, shared_memory_threshold=1024,
+                                   start_method='fork')
+        self.executor = DAGExecutor(max_workers=4, sandbox=self.sandbox)
+
+    def tearDown(self):
+        for action in ('test_digest', 'test_spin', 'test_allocate', 'test_crash'):
+            unregister_step_handler(action)
+        self.executor.shutdown()
+        self.sandbox.shutdown()
+
+    def test_sandboxed_steps_run_in_worker_processes_with_shared_payloads(self):
+        register_step_handler('test_digest', sandbox_digest, sandbox=True)
+        steps = [{'step_number': 1, 'action': 'test_digest', 'parameters': {'payload': 'x' * 5000 + 'end'}},
+                 {'step_number': 2, 'action': 'test_digest', 'parameters': {'payload': b'small'}}]
+        run = self.executor.run(steps)
+        self.assertTrue(run.succeeded, run.to_dict())
+        large, small = run.steps[1].result, run.steps[2].result
+        self.assertNotEqual(large['pid'], os.getpid())
+        self.assertEqual((large['size'], large['type'], large['tail'], large['step_number']), (5003, 'str', 'end', 1))
+        self.assertEqual((small['size'], small['type']), (5, 'bytes'))
+        self.assertEqual(self.sandbox.stats()['shared_bytes'], 5003)
+
+    def test_limits_fail_the_call_and_the_pool_recovers(self):
+        register_step_handler('test_spin', sandbox_spin, sandbox=True)
+        register_step_handler('test_allocate', sandbox_allocate, sandbox=True)
+        register_step_handler('test_crash', sandbox_crash, sandbox=True)
+        register_step_handler('test_digest', sandbox_digest, sandbox=True)
+        context = {'step_number': 1}
+
+        with self.assertRaises(SandboxLimitError):
+            self.sandbox.call(sandbox_spin, {}, context)
+        with self.assertRaises(MemoryError):
+            self.sandbox.call(sandbox_allocate, {'megabytes': 4096}, context)
+        with self.assertRaises(SandboxError):
+            self.sandbox.call(sandbox_crash, {}, context)
+        self.assertEqual(self.sandbox.call(sandbox_digest, {'payload': b'ok'}, context)['size'], 2)
+        stats = self.sandbox.stats()
+        self.assertEqual((stats['failed'], stats['limit_exceeded'], stats['worker_crashes']), (3, 1, 1))
+
+        run = self.executor.run([{'step_number': 1, 'action': 'test_spin'}])
+        self.assertEqual(run.status, 'failed')
+        self.assertIn('SandboxLimitError', run.steps[1].error)
+
+    def test_sandboxed_handlers_must_be_importable(self):
+        with self.assertRaises(ValueError):
+            register_step_handler('test_digest', lambda parameters, context: None, sandbox=True)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,430 @@
+"""
+Local threat-intelligence store for the playbook engine.
+
+Indicators from the configured `threat_intelligence_sources` are kept in memory and refreshed in the
+background every `auto_update_interval_minutes`, so indicator checks during playbook creation and
+runs are dictionary lookups rather than calls to the feeds. Lookups first consult a Bloom filter:
+the vast majority of values seen during a run are not known-bad, and the filter rejects those
+without touching the (much larger) indicator index.
+
+Refreshes are incremental. Sources are either local JSON Lines files (a path or file:// URL), read
+from the byte offset reached by the previous refresh, or HTTP(S) feeds queried with the cursor
+returned by the previous response (`?since=<cursor>`, plus `If-None-Match` on the ETag). Each feed
+entry is an object with a `value` and optionally `type`, `confidence`, `techniques` (MITRE ATT&CK
+technique ids) and `action` ('add', the default, or 'remove'); HTTP feeds answer with
+`{"cursor": ..., "indicators": [...]}`.
+
+Every effective change (an indicator added, removed or changed, not merely re-sent by a feed) is
+appended to a bounded change log with a sequence number, so consumers such as the playbook
+auto-updater can ask for the delta since the cursor they last saw instead of rescanning the store.
+
+Requirements Addressed:
+- Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+  - TR-DPG-004-2: Incorporate real-time threat intelligence into playbook creation.
+"""
+
+import hashlib  # Bloom filter hash functions. (builtin)
+import json  # Parses feed entries. (builtin)
+import logging  # Reports malformed feed entries and failing sources. (builtin)
+import math  # Bloom filter sizing. (builtin)
+import os  # Stats local feed files. (builtin)
+import threading  # Background refresh and update serialization. (builtin)
+import time  # Refresh timestamps. (builtin)
+import urllib.parse  # Builds incremental feed URLs. (builtin)
+import urllib.request  # Fetches HTTP feeds. (builtin)
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+from urllib.error import HTTPError
+
+# Default Bloom filter sizing; the filter is rebuilt larger when the store outgrows it.
+DEFAULT_BLOOM_CAPACITY = 100000
+DEFAULT_BLOOM_ERROR_RATE = 0.001
+
+# Default time between background refreshes.
+DEFAULT_REFRESH_INTERVAL_SECONDS = 15 * 60
+
+# Timeout of HTTP feed requests.
+FEED_TIMEOUT_SECONDS = 30
+
+# Default number of indicator changes kept for delta consumers.
+DEFAULT_CHANGE_LOG_SIZE = 100000
+
+# Removed indicators stay set in the Bloom filter; it is rebuilt when they exceed this share.
+_STALE_BLOOM_RATIO = 0.25
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_indicator(value: Any) -> str:
+    """
+    Returns the lookup form of an indicator: trimmed, lower-cased and refanged ('hxxp', '[.]').
+    """
+    text = str(value).strip().lower()
+    return text.replace('[.]', '.').replace('(.)', '.').replace('hxxp', 'http')
+
+
+class BloomFilter:
+    """
+    Bloom filter over strings, using double hashing of a single BLAKE2b digest.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_BLOOM_CAPACITY, error_rate: float = DEFAULT_BLOOM_ERROR_RATE):
+        """
+        Sizes the filter for the given number of values and false-positive rate.
+        """
+        self.capacity = max(1, int(capacity))
+        self.error_rate = error_rate
+        self.bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.bits / self.capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self._array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        array = self._array
+        return all(array[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+@dataclass(frozen=True)
+class Indicator:
+    """
+    A known indicator of compromise.
+    """
+    value: str
+    type: Optional[str]
+    source: str
+    confidence: Optional[float]
+    updated_at: float
+    techniques: Tuple[str, ...] = ()
+
+    def to_dict(self) -> dict:
+        return {'value': self.value, 'type': self.type, 'source': self.source,
+                'confidence': self.confidence, 'updated_at': self.updated_at, 'techniques': list(self.techniques)}
+
+
+@dataclass(frozen=True)
+class IntelDelta:
+    """
+    The indicators and techniques changed since a cursor of the change log.
+
+    `complete` is False when changes older than the log were dropped: the consumer must then treat
+    everything as changed.
+    """
+    cursor: int
+    indicators: FrozenSet[str]
+    techniques: FrozenSet[str]
+    complete: bool = True
+
+    def __bool__(self) -> bool:
+        return bool(self.indicators or self.techniques) or not self.complete
+
+
+class _FeedState:
+    """
+    Incremental position of a source: file offset, or HTTP cursor and ETag.
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.cursor = None
+        self.etag = None
+        self.last_refresh = None
+        self.last_error = None
+
+
+class ThreatIntelStore:
+    """
+    In-memory indicator index with a Bloom filter prefilter, refreshed incrementally from feeds.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+      - TR-DPG-004-2: Incorporate real-time threat intelligence into playbook creation.
+    """
+
+    def __init__(self, sources: Sequence[str] = (), capacity: int = DEFAULT_BLOOM_CAPACITY,
+                 error_rate: float = DEFAULT_BLOOM_ERROR_RATE, change_log_size: int = DEFAULT_CHANGE_LOG_SIZE):
+        """
+        Initializes an empty store; call refresh() or start() to load the sources.
+
+        Parameters:
+            sources (Sequence[str]): Feed file paths or URLs.
+            capacity (int): Initial Bloom filter capacity.
+            error_rate (float): Bloom filter false-positive rate.
+            change_log_size (int): Number of indicator changes kept for changes_since().
+        """
+        self.sources = list(sources)
+        self.error_rate = error_rate
+        self._indicators: Dict[str, Indicator] = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._removed = 0
+        # (sequence number, indicator, techniques of the old and new indicator)
+        self._changes: deque = deque(maxlen=max(1, int(change_log_size)))
+        self._sequence = 0
+        self._states = {source: _FeedState() for source in self.sources}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def lookup(self, value: Any) -> Optional[Indicator]:
+        """
+        Returns the indicator matching a value, or None; most unknown values are rejected by the
+        Bloom filter alone.
+        """
+        key = normalize_indicator(value)
+        if key not in self._bloom:
+            return None
+        return self._indicators.get(key)
+
+    def lookup_many(self, values: Iterable[Any]) -> Dict[str, Indicator]:
+        """
+        Returns the matching indicators of the given values, keyed by the value as given.
+        """
+        matches = {}
+        for value in values:
+            indicator = self.lookup(value)
+            if indicator is not None:
+                matches[str(value)] = indicator
+        return matches
+
+    def __contains__(self, value: Any) -> bool:
+        return self.lookup(value) is not None
+
+    def __len__(self) -> int:
+        return len(self._indicators)
+
+    def apply(self, entries: Iterable[dict], source: str) -> int:
+        """
+        Applies feed entries (additions and removals) and returns how many were applied.
+
+        Malformed entries (a non-numeric confidence, techniques that are not a string or a list)
+        are skipped one by one, so they do not hold back the rest of the feed, and reported in a
+        single warning.
+        """
+        now = time.time()
+        applied = 0
+        malformed = []
+        with self._lock:
+            for entry in entries:
+                if not isinstance(entry, dict) or entry.get('value') in (None, ''):
+                    continue
+                key = normalize_indicator(entry['value'])
+                if entry.get('action', 'add') == 'remove':
+                    previous = self._indicators.pop(key, None)
+                    if previous is not None:
+                        self._removed += 1
+                        self._log_change(key, previous.techniques)
+                else:
+                    try:
+                        confidence = entry.get('confidence')
+                        confidence = float(confidence) if confidence is not None else None
+                        if confidence is not None and not math.isfinite(confidence):
+                            raise ValueError(f'confidence {confidence} is not finite')
+                        techniques = entry.get('techniques') or ()
+                        techniques = tuple(sorted({str(technique).upper() for technique in
+                                                   ((techniques,) if isinstance(techniques, str) else techniques)}))
+                    except (TypeError, ValueError) as exc:
+                        malformed.append((key, exc))
+                        continue
+                    indicator = Indicator(key, entry.get('type'), source, confidence, now, techniques)
+                    previous = self._indicators.get(key)
+                    if previous is None:
+                        # Set the filter bits first, so concurrent lookups never miss an indexed value.
+                        self._bloom.add(key)
+                    if previous is None or (previous.type, previous.source, previous.confidence,
+                                            previous.techniques) != (indicator.type, source, indicator.confidence,
+                                                                     techniques):
+                        self._log_change(key, techniques + (previous.techniques if previous else ()))
+                    self._indicators[key] = indicator
+                applied += 1
+            if len(self._indicators) > self._bloom.capacity or self._removed > _STALE_BLOOM_RATIO * self._bloom.capacity:
+                self._rebuild_bloom()
+        if malformed:
+            logger.warning('Skipped %d malformed threat intelligence entries from %s, first %r: %s',
+                           len(malformed), source, *malformed[0])
+        return applied
+
+    def _log_change(self, key: str, techniques: Tuple[str, ...]) -> None:
+        """
+        Appends an indicator change to the change log. Called with the lock held.
+        """
+        self._sequence += 1
+        self._changes.append((self._sequence, key, techniques))
+
+    def changes_since(self, cursor: int = 0) -> IntelDelta:
+        """
+        Returns the indicators and techniques changed after a cursor, and the cursor to pass next
+        time; a cursor of 0 asks for everything since the store was created.
+        """
+        with self._lock:
+            changes = list(self._changes)
+            sequence = self._sequence
+        # Changes after the cursor were dropped if the oldest kept one is not the one right after it.
+        complete = cursor >= sequence or (bool(changes) and changes[0][0] <= cursor + 1)
+        indicators, techniques = set(), set()
+        for number, key, key_techniques in changes:
+            if number > cursor:
+                indicators.add(key)
+                techniques.update(key_techniques)
+        return IntelDelta(sequence, frozenset(indicators), frozenset(techniques), complete)
+
+    def _drop_source(self, source: str) -> None:
+        with self._lock:
+            for key in [key for key, indicator in self._indicators.items() if indicator.source == source]:
+                self._log_change(key, self._indicators.pop(key).techniques)
+                self._removed += 1
+
+    def _rebuild_bloom(self) -> None:
+        """
+        Builds a filter sized for twice the current indicators and swaps it in. Called with the lock held.
+        """
+        bloom = BloomFilter(max(self._bloom.capacity, 2 * len(self._indicators)), self.error_rate)
+        for key in self._indicators:
+            bloom.add(key)
+        self._bloom = bloom
+        self._removed = 0
+
+    def _pull_file(self, source: str, state: _FeedState) -> Tuple[List[dict], Dict[str, Any]]:
+        """
+        Reads the complete lines appended since the previous refresh. Returns the entries and the
+        new offset, which the caller stores only once the entries have been applied.
+        """
+        path = source[len('file://'):] if source.startswith('file://') else source
+        size = os.stat(path).st_size
+        if size < state.offset:
+            # The file was truncated or rotated: reload it from the start.
+            self._drop_source(source)
+            state.offset = 0
+        if size == state.offset:
+            return [], {}
+        with open(path, 'rb') as f:
+            f.seek(state.offset)
+            data = f.read(size - state.offset)
+        # Only consume complete lines; a partially written last line is read on the next refresh.
+        end = data.rfind(b'\n') + 1
+        entries = []
+        for line in data[:end].splitlines():
+            line = line.strip()
+            if line:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+        return entries, {'offset': state.offset + end}
+
+    def _pull_http(self, source: str, state: _FeedState) -> Tuple[List[dict], Dict[str, Any]]:
+        """
+        Queries the feed for the changes since the previous cursor. Returns the entries and the
+        new cursor and ETag, which the caller stores only once the entries have been applied.
+        """
+        url = source
+        if state.cursor is not None:
+            separator = '&' if urllib.parse.urlparse(source).query else '?'
+            url = f'{source}{separator}{urllib.parse.urlencode({"since": state.cursor})}'
+        request = urllib.request.Request(url, headers={'Accept': 'application/json'})
+        if state.etag:
+            request.add_header('If-None-Match', state.etag)
+        try:
+            with urllib.request.urlopen(request, timeout=FEED_TIMEOUT_SECONDS) as response:
+                payload = json.loads(response.read().decode('utf-8'))
+                etag = response.headers.get('ETag')
+        except HTTPError as exc:
+            if exc.code == 304:
+                return [], {}
+            raise
+        if isinstance(payload, list):
+            return payload, {'etag': etag}
+        return payload.get('indicators') or [], {'etag': etag, 'cursor': payload.get('cursor', state.cursor)}
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Pulls the changes of every source since the previous refresh.
+
+        A failing source keeps its indicators and is retried on the next refresh from the same
+        position: the offset or cursor of a source only advances once its entries are applied.
+
+        Returns:
+            dict: The number of entries applied per source.
+        """
+        applied = {}
+        for source in self.sources:
+            state = self._states[source]
+            try:
+                if source.startswith(('http://', 'https://')):
+                    entries, position = self._pull_http(source, state)
+                else:
+                    entries, position = self._pull_file(source, state)
+                applied[source] = self.apply(entries, source)
+                for name, value in position.items():
+                    setattr(state, name, value)
+                state.last_refresh = time.time()
+                state.last_error = None
+            except (OSError, ValueError, TypeError, AttributeError) as exc:
+                logger.warning('Refreshing threat intelligence source %s failed: %s', source, exc)
+                state.last_error = str(exc)
+                applied[source] = 0
+        return applied
+
+    def start(self, interval_seconds: float = DEFAULT_REFRESH_INTERVAL_SECONDS) -> None:
+        """
+        Starts refreshing in a background thread, immediately and then every interval.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, args=(float(interval_seconds),),
+                                            name='threat-intel-refresh', daemon=True)
+            self._thread.start()
+
+    def _run(self, interval_seconds: float) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                # Keep refreshing: the store serves the indicators it has until the feeds recover.
+                logger.exception('Threat intelligence refresh failed')
+            self._stop.wait(interval_seconds)
+
+    def stop(self) -> None:
+        """
+        Stops the background refresh.
+        """
+        self._stop.set()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Returns the indicator count and the refresh state of every source, for monitoring.
+        """
+        return {
+            'indicators': len(self._indicators),
+            'sources': {source: {'last_refresh': state.last_refresh, 'last_error': state.last_error}
+                        for source, state in self._states.items()},
+        }
+
+
+_store: Optional[ThreatIntelStore] = None
+_store_lock = threading.Lock()
+
+
+def get_threat_intel_store(sources: Sequence[str] = (), interval_seconds: float = DEFAULT_REFRESH_INTERVAL_SECONDS,
+                           capacity: int = DEFAULT_BLOOM_CAPACITY) -> ThreatIntelStore:
+    """
+    Returns the process-wide threat-intelligence store, creating it for the given sources and
+    starting its background refresh on first use.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ThreatIntelStore(sources, capacity)
+            _store.start(interval_seconds)
+        return _store
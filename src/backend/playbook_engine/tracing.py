@@ -0,0 +1,282 @@
+"""
+In-process tracing of playbook runs.
+
+Every run is a trace (its id is the run id) made of a root span for the run and one child span per
+step, with the step's action, integration, outcome, attempts, the time it waited between becoming
+ready and its handler starting (worker pool and integration caps), the size of its parameters and
+result, and an event per failed attempt. Spans are built once, when the step or run finishes, and
+appended to a bounded ring buffer, so recording costs a few microseconds and tracing can stay on
+in production; the oldest spans are dropped when the buffer is full.
+
+Traces are exported as OTLP/JSON (the OpenTelemetry protocol's JSON encoding, as read by
+OpenTelemetry collectors and most tracing back-ends), and summarized as a run timeline: the steps
+ordered by start time with their offsets and durations, also rendered as a text chart.
+
+Requirements Addressed:
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import hashlib  # Derives trace ids from run ids that are not 128-bit hex. (builtin)
+import json  # Payload sizes and OTLP/JSON export. (builtin)
+import os  # Creates export directories. (builtin)
+import random  # Span ids. (builtin)
+import threading  # Guards the process-wide collector. (builtin)
+from collections import deque
+from typing import Any, Iterable, List, Optional
+
+# Default number of spans kept in memory.
+DEFAULT_MAX_SPANS = 100000
+
+# OTLP span kinds and status codes.
+SPAN_KIND_INTERNAL = 1
+STATUS_CODE_OK = 1
+STATUS_CODE_ERROR = 2
+
+# Name of the instrumentation scope in exported traces.
+SCOPE_NAME = 'playbook_engine'
+
+_random = random.Random()
+
+# Reused encoder: building one per call costs more than encoding a typical payload.
+_encoder = json.JSONEncoder(default=str, separators=(',', ':'), check_circular=False)
+
+
+def trace_id_for(run_id: str) -> str:
+    """
+    Returns the trace id of a run: the run id itself when it is 32 hex digits, as generated run
+    ids are, else a hash of it.
+    """
+    run_id = str(run_id)
+    if len(run_id) == 32:
+        try:
+            int(run_id, 16)
+            return run_id.lower()
+        except ValueError:
+            pass
+    return hashlib.sha256(run_id.encode('utf-8')).hexdigest()[:32]
+
+
+def new_span_id() -> str:
+    """
+    Returns a random 64-bit span id as 16 hex digits.
+    """
+    return '%016x' % _random.getrandbits(64)
+
+
+def payload_size(value: Any) -> int:
+    """
+    Returns the size in bytes of a value serialized as JSON, or -1 if it cannot be serialized.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    try:
+        return len(_encoder.encode(value))
+    except (TypeError, ValueError, RecursionError):
+        return -1
+
+
+class Span:
+    """
+    A finished span; times are nanoseconds since the epoch.
+    """
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'start_ns', 'end_ns', 'attributes', 'events', 'error')
+
+    def __init__(self, trace_id: str, span_id: str, parent_id: Optional[str], name: str, start_ns: int,
+                 end_ns: int, attributes: dict, events: Optional[list] = None, error: Optional[str] = None):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.attributes = attributes
+        self.events = events or ()
+        self.error = error
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_otlp(self) -> dict:
+        """
+        Returns the span in the OTLP/JSON encoding.
+        """
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': SPAN_KIND_INTERNAL,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': _otlp_attributes(self.attributes),
+            'status': ({'code': STATUS_CODE_ERROR, 'message': self.error} if self.error is not None
+                       else {'code': STATUS_CODE_OK}),
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.events:
+            span['events'] = [{'timeUnixNano': str(time_ns), 'name': name, 'attributes': _otlp_attributes(attributes)}
+                              for time_ns, name, attributes in self.events]
+        return span
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes: dict) -> List[dict]:
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class TraceCollector:
+    """
+    Bounded in-memory collector of finished spans.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+    """
+
+    def __init__(self, max_spans: int = DEFAULT_MAX_SPANS, payload_sizes: bool = True):
+        """
+        Initializes the collector.
+
+        Parameters:
+            max_spans (int): Number of spans kept; the oldest are dropped beyond it.
+            payload_sizes (bool): Whether step spans record the serialized size of parameters and results.
+        """
+        # Appending to a deque is atomic, so recording needs no lock.
+        self._spans: deque = deque(maxlen=max(1, int(max_spans)))
+        self.payload_sizes = payload_sizes
+
+    def record(self, span: Span) -> None:
+        """
+        Adds a finished span.
+        """
+        self._spans.append(span)
+
+    def spans(self, run_id: Optional[str] = None) -> List[Span]:
+        """
+        Returns the collected spans, or those of one run, oldest first.
+        """
+        spans = list(self._spans)
+        if run_id is None:
+            return spans
+        trace_id = trace_id_for(run_id)
+        return [span for span in spans if span.trace_id == trace_id]
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def to_otlp(self, run_id: Optional[str] = None, resource: Optional[dict] = None) -> dict:
+        """
+        Returns the collected spans, or those of one run, as an OTLP/JSON export request.
+        """
+        return to_otlp(self.spans(run_id), resource)
+
+    def export_otlp(self, path: str, run_id: Optional[str] = None, resource: Optional[dict] = None) -> int:
+        """
+        Writes the collected spans, or those of one run, to an OTLP/JSON file.
+
+        Returns:
+            int: The number of spans written.
+        """
+        spans = self.spans(run_id)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(to_otlp(spans, resource), f)
+        return len(spans)
+
+    def timeline(self, run_id: str) -> Optional[dict]:
+        """
+        Returns the timeline of a run, or None if none of its spans are collected.
+        """
+        return build_timeline(self.spans(run_id))
+
+
+def to_otlp(spans: Iterable[Span], resource: Optional[dict] = None) -> dict:
+    """
+    Returns spans as an OTLP/JSON export request (ExportTraceServiceRequest).
+    """
+    return {'resourceSpans': [{
+        'resource': {'attributes': _otlp_attributes(dict({'service.name': SCOPE_NAME}, **(resource or {})))},
+        'scopeSpans': [{'scope': {'name': SCOPE_NAME}, 'spans': [span.to_otlp() for span in spans]}],
+    }]}
+
+
+def build_timeline(spans: List[Span]) -> Optional[dict]:
+    """
+    Summarizes the spans of a run as a timeline: its steps ordered by start time, with offsets from
+    the start of the run in milliseconds.
+    """
+    if not spans:
+        return None
+    root = next((span for span in spans if span.parent_id is None), None)
+    origin = root.start_ns if root is not None else min(span.start_ns for span in spans)
+    end = root.end_ns if root is not None else max(span.end_ns for span in spans)
+    steps = sorted((span for span in spans if span is not root), key=lambda span: (span.start_ns, span.end_ns))
+    return {
+        'trace_id': spans[0].trace_id,
+        'run_id': root.attributes.get('run.id') if root is not None else None,
+        'playbook_id': root.attributes.get('playbook.id') if root is not None else None,
+        'status': root.attributes.get('run.status') if root is not None else None,
+        'duration_ms': round((end - origin) / 1e6, 3),
+        'steps': [
+            {
+                'step_number': span.attributes.get('step.number'),
+                'action': span.attributes.get('step.action'),
+                'status': span.attributes.get('step.status'),
+                'start_ms': round((span.start_ns - origin) / 1e6, 3),
+                'duration_ms': round(span.duration_ms, 3),
+                'queue_wait_ms': span.attributes.get('step.queue_wait_ms'),
+                'attempts': span.attributes.get('step.attempts'),
+                'error': span.error,
+            }
+            for span in steps
+        ],
+    }
+
+
+def render_timeline(timeline: dict, width: int = 60) -> str:
+    """
+    Renders a timeline as a text chart, one line per step.
+    """
+    total = max(timeline['duration_ms'], 1e-3)
+    run_id = timeline.get('run_id') or timeline['trace_id']
+    lines = [f"run {run_id} {timeline.get('status') or ''} {timeline['duration_ms']:.1f} ms".replace('  ', ' ')]
+    label_width = max((len(f"{step['step_number']} {step['action']}") for step in timeline['steps']), default=0)
+    for step in timeline['steps']:
+        offset = int(step['start_ms'] / total * width)
+        length = max(1, int(step['duration_ms'] / total * width))
+        bar = ' ' * offset + ('#' if step['status'] != 'failed' else '!') * min(length, width - offset or 1)
+        label = f"{step['step_number']} {step['action']}".ljust(label_width)
+        lines.append(f"{label} |{bar.ljust(width)}| {step['start_ms']:.1f} +{step['duration_ms']:.1f} ms "
+                     f"{step['status']}")
+    return '\n'.join(lines)
+
+
+_collector: Optional[TraceCollector] = None
+_collector_lock = threading.Lock()
+
+
+def get_trace_collector(max_spans: int = DEFAULT_MAX_SPANS, payload_sizes: bool = True) -> TraceCollector:
+    """
+    Returns the process-wide trace collector, creating it with the given capacity on first use.
+    """
+    global _collector
+    with _collector_lock:
+        if _collector is None:
+            _collector = TraceCollector(max_spans, payload_sizes)
+        return _collector
@@ -0,0 +1,342 @@
+"""
+Trigger matching: selects the playbooks that apply to an incident.
+
+Playbook triggers are declarative, configured under `playbook_triggers`:
+
+    {'playbook_id': 'phishing-triage',
+     'priority': 10,                                    # higher first when several playbooks match
+     'when': {'type': 'phishing',                       # equality
+              'severity': {'gte': 3},                   # comparisons: gt, gte, lt, lte, ne
+              'source.vendor': {'in': ['proofpoint', 'mimecast']},
+              'tags': {'contains': 'vip'},              # list fields
+              'reporter': {'exists': True}},
+     'any': [{...}, {...}],                             # alternatives to 'when' (any may match)
+     'expression': "incident['score'] > 0.8"}           # optional residual check (expressions.py)
+
+Fields are dotted paths into the incident. All the tests of a 'when' must hold; with 'any', each
+alternative is a separate rule and the trigger matches if one of them does.
+
+Rather than evaluating every trigger against every incident, the triggers are compiled into a
+discrimination network in the manner of Rete's alpha network. Each distinct test (field, operator,
+value) is one node shared by all the rules using it. Equality, `in` and `contains` tests are
+hashed: for each field, one dictionary lookup of the incident's value finds every node it
+satisfies. Comparisons are kept sorted by threshold per field, so the satisfied ones are found by
+bisection. A rule matches when its count of satisfied nodes reaches its number of tests, so the
+cost of matching an incident grows with the tests it actually satisfies, not with the number of
+playbooks. Residual expressions are only evaluated for rules whose tests all hold.
+
+Requirements Addressed:
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - Automate incident response using AI-driven workflows.
+- Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+  - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+"""
+
+import bisect  # Finds satisfied comparison thresholds. (builtin)
+import re  # Regular expression tests. (builtin)
+import threading  # Guards the process-wide network. (builtin)
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+
+# Internal dependencies
+from .expressions import CompiledExpression, ExpressionError  # Residual trigger expressions.
+
+# Operators of field tests.
+HASHED_OPERATORS = ('eq', 'in', 'contains')
+RANGE_OPERATORS = ('gt', 'gte', 'lt', 'lte')
+OTHER_OPERATORS = ('ne', 'not_in', 'exists', 'matches')
+OPERATORS = HASHED_OPERATORS + RANGE_OPERATORS + OTHER_OPERATORS
+
+_MISSING = object()
+
+
+class TriggerError(ValueError):
+    """
+    Raised when a playbook trigger is malformed.
+    """
+
+
+@dataclass(frozen=True)
+class TriggerMatch:
+    """
+    A playbook whose trigger matches an incident.
+    """
+    playbook_id: str
+    priority: int
+    rule: str
+
+    def to_dict(self) -> dict:
+        return {'playbook_id': self.playbook_id, 'priority': self.priority, 'rule': self.rule}
+
+
+class _Rule:
+    """
+    One conjunction of tests of a trigger.
+    """
+
+    __slots__ = ('id', 'playbook_id', 'priority', 'size', 'expression')
+
+    def __init__(self, rule_id: str, playbook_id: str, priority: int, size: int,
+                 expression: Optional[CompiledExpression]):
+        self.id = rule_id
+        self.playbook_id = playbook_id
+        self.priority = priority
+        self.size = size
+        self.expression = expression
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+        return True
+    except TypeError:
+        return False
+
+
+def _resolve(incident: Mapping, path: Tuple[str, ...]) -> Any:
+    value = incident
+    for key in path:
+        if not isinstance(value, Mapping):
+            return _MISSING
+        value = value.get(key, _MISSING)
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+class _FieldIndex:
+    """
+    The tests of one incident field: hashed equality and membership, sorted comparisons and the rest.
+    """
+
+    __slots__ = ('path', 'equals', 'contains', 'ranges', 'others')
+
+    def __init__(self, path: Tuple[str, ...]):
+        self.path = path
+        self.equals: Dict[Hashable, List[int]] = {}
+        self.contains: Dict[Hashable, List[int]] = {}
+        # operator -> (sorted thresholds, nodes in the same order)
+        self.ranges: Dict[str, Tuple[list, list]] = {}
+        self.others: List[Tuple[int, str, Any]] = []
+
+    def satisfied(self, value: Any, out: List[int]) -> None:
+        """
+        Appends the nodes satisfied by the field's value (or _MISSING) to out.
+        """
+        if value is not _MISSING:
+            if _hashable(value):
+                out.extend(self.equals.get(value, ()))
+            if isinstance(value, (list, tuple, set, frozenset)) and self.contains:
+                # Each distinct item once: a repeated item must not count a node twice towards a rule.
+                for item in {item for item in value if _hashable(item)}:
+                    out.extend(self.contains.get(item, ()))
+            if self.ranges and isinstance(value, (int, float)) and not isinstance(value, bool):
+                for operator, (thresholds, nodes) in self.ranges.items():
+                    if operator == 'gt':
+                        out.extend(nodes[:bisect.bisect_left(thresholds, value)])
+                    elif operator == 'gte':
+                        out.extend(nodes[:bisect.bisect_right(thresholds, value)])
+                    elif operator == 'lt':
+                        out.extend(nodes[bisect.bisect_right(thresholds, value):])
+                    else:
+                        out.extend(nodes[bisect.bisect_left(thresholds, value):])
+        for node, operator, operand in self.others:
+            if operator == 'exists':
+                if (value is not _MISSING and value is not None) == operand:
+                    out.append(node)
+            elif value is _MISSING:
+                continue
+            elif operator == 'ne':
+                if value != operand:
+                    out.append(node)
+            elif operator == 'not_in':
+                if not _hashable(value) or value not in operand:
+                    out.append(node)
+            elif isinstance(value, str) and operand.search(value):
+                out.append(node)
+
+
+class TriggerNetwork:
+    """
+    Playbook triggers compiled into a shared discrimination network.
+
+    Requirements Addressed:
+    - Incident Response Automation (Technical Specification/4.1 Incident Response Automation)
+      - TR-IR-001-5: Ensure scalability to handle peak incident loads without degradation.
+    """
+
+    def __init__(self, triggers: Sequence[Mapping] = ()):
+        """
+        Compiles the triggers.
+
+        Raises:
+            TriggerError: If a trigger is malformed.
+        """
+        self._fields: Dict[Tuple[str, ...], _FieldIndex] = {}
+        self._nodes: Dict[Tuple[Tuple[str, ...], str, Any], int] = {}
+        self._node_rules: List[List[int]] = []
+        self._rules: List[_Rule] = []
+        self._unconditional: List[int] = []
+        for index, trigger in enumerate(triggers):
+            self.add(trigger, index)
+        self._finish_ranges()
+
+    @property
+    def node_count(self) -> int:
+        """
+        Number of distinct tests in the network.
+        """
+        return len(self._node_rules)
+
+    @property
+    def rule_count(self) -> int:
+        return len(self._rules)
+
+    def add(self, trigger: Mapping, index: int = 0) -> None:
+        """
+        Adds a trigger to the network.
+
+        Raises:
+            TriggerError: If the trigger is malformed.
+        """
+        if not isinstance(trigger, Mapping) or not trigger.get('playbook_id'):
+            raise TriggerError(f'Trigger {index + 1} must be an object with a playbook_id.')
+        playbook_id = str(trigger['playbook_id'])
+        try:
+            priority = int(trigger.get('priority', 0))
+        except (TypeError, ValueError):
+            raise TriggerError(f"Trigger of '{playbook_id}' has an invalid priority.") from None
+        expression = None
+        if trigger.get('expression'):
+            try:
+                expression = CompiledExpression(trigger['expression'])
+            except ExpressionError as exc:
+                raise TriggerError(f"Trigger of '{playbook_id}': {exc}") from None
+        alternatives = trigger.get('any') or [trigger.get('when') or {}]
+        for position, conditions in enumerate(alternatives):
+            if not isinstance(conditions, Mapping):
+                raise TriggerError(f"Trigger of '{playbook_id}' has a malformed condition.")
+            nodes = set()
+            for field, test in conditions.items():
+                tests = test.items() if isinstance(test, Mapping) else (('eq', test),)
+                for operator, operand in tests:
+                    nodes.add(self._node(playbook_id, str(field), operator, operand))
+            rule_id = f'{playbook_id}#{position + 1}' if len(alternatives) > 1 else playbook_id
+            rule = len(self._rules)
+            self._rules.append(_Rule(rule_id, playbook_id, priority, len(nodes), expression))
+            for node in nodes:
+                self._node_rules[node].append(rule)
+            if not nodes:
+                self._unconditional.append(rule)
+
+    def _node(self, playbook_id: str, field: str, operator: str, operand: Any) -> int:
+        """
+        Returns the node of a test, creating it (and indexing it under its field) if it is new.
+        """
+        if operator not in OPERATORS:
+            raise TriggerError(f"Trigger of '{playbook_id}' uses unknown operator '{operator}' on '{field}'.")
+        path = tuple(field.split('.'))
+        if operator in ('in', 'not_in'):
+            if not isinstance(operand, (list, tuple, set, frozenset)) or not all(map(_hashable, operand)):
+                raise TriggerError(f"Trigger of '{playbook_id}': '{operator}' on '{field}' needs a list of values.")
+            operand = frozenset(operand)
+        elif operator in RANGE_OPERATORS:
+            if isinstance(operand, bool) or not isinstance(operand, (int, float)):
+                raise TriggerError(f"Trigger of '{playbook_id}': '{operator}' on '{field}' needs a number.")
+        elif operator == 'exists':
+            operand = bool(operand)
+        elif operator == 'matches':
+            try:
+                operand = re.compile(operand)
+            except (re.error, TypeError) as exc:
+                raise TriggerError(f"Trigger of '{playbook_id}': invalid pattern on '{field}': {exc}") from None
+        elif not _hashable(operand):
+            raise TriggerError(f"Trigger of '{playbook_id}': '{operator}' on '{field}' needs a scalar value.")
+
+        key = (path, operator, operand.pattern if operator == 'matches' else operand)
+        node = self._nodes.get(key)
+        if node is not None:
+            return node
+        node = len(self._node_rules)
+        self._nodes[key] = node
+        self._node_rules.append([])
+        index = self._fields.get(path)
+        if index is None:
+            index = self._fields[path] = _FieldIndex(path)
+        if operator == 'eq':
+            index.equals.setdefault(operand, []).append(node)
+        elif operator == 'in':
+            for value in operand:
+                index.equals.setdefault(value, []).append(node)
+        elif operator == 'contains':
+            index.contains.setdefault(operand, []).append(node)
+        elif operator in RANGE_OPERATORS:
+            index.ranges.setdefault(operator, ([], []))
+            index.ranges[operator][0].append(operand)
+            index.ranges[operator][1].append(node)
+        else:
+            index.others.append((node, operator, operand))
+        return node
+
+    def _finish_ranges(self) -> None:
+        """
+        Sorts the comparison thresholds of every field; gt/gte ascending are satisfied by a prefix,
+        lt/lte by a suffix.
+        """
+        for index in self._fields.values():
+            for operator, (thresholds, nodes) in list(index.ranges.items()):
+                ordered = sorted(zip(thresholds, nodes))
+                index.ranges[operator] = ([threshold for threshold, _ in ordered], [node for _, node in ordered])
+
+    def match(self, incident: Mapping) -> List[TriggerMatch]:
+        """
+        Returns the playbooks whose triggers match an incident, highest priority first; a playbook
+        appears once, with its first matching rule.
+        """
+        satisfied: List[int] = []
+        for path, index in self._fields.items():
+            index.satisfied(_resolve(incident, path), satisfied)
+
+        counts: Dict[int, int] = {}
+        candidates = list(self._unconditional)
+        node_rules, rules = self._node_rules, self._rules
+        for node in satisfied:
+            for rule in node_rules[node]:
+                count = counts.get(rule, 0) + 1
+                counts[rule] = count
+                if count == rules[rule].size:
+                    candidates.append(rule)
+
+        matches: Dict[str, TriggerMatch] = {}
+        names = None
+        for rule_index in sorted(candidates):
+            rule = rules[rule_index]
+            if rule.playbook_id in matches:
+                continue
+            if rule.expression is not None:
+                names = names or {'incident': incident}
+                try:
+                    if not rule.expression.evaluate(names):
+                        continue
+                except ExpressionError:
+                    continue
+            matches[rule.playbook_id] = TriggerMatch(rule.playbook_id, rule.priority, rule.id)
+        return sorted(matches.values(), key=lambda match: (-match.priority, match.playbook_id))
+
+
+_network: Optional[TriggerNetwork] = None
+_network_source: Any = None
+_network_lock = threading.Lock()
+
+
+def get_trigger_network(triggers: Sequence[Mapping] = ()) -> TriggerNetwork:
+    """
+    Returns the process-wide trigger network, recompiling it when it is given a different triggers
+    object (e.g. after the configuration was reloaded).
+    """
+    global _network, _network_source
+    with _network_lock:
+        if _network is None or triggers is not _network_source:
+            _network = TriggerNetwork(triggers)
+            _network_source = triggers
+        return _network
@@ -0,0 +1,307 @@
+"""
+Content-addressed version store of playbooks.
+
+Every saved version of a playbook (its name and steps) is stored once, as a blob addressed by the
+SHA-256 of its canonical JSON, so identical versions, e.g. an auto-update that changes nothing, cost
+nothing. A version is delta-compressed against its parent by compressing it with zlib using the
+parent's content as preset dictionary: the unchanged steps become back-references into the parent,
+so a small edit to a large playbook costs a few hundred bytes rather than a full copy. To bound the
+work needed to read a version, every `keyframe_interval`-th version in a chain is stored compressed
+on its own.
+
+Any version is looked up directly by its hash (a primary-key lookup plus at most
+`keyframe_interval` decompressions, with decoded versions kept in an LRU cache). Diffs between
+versions compare steps by step number.
+
+Requirements Addressed:
+- Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+  - TR-DPG-004-5: Ensure version control and audit logging for all playbook modifications.
+"""
+
+import hashlib  # Content addresses of versions. (builtin)
+import json  # Canonical serialization of versions. (builtin)
+import os  # Creates the store directory. (builtin)
+import sqlite3  # Local durable storage. (builtin)
+import threading  # Serializes access to the shared connection. (builtin)
+import time  # Timestamps versions. (builtin)
+import zlib  # Delta compression against the parent version. (builtin)
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+# Default number of versions in a delta chain before a version is stored on its own.
+DEFAULT_KEYFRAME_INTERVAL = 32
+
+# Default number of decoded versions kept in memory.
+DEFAULT_VERSION_CACHE_SIZE = 512
+
+# zlib only uses the last 32 KiB of a preset dictionary.
+_MAX_ZDICT_BYTES = 32 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    base TEXT,
+    depth INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    playbook_id TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    parent TEXT,
+    author TEXT,
+    message TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_versions_playbook ON versions (playbook_id, seq);
+"""
+
+
+class VersionNotFoundError(KeyError):
+    """
+    Raised when a version hash is not in the store.
+    """
+
+
+def _canonical(content: dict) -> bytes:
+    return json.dumps(content, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def version_hash(content: dict) -> str:
+    """
+    Returns the content address of a playbook version.
+    """
+    return hashlib.sha256(_canonical(content)).hexdigest()
+
+
+def _compress(data: bytes, base: Optional[bytes]) -> bytes:
+    if base is None:
+        return zlib.compress(data, 9)
+    compressor = zlib.compressobj(9, zdict=base[-_MAX_ZDICT_BYTES:])
+    return compressor.compress(data) + compressor.flush()
+
+
+def _decompress(data: bytes, base: Optional[bytes]) -> bytes:
+    if base is None:
+        return zlib.decompress(data)
+    decompressor = zlib.decompressobj(zdict=base[-_MAX_ZDICT_BYTES:])
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+def _steps_by_number(steps: list) -> 'OrderedDict[Any, Any]':
+    keyed = OrderedDict()
+    for index, step in enumerate(steps or []):
+        number = step.get('step_number', index + 1) if isinstance(step, dict) else index + 1
+        keyed[json.dumps(number, sort_keys=True, default=str)] = (number, step)
+    return keyed
+
+
+def diff_versions(old: dict, new: dict) -> dict:
+    """
+    Returns the differences between two playbook versions.
+
+    Steps are matched by step number: the result lists added and removed steps, and for each changed
+    step the fields whose values differ. Other top-level fields are compared as a whole.
+    """
+    old_steps = _steps_by_number(old.get('steps'))
+    new_steps = _steps_by_number(new.get('steps'))
+
+    added = [step for key, (_, step) in new_steps.items() if key not in old_steps]
+    removed = [step for key, (_, step) in old_steps.items() if key not in new_steps]
+    changed = []
+    for key, (number, step) in new_steps.items():
+        if key not in old_steps or old_steps[key][1] == step:
+            continue
+        before = old_steps[key][1] if isinstance(old_steps[key][1], dict) else {'action': old_steps[key][1]}
+        after = step if isinstance(step, dict) else {'action': step}
+        fields = {name: {'old': before.get(name), 'new': after.get(name)}
+                  for name in sorted(set(before) | set(after)) if before.get(name) != after.get(name)}
+        changed.append({'step_number': number, 'changes': fields})
+
+    fields = {name: {'old': old.get(name), 'new': new.get(name)}
+              for name in sorted((set(old) | set(new)) - {'steps'}) if old.get(name) != new.get(name)}
+    return {'fields': fields, 'added_steps': added, 'removed_steps': removed, 'changed_steps': changed}
+
+
+class PlaybookVersionStore:
+    """
+    SQLite store of playbook versions, content-addressed and delta-compressed.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+      - TR-DPG-004-5: Ensure version control and audit logging for all playbook modifications.
+    """
+
+    def __init__(self, path: str, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+                 cache_size: int = DEFAULT_VERSION_CACHE_SIZE):
+        """
+        Opens (and creates if needed) the store.
+
+        Parameters:
+            path (str): Path of the SQLite file, or ':memory:' for a store that does not survive the
+                process (tests).
+            keyframe_interval (int): Maximum length of a delta chain.
+            cache_size (int): Number of decoded versions kept in memory.
+        """
+        self.path = path
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self.cache_size = max(1, int(cache_size))
+        directory = os.path.dirname(path)
+        if directory and path != ':memory:':
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._cache: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(_SCHEMA)
+
+    def _cache_put(self, key: str, data: bytes) -> None:
+        self._cache[key] = data
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _load(self, key: str) -> bytes:
+        """
+        Returns the canonical bytes of a version, decoding its delta chain. Called with the lock held.
+        """
+        data = self._cache.get(key)
+        if data is not None:
+            self._cache.move_to_end(key)
+            return data
+        row = self._connection.execute('SELECT base, data FROM blobs WHERE hash = ?', (key,)).fetchone()
+        if row is None:
+            raise VersionNotFoundError(key)
+        base, blob = row
+        data = _decompress(blob, self._load(base) if base else None)
+        self._cache_put(key, data)
+        return data
+
+    def put(self, playbook_id: Any, content: dict, parent: Optional[str] = None,
+            author: Optional[str] = None, message: Optional[str] = None) -> str:
+        """
+        Records a version of a playbook.
+
+        Parameters:
+            playbook_id: The playbook the version belongs to.
+            content (dict): The version, e.g. {'name': ..., 'steps': [...]}.
+            parent (str, optional): Hash of the version it was derived from; defaults to the
+                playbook's latest version.
+            author (str, optional): Who made the change, for the audit log.
+            message (str, optional): Why the change was made, for the audit log.
+
+        Returns:
+            str: The content address of the version. Nothing is recorded if it is the playbook's
+            latest version already.
+
+        Raises:
+            VersionNotFoundError: If the parent is not in the store.
+        """
+        data = _canonical(content)
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            latest = self.latest(playbook_id)
+            if latest == key:
+                # Unchanged since the latest version, e.g. an auto-update with nothing to apply.
+                return key
+            if parent is None:
+                parent = latest
+            exists = self._connection.execute('SELECT 1 FROM blobs WHERE hash = ?', (key,)).fetchone()
+            if not exists:
+                base, depth, blob = None, 0, None
+                if parent is not None and parent != key:
+                    parent_depth = self._connection.execute(
+                        'SELECT depth FROM blobs WHERE hash = ?', (parent,)).fetchone()
+                    if parent_depth is None:
+                        raise VersionNotFoundError(parent)
+                    if parent_depth[0] + 1 < self.keyframe_interval:
+                        base, depth = parent, parent_depth[0] + 1
+                        blob = _compress(data, self._load(parent))
+                full = _compress(data, None)
+                if blob is None or len(blob) >= len(full):
+                    base, depth, blob = None, 0, full
+                self._connection.execute(
+                    'INSERT INTO blobs (hash, base, depth, size, data) VALUES (?, ?, ?, ?, ?)',
+                    (key, base, depth, len(data), blob))
+                self._cache_put(key, data)
+            self._connection.execute(
+                'INSERT INTO versions (playbook_id, hash, parent, author, message, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (str(playbook_id), key, parent, author, message, time.time()))
+        return key
+
+    def get(self, key: str) -> dict:
+        """
+        Returns the version with the given hash.
+
+        Raises:
+            VersionNotFoundError: If the version is not in the store.
+        """
+        with self._lock:
+            return json.loads(self._load(key).decode('utf-8'))
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._cache or self._connection.execute(
+                'SELECT 1 FROM blobs WHERE hash = ?', (key,)).fetchone() is not None
+
+    def latest(self, playbook_id: Any) -> Optional[str]:
+        """
+        Returns the hash of the latest version of a playbook, or None.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT hash FROM versions WHERE playbook_id = ? ORDER BY seq DESC LIMIT 1',
+                (str(playbook_id),)).fetchone()
+        return row[0] if row else None
+
+    def history(self, playbook_id: Any, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Returns the versions of a playbook, newest first, with their audit information.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT hash, parent, author, message, created_at FROM versions '
+                'WHERE playbook_id = ? ORDER BY seq DESC LIMIT ?',
+                (str(playbook_id), -1 if limit is None else int(limit))).fetchall()
+        return [{'hash': key, 'parent': parent, 'author': author, 'message': message, 'created_at': created_at}
+                for key, parent, author, message, created_at in rows]
+
+    def diff(self, old: str, new: str) -> dict:
+        """
+        Returns the differences between two versions (see diff_versions).
+
+        Raises:
+            VersionNotFoundError: If either version is not in the store.
+        """
+        return diff_versions(self.get(old), self.get(new))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the number of distinct versions and their raw and stored sizes in bytes, for monitoring.
+        """
+        with self._lock:
+            count, raw, stored = self._connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs').fetchone()
+        return {'versions': count, 'raw_bytes': raw, 'stored_bytes': stored}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+_store: Optional[PlaybookVersionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_version_store(path: str, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL) -> PlaybookVersionStore:
+    """
+    Returns the process-wide version store, opening it at the given path on first use.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PlaybookVersionStore(path, keyframe_interval)
+        return _store
@@ -0,0 +1,459 @@
+"""
+Streaming import and export of XSOAR playbooks, with incremental sync.
+
+XSOAR playbooks are YAML documents whose `tasks` form a graph through `nexttasks`. On import every
+regular, condition and sub-playbook task becomes a step (`step_number` is the task id) depending on
+the tasks leading to it; start and section-title tasks are only structure and are removed, their
+edges passing through. The XSOAR semantics of branches is kept with step conditions: a task after
+the branch 'yes' of condition task 3 gets `3 in results and results[3] == 'yes'`, and a task after a
+task that may be skipped only runs if that task succeeded. The task's name, type, script and other
+presentation fields are kept under the step's `xsoar` key, so exported playbooks round-trip.
+
+Bundles (several `---`-separated documents) are read and written one document at a time, so their
+size is not limited by memory. Incremental sync hashes each raw document before parsing it, and
+only parses and converts the documents whose hash changed since the previous sync, so re-syncing a
+library of thousands of playbooks mostly costs reading and hashing it.
+
+Requirements Addressed:
+- Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+  - TR-DPG-004-1: Develop AI algorithms for generating standardized playbooks compatible with XSOAR.
+"""
+
+import ast  # Reads branch labels back from step conditions. (builtin)
+import hashlib  # Content hashes of raw documents. (builtin)
+import os  # Creates the sync state directory. (builtin)
+import re  # Recognizes branch conditions on export. (builtin)
+import sqlite3  # Incremental sync state. (builtin)
+import threading  # Serializes access to the shared connection. (builtin)
+import time  # Sync timestamps. (builtin)
+import uuid  # Task ids of exported playbooks. (builtin)
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import yaml  # PyYAML version 5.4.1
+
+# The libyaml-based loader and dumper are several times faster; the pure Python ones are used
+# when PyYAML was built without libyaml.
+_Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_Dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# Task types that only structure the graph and do not become steps.
+_STRUCTURAL_TASK_TYPES = ('start', 'title')
+
+# Branch labels with a special meaning in XSOAR.
+LABEL_NONE = '#none#'
+LABEL_DEFAULT = '#default#'
+
+# Action of imported condition tasks without a script; its handler must return the branch label.
+CONDITION_ACTION = 'xsoar_condition'
+
+# Action of imported sub-playbook tasks.
+SUBPLAYBOOK_ACTION = 'xsoar_playbook'
+
+_LABEL_LITERAL = r"'(?:[^'\\]|\\.)*'"
+_BRANCH_PATTERN = re.compile(r"results\[(?P<step>-?\d+)\] (?P<op>==|not in) "
+                             rf"(?P<value>{_LABEL_LITERAL}|\[(?:{_LABEL_LITERAL}|[^\]'])*\])")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS xsoar_sync (
+    xsoar_id TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    playbook_id TEXT,
+    synced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_xsoar_sync_hash ON xsoar_sync (content_hash);
+"""
+
+
+class XsoarConversionError(ValueError):
+    """
+    Raised when a document is not a valid XSOAR playbook.
+    """
+
+
+def iter_documents(stream: TextIO) -> Iterator[str]:
+    """
+    Yields the raw text of each YAML document of a stream, reading it line by line.
+    """
+    lines: List[str] = []
+    for line in stream:
+        marker = line.rstrip()
+        if marker in ('---', '...') or line.startswith('--- '):
+            if any(text.strip() and not text.lstrip().startswith('#') for text in lines):
+                yield ''.join(lines)
+            # Content after the '---' marker belongs to the new document; YAML accepts the marker.
+            lines = [line] if line.startswith('--- ') and line[4:].strip() else []
+            continue
+        lines.append(line)
+    if any(text.strip() and not text.lstrip().startswith('#') for text in lines):
+        yield ''.join(lines)
+
+
+def load_bundle(stream: TextIO) -> Iterator[dict]:
+    """
+    Parses the XSOAR playbooks of a YAML stream one document at a time.
+    """
+    for document in iter_documents(stream):
+        yield yaml.load(document, Loader=_Loader)
+
+
+def iter_bundle(playbooks: Iterable[dict]) -> Iterator[str]:
+    """
+    Yields the YAML text of each XSOAR playbook of a bundle, one document at a time.
+    """
+    for playbook in playbooks:
+        yield '---\n' + yaml.dump(playbook, Dumper=_Dumper, sort_keys=False, allow_unicode=True,
+                                  default_flow_style=False)
+
+
+def dump_bundle(playbooks: Iterable[dict], out: TextIO) -> int:
+    """
+    Writes XSOAR playbooks to a stream as a multi-document YAML bundle; returns how many were written.
+    """
+    count = 0
+    for document in iter_bundle(playbooks):
+        out.write(document)
+        count += 1
+    return count
+
+
+def _task_number(task_id: Any, numbers: Dict[str, Any]) -> Any:
+    key = str(task_id)
+    if key not in numbers:
+        numbers[key] = int(key) if key.isdigit() else key
+    return numbers[key]
+
+
+def _task_action(task: dict) -> str:
+    definition = task.get('task') or {}
+    if task.get('type') == 'playbook':
+        return SUBPLAYBOOK_ACTION
+    script = definition.get('script') or definition.get('scriptName') or ''
+    if '|||' in script:
+        script = script.split('|||', 1)[1]
+    if script:
+        return script
+    if task.get('type') == 'condition':
+        return CONDITION_ACTION
+    return definition.get('name') or 'noop'
+
+
+def _import_arguments(task: dict) -> dict:
+    parameters = {}
+    for name, value in (task.get('scriptarguments') or {}).items():
+        if isinstance(value, dict) and 'simple' in value:
+            parameters[name] = value['simple']
+        elif isinstance(value, dict) and 'complex' in value:
+            parameters[name] = {'complex': value['complex']}
+        else:
+            parameters[name] = value
+    if task.get('type') == 'playbook':
+        parameters.setdefault('playbook', (task.get('task') or {}).get('playbookName'))
+    if task.get('type') == 'condition' and task.get('conditions'):
+        parameters.setdefault('conditions', task['conditions'])
+    return parameters
+
+
+def _quote(value: str) -> str:
+    """
+    Returns a branch label as a single-quoted string literal of the condition syntax.
+    """
+    escaped = str(value).replace('\\', '\\\\').replace("'", "\\'").replace('\n', '\\n').replace('\r', '\\r')
+    return f"'{escaped}'"
+
+
+def from_xsoar(document: dict) -> dict:
+    """
+    Converts an XSOAR playbook into the engine's playbook format.
+
+    Returns:
+        dict: {'name', 'description', 'xsoar_id', 'steps'}.
+
+    Raises:
+        XsoarConversionError: If the document is not an XSOAR playbook.
+    """
+    if not isinstance(document, dict) or not isinstance(document.get('tasks'), dict):
+        raise XsoarConversionError('XSOAR playbook must be a mapping with a tasks mapping.')
+    tasks = {str(task_id): task or {} for task_id, task in document['tasks'].items()}
+    numbers: Dict[str, Any] = {}
+
+    incoming: Dict[str, List[Tuple[str, str]]] = {task_id: [] for task_id in tasks}
+    for task_id, task in tasks.items():
+        for label, targets in (task.get('nexttasks') or {}).items():
+            for target in targets or ():
+                target = str(target)
+                if target not in tasks:
+                    raise XsoarConversionError(f"Task {task_id} leads to unknown task {target}.")
+                incoming[target].append((task_id, str(label)))
+
+    def is_step(task_id: str) -> bool:
+        return tasks[task_id].get('type', 'regular') not in _STRUCTURAL_TASK_TYPES
+
+    resolved: Dict[str, List[Tuple[str, str]]] = {}
+
+    def step_edges(task_id: str, visiting: frozenset = frozenset()) -> List[Tuple[str, str]]:
+        """
+        Returns the (step task id, label) edges leading to a task, through structural tasks.
+        """
+        if task_id in resolved:
+            return resolved[task_id]
+        if task_id in visiting:
+            raise XsoarConversionError(f'Tasks form a cycle through task {task_id}.')
+        edges = []
+        for source, label in incoming[task_id]:
+            if is_step(source):
+                edges.append((source, label))
+            else:
+                edges.extend(step_edges(source, visiting | {task_id}))
+        resolved[task_id] = edges
+        return edges
+
+    gated = set()
+    steps = []
+    order = sorted((task_id for task_id in tasks if is_step(task_id)),
+                   key=lambda task_id: (not task_id.isdigit(), int(task_id) if task_id.isdigit() else 0, task_id))
+    for task_id in order:
+        task = tasks[task_id]
+        edges = step_edges(task_id)
+        step = {
+            'step_number': _task_number(task_id, numbers),
+            'action': _task_action(task),
+            'parameters': _import_arguments(task),
+            'depends_on': sorted({_task_number(source, numbers) for source, _ in edges}, key=str),
+        }
+        if task.get('continueonerror'):
+            step['on_failure'] = 'continue'
+
+        # A task only runs if a task leading to it succeeded on the branch taken.
+        branch_edges = any(label != LABEL_NONE for _, label in edges)
+        if branch_edges or any(source in gated for source, _ in edges):
+            clauses = []
+            for source, label in edges:
+                number = _task_number(source, numbers)
+                if label == LABEL_NONE:
+                    clauses.append(f'{number} in results')
+                elif label == LABEL_DEFAULT:
+                    others = sorted(other for other in (tasks[source].get('nexttasks') or {})
+                                    if other not in (LABEL_NONE, LABEL_DEFAULT))
+                    clauses.append(f"{number} in results and results[{number}] not in "
+                                   f"[{', '.join(_quote(other) for other in others)}]")
+                else:
+                    clauses.append(f'{number} in results and results[{number}] == {_quote(label)}')
+            step['condition'] = ' or '.join(f'({clause})' if len(clauses) > 1 else clause for clause in clauses)
+            gated.add(task_id)
+
+        definition = task.get('task') or {}
+        step['xsoar'] = {key: value for key, value in (
+            ('taskid', task.get('taskid')), ('type', task.get('type', 'regular')),
+            ('name', definition.get('name')), ('description', definition.get('description')),
+            ('script', definition.get('script')), ('scriptName', definition.get('scriptName')),
+            ('brand', definition.get('brand')), ('iscommand', definition.get('iscommand')),
+            ('playbookName', definition.get('playbookName')), ('view', task.get('view')),
+        ) if value not in (None, '')}
+        steps.append(step)
+
+    return {
+        'name': document.get('name') or str(document.get('id') or 'XSOAR playbook'),
+        'description': document.get('description', ''),
+        'xsoar_id': str(document.get('id') or document.get('name') or ''),
+        'steps': steps,
+    }
+
+
+def _branch_labels(condition: Optional[str]) -> Dict[str, str]:
+    """
+    Returns the branch label of each step a condition written by from_xsoar refers to.
+    """
+    labels = {}
+    for match in _BRANCH_PATTERN.finditer(condition or ''):
+        labels[match.group('step')] = (ast.literal_eval(match.group('value')) if match.group('op') == '=='
+                                       else LABEL_DEFAULT)
+    return labels
+
+
+def to_xsoar(name: str, steps: list, xsoar_id: Optional[str] = None, description: str = '') -> dict:
+    """
+    Converts an engine playbook into an XSOAR playbook.
+
+    Steps become tasks numbered by step number, following a start task; dependencies become
+    `nexttasks`, labelled with the branch when the step's condition tests a condition task's result.
+    """
+    normalized = []
+    for index, step in enumerate(steps):
+        step = {'action': step} if isinstance(step, str) else dict(step)
+        step.setdefault('step_number', index + 1)
+        normalized.append(step)
+    if not any('depends_on' in step for step in normalized):
+        for previous, step in zip(normalized, normalized[1:]):
+            step['depends_on'] = [previous['step_number']]
+
+    ids = {str(step['step_number']) for step in normalized}
+    start_id = '0'
+    while start_id in ids:
+        start_id = str(int(start_id) - 1)
+
+    tasks: Dict[str, dict] = {start_id: {
+        'id': start_id, 'taskid': str(uuid.uuid5(uuid.NAMESPACE_URL, f'{xsoar_id or name}/start')),
+        'type': 'start', 'task': {'id': start_id, 'version': -1, 'name': '', 'iscommand': False, 'brand': ''},
+        'nexttasks': {}, 'separatecontext': False,
+    }}
+    for step in normalized:
+        task_id = str(step['step_number'])
+        meta = step.get('xsoar') or {}
+        action = step['action']
+        task_type = meta.get('type') or ('playbook' if action == SUBPLAYBOOK_ACTION else 'regular')
+        definition = {'id': task_id, 'version': -1, 'name': meta.get('name') or action}
+        for key in ('description', 'playbookName'):
+            if meta.get(key):
+                definition[key] = meta[key]
+        if task_type == 'playbook':
+            definition.setdefault('playbookName', (step.get('parameters') or {}).get('playbook'))
+        elif action != CONDITION_ACTION:
+            if meta.get('scriptName'):
+                definition['scriptName'] = meta['scriptName']
+            else:
+                definition['script'] = meta.get('script') or f'|||{action}'
+        definition['iscommand'] = bool(meta.get('iscommand', 'scriptName' not in definition and task_type == 'regular'))
+        definition['brand'] = meta.get('brand', '')
+
+        arguments = {}
+        for key, value in (step.get('parameters') or {}).items():
+            if task_type == 'playbook' and key == 'playbook' or task_type == 'condition' and key == 'conditions':
+                continue
+            if isinstance(value, dict) and set(value) == {'complex'}:
+                arguments[key] = {'complex': value['complex']}
+            else:
+                arguments[key] = {'simple': value}
+
+        task = {
+            'id': task_id,
+            'taskid': meta.get('taskid') or str(uuid.uuid5(uuid.NAMESPACE_URL, f'{xsoar_id or name}/{task_id}')),
+            'type': task_type,
+            'task': definition,
+            'nexttasks': {},
+            'scriptarguments': arguments,
+            'separatecontext': task_type == 'playbook',
+            'continueonerror': step.get('on_failure') == 'continue',
+        }
+        if task_type == 'condition' and (step.get('parameters') or {}).get('conditions'):
+            task['conditions'] = step['parameters']['conditions']
+        if meta.get('view'):
+            task['view'] = meta['view']
+        tasks[task_id] = task
+
+    for step in normalized:
+        task_id = str(step['step_number'])
+        labels = _branch_labels(step.get('condition'))
+        dependencies = step.get('depends_on') or []
+        sources = [str(dependency) for dependency in dependencies] or [start_id]
+        for source in sources:
+            label = labels.get(source, LABEL_NONE)
+            tasks[source]['nexttasks'].setdefault(label, []).append(task_id)
+    for task in tasks.values():
+        if not task['nexttasks']:
+            del task['nexttasks']
+
+    return {
+        'id': xsoar_id or name,
+        'version': -1,
+        'name': name,
+        'description': description or '',
+        'starttaskid': start_id,
+        'tasks': tasks,
+        'inputs': [],
+        'outputs': [],
+    }
+
+
+class XsoarSync:
+    """
+    Incremental import of XSOAR bundles: only documents whose content changed are converted.
+
+    Requirements Addressed:
+    - Dynamic Playbook Generation (Technical Specification/4.4 Dynamic Playbook Generation)
+      - TR-DPG-004-1: Develop AI algorithms for generating standardized playbooks compatible with XSOAR.
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens (and creates if needed) the sync state database.
+
+        Parameters:
+            path (str): Path of the SQLite file, or ':memory:' (tests).
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and path != ':memory:':
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(_SCHEMA)
+
+    def _known_hashes(self) -> Dict[str, Tuple[str, Optional[str]]]:
+        with self._lock:
+            rows = self._connection.execute('SELECT content_hash, xsoar_id, playbook_id FROM xsoar_sync').fetchall()
+        return {content_hash: (xsoar_id, playbook_id) for content_hash, xsoar_id, playbook_id in rows}
+
+    def playbook_id(self, xsoar_id: str) -> Optional[str]:
+        """
+        Returns the engine playbook an XSOAR playbook was imported as, or None.
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT playbook_id FROM xsoar_sync WHERE xsoar_id = ?',
+                                           (xsoar_id,)).fetchone()
+        return row[0] if row else None
+
+    def sync(self, stream: TextIO, apply: Callable[[dict, Optional[str]], Any]) -> Dict[str, Any]:
+        """
+        Imports the playbooks of a bundle that changed since the previous sync.
+
+        Parameters:
+            stream (TextIO): The YAML bundle.
+            apply (callable): Stores a converted playbook: apply(converted, playbook_id) receives the
+                playbook it was previously imported as (or None) and returns its playbook id.
+
+        Returns:
+            dict: Counts of 'unchanged', 'imported' and 'failed' documents, and the 'errors'.
+        """
+        known = self._known_hashes()
+        stats: Dict[str, Any] = {'unchanged': 0, 'imported': 0, 'failed': 0, 'errors': []}
+        for document in iter_documents(stream):
+            content_hash = hashlib.sha256(document.encode('utf-8')).hexdigest()
+            if content_hash in known:
+                stats['unchanged'] += 1
+                continue
+            try:
+                converted = from_xsoar(yaml.load(document, Loader=_Loader))
+                playbook_id = apply(converted, self.playbook_id(converted['xsoar_id']))
+            except (yaml.YAMLError, ValueError) as exc:
+                stats['failed'] += 1
+                stats['errors'].append(str(exc))
+                continue
+            with self._lock:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO xsoar_sync (xsoar_id, content_hash, playbook_id, synced_at) '
+                    'VALUES (?, ?, ?, ?)',
+                    (converted['xsoar_id'], content_hash, None if playbook_id is None else str(playbook_id),
+                     time.time()))
+            known[content_hash] = (converted['xsoar_id'], playbook_id)
+            stats['imported'] += 1
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+_sync: Optional[XsoarSync] = None
+_sync_lock = threading.Lock()
+
+
+def get_xsoar_sync(path: str) -> XsoarSync:
+    """
+    Returns the process-wide XSOAR sync state, opening it at the given path on first use.
+    """
+    global _sync
+    with _sync_lock:
+        if _sync is None:
+            _sync = XsoarSync(path)
+        return _sync
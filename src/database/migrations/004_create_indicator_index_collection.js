@@ -0,0 +1,105 @@
+// Migration script to create the indicator_index collection in the MongoDB database.
+// The collection is the reverse index from indicators of compromise (IPs, domains, URLs, hashes,
+// e-mail addresses) to the incidents that mention them, maintained by the incident management service.
+
+// Requirements Addressed:
+// - Incident Data Management (Technical Specification/4.5 Comprehensive Case Management)
+//   - TR-CM-005-3: Provide search and retrieval capabilities for historical incident data.
+
+// External Dependencies
+const { MongoClient } = require('mongodb'); // MongoDB client for connecting to the database and executing the migration. Version: 3.6.3
+
+// Internal Dependencies
+const { initializeDatabase } = require('../mongo_init'); // Provides initialization logic for setting up the MongoDB connection.
+
+/**
+ * Executes the migration to create the indicator_index collection and its indexes.
+ *
+ * @param {MongoClient} db - MongoDB database connection instance.
+ * @returns {Promise<void>} - Resolves when the collection and indexes are created.
+ *
+ * Steps:
+ * 1. Connect to the MongoDB database using the initializeDatabase function.
+ * 2. Create the indicator_index collection if it does not exist.
+ * 3. Create the unique (value, type) index used by pivots, bulk lookups and incremental upserts.
+ * 4. Create the last_seen index used to list recently active indicators.
+ *
+ * Requirements Addressed:
+ * - TR-CM-005-3: Provide search and retrieval capabilities for historical incident data.
+ *   - Location: Technical Specification/4.5 Comprehensive Case Management
+ */
+async function up(db) {
+  // Step 1: Connect to the MongoDB database using the initializeDatabase function.
+  if (!db) {
+    db = await initializeDatabase(); // Initialize the database connection.
+  }
+
+  const collectionName = 'indicator_index';
+
+  try {
+    // Step 2: Create the indicator_index collection if it does not exist.
+    const collections = await db.listCollections({ name: collectionName }).toArray();
+    if (collections.length === 0) {
+      await db.createCollection(collectionName);
+      console.log(`Created collection '${collectionName}'.`);
+    } else {
+      console.log(`Collection '${collectionName}' already exists. Ensuring indexes.`);
+    }
+
+    const indicatorIndexCollection = db.collection(collectionName);
+
+    // Step 3: Unique index on (value, type). Lookups query by value alone and use its prefix;
+    // uniqueness guarantees one entry per indicator for the incremental upserts.
+    await indicatorIndexCollection.createIndex(
+      { value: 1, type: 1 },
+      {
+        name: 'idx_value_type',
+        unique: true
+      }
+    );
+
+    // Step 4: Index on 'last_seen' for listing recently active indicators.
+    await indicatorIndexCollection.createIndex(
+      { last_seen: -1 },
+      { name: 'idx_last_seen' }
+    );
+
+    console.log(`Indexes created for collection '${collectionName}'.`);
+  } catch (error) {
+    // Handle any errors that occurred during the migration.
+    console.error(`An error occurred while creating the '${collectionName}' collection: `, error);
+    throw error;
+  }
+}
+
+/**
+ * Reverts the migration by dropping the indicator_index collection.
+ *
+ * @param {MongoClient} db - MongoDB database connection instance.
+ * @returns {Promise<void>} - Resolves when the collection is dropped.
+ */
+async function down(db) {
+  if (!db) {
+    db = await initializeDatabase();
+  }
+
+  const collectionName = 'indicator_index';
+
+  try {
+    const collections = await db.listCollections({ name: collectionName }).toArray();
+    if (collections.length > 0) {
+      await db.collection(collectionName).drop();
+      console.log(`Migration down: Dropped collection '${collectionName}'.`);
+    } else {
+      console.warn(`Migration down: Collection '${collectionName}' does not exist.`);
+    }
+  } catch (error) {
+    console.error('Migration down: Error dropping indicator_index collection:', error);
+    throw error;
+  }
+}
+
+module.exports = {
+  up,
+  down
+};